@@ -6,7 +6,15 @@ __version__ = "2.0.0"
 __author__ = "Voice Notes Team"
 __description__ = "Aplikacja do nagrywania głosu i transkrypcji za pomocą OpenAI Whisper"
 
-from .voice_notes_app import VoiceNotesApp
-from .config import Config
+__all__ = ['VoiceNotesApp', 'Config']
 
-__all__ = ['VoiceNotesApp', 'Config']
\ No newline at end of file
+
+def __getattr__(name):
+    """Leniwy import eksportów - ciężkie zależności ładują się przy pierwszym użyciu"""
+    if name == 'VoiceNotesApp':
+        from .voice_notes_app import VoiceNotesApp
+        return VoiceNotesApp
+    if name == 'Config':
+        from .config import Config
+        return Config
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,337 @@
+"""
+Moduł kodowania audio w trakcie nagrywania - plik do wysyłki jest gotowy w chwili zatrzymania
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+import wave
+from typing import Optional, Tuple
+from config import Config, load_environment
+
+
+class _Resampler:
+    """
+    Strumieniowa zmiana częstotliwości próbkowania (mono, float32)
+
+    Filtr dolnoprzepustowy (okienkowany sinc) usuwa pasmo powyżej nowej
+    częstotliwości Nyquista, a próbki wyjściowe są interpolowane liniowo.
+    Stan (historia filtra i pozycja ułamkowa) przechodzi między blokami,
+    więc wynik nie zależy od podziału nagrania na bloki.
+    """
+
+    def __init__(self, in_rate: int, out_rate: int, taps: int = 63):
+        import numpy as np
+        self._np = np
+        self.step = in_rate / out_rate
+        self._pos = 0.0
+        self._tail = np.zeros(0, dtype=np.float32)
+
+        if out_rate < in_rate:
+            cutoff = 0.45 * out_rate / in_rate  # odcięcie z zapasem poniżej Nyquista (względem in_rate)
+            n = np.arange(taps) - (taps - 1) / 2
+            kernel = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hamming(taps)
+            self._kernel = (kernel / kernel.sum()).astype(np.float32)
+        else:
+            self._kernel = np.ones(1, dtype=np.float32)
+        self._history = np.zeros(len(self._kernel) - 1, dtype=np.float32)
+
+    def process(self, samples):
+        """Przetwarza kolejny blok próbek i zwraca gotowe próbki wyjściowe"""
+        np = self._np
+        if len(self._kernel) > 1:
+            padded = np.concatenate((self._history, samples))
+            filtered = np.convolve(padded, self._kernel, mode='valid')
+            self._history = padded[len(padded) - len(self._history):]
+        else:
+            filtered = samples
+
+        buffer = np.concatenate((self._tail, filtered))
+        positions = np.arange(self._pos, len(buffer) - 1, self.step)
+        index = positions.astype(np.int64)
+        fraction = (positions - index).astype(np.float32)
+        output = buffer[index] * (1 - fraction) + buffer[index + 1] * fraction
+
+        next_pos = self._pos + len(positions) * self.step
+        consumed = int(next_pos)
+        self._tail = buffer[consumed:]
+        self._pos = next_pos - consumed
+        return output
+
+    def flush(self):
+        """Wypycha próbki zatrzymane w opóźnieniu filtra"""
+        return self.process(self._np.zeros(len(self._kernel) // 2, dtype=self._np.float32))
+
+
+class IncrementalEncoder:
+    """
+    Koder dopisujący bloki z mikrofonu do pliku na bieżąco.
+
+    Każdy blok jest od razu miksowany do mono, przepróbkowany do
+    częstotliwości oczekiwanej przez Whisper (domyślnie 16 kHz) i zapisany
+    jako WAV lub - jeśli dostępny jest pakiet `soundfile` - FLAC. Po
+    zatrzymaniu nagrywania wystarczy domknąć plik.
+    """
+
+    def __init__(self, input_rate: int, channels: int = 1, sample_width: int = 2,
+                 target_rate: Optional[int] = None, audio_format: Optional[str] = None):
+        """
+        Inicjalizuje koder i tworzy plik tymczasowy
+
+        Args:
+            input_rate: Częstotliwość próbkowania nagrania
+            channels: Liczba kanałów nagrania
+            sample_width: Rozmiar próbki w bajtach (obsługiwane 16-bitowe PCM)
+            target_rate: Częstotliwość próbkowania pliku (domyślnie z config)
+            audio_format: 'wav' lub 'flac' (domyślnie z config)
+        """
+        import numpy as np
+        if sample_width != 2:
+            raise ValueError("Koder obsługuje tylko 16-bitowe próbki PCM")
+        self._np = np
+        self.channels = channels
+        self.target_rate = target_rate or Config.AUDIO_ENCODER_RATE
+        self.format = (audio_format or Config.AUDIO_ENCODER_FORMAT).lower()
+        self._resampler = _Resampler(input_rate, self.target_rate) if input_rate != self.target_rate else None
+
+        self._soundfile = None
+        if self.format == 'flac':
+            try:
+                import soundfile
+                self._soundfile = soundfile
+            except ImportError:
+                print("⚠️ Brak pakietu soundfile - nagranie zostanie zapisane jako WAV")
+                self.format = 'wav'
+
+        temp_file = tempfile.NamedTemporaryFile(suffix=f".{self.format}", delete=False)
+        temp_file.close()
+        self.path = temp_file.name
+
+        if self._soundfile:
+            self._writer = self._soundfile.SoundFile(
+                self.path, 'w', samplerate=self.target_rate, channels=1, format='FLAC', subtype='PCM_16'
+            )
+        else:
+            self._writer = wave.open(self.path, 'wb')
+            self._writer.setnchannels(1)
+            self._writer.setsampwidth(2)
+            self._writer.setframerate(self.target_rate)
+
+        self.samples_written = 0
+        self.encode_time = 0.0  # łączny czas kodowania bloków w trakcie nagrywania
+        self.finish_time: Optional[float] = None  # czas domknięcia pliku po zatrzymaniu
+        self._closed = False
+
+    @property
+    def duration(self) -> float:
+        """Długość zakodowanego nagrania w sekundach"""
+        return self.samples_written / self.target_rate
+
+    def write(self, data: bytes):
+        """
+        Koduje kolejny blok z mikrofonu
+
+        Args:
+            data: Surowe próbki PCM 16-bit (przeplecione kanały)
+        """
+        started = time.perf_counter()
+        np = self._np
+        samples = np.frombuffer(data, dtype='<i2').astype(np.float32)
+        if self.channels > 1:
+            samples = samples[:len(samples) - len(samples) % self.channels]
+            samples = samples.reshape(-1, self.channels).mean(axis=1)
+        if self._resampler:
+            samples = self._resampler.process(samples)
+        self._write_samples(samples)
+        self.encode_time += time.perf_counter() - started
+
+    def finish(self) -> str:
+        """
+        Domyka plik (po zatrzymaniu nagrywania)
+
+        Returns:
+            str: Ścieżka do gotowego pliku
+        """
+        started = time.perf_counter()
+        if not self._closed:
+            if self._resampler:
+                self._write_samples(self._resampler.flush())
+            self._writer.close()
+            self._closed = True
+        self.finish_time = time.perf_counter() - started
+        return self.path
+
+    def abort(self):
+        """Przerywa kodowanie i usuwa plik"""
+        if not self._closed:
+            try:
+                self._writer.close()
+            except Exception:
+                pass
+            self._closed = True
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+    def _write_samples(self, samples):
+        """Zapisuje próbki float32 jako 16-bitowe PCM"""
+        np = self._np
+        pcm = np.clip(np.rint(samples), -32768, 32767).astype('<i2')
+        if self._soundfile:
+            self._writer.write(pcm)
+        else:
+            self._writer.writeframes(pcm.tobytes())
+        self.samples_written += len(pcm)
+
+
+class _MockUploadServer:
+    """
+    Lokalny serwer HTTP zapisujący moment nadejścia pierwszego i ostatniego bajtu żądania
+
+    Opcjonalny limit przepustowości odbioru symuluje łącze do serwera API.
+    """
+
+    def __init__(self, bandwidth: Optional[float] = None):
+        import socketserver
+        self.first_byte_at: Optional[float] = None
+        self.last_byte_at: Optional[float] = None
+        self._done = threading.Event()
+        server = self
+
+        class _Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                first = self.request.recv(65536)
+                server.first_byte_at = time.perf_counter()
+                header, _, body = first.partition(b"\r\n\r\n")
+                length = 0
+                for line in header.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":", 1)[1])
+                received = len(body)
+                while received < length:
+                    chunk = self.request.recv(65536)
+                    if not chunk:
+                        break
+                    received += len(chunk)
+                    if bandwidth:
+                        # Nie odbieraj szybciej niż pozwala symulowane łącze
+                        delay = server.first_byte_at + received / bandwidth - time.perf_counter()
+                        if delay > 0:
+                            time.sleep(delay)
+                server.last_byte_at = time.perf_counter()
+                server._done.set()
+                self.wfile.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                                 b"Content-Length: 12\r\nConnection: close\r\n\r\n{\"text\": \"\"}")
+
+        self._server = socketserver.TCPServer(('127.0.0.1', 0), _Handler)
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def upload(self, path: str) -> Tuple[float, float]:
+        """
+        Wysyła plik do serwera
+
+        Returns:
+            Tuple[float, float]: Momenty (perf_counter) nadejścia pierwszego i ostatniego bajtu
+        """
+        import http.client
+        self._done.clear()
+        connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=300)
+        with open(path, 'rb') as body:
+            connection.request('POST', '/v1/audio/transcriptions', body=body,
+                               headers={'Content-Length': str(os.path.getsize(path))})
+        connection.getresponse().read()
+        connection.close()
+        self._done.wait(5)
+        return self.first_byte_at, self.last_byte_at
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def run_upload_benchmark(seconds: float = 30.0, audio_format: Optional[str] = None,
+                         bandwidth: Optional[float] = None) -> dict:
+    """
+    Porównuje czas od zatrzymania nagrania do wysłania pliku
+
+    Dawna ścieżka łączy bloki, zapisuje WAV w częstotliwości nagrania i
+    dopiero wtedy wysyła plik; nowa domyka plik kodowany w trakcie nagrania.
+    Nagranie jest syntetyczne, a wysyłka trafia do lokalnego serwera-atrapy.
+
+    Args:
+        seconds: Długość symulowanego nagrania
+        audio_format: Format kodera ('wav' lub 'flac')
+        bandwidth: Symulowana przepustowość łącza w bajtach/s (None - bez limitu)
+
+    Returns:
+        dict: Dla ścieżek 'encoded' i 'legacy': czas do pierwszego i ostatniego bajtu (ms) oraz rozmiar
+    """
+    import numpy as np
+    rate, chunk = Config.AUDIO_RATE, Config.AUDIO_CHUNK
+    t = np.arange(int(seconds * rate)) / rate
+    signal = (3000 * np.sin(2 * np.pi * 220 * t) + 300 * np.random.randn(len(t))).astype('<i2').tobytes()
+    frames = [signal[i:i + chunk * 2] for i in range(0, len(signal), chunk * 2)]
+
+    def measure(stop: float, path: str) -> dict:
+        first, last = server.upload(path)
+        size = os.path.getsize(path)
+        os.unlink(path)
+        return {'first_byte_ms': (first - stop) * 1000, 'last_byte_ms': (last - stop) * 1000, 'size': size}
+
+    server = _MockUploadServer(bandwidth)
+    try:
+        # Rozgrzewka połączenia, żeby pierwszy pomiar nie płacił za inicjalizację
+        warmup = tempfile.NamedTemporaryFile(suffix=".bin", delete=False)
+        warmup.write(b"\0")
+        warmup.close()
+        server.upload(warmup.name)
+        os.unlink(warmup.name)
+
+        encoder = IncrementalEncoder(rate, audio_format=audio_format)
+        for frame in frames:
+            encoder.write(frame)
+        stop = time.perf_counter()
+        encoded = measure(stop, encoder.finish())
+
+        stop = time.perf_counter()
+        temp_file = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
+        temp_file.close()
+        with wave.open(temp_file.name, 'wb') as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(rate)
+            wf.writeframes(b''.join(frames))
+        legacy = measure(stop, temp_file.name)
+    finally:
+        server.close()
+
+    encoded['format'] = encoder.format
+    encoded['encode_ms_per_second'] = encoder.encode_time * 1000 / seconds
+    return {'encoded': encoded, 'legacy': legacy}
+
+
+def main(argv=None):
+    """Wiersz poleceń pomiaru czasu od zatrzymania do wysyłki"""
+    parser = argparse.ArgumentParser(description="Pomiar kodowania w trakcie nagrywania")
+    parser.add_argument('-s', '--seconds', type=float, default=30.0, help="Długość symulowanego nagrania")
+    parser.add_argument('--format', choices=('wav', 'flac'), help="Format kodera (domyślnie AUDIO_ENCODER_FORMAT)")
+    parser.add_argument('--bandwidth', type=float, default=1024,
+                        help="Symulowana przepustowość wysyłki w KiB/s (0 - bez limitu)")
+    args = parser.parse_args(argv)
+    load_environment()
+
+    result = run_upload_benchmark(args.seconds, args.format, args.bandwidth * 1024 or None)
+    encoded, legacy = result['encoded'], result['legacy']
+    print(f"⏱️ Zatrzymanie → wysyłka ({args.seconds:.0f} s nagrania, łącze {args.bandwidth:.0f} KiB/s):")
+    for label, stats in ((f"kodowanie w trakcie ({encoded['format']} {Config.AUDIO_ENCODER_RATE} Hz)", encoded),
+                         (f"zapis po zatrzymaniu (WAV {Config.AUDIO_RATE} Hz)", legacy)):
+        print(f"   {label}: pierwszy bajt {stats['first_byte_ms']:.1f} ms, "
+              f"całość {stats['last_byte_ms']:.0f} ms, {stats['size'] / 1024:.0f} KiB")
+    print(f"   koszt kodowania w trakcie nagrania: {encoded['encode_ms_per_second']:.2f} ms na sekundę audio")
+
+
+if __name__ == "__main__":
+    main()
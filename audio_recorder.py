@@ -1,31 +1,107 @@
 """
 Moduł do nagrywania dźwięku
 """
-import pyaudio
 import threading
 import wave
 import tempfile
 import os
-from typing import Callable, Optional, List
+import time
+from typing import TYPE_CHECKING, Callable, Optional, List
 from config import Config
+from audio_encoder import IncrementalEncoder
+from audio_source import create_audio_source
+import profiler
+import scheduling
+import tracing
+
+if TYPE_CHECKING:
+    import pyaudio
+
+
+class Endpointer:
+    """Wykrywa koniec wypowiedzi po ciszy trwającej ENDPOINT_SILENCE sekund"""
+
+    # Zdarzenia zwracane przez feed()
+    CONTINUE = 'continue'
+    CLOSE = 'close'    # wypowiedź zakończona - wyślij do transkrypcji
+    RESET = 'reset'    # sama cisza lub krótki trzask - odrzuć nagrany fragment
+
+    def __init__(self, rate: int, channels: int = 1):
+        """
+        Args:
+            rate: Częstotliwość próbkowania w Hz
+            channels: Liczba kanałów (próbki 16-bitowe)
+        """
+        self.rate = rate
+        self.channels = channels
+        self.threshold = Config.ENDPOINT_THRESHOLD
+        self.silence_limit = Config.ENDPOINT_SILENCE
+        self.min_speech = Config.ENDPOINT_MIN_SPEECH
+        self.max_utterance = Config.ENDPOINT_MAX_UTTERANCE
+        self.reset()
+
+    def reset(self):
+        """Zeruje liczniki na początku nowej wypowiedzi"""
+        self.speech_time = 0.0
+        self.silence_time = 0.0
+        self.utterance_time = 0.0
+
+    @property
+    def has_speech(self) -> bool:
+        """Czy bieżący fragment zawiera wystarczająco dużo mowy, by go transkrybować"""
+        return self.speech_time >= self.min_speech
+
+    def feed(self, data: bytes) -> str:
+        """
+        Klasyfikuje blok audio jako mowę lub ciszę
+
+        Args:
+            data: Blok próbek int16
+
+        Returns:
+            str: CONTINUE, CLOSE lub RESET
+        """
+        import numpy as np
+        samples = np.frombuffer(data, dtype=np.int16)
+        duration = len(samples) / (self.rate * self.channels)
+        rms = float(np.sqrt(np.mean(samples.astype(np.float32) ** 2))) / 32768.0 if len(samples) else 0.0
+
+        self.utterance_time += duration
+        if rms >= self.threshold:
+            self.speech_time += duration
+            self.silence_time = 0.0
+        else:
+            self.silence_time += duration
+
+        if self.has_speech and (self.silence_time >= self.silence_limit
+                                or self.utterance_time >= self.max_utterance):
+            return self.CLOSE
+        if not self.has_speech and self.silence_time >= self.silence_limit:
+            return self.RESET
+        return self.CONTINUE
 
 
 class AudioRecorder:
     """Klasa odpowiedzialna za nagrywanie dźwięku"""
     
-    def __init__(self, audio_callback: Optional[Callable[[bytes], None]] = None):
+    def __init__(self, audio_callback: Optional[Callable[[bytes], None]] = None,
+                 utterance_callback: Optional[Callable[[str, float, float], None]] = None,
+                 audio_interface=None):
         """
         Inicjalizuje recorder audio
         
         Args:
             audio_callback: Funkcja wywoływana z danymi audio podczas nagrywania
+            utterance_callback: Funkcja wywoływana (w wątku nagrywania) ze ścieżką pliku,
+                długością i chwilą (perf_counter) zamknięcia wypowiedzi po ciszy (ENDPOINT_ENABLED)
+            audio_interface: Źródło audio zgodne z pyaudio.PyAudio (domyślnie wybrane przez AUDIO_SOURCE)
         """
-        self.audio = pyaudio.PyAudio()
+        self.audio = audio_interface if audio_interface is not None else create_audio_source()
         self.audio_callback = audio_callback
         
         # Konfiguracja audio z config
         self.chunk = Config.AUDIO_CHUNK
-        self.format = getattr(pyaudio, Config.AUDIO_FORMAT)
+        self.format = getattr(self.audio, Config.AUDIO_FORMAT)
         self.channels = Config.AUDIO_CHANNELS
         self.rate = Config.AUDIO_RATE
         
@@ -33,7 +109,17 @@ class AudioRecorder:
         self.is_recording = False
         self.recording_thread: Optional[threading.Thread] = None
         self.frames: List[bytes] = []
-        self._stream: Optional[pyaudio.Stream] = None
+        self._stream: Optional["pyaudio.Stream"] = None
+        # Koder dopisujący bloki do pliku w trakcie nagrywania
+        self._encoder: Optional[IncrementalEncoder] = None
+        # Długość ostatniego zapisanego nagrania w sekundach
+        self.last_duration: Optional[float] = None
+        
+        # Dzielenie nagrania na wypowiedzi po ciszy (nagrywanie trwa bez przerwy)
+        self.utterance_callback = utterance_callback
+        self._endpointer: Optional[Endpointer] = None
+        # Liczba ostatnich bloków ciszy zachowywanych na początek następnej wypowiedzi
+        self._preroll_chunks = max(1, int(Config.ENDPOINT_PREROLL * self.rate / self.chunk))
     
     def start_recording(self) -> bool:
         """
@@ -53,9 +139,11 @@ class AudioRecorder:
             
         self.is_recording = True
         self.frames = []  # Wyczyść poprzednie dane audio
+        self._encoder = self._create_encoder()
+        self._endpointer = Endpointer(self.rate, self.channels) if self.endpointing else None
         print("\n🎤 NAGRYWANIE ROZPOCZĘTE - mów teraz...")
         
-        self.recording_thread = threading.Thread(target=self._record_audio)
+        self.recording_thread = threading.Thread(target=self._record_audio, args=(tracing.current_trace(),))
         self.recording_thread.daemon = True
         self.recording_thread.start()
         
@@ -76,26 +164,92 @@ class AudioRecorder:
         print("⏹️ NAGRYWANIE ZATRZYMANE - przetwarzanie...")
         
         # Poczekaj na zakończenie wątku nagrywania
-        if self.recording_thread and self.recording_thread.is_alive():
-            self.recording_thread.join(timeout=5)
+        with tracing.span('record.join'):
+            if self.recording_thread and self.recording_thread.is_alive():
+                self.recording_thread.join(timeout=5)
             
         # Wyczyść referencję do wątku
         self.recording_thread = None
         
-        # Zapisz audio do pliku
-        return self._save_audio_to_file()
+        endpointer, self._endpointer = self._endpointer, None
+        if endpointer and not endpointer.has_speech:
+            # Wypowiedzi zostały już wysłane, a reszta nagrania to cisza
+            if self._encoder:
+                self._encoder.abort()
+                self._encoder = None
+            self.frames = []
+            return None
+        
+        # Domknij plik kodowany w trakcie nagrywania lub zapisz audio do pliku
+        if self._encoder:
+            with tracing.span('record.finish_encoder'):
+                return self._finish_encoder()
+        with tracing.span('record.save_wav'):
+            return self._save_audio_to_file()
+
+    @property
+    def endpointing(self) -> bool:
+        """Czy nagranie jest dzielone na wypowiedzi po ciszy"""
+        return Config.ENDPOINT_ENABLED and self.utterance_callback is not None
+
+    def _create_encoder(self) -> Optional[IncrementalEncoder]:
+        """Tworzy koder nagrania (None - zapis całego nagrania po zatrzymaniu)"""
+        if not Config.AUDIO_ENCODE_WHILE_RECORDING:
+            return None
+        try:
+            return IncrementalEncoder(
+                self.rate,
+                channels=self.channels,
+                sample_width=self.audio.get_sample_size(self.format),
+            )
+        except Exception as e:
+            print(f"⚠️ Kodowanie w trakcie nagrywania niedostępne: {e}")
+            return None
+
+    def _finish_encoder(self) -> Optional[str]:
+        """
+        Domyka plik kodowany w trakcie nagrywania
+
+        Returns:
+            Optional[str]: Ścieżka do pliku lub None w przypadku błędu
+        """
+        encoder, self._encoder = self._encoder, None
+        if not encoder.samples_written:
+            encoder.abort()
+            print("❌ Brak danych audio do zapisania")
+            return None
+        try:
+            path = encoder.finish()
+        except Exception as e:
+            print(f"⚠️ Błąd kodera ({e}) - zapisuję nagranie w całości")
+            encoder.abort()
+            return self._save_audio_to_file()
+
+        self.last_duration = encoder.duration
+        print(f"📦 Nagranie gotowe do wysyłki po {encoder.finish_time * 1000:.1f} ms "
+              f"({encoder.format}, {os.path.getsize(path) / 1024:.0f} KiB)")
+        return path
     
-    def _record_audio(self):
+    def _record_audio(self, trace_id: Optional[str] = None):
         """Nagrywa dźwięk w osobnym wątku"""
+        scheduling.apply(scheduling.CAPTURE)
+        with tracing.use_trace(trace_id), profiler.section(), tracing.span('record.capture') as span:
+            encoder = self._encoder
+            self._capture_audio()
+            span.set(chunks=len(self.frames), encode_ms=encoder.encode_time * 1000 if encoder else 0.0)
+
+    def _capture_audio(self):
+        """Odczytuje bloki z mikrofonu do czasu zatrzymania nagrywania"""
         try:
             # Rozpocznij nagrywanie
-            self._stream = self.audio.open(
-                format=self.format,
-                channels=self.channels,
-                rate=self.rate,
-                input=True,
-                frames_per_buffer=self.chunk
-            )
+            with tracing.span('record.open_stream'):
+                self._stream = self.audio.open(
+                    format=self.format,
+                    channels=self.channels,
+                    rate=self.rate,
+                    input=True,
+                    frames_per_buffer=self.chunk
+                )
             
             self.frames = []
             print("🎤 Nagrywanie w toku...")
@@ -105,11 +259,19 @@ class AudioRecorder:
                 try:
                     data = self._stream.read(self.chunk, exception_on_overflow=False)
                     self.frames.append(data)
+                    if self._encoder:
+                        self._encode_chunk(data)
+                    if self._endpointer:
+                        self._check_endpoint(data)
                     
                     # Przekaż dane audio do callback'a jeśli jest ustawiony
                     if self.audio_callback:
                         self.audio_callback(data)
                         
+                except EOFError:
+                    # Plik lub potok się skończył - nagranie czeka na zatrzymanie
+                    print("📼 Koniec źródła audio")
+                    break
                 except Exception as e:
                     print(f"⚠️ Błąd podczas odczytu audio: {e}")
                     break
@@ -122,6 +284,44 @@ class AudioRecorder:
             print(f"❌ Błąd podczas nagrywania: {e}")
             self.is_recording = False
     
+    def _check_endpoint(self, data: bytes):
+        """Zamyka wypowiedź po ciszy; strumień nie jest zatrzymywany, więc kolejna zaczyna się bez przerwy"""
+        event = self._endpointer.feed(data)
+        if event == Endpointer.CONTINUE:
+            return
+        self._endpointer.reset()
+        if event == Endpointer.RESET:
+            self._discard_utterance()
+            return
+
+        closed_ts = time.perf_counter()
+        with tracing.span('record.endpoint'):
+            path = self._finish_encoder() if self._encoder else self._save_audio_to_file()
+            self.frames = []
+            self._encoder = self._create_encoder()
+        if path:
+            print(f"✂️ Koniec wypowiedzi po ciszy ({self.last_duration:.1f} s) - nagrywanie trwa dalej")
+            self.utterance_callback(path, self.last_duration, closed_ts)
+
+    def _discard_utterance(self):
+        """Odrzuca fragment bez mowy, zachowując kilka ostatnich bloków ciszy na początek wypowiedzi"""
+        self.frames = self.frames[-self._preroll_chunks:]
+        if self._encoder:
+            self._encoder.abort()
+            self._encoder = self._create_encoder()
+            for chunk in self.frames:
+                if self._encoder:
+                    self._encode_chunk(chunk)
+
+    def _encode_chunk(self, data: bytes):
+        """Koduje blok audio; po błędzie kodera nagranie zostanie zapisane w całości po zatrzymaniu"""
+        try:
+            self._encoder.write(data)
+        except Exception as e:
+            print(f"⚠️ Błąd kodowania audio ({e}) - zapis nastąpi po zatrzymaniu")
+            self._encoder.abort()
+            self._encoder = None
+
     def _save_audio_to_file(self) -> Optional[str]:
         """
         Zapisuje nagrane audio do tymczasowego pliku WAV
@@ -139,11 +339,15 @@ class AudioRecorder:
             temp_file.close()
             
             # Zapisz audio do pliku WAV
+            sample_width = self.audio.get_sample_size(self.format)
+            audio_data = b''.join(self.frames)
             with wave.open(temp_file.name, 'wb') as wf:
                 wf.setnchannels(self.channels)
-                wf.setsampwidth(self.audio.get_sample_size(self.format))
+                wf.setsampwidth(sample_width)
                 wf.setframerate(self.rate)
-                wf.writeframes(b''.join(self.frames))
+                wf.writeframes(audio_data)
+            
+            self.last_duration = len(audio_data) / (sample_width * self.channels * self.rate)
             
             return temp_file.name
             
@@ -0,0 +1,539 @@
+"""
+Moduł źródeł audio - mikrofon (PortAudio), plik WAV, sygnał syntetyczny i strumień stdin/potok
+
+Źródła mają interfejs pyaudio.PyAudio (open/get_sample_size/terminate i stałe
+formatu), więc AudioRecorder korzysta z nich bez zmian. Sesje z mikrofonu
+można zapisywać (AUDIO_SOURCE_RECORD_DIR) wraz z czasem odczytu każdego
+bloku i odtwarzać przez cały potok aplikacji:
+
+    python audio_source.py replay ~/.szeptucha/sessions/session-20260101-120000.wav
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+import wave
+from datetime import datetime
+from typing import List, Optional
+from config import Config, load_environment
+
+# Źródła wybierane przez AUDIO_SOURCE
+SOURCES = ('portaudio', 'file', 'synthetic', 'stdin')
+
+# Rozszerzenie pliku z czasami odczytu bloków zapisanej sesji
+TIMING_SUFFIX = '.timing.json'
+
+
+class AudioSource:
+    """
+    Interfejs źródła audio zgodny z pyaudio.PyAudio
+
+    Źródła inne niż PortAudio dostarczają próbki int16 (paInt16).
+    """
+
+    # Stałe formatu o tych samych wartościach co w pyaudio
+    paFloat32 = 1
+    paInt32 = 2
+    paInt24 = 4
+    paInt16 = 8
+    paInt8 = 16
+    paUInt8 = 32
+
+    def __init__(self):
+        # Liczba otwartych, niezamkniętych strumieni (test długotrwały wykrywa wycieki)
+        self.open_streams = 0
+
+    def open(self, format: int, channels: int, rate: int, input: bool = True,
+             frames_per_buffer: int = 1024, **kwargs):
+        """
+        Otwiera strumień wejściowy
+
+        Returns:
+            Obiekt z metodami read(frames, exception_on_overflow), stop_stream() i close();
+            read() zgłasza EOFError po wyczerpaniu źródła
+        """
+        if format != self.paInt16:
+            raise ValueError(f"Źródło {type(self).__name__} obsługuje tylko format paInt16")
+        stream = self._open_stream(channels, rate, frames_per_buffer)
+        self.open_streams += 1
+        return stream
+
+    def _open_stream(self, channels: int, rate: int, frames_per_buffer: int) -> "_SourceStream":
+        raise NotImplementedError
+
+    def get_sample_size(self, format: int) -> int:
+        return {self.paFloat32: 4, self.paInt32: 4, self.paInt24: 3, self.paInt16: 2}.get(format, 1)
+
+    def terminate(self):
+        """Zwalnia zasoby źródła"""
+
+
+class _SourceStream:
+    """Strumień wydający bloki w zadanym tempie: czas rzeczywisty, przyspieszony, maksymalny lub zapisany"""
+
+    def __init__(self, source: AudioSource, channels: int, speed: float = 1.0,
+                 offsets: Optional[List[float]] = None):
+        """
+        Args:
+            source: Źródło, które otworzyło strumień
+            channels: Liczba kanałów
+            speed: Krotność czasu rzeczywistego (0 - bez czekania)
+            offsets: Zapisane chwile odczytu kolejnych bloków (sekundy od otwarcia strumienia)
+        """
+        self._source = source
+        self.channels = channels
+        self.speed = speed
+        self.offsets = offsets
+        self.blocks = 0
+        self._started = time.perf_counter()
+        self._elapsed = 0.0
+        self._closed = False
+
+    def read(self, frames: int, exception_on_overflow: bool = True) -> bytes:
+        data = self._next_block(frames)
+        self._wait(frames)
+        self.blocks += 1
+        return data
+
+    def _next_block(self, frames: int) -> bytes:
+        raise NotImplementedError
+
+    def _wait(self, frames: int):
+        """Czeka do chwili, w której blok byłby dostępny w prawdziwym strumieniu"""
+        if self.offsets is not None and self.blocks < len(self.offsets):
+            self._elapsed = self.offsets[self.blocks]
+        else:
+            self._elapsed += frames / self.rate
+        if self.speed <= 0:
+            return
+        delay = self._started + self._elapsed / self.speed - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+    @property
+    def rate(self) -> int:
+        raise NotImplementedError
+
+    def stop_stream(self):
+        pass
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._source.open_streams -= 1
+
+
+class PortAudioSource(AudioSource):
+    """Mikrofon przez PortAudio (pyaudio); opcjonalnie zapisuje sesje do odtworzenia"""
+
+    def __init__(self, record_dir: Optional[str] = None):
+        """
+        Args:
+            record_dir: Katalog zapisu sesji (WAV + czasy odczytu bloków); domyślnie AUDIO_SOURCE_RECORD_DIR
+        """
+        super().__init__()
+        # PortAudio ładowany dopiero przy tworzeniu źródła (nie przy imporcie modułu)
+        import pyaudio
+        self._pyaudio = pyaudio.PyAudio()
+        self.record_dir = record_dir if record_dir is not None else Config.AUDIO_SOURCE_RECORD_DIR
+
+    def open(self, format: int, channels: int, rate: int, input: bool = True,
+             frames_per_buffer: int = 1024, **kwargs):
+        stream = self._pyaudio.open(format=format, channels=channels, rate=rate, input=input,
+                                    frames_per_buffer=frames_per_buffer, **kwargs)
+        self.open_streams += 1
+        if self.record_dir and format == self.paInt16:
+            return _RecordingStream(self, stream, channels, rate, frames_per_buffer)
+        return _PortAudioStream(self, stream)
+
+    def get_sample_size(self, format: int) -> int:
+        return self._pyaudio.get_sample_size(format)
+
+    def terminate(self):
+        self._pyaudio.terminate()
+
+
+class _PortAudioStream:
+    """Strumień PortAudio z licznikiem otwartych strumieni źródła"""
+
+    def __init__(self, source: PortAudioSource, stream):
+        self._source = source
+        self._stream = stream
+        self._closed = False
+
+    def read(self, frames: int, exception_on_overflow: bool = True) -> bytes:
+        return self._stream.read(frames, exception_on_overflow=exception_on_overflow)
+
+    def stop_stream(self):
+        self._stream.stop_stream()
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._stream.close()
+            self._source.open_streams -= 1
+
+
+class _RecordingStream(_PortAudioStream):
+    """Strumień PortAudio zapisujący odczytane bloki i chwile ich odczytu (sesja do odtworzenia)"""
+
+    def __init__(self, source: PortAudioSource, stream, channels: int, rate: int, chunk: int):
+        super().__init__(source, stream)
+        directory = os.path.expanduser(source.record_dir)
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"session-{datetime.now():%Y%m%d-%H%M%S-%f}.wav")
+        self._wav = wave.open(self.path, 'wb')
+        self._wav.setnchannels(channels)
+        self._wav.setsampwidth(2)
+        self._wav.setframerate(rate)
+        self._chunk = chunk
+        self._offsets: List[float] = []
+        self._started = time.perf_counter()
+
+    def read(self, frames: int, exception_on_overflow: bool = True) -> bytes:
+        data = super().read(frames, exception_on_overflow)
+        self._offsets.append(round(time.perf_counter() - self._started, 6))
+        self._wav.writeframes(data)
+        return data
+
+    def close(self):
+        if self._closed:
+            return
+        super().close()
+        try:
+            self._wav.close()
+            write_timing(self.path, self._offsets, self._chunk)
+            print(f"📼 Sesja zapisana do odtworzenia: {self.path}")
+        except OSError as e:
+            print(f"⚠️ Nie udało się zapisać sesji audio: {e}")
+
+
+class FileSource(AudioSource):
+    """Odtwarza plik WAV (16-bit) - w czasie rzeczywistym, przyspieszony, maksymalnie szybko lub z zapisanym tempem"""
+
+    def __init__(self, path: Optional[str] = None, speed: Optional[float] = None,
+                 use_timing: Optional[bool] = None, loop: Optional[bool] = None):
+        """
+        Args:
+            path: Plik WAV (domyślnie AUDIO_SOURCE_PATH)
+            speed: Krotność czasu rzeczywistego, 0 - bez czekania (domyślnie AUDIO_SOURCE_SPEED)
+            use_timing: Czy odtwarzać zapisane chwile odczytu bloków (domyślnie AUDIO_SOURCE_TIMING)
+            loop: Czy po końcu pliku zaczynać od nowa (domyślnie AUDIO_SOURCE_LOOP)
+        """
+        super().__init__()
+        self.path = os.path.expanduser(path or Config.AUDIO_SOURCE_PATH)
+        if not self.path or not os.path.isfile(self.path):
+            raise FileNotFoundError(f"Brak pliku źródła audio: {self.path or '(AUDIO_SOURCE_PATH)'}")
+        self.speed = Config.AUDIO_SOURCE_SPEED if speed is None else speed
+        self.use_timing = Config.AUDIO_SOURCE_TIMING if use_timing is None else use_timing
+        self.loop = Config.AUDIO_SOURCE_LOOP if loop is None else loop
+        self._cache = {}
+
+    def _open_stream(self, channels: int, rate: int, frames_per_buffer: int) -> "_SourceStream":
+        key = (channels, rate)
+        if key not in self._cache:
+            self._cache[key] = _load_wav(self.path, channels, rate)
+        offsets = None
+        if self.use_timing:
+            offsets = read_timing(self.path, frames_per_buffer)
+        return _BufferStream(self, self._cache[key], channels, rate, self.speed, offsets, self.loop)
+
+
+class _BufferStream(_SourceStream):
+    """Strumień bloków z bufora próbek int16 (plik wczytany do pamięci)"""
+
+    def __init__(self, source: AudioSource, samples: bytes, channels: int, rate: int, speed: float,
+                 offsets: Optional[List[float]], loop: bool):
+        super().__init__(source, channels, speed, offsets)
+        self._samples = samples
+        self._rate = rate
+        self._position = 0
+        self._loop = loop
+
+    @property
+    def rate(self) -> int:
+        return self._rate
+
+    def _next_block(self, frames: int) -> bytes:
+        size = frames * self.channels * 2
+        if self._position >= len(self._samples):
+            if not self._loop or not self._samples:
+                raise EOFError("Koniec pliku audio")
+            self._position = 0
+            self.offsets = None
+        block = self._samples[self._position:self._position + size]
+        self._position += size
+        # Ostatni blok dopełniony ciszą - PortAudio zawsze zwraca pełne bloki
+        return block + b'\x00' * (size - len(block))
+
+
+class SyntheticSource(AudioSource):
+    """Generator sygnału: ton (mowa) przeplatany ciszą lub szum"""
+
+    def __init__(self, signal: Optional[str] = None, speed: Optional[float] = None,
+                 speech_seconds: float = 0.6, silence_seconds: float = 0.0, amplitude: float = 0.3):
+        """
+        Args:
+            signal: 'tone', 'noise' lub 'silence' (domyślnie AUDIO_SOURCE_SIGNAL)
+            speed: Krotność czasu rzeczywistego, 0 - bez czekania (domyślnie AUDIO_SOURCE_SPEED)
+            speech_seconds: Długość fragmentu z sygnałem
+            silence_seconds: Długość ciszy po każdym fragmencie (0 - sygnał ciągły)
+            amplitude: Amplituda sygnału (0.0 - 1.0)
+        """
+        super().__init__()
+        self.signal = (signal or Config.AUDIO_SOURCE_SIGNAL).lower()
+        if self.signal not in ('tone', 'noise', 'silence'):
+            raise ValueError(f"Nieznany sygnał syntetyczny: {self.signal}")
+        self.speed = Config.AUDIO_SOURCE_SPEED if speed is None else speed
+        self.speech_seconds = speech_seconds
+        self.silence_seconds = silence_seconds
+        self.amplitude = amplitude
+
+    def _open_stream(self, channels: int, rate: int, frames_per_buffer: int) -> "_SourceStream":
+        return _SyntheticStream(self, channels, rate)
+
+
+class _SyntheticStream(_SourceStream):
+    """Strumień generowanego sygnału (powtarzalny - szum z ustalonym ziarnem)"""
+
+    def __init__(self, source: SyntheticSource, channels: int, rate: int):
+        import numpy as np
+        super().__init__(source, channels, source.speed)
+        self._rate = rate
+        self._position = 0
+        self._random = np.random.default_rng(0)
+
+    @property
+    def rate(self) -> int:
+        return self._rate
+
+    def _next_block(self, frames: int) -> bytes:
+        import numpy as np
+        source = self._source
+        index = np.arange(self._position, self._position + frames)
+        self._position += frames
+        if source.signal == 'silence':
+            samples = np.zeros(frames)
+        elif source.signal == 'noise':
+            samples = self._random.standard_normal(frames) * source.amplitude / 3
+        else:
+            samples = np.sin(2 * np.pi * 220 * index / self._rate) * source.amplitude
+        if source.silence_seconds > 0:
+            cycle = source.speech_seconds + source.silence_seconds
+            samples = np.where((index / self._rate) % cycle < source.speech_seconds, samples, 0.0)
+        pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16)
+        return np.repeat(pcm, self.channels).tobytes()
+
+
+class StdinSource(AudioSource):
+    """Surowe próbki int16 (s16le) ze stdin lub nazwanego potoku, np. `arecord -f S16_LE -r 44100 | ...`"""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: '-' (stdin) lub ścieżka potoku/pliku (domyślnie AUDIO_SOURCE_PATH lub stdin)
+        """
+        super().__init__()
+        self.path = path or Config.AUDIO_SOURCE_PATH or '-'
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _open_stream(self, channels: int, rate: int, frames_per_buffer: int) -> "_SourceStream":
+        # Potok pozostaje otwarty między sesjami - kolejne nagranie czyta dalszy ciąg
+        with self._lock:
+            if self._file is None:
+                self._file = sys.stdin.buffer if self.path == '-' else open(os.path.expanduser(self.path), 'rb')
+        return _PipeStream(self, self._file, channels, rate)
+
+    def terminate(self):
+        with self._lock:
+            if self._file is not None and self._file is not sys.stdin.buffer:
+                self._file.close()
+            self._file = None
+
+
+class _PipeStream(_SourceStream):
+    """Strumień czytający bloki z potoku (tempo wyznacza nadawca)"""
+
+    def __init__(self, source: StdinSource, file, channels: int, rate: int):
+        super().__init__(source, channels, speed=0)
+        self._file = file
+        self._rate = rate
+
+    @property
+    def rate(self) -> int:
+        return self._rate
+
+    def _next_block(self, frames: int) -> bytes:
+        size = frames * self.channels * 2
+        data = self._file.read(size)
+        if not data:
+            raise EOFError("Koniec strumienia audio")
+        return data + b'\x00' * (size - len(data))
+
+
+def create_audio_source(name: Optional[str] = None) -> AudioSource:
+    """
+    Tworzy źródło audio wybrane w konfiguracji
+
+    Args:
+        name: 'portaudio', 'file', 'synthetic' lub 'stdin' (domyślnie AUDIO_SOURCE)
+
+    Returns:
+        AudioSource: Źródło zgodne z pyaudio.PyAudio
+    """
+    name = (name or Config.AUDIO_SOURCE).lower()
+    if name == 'portaudio':
+        return PortAudioSource()
+    if name == 'file':
+        return FileSource()
+    if name == 'synthetic':
+        return SyntheticSource()
+    if name == 'stdin':
+        return StdinSource()
+    raise ValueError(f"Nieznane źródło audio: {name} (dostępne: {', '.join(SOURCES)})")
+
+
+def write_timing(path: str, offsets: List[float], chunk: int):
+    """Zapisuje chwile odczytu bloków obok pliku WAV sesji"""
+    with open(path + TIMING_SUFFIX, 'w', encoding='utf-8') as f:
+        json.dump({'chunk': chunk, 'offsets': offsets}, f)
+
+
+def read_timing(path: str, chunk: int) -> Optional[List[float]]:
+    """
+    Wczytuje chwile odczytu bloków zapisanej sesji
+
+    Returns:
+        Optional[List[float]]: Czasy w sekundach lub None, gdy brak pliku lub inny rozmiar bloku
+    """
+    try:
+        with open(path + TIMING_SUFFIX, encoding='utf-8') as f:
+            timing = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if timing.get('chunk') != chunk:
+        print(f"⚠️ Sesja zapisana z blokiem {timing.get('chunk')}, odtwarzana z {chunk} - pomijam zapisane tempo")
+        return None
+    return timing.get('offsets')
+
+
+def _load_wav(path: str, channels: int, rate: int) -> bytes:
+    """Wczytuje plik WAV (16-bit) i dopasowuje liczbę kanałów oraz częstotliwość do strumienia"""
+    with wave.open(path, 'rb') as wf:
+        if wf.getsampwidth() != 2:
+            raise ValueError(f"Obsługiwane są tylko pliki WAV 16-bit: {path}")
+        source_channels = wf.getnchannels()
+        source_rate = wf.getframerate()
+        data = wf.readframes(wf.getnframes())
+    if source_channels == channels and source_rate == rate:
+        return data
+
+    import numpy as np
+    samples = np.frombuffer(data, dtype=np.int16).reshape(-1, source_channels).astype(np.float32)
+    mono = samples.mean(axis=1)
+    if source_rate != rate and len(mono):
+        count = int(len(mono) * rate / source_rate)
+        mono = np.interp(np.arange(count) * source_rate / rate, np.arange(len(mono)), mono)
+    pcm = np.clip(mono, -32768, 32767).astype(np.int16)
+    return np.repeat(pcm, channels).tobytes()
+
+
+# --- Odtwarzanie sesji przez cały potok aplikacji ---
+
+def replay(path: str, repeats: int = 1, speed: Optional[float] = None, use_timing: bool = True) -> List[dict]:
+    """
+    Odtwarza nagranie przez VoiceNotesApp (nagrywanie, transkrypcja, przetwarzanie, wklejenie do atrapy)
+
+    Args:
+        path: Plik WAV (np. sesja zapisana przez AUDIO_SOURCE_RECORD_DIR)
+        repeats: Liczba odtworzeń
+        speed: Krotność czasu rzeczywistego (domyślnie AUDIO_SOURCE_SPEED)
+        use_timing: Czy odtwarzać zapisane chwile odczytu bloków
+
+    Returns:
+        List[dict]: Czasy każdego odtworzenia: capture (nagrywanie), latency (od końca
+            nagrania do wklejenia), pastes i text (ostatni wklejony tekst)
+    """
+    from output_worker import FakeClipboard, FakeKeyboard, OutputWorker
+    from recording_window import HeadlessRecordingWindow, HeadlessRoot
+    from text_processor import TextProcessor
+    from voice_notes_app import VoiceNotesApp
+    from window_provider import FakeWindowProvider, WindowClassifier
+
+    source = FileSource(path, speed=speed, use_timing=use_timing, loop=False)
+    clipboard = FakeClipboard()
+    keyboard = FakeKeyboard(clipboard)
+    root = HeadlessRoot()
+    app = VoiceNotesApp(
+        root,
+        audio_interface=source,
+        text_processor=TextProcessor(
+            window_classifier=WindowClassifier(provider=FakeWindowProvider('Edit', 'Notatnik')),
+            output_worker=OutputWorker(keyboard=keyboard, clipboard=clipboard),
+        ),
+        recording_window=HeadlessRecordingWindow(root),
+    )
+    app.recording_window.start()
+    results = []
+    try:
+        for _ in range(repeats):
+            keyboard.events.clear()
+            started = time.perf_counter()
+            if not app.start_recording():
+                break
+            # Nagrywanie kończy się na końcu pliku (wątek nagrywania wychodzi po EOFError)
+            thread = app.audio_recorder.recording_thread
+            while thread and thread.is_alive():
+                root.pump()
+                thread.join(0.05)
+            captured = time.perf_counter()
+            app.stop_recording()
+            if app._utterance_executor:
+                app._utterance_executor.submit(lambda: None).result()
+            app.text_processor.output_worker.flush()
+            finished = time.perf_counter()
+            pastes = [text for kind, text, _ in keyboard.events if kind == 'paste']
+            results.append({
+                'capture': captured - started,
+                'latency': finished - captured,
+                'pastes': len(pastes),
+                'text': pastes[-1] if pastes else '',
+            })
+    finally:
+        app.shutdown()
+    return results
+
+
+def main(argv=None):
+    """Wiersz poleceń źródeł audio"""
+    parser = argparse.ArgumentParser(description="Źródła audio - odtwarzanie zapisanych sesji przez cały potok")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    replay_parser = subparsers.add_parser('replay', help="Odtwórz plik WAV przez nagrywanie, transkrypcję i wklejanie")
+    replay_parser.add_argument('path', help="Plik WAV (16-bit)")
+    replay_parser.add_argument('-n', '--repeats', type=int, default=3, help="Liczba odtworzeń")
+    replay_parser.add_argument('--speed', type=float, help="Krotność czasu rzeczywistego (0 - bez czekania)")
+    replay_parser.add_argument('--no-timing', action='store_true', help="Pomiń zapisane chwile odczytu bloków")
+    replay_parser.add_argument('--endpointing', action='store_true', help="Dyktowanie ciągłe (ENDPOINT_ENABLED)")
+    args = parser.parse_args(argv)
+    load_environment()
+
+    if args.endpointing:
+        Config.ENDPOINT_ENABLED = True
+    results = replay(args.path, args.repeats, args.speed, not args.no_timing)
+    if not results:
+        return
+    print(f"\n{'odtworzenie':<12} {'nagrywanie':>11} {'do wklejenia':>13} {'wklejenia':>10}")
+    for index, result in enumerate(results, 1):
+        print(f"{index:<12} {result['capture']:>10.2f}s {result['latency']:>12.3f}s {result['pastes']:>10}")
+    latencies = [r['latency'] for r in results]
+    print(f"⏱️ Opóźnienie od końca nagrania do wklejenia: mediana {statistics.median(latencies):.3f} s, "
+          f"maks. {max(latencies):.3f} s")
+    print(f"📝 {results[-1]['text']!r}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,467 @@
+"""
+Moduł ponownej transkrypcji archiwum w tle - większy model, gdy komputer jest bezczynny
+
+W ciągu dnia dyktowanie obsługuje najszybszy model, a nagrania notatek są
+zachowywane (REFINE_AUDIO_DIR). Gdy nikt nie nagrywa, a procesor jest wolny,
+wątek o najniższym priorytecie transkrybuje je modelem REFINE_MODEL
+i podmienia treść notatek w archiwum. Rozpoczęcie nagrywania przerywa
+dekodowanie na granicy najbliższego segmentu.
+
+    python background_refiner.py status
+    python background_refiner.py bench --notes 20 --segment-ms 300
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+import wave
+from types import SimpleNamespace
+from collections import deque
+from typing import Callable, Deque, Optional
+from config import Config, load_environment
+from note_store import NoteStore
+import scheduling
+
+
+# Najdłuższa przerwa po kolejnych błędach ładowania modelu lub transkrypcji
+_MAX_RETRY_DELAY = 3600.0
+
+
+class CpuMonitor:
+    """Obciążenie procesora przez inne procesy (bez pracy bieżącego procesu) między kolejnymi odczytami"""
+
+    def __init__(self):
+        self._previous = self._read()
+
+    def other_load(self) -> Optional[float]:
+        """
+        Zwraca obciążenie od poprzedniego wywołania
+
+        Returns:
+            Optional[float]: Ułamek czasu wszystkich rdzeni (0.0 - 1.0) zajęty przez inne
+                procesy lub None, gdy nie da się go zmierzyć
+        """
+        current = self._read()
+        previous, self._previous = self._previous, current
+        if current is None or previous is None:
+            return None
+        busy, total, own = (c - p for c, p in zip(current, previous))
+        if total <= 0:
+            return None
+        return max(0.0, min(1.0, (busy - own) / total))
+
+    @staticmethod
+    def _read():
+        """(czas zajęty, czas całkowity, czas bieżącego procesu) w sekundach sumarycznie dla rdzeni"""
+        times = os.times()
+        own = times.user + times.system
+        try:
+            with open('/proc/stat') as stat:
+                fields = [int(v) for v in stat.readline().split()[1:]]
+            ticks = os.sysconf('SC_CLK_TCK')
+            idle = fields[3] + (fields[4] if len(fields) > 4 else 0)
+            return (sum(fields) - idle) / ticks, sum(fields) / ticks, own
+        except (OSError, ValueError, IndexError, AttributeError):
+            pass
+        try:
+            import psutil
+            cpu = psutil.cpu_times()
+            total = sum(cpu)
+            return total - cpu.idle, total, own
+        except Exception:
+            return None
+
+
+class BackgroundRefiner:
+    """
+    Wątek ponownej transkrypcji zachowanych nagrań większym modelem
+
+    Pracuje tylko, gdy is_busy() zwraca False, od ostatniej aktywności minęło
+    REFINE_IDLE_DELAY sekund, a inne procesy zajmują mniej niż REFINE_MAX_CPU
+    procesora. pause() przerywa bieżące dekodowanie (notatka wróci do kolejki).
+    """
+
+    def __init__(self, note_store: NoteStore, is_busy: Callable[[], bool] = lambda: False,
+                 post_process: Optional[Callable[[str], str]] = None,
+                 model_factory: Optional[Callable] = None):
+        """
+        Args:
+            note_store: Archiwum notatek z zachowanymi nagraniami
+            is_busy: Czy aplikacja pracuje (np. trwa nagrywanie)
+            post_process: Przetwarzanie końcowe tekstu (słownik zamian, słownictwo)
+            model_factory: Funkcja tworząca model (model, device=, compute_type=);
+                domyślnie faster_whisper.WhisperModel (atrapy w pomiarach)
+        """
+        self.note_store = note_store
+        self.is_busy = is_busy
+        self.post_process = post_process
+        self.model_factory = model_factory
+        self.model_name = Config.REFINE_MODEL
+        self.audio_dir = os.path.expanduser(Config.REFINE_AUDIO_DIR)
+
+        self._model = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        # Ustawiane przez pause(); dekodowanie sprawdza je między segmentami
+        self._yield = threading.Event()
+        self._yield_requested_at = 0.0
+        self._last_activity = time.monotonic()
+        self._cpu = CpuMonitor()
+        self._audio_lock = threading.Lock()
+        # Po błędzie modelu notatka zostaje w kolejce, a kolejna próba czeka coraz dłużej
+        self._failures = 0
+        self._retry_at = 0.0
+
+        # Statystyki: przepustowość i szybkość ustępowania nagrywaniu
+        self.refined = 0
+        self.audio_seconds = 0.0
+        self.decode_seconds = 0.0
+        self.interrupted = 0
+        self.yield_latencies: Deque[float] = deque(maxlen=1000)
+
+    def start(self):
+        """Uruchamia wątek w tle"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="Refiner", daemon=True)
+        self._thread.start()
+        print(f"♻️ Ponowna transkrypcja w tle włączona (model {self.model_name}, "
+              f"po {Config.REFINE_IDLE_DELAY:.0f} s bezczynności)")
+
+    def stop(self, timeout: float = 5.0):
+        """Zatrzymuje wątek (przerywa bieżące dekodowanie)"""
+        self._stop.set()
+        self._yield.set()
+        self._wake.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout)
+        self._thread = None
+        self._model = None
+
+    def pause(self):
+        """Ustępuje pierwszeństwa nowemu nagraniu (wywoływane przy starcie nagrywania)"""
+        self._last_activity = time.monotonic()
+        if not self._yield.is_set():
+            self._yield_requested_at = time.perf_counter()
+            self._yield.set()
+
+    def touch(self):
+        """Odnotowuje aktywność użytkownika (liczenie bezczynności od nowa)"""
+        self._last_activity = time.monotonic()
+
+    def retain(self, audio_path: str) -> Optional[str]:
+        """
+        Przenosi nagranie do REFINE_AUDIO_DIR (zamiast usuwać je po transkrypcji)
+
+        Najstarsze nagrania ponad REFINE_MAX_RECORDINGS są usuwane.
+
+        Args:
+            audio_path: Plik tymczasowy nagrania
+
+        Returns:
+            Optional[str]: Nowa ścieżka lub None, gdy nie udało się go zachować (plik usunięty)
+        """
+        with self._audio_lock:
+            try:
+                os.makedirs(self.audio_dir, exist_ok=True)
+                extension = os.path.splitext(audio_path)[1] or '.wav'
+                target = os.path.join(self.audio_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}{extension}")
+                shutil.move(audio_path, target)
+            except OSError as e:
+                print(f"⚠️ Nie udało się zachować nagrania do ponownej transkrypcji: {e}")
+                try:
+                    os.unlink(audio_path)
+                except OSError:
+                    pass
+                return None
+            self._prune()
+        return target
+
+    def stats(self) -> dict:
+        """Przepustowość (sekundy audio na sekundę dekodowania) i opóźnienia ustępowania nagrywaniu"""
+        latencies = sorted(self.yield_latencies)
+        return {
+            'refined': self.refined,
+            'interrupted': self.interrupted,
+            'audio_seconds': self.audio_seconds,
+            'decode_seconds': self.decode_seconds,
+            'speed': self.audio_seconds / self.decode_seconds if self.decode_seconds else None,
+            'yield_median': statistics.median(latencies) if latencies else None,
+            'yield_max': latencies[-1] if latencies else None,
+        }
+
+    def _prune(self):
+        """Usuwa najstarsze zachowane nagrania ponad limit (notatki zostają z dotychczasową treścią)"""
+        files = sorted(name for name in os.listdir(self.audio_dir) if not name.startswith('.'))
+        for name in files[:max(0, len(files) - Config.REFINE_MAX_RECORDINGS)]:
+            try:
+                os.unlink(os.path.join(self.audio_dir, name))
+            except OSError:
+                pass
+
+    def _run(self):
+        """Pętla wątku: czeka na bezczynność i przetwarza kolejne notatki"""
+        scheduling.apply(scheduling.BACKGROUND)
+        while not self._stop.is_set():
+            self._wake.wait(Config.REFINE_CHECK_INTERVAL)
+            self._wake.clear()
+            # Wyczyszczone przed sprawdzeniem bezczynności - pause() wywołane później przerwie dekodowanie
+            self._yield.clear()
+            if self._stop.is_set() or time.monotonic() < self._retry_at or not self._idle():
+                continue
+            try:
+                notes = self.note_store.pending_refinement(limit=1)
+            except Exception as e:
+                print(f"⚠️ Nie udało się odczytać kolejki ponownej transkrypcji: {e}")
+                continue
+            if not notes:
+                # Nic do zrobienia - duży model nie zajmuje pamięci do kolejnych nagrań
+                self._model = None
+                continue
+            self._refine(notes[0])
+            # Kolejna notatka od razu, jeśli nadal nikt nie nagrywa
+            self._wake.set()
+
+    def _idle(self) -> bool:
+        """Czy komputer jest bezczynny: brak nagrywania, odstęp od aktywności i wolny procesor"""
+        load = self._cpu.other_load()
+        if self.is_busy() or time.monotonic() - self._last_activity < Config.REFINE_IDLE_DELAY:
+            return False
+        return load is None or load <= Config.REFINE_MAX_CPU
+
+    def _refine(self, note: dict):
+        """Transkrybuje nagranie notatki większym modelem i zapisuje wynik"""
+        path = note['audio_path']
+        if not os.path.exists(path):
+            self.note_store.detach_audio(note['id'])
+            return
+        if self._model is None:
+            try:
+                self._model = self._load_model()
+            except Exception as e:
+                # Brak sieci przy pobieraniu, brak pamięci... - nagranie nie jest winne
+                self._back_off(f"Nie udało się załadować modelu {self.model_name}: {e}")
+                return
+            if self._yield.is_set():
+                return
+        started = time.perf_counter()
+        try:
+            text = self._transcribe(path, note.get('language') or 'pl')
+        except Exception as e:
+            if self._audio_readable(path):
+                self._back_off(f"Ponowna transkrypcja notatki #{note['id']} nie powiodła się: {e}")
+            else:
+                # Uszkodzony plik nigdy się nie zdekoduje - notatka zostaje z dotychczasową treścią
+                print(f"⚠️ Nie można zdekodować nagrania notatki #{note['id']}: {e}")
+                self.note_store.detach_audio(note['id'])
+            return
+        self._failures = 0
+        elapsed = time.perf_counter() - started
+        self.decode_seconds += elapsed
+
+        if text is None:
+            # Przerwane przez nagrywanie - notatka zostaje w kolejce
+            if self._stop.is_set():
+                return
+            self.interrupted += 1
+            self.yield_latencies.append(time.perf_counter() - self._yield_requested_at)
+            return
+
+        if text and self.post_process:
+            text = self.post_process(text)
+        self.refined += 1
+        self.audio_seconds += note.get('duration') or 0.0
+        if text:
+            self.note_store.refine(note['id'], text, self.model_name)
+        else:
+            self.note_store.detach_audio(note['id'])
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+        print(f"♻️ Notatka #{note['id']} dopracowana modelem {self.model_name} "
+              f"({note.get('duration') or 0.0:.1f} s audio w {elapsed:.1f} s)")
+
+    def _transcribe(self, path: str, language: str) -> Optional[str]:
+        """
+        Transkrybuje plik, sprawdzając między segmentami, czy trzeba ustąpić nagrywaniu
+
+        Returns:
+            Optional[str]: Tekst lub None, gdy dekodowanie zostało przerwane
+        """
+        segments, _info = self._model.transcribe(path, language=language, beam_size=Config.REFINE_BEAM_SIZE)
+        texts = []
+        try:
+            for segment in segments:
+                if self._yield.is_set():
+                    return None
+                texts.append(segment.text)
+        finally:
+            # Zamknięcie generatora kończy dekodowanie pozostałych segmentów
+            close = getattr(segments, 'close', None)
+            if close:
+                close()
+        return "".join(texts).strip()
+
+    def _back_off(self, message: str):
+        """Odkłada kolejną próbę po błędzie (notatka zostaje w kolejce)"""
+        delay = min(_MAX_RETRY_DELAY, Config.REFINE_RETRY_DELAY * 2 ** self._failures)
+        self._failures += 1
+        self._retry_at = time.monotonic() + delay
+        self._model = None
+        print(f"⚠️ {message} - ponowna próba za {delay:.0f} s")
+
+    @staticmethod
+    def _audio_readable(path: str) -> bool:
+        """Czy nagranie da się zdekodować (odróżnia uszkodzony plik od błędu modelu)"""
+        try:
+            from faster_whisper.audio import decode_audio
+        except ImportError:
+            decode_audio = None
+        try:
+            if decode_audio is not None:
+                decode_audio(path)
+            else:
+                with wave.open(path, 'rb') as wf:
+                    wf.readframes(wf.getnframes())
+            return True
+        except Exception:
+            return False
+
+    def _load_model(self):
+        """Ładuje większy model (w wątku tła - pula wątków modelu dziedziczy niski priorytet)"""
+        factory = self.model_factory
+        if factory is None:
+            from faster_whisper import WhisperModel
+            factory = WhisperModel
+        started = time.perf_counter()
+        model = factory(
+            self.model_name,
+            device=Config.REFINE_DEVICE or Config.LOCAL_DEVICE,
+            compute_type=Config.REFINE_COMPUTE_TYPE or Config.LOCAL_COMPUTE_TYPE,
+        )
+        print(f"♻️ Model {self.model_name} do ponownej transkrypcji załadowany w {time.perf_counter() - started:.1f} s")
+        return model
+
+
+# --- Pomiar przepustowości i ustępowania nagrywaniu ---
+
+class _SegmentModel:
+    """Atrapa modelu - dekodowanie segmentu (2 s audio) obciąża procesor przez segment_ms"""
+
+    def __init__(self, segment_ms: float):
+        self.segment_ms = segment_ms
+
+    def transcribe(self, audio, **kwargs):
+        with wave.open(audio, 'rb') as wf:
+            duration = wf.getnframes() / wf.getframerate()
+        return self._segments(max(1, int(duration / 2))), SimpleNamespace(language='pl', duration=duration)
+
+    def _segments(self, count: int):
+        for index in range(count):
+            deadline = time.perf_counter() + self.segment_ms / 1000
+            while time.perf_counter() < deadline:
+                sum(i * i for i in range(1000))
+            yield SimpleNamespace(text=f" segment {index}.")
+
+
+def run_benchmark(notes: int = 20, note_seconds: float = 10.0, segment_ms: float = 300.0,
+                  recordings: int = 5, seconds: float = 30.0):
+    """
+    Mierzy przepustowość ponownej transkrypcji i czas ustępowania nowym nagraniom
+
+    Args:
+        notes: Liczba notatek z nagraniami w archiwum
+        note_seconds: Długość każdego nagrania
+        segment_ms: Czas dekodowania segmentu (2 s audio) przez atrapę modelu
+        recordings: Liczba nagrań rozpoczynanych w trakcie pomiaru
+        seconds: Czas pomiaru
+    """
+    import random
+
+    directory = tempfile.mkdtemp(prefix='szeptucha-refine-')
+    Config.REFINE_AUDIO_DIR = os.path.join(directory, 'audio')
+    Config.REFINE_IDLE_DELAY = 0.5
+    Config.REFINE_CHECK_INTERVAL = 0.1
+    # Atrapa zajmuje procesor w tym samym procesie, więc nie zawyża obciążenia innych procesów
+    Config.REFINE_MAX_CPU = 1.0
+    store = NoteStore(os.path.join(directory, 'notes.db'))
+    recording = threading.Event()
+    refiner = BackgroundRefiner(store, is_busy=recording.is_set, model_factory=lambda *a, **k: _SegmentModel(segment_ms))
+    try:
+        silence = b'\x00\x00' * int(16000 * note_seconds)
+        for index in range(notes):
+            path = os.path.join(directory, f"note-{index}.wav")
+            with wave.open(path, 'wb') as wf:
+                wf.setnchannels(1)
+                wf.setsampwidth(2)
+                wf.setframerate(16000)
+                wf.writeframes(silence)
+            store.add(f"notatka {index}", duration=note_seconds, audio_path=refiner.retain(path))
+        store.flush()
+
+        refiner.start()
+        started = time.perf_counter()
+        rng = random.Random(0)
+        starts = sorted(rng.uniform(2.0, seconds - 2.0) for _ in range(recordings))
+        for at in starts:
+            time.sleep(max(0.0, started + at - time.perf_counter()))
+            # Nagranie trwa 1-2 s; potem odliczanie bezczynności od nowa
+            recording.set()
+            refiner.pause()
+            time.sleep(rng.uniform(1.0, 2.0))
+            recording.clear()
+            refiner.touch()
+        time.sleep(max(0.0, started + seconds - time.perf_counter()))
+        elapsed = time.perf_counter() - started
+    finally:
+        refiner.stop()
+        store.close()
+        shutil.rmtree(directory, ignore_errors=True)
+
+    stats = refiner.stats()
+    print(f"\n♻️ Dopracowano {stats['refined']}/{notes} notatek w {elapsed:.0f} s "
+          f"({stats['refined'] / elapsed * 60:.1f} notatek/min, "
+          f"{stats['speed'] or 0.0:.1f}× czasu rzeczywistego podczas dekodowania)")
+    print(f"⏸️ Przerwane dekodowania: {stats['interrupted']}")
+    if stats['yield_median'] is not None:
+        print(f"⏱️ Ustąpienie nagrywaniu: mediana {stats['yield_median'] * 1000:.0f} ms, "
+              f"maks. {stats['yield_max'] * 1000:.0f} ms (granica segmentu: {segment_ms:.0f} ms)")
+
+
+def main(argv=None):
+    """Wiersz poleceń ponownej transkrypcji w tle"""
+    parser = argparse.ArgumentParser(description="Ponowna transkrypcja archiwum w tle większym modelem")
+    parser.add_argument('--db', help="Ścieżka do bazy (domyślnie NOTES_DB_PATH)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('status', help="Liczba notatek czekających na ponowną transkrypcję")
+    bench_parser = subparsers.add_parser('bench', help="Pomiar przepustowości i ustępowania na atrapie modelu")
+    bench_parser.add_argument('--notes', type=int, default=20, help="Liczba notatek")
+    bench_parser.add_argument('--note-seconds', type=float, default=10.0, help="Długość nagrania notatki")
+    bench_parser.add_argument('--segment-ms', type=float, default=300.0, help="Czas dekodowania segmentu (ms)")
+    bench_parser.add_argument('--recordings', type=int, default=5, help="Liczba nagrań w trakcie pomiaru")
+    bench_parser.add_argument('-s', '--seconds', type=float, default=30.0, help="Czas pomiaru")
+    args = parser.parse_args(argv)
+    load_environment()
+
+    if args.command == 'bench':
+        run_benchmark(args.notes, args.note_seconds, args.segment_ms, args.recordings, args.seconds)
+        return
+    store = NoteStore(args.db)
+    try:
+        pending = store.pending_refinement(limit=sys.maxsize)
+        seconds = sum(note.get('duration') or 0.0 for note in pending)
+        print(f"♻️ Czeka na ponowną transkrypcję: {len(pending)} notatek ({seconds / 60:.1f} min audio)")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
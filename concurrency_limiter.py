@@ -0,0 +1,386 @@
+"""
+Moduł adaptacyjnego limitu współbieżności (AIMD) dla masowej transkrypcji przez API
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+from config import Config, load_environment
+
+
+def classify_error(error: Exception) -> Tuple[Optional[int], Optional[float]]:
+    """
+    Odczytuje kod HTTP i nagłówek Retry-After z wyjątku klienta
+
+    Obsługuje wyjątki pakietu openai (status_code, response.headers) oraz
+    urllib (code, headers).
+
+    Returns:
+        Tuple: (kod statusu lub None, zalecany czas oczekiwania w sekundach lub None)
+    """
+    status = getattr(error, 'status_code', None) or getattr(error, 'code', None)
+    if not isinstance(status, int):
+        status = None
+
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or getattr(error, 'headers', None)
+    retry_after = None
+    if headers is not None:
+        value = headers.get('retry-after-ms')
+        if value is not None:
+            try:
+                retry_after = float(value) / 1000
+            except ValueError:
+                pass
+        value = headers.get('retry-after') if retry_after is None else None
+        if value is not None:
+            try:
+                retry_after = float(value)
+            except ValueError:
+                # Retry-After może być datą HTTP
+                import email.utils
+                try:
+                    retry_after = email.utils.parsedate_to_datetime(value).timestamp() - time.time()
+                except (TypeError, ValueError):
+                    pass
+    if retry_after is not None:
+        retry_after = max(0.0, retry_after)
+    return status, retry_after
+
+
+class AdaptiveLimiter:
+    """
+    Limit równoległych żądań dobierany metodą AIMD.
+
+    Dopóki opóźnienia są bliskie najlepszym ostatnio obserwowanym, a
+    serwer nie odrzuca żądań, limit rośnie o ok. 1 na "rundę" (addytywnie).
+    Przy znanej długości nagrań porównywany jest czas odpowiedzi na sekundę
+    audio, względem nagrań podobnej długości - dłuższe nagranie nie jest
+    oznaką przeciążenia.
+    Odpowiedzi 429/5xx zmniejszają go o połowę, a rosnące opóźnienia -
+    łagodnie; zmniejszenie następuje najwyżej raz na czas jednej odpowiedzi,
+    żeby seria równoczesnych odrzuceń nie zerowała limitu. Retry-After
+    wstrzymuje wysyłanie nowych żądań do wskazanej chwili.
+    """
+
+    def __init__(self, initial: Optional[float] = None, min_limit: Optional[int] = None,
+                 max_limit: Optional[int] = None, latency_tolerance: Optional[float] = None):
+        """
+        Inicjalizuje ogranicznik
+
+        Args:
+            initial: Początkowy limit (domyślnie z config)
+            min_limit: Minimalny limit (domyślnie z config)
+            max_limit: Maksymalny limit (domyślnie z config)
+            latency_tolerance: Krotność najlepszego opóźnienia uznawana jeszcze za zdrową
+        """
+        self.min_limit = min_limit or Config.API_CONCURRENCY_MIN
+        self.max_limit = max_limit or Config.API_CONCURRENCY_MAX
+        self.latency_tolerance = latency_tolerance or Config.API_LATENCY_TOLERANCE
+        self.limit = float(min(self.max_limit, max(self.min_limit, initial or Config.API_CONCURRENCY_INITIAL)))
+
+        self.in_flight = 0
+        self.completed = 0
+        self.overloaded = 0
+        self.errors = 0
+        self._blocked_until = 0.0
+        self._last_decrease = 0.0
+        self._latencies: "deque[float]" = deque(maxlen=50)
+        # Czas odpowiedzi na sekundę audio w przedziałach długości nagrań (1-2 s, 2-4 s, ...)
+        self._rates: Dict[int, "deque[float]"] = {}
+        self._completions: "deque[float]" = deque()
+        self._last_report = time.monotonic()
+        self._condition = threading.Condition()
+
+    def call(self, fn: Callable, *args, max_attempts: Optional[int] = None, duration: Optional[float] = None):
+        """
+        Wywołuje funkcję w ramach limitu, ponawiając po przeciążeniu serwera
+
+        Args:
+            fn: Funkcja wysyłająca jedno żądanie
+            *args: Argumenty funkcji
+            max_attempts: Maksymalna liczba prób (domyślnie z config)
+            duration: Długość wysyłanego nagrania w sekundach (None - nieznana)
+
+        Returns:
+            Wynik funkcji (ostatni wyjątek jest przekazywany dalej)
+        """
+        attempts = max_attempts or Config.API_MAX_ATTEMPTS
+        for attempt in range(attempts):
+            self.acquire()
+            started = time.monotonic()
+            try:
+                result = fn(*args)
+            except Exception as e:
+                status, retry_after = classify_error(e)
+                if status == 429 or (status is not None and status >= 500) or retry_after is not None:
+                    self.release(started, 'overload', retry_after, duration)
+                    if attempt + 1 < attempts:
+                        if retry_after is None:
+                            # Bez wskazówki serwera - wykładnicze oczekiwanie tylko tego zadania
+                            time.sleep(Config.API_RETRY_BACKOFF * (2 ** attempt))
+                        continue
+                else:
+                    self.release(started, 'error', duration=duration)
+                raise
+            self.release(started, 'ok', duration=duration)
+            return result
+
+    def acquire(self):
+        """Czeka na wolne miejsce w limicie (i na upływ Retry-After)"""
+        with self._condition:
+            while True:
+                wait = self._blocked_until - time.monotonic()
+                if wait <= 0 and self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return
+                self._condition.wait(timeout=wait if wait > 0 else None)
+
+    def release(self, started: float, outcome: str, retry_after: Optional[float] = None,
+                duration: Optional[float] = None):
+        """
+        Zwalnia miejsce i aktualizuje limit
+
+        Args:
+            started: Moment wysłania żądania (time.monotonic)
+            outcome: 'ok', 'overload' (429/5xx) lub 'error' (błąd niezwiązany z obciążeniem)
+            retry_after: Czas z nagłówka Retry-After w sekundach
+            duration: Długość nagrania w sekundach - opóźnienie liczone na sekundę audio
+        """
+        now = time.monotonic()
+        latency = now - started
+        with self._condition:
+            saturated = self.in_flight >= int(self.limit)
+            self.in_flight -= 1
+
+            if outcome == 'ok':
+                self.completed += 1
+                self._completions.append(now)
+                if duration:
+                    # Przedział długości - w krótkich nagraniach przeważa stały narzut żądania
+                    value = latency / duration
+                    history = self._rates.setdefault(int(math.log2(max(duration, 1.0))), deque(maxlen=50))
+                else:
+                    value, history = latency, self._latencies
+                best = min(history) if history else value
+                if history is not self._latencies:
+                    history.append(value)
+                self._latencies.append(latency)
+                if value > best * self.latency_tolerance:
+                    self._decrease(now, 0.9, latency)
+                elif saturated:
+                    # Wzrost tylko gdy limit był faktycznie wykorzystany
+                    self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            elif outcome == 'overload':
+                self.overloaded += 1
+                self._decrease(now, 0.5, latency)
+                if retry_after:
+                    self._blocked_until = max(self._blocked_until, now + retry_after)
+            else:
+                self.errors += 1
+
+            self._condition.notify_all()
+            report = now - self._last_report >= Config.API_LIMITER_REPORT_INTERVAL
+            if report:
+                self._last_report = now
+        if report:
+            stats = self.stats()
+            print(f"📈 Limit API: {stats['limit']:.1f}, w toku {stats['in_flight']}, "
+                  f"{stats['throughput']:.1f} żądań/s, odrzucone {stats['overloaded']}")
+
+    def stats(self) -> dict:
+        """
+        Zwraca bieżący stan ogranicznika
+
+        Returns:
+            dict: Limit, żądania w toku, liczniki i przepustowość (żądania/s z ostatnich 10 s)
+        """
+        now = time.monotonic()
+        with self._condition:
+            while self._completions and now - self._completions[0] > 10:
+                self._completions.popleft()
+            window = now - self._completions[0] if len(self._completions) > 1 else 0
+            throughput = (len(self._completions) - 1) / window if window else 0.0
+            return {
+                'limit': self.limit,
+                'in_flight': self.in_flight,
+                'completed': self.completed,
+                'overloaded': self.overloaded,
+                'errors': self.errors,
+                'throughput': throughput,
+            }
+
+    def _decrease(self, now: float, factor: float, latency: float):
+        """Zmniejsza limit najwyżej raz na czas jednej odpowiedzi (wywoływane z blokadą)"""
+        # Odrzucenia przychodzą szybko - okno liczymy od czasu ostatniej udanej odpowiedzi
+        window = max(latency, self._latencies[-1] if self._latencies else 0.0)
+        if now - self._last_decrease < window:
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_limit, self.limit * factor)
+
+
+class _RateLimitedMockServer:
+    """
+    Lokalna atrapa API z limitami jak u dostawcy
+
+    Limit żądań na sekundę (token bucket) zwraca 429 z Retry-After,
+    przekroczenie pojemności równoległej - 503, a czas odpowiedzi rośnie
+    z liczbą żądań w toku i z długością nagrania (nagłówek X-Audio-Seconds).
+    """
+
+    def __init__(self, rate: float, capacity: int, base_latency: float = 0.05,
+                 latency_per_second: float = 0.005):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        self.rate = rate
+        self.capacity = capacity
+        self.base_latency = base_latency
+        self.latency_per_second = latency_per_second
+        self.in_flight = 0
+        self.rejected = 0
+        self._tokens = float(rate)
+        self._refilled = time.monotonic()
+        self._lock = threading.Lock()
+        mock = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                status, retry_after, in_flight = mock._admit()
+                if status != 200:
+                    self.send_response(status)
+                    if retry_after is not None:
+                        self.send_header('Retry-After', f"{retry_after:.2f}")
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                try:
+                    audio_seconds = float(self.headers.get('X-Audio-Seconds') or 0)
+                    time.sleep((mock.base_latency + audio_seconds * mock.latency_per_second)
+                               * (1 + in_flight / mock.capacity))
+                    body = json.dumps({'text': 'ok'}).encode('utf-8')
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                finally:
+                    with mock._lock:
+                        mock.in_flight -= 1
+
+            def log_message(self, format, *args):
+                pass
+
+        class _Server(ThreadingHTTPServer):
+            daemon_threads = True
+            request_queue_size = 256
+
+        self._server = _Server(('127.0.0.1', 0), _Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}/v1/audio/transcriptions"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def _admit(self) -> Tuple[int, Optional[float], int]:
+        """Decyduje o przyjęciu żądania (status, Retry-After, liczba żądań w toku)"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.rate, self._tokens + (now - self._refilled) * self.rate)
+            self._refilled = now
+            if self._tokens < 1:
+                self.rejected += 1
+                return 429, (1 - self._tokens) / self.rate, self.in_flight
+            if self.in_flight >= self.capacity:
+                self.rejected += 1
+                return 503, None, self.in_flight
+            self._tokens -= 1
+            self.in_flight += 1
+            return 200, None, self.in_flight
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def run_benchmark(requests: int, rate: float, capacity: int, fixed: Optional[int] = None,
+                  max_audio: float = 0.0, pass_duration: bool = True) -> dict:
+    """
+    Wysyła serię żądań do atrapy API z limitami
+
+    Args:
+        requests: Liczba żądań
+        rate: Limit atrapy w żądaniach na sekundę
+        capacity: Pojemność równoległa atrapy
+        fixed: Stała współbieżność zamiast adaptacyjnej (dla porównania)
+        max_audio: Nagrania o losowej długości 1 - max_audio s (0 - bez nagrań)
+        pass_duration: Czy ogranicznik zna długość nagrań
+
+    Returns:
+        dict: Czas, przepustowość, liczba odrzuceń i końcowy limit
+    """
+    import urllib.request
+    server = _RateLimitedMockServer(rate, capacity)
+    if fixed:
+        limiter = AdaptiveLimiter(initial=fixed, min_limit=fixed, max_limit=fixed)
+    else:
+        limiter = AdaptiveLimiter()
+
+    rng = random.Random(0)
+    durations = [rng.uniform(1.0, max_audio) if max_audio else 0.0 for _ in range(requests)]
+
+    def send(index):
+        request = urllib.request.Request(server.url, data=b"x" * 1024, method='POST',
+                                         headers={'X-Audio-Seconds': f"{durations[index]:.2f}"})
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return response.read()
+
+    def job(index):
+        try:
+            limiter.call(send, index, max_attempts=50,
+                         duration=durations[index] if pass_duration and max_audio else None)
+            return True
+        except Exception:
+            return False
+
+    started = time.monotonic()
+    try:
+        with ThreadPoolExecutor(max_workers=limiter.max_limit) as executor:
+            succeeded = sum(executor.map(job, range(requests)))
+    finally:
+        server.close()
+    elapsed = time.monotonic() - started
+    return {
+        'elapsed': elapsed,
+        'throughput': succeeded / elapsed,
+        'succeeded': succeeded,
+        'rejected': server.rejected,
+        'limit': limiter.limit,
+    }
+
+
+def main(argv=None):
+    """Porównanie stałej i adaptacyjnej współbieżności na atrapie API"""
+    parser = argparse.ArgumentParser(description="Adaptacyjny limit współbieżności API - pomiar na atrapie")
+    parser.add_argument('-n', '--requests', type=int, default=300)
+    parser.add_argument('--rate', type=float, default=40, help="Limit atrapy w żądaniach/s")
+    parser.add_argument('--capacity', type=int, default=8, help="Pojemność równoległa atrapy")
+    parser.add_argument('--fixed', type=int, nargs='*', default=[2, 32], help="Stałe współbieżności do porównania")
+    parser.add_argument('--max-audio', type=float, default=60.0,
+                        help="Nagrania o losowej długości do tylu sekund (0 - jednakowe żądania)")
+    args = parser.parse_args(argv)
+    load_environment()
+
+    # Adaptacyjna bez długości nagrań - porównanie z opóźnieniem liczonym na sekundę audio
+    variants = [(None, True)] + ([(None, False)] if args.max_audio else []) + [(fixed, True) for fixed in args.fixed]
+    for fixed, pass_duration in variants:
+        result = run_benchmark(args.requests, args.rate, args.capacity, fixed, args.max_audio, pass_duration)
+        label = f"stała {fixed}" if fixed else ("adaptacyjna" if pass_duration else "bez długości")
+        print(f"📊 {label:>12}: {result['elapsed']:.2f} s, {result['throughput']:.1f} żądań/s, "
+              f"odrzucone {result['rejected']}, limit końcowy {result['limit']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
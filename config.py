@@ -2,23 +2,19 @@
 Konfiguracja aplikacji Voice Notes
 """
 import os
-from dotenv import load_dotenv
 
-# Ładowanie zmiennych środowiskowych z pliku .env
-load_dotenv()
+
+def _env_flag(name: str, default: bool) -> bool:
+    """Odczytuje flagę logiczną ze zmiennej środowiskowej"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.lower() in ('1', 'true', 'yes')
+
 
 class Config:
     """Klasa konfiguracji aplikacji"""
     
-    # OpenAI API
-    OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
-    # Tryb transkrypcji: 'auto' (domyślnie), 'api', 'local'
-    TRANSCRIPTION_MODE = os.getenv('TRANSCRIPTION_MODE', 'auto').lower()
-    # Ustawienia lokalnego modelu Whisper (dla 'local' lub fallback w 'auto')
-    LOCAL_WHISPER_MODEL = os.getenv('LOCAL_WHISPER_MODEL', 'base')
-    LOCAL_DEVICE = os.getenv('LOCAL_DEVICE', 'cpu')  # 'cpu' lub 'cuda'
-    LOCAL_COMPUTE_TYPE = os.getenv('LOCAL_COMPUTE_TYPE', 'int8')  # np. 'int8', 'float32'
-    
     # Konfiguracja audio
     AUDIO_CHUNK = 1024
     AUDIO_FORMAT = 'paInt16'  # pyaudio.paInt16
@@ -38,6 +34,187 @@ class Config:
     ANIMATION_SPEED = 0.1
     WAVE_COLORS = ['#00ff88', '#00cc66', '#009944', '#006622']
     
+    # Stałe pomocnicze (niezależne od środowiska)
+    VOCABULARY_CACHE_SIZE = 10000  # zapamiętane wyniki korekty tokenów
+    OUTPUT_CLIPBOARD_POLL_INTERVAL = 0.005  # sekundy
+    NOTES_BATCH_SIZE = 100  # maksymalna liczba notatek w jednej transakcji
+    NOTES_BATCH_INTERVAL = 0.5  # sekundy oczekiwania na kolejne notatki do transakcji
+    API_LIMITER_REPORT_INTERVAL = 5.0  # sekundy między komunikatami o limicie współbieżności API
+    
+    @classmethod
+    def reload(cls):
+        """Odczytuje ustawienia zależne od zmiennych środowiskowych"""
+        # OpenAI API
+        cls.OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+        # Tryb transkrypcji: 'auto' (domyślnie), 'api', 'local'
+        cls.TRANSCRIPTION_MODE = os.getenv('TRANSCRIPTION_MODE', 'auto').lower()
+        # Ustawienia lokalnego modelu Whisper (dla 'local' lub fallback w 'auto')
+        cls.LOCAL_WHISPER_MODEL = os.getenv('LOCAL_WHISPER_MODEL', 'base')
+        cls.LOCAL_DEVICE = os.getenv('LOCAL_DEVICE', 'cpu')  # 'cpu' lub 'cuda'
+        cls.LOCAL_COMPUTE_TYPE = os.getenv('LOCAL_COMPUTE_TYPE', 'int8')  # np. 'int8', 'float32'
+        # Zwolnienie modelu z pamięci po bezczynności (0 = model zawsze załadowany);
+        # po zwolnieniu model jest ładowany w tle od razu po rozpoczęciu nagrywania
+        cls.LOCAL_MODEL_IDLE_TIMEOUT = float(os.getenv('LOCAL_MODEL_IDLE_TIMEOUT', '0'))  # sekundy
+        # Dekodowanie w osobnym procesie (audio przez pamięć współdzieloną, restart po awarii)
+        cls.LOCAL_WORKER_PROCESS = _env_flag('LOCAL_WORKER_PROCESS', False)
+        cls.LOCAL_WORKER_START_TIMEOUT = float(os.getenv('LOCAL_WORKER_START_TIMEOUT', '300'))  # sekundy
+        cls.LOCAL_WORKER_MAX_RESTARTS = int(os.getenv('LOCAL_WORKER_MAX_RESTARTS', '5'))
+        # Wątki obliczeniowe modelu (0 = przy włączonej polityce szeregowania liczba rdzeni dekodowania)
+        cls.LOCAL_CPU_THREADS = int(os.getenv('LOCAL_CPU_THREADS', '0'))
+
+        # Polityka szeregowania: nagrywanie i UI przed dekodowaniem (python scheduling.py - pomiar)
+        cls.SCHED_POLICY_ENABLED = _env_flag('SCHED_POLICY_ENABLED', False)
+        cls.SCHED_RESERVED_CORES = int(os.getenv('SCHED_RESERVED_CORES', '1'))  # rdzenie wolne od dekodowania
+        cls.SCHED_PIN_INTERACTIVE = _env_flag('SCHED_PIN_INTERACTIVE', False)  # nagrywanie i UI tylko na nich
+        cls.SCHED_CAPTURE_NICE = int(os.getenv('SCHED_CAPTURE_NICE', '-5'))  # ujemne wymaga uprawnień
+        cls.SCHED_UI_NICE = int(os.getenv('SCHED_UI_NICE', '-2'))
+        # Dodatnie nice dekodowania pogarszało nagrywanie w pomiarze na jądrze z EEVDF (Linux >= 6.6)
+        cls.SCHED_DECODE_NICE = int(os.getenv('SCHED_DECODE_NICE', '0'))
+        cls.SCHED_DECODE_BATCH = _env_flag('SCHED_DECODE_BATCH', True)  # SCHED_BATCH dla dekodowania (Linux)
+        cls.SCHED_BACKGROUND_NICE = int(os.getenv('SCHED_BACKGROUND_NICE', '19'))  # praca w tle (zawsze, bez uprawnień)
+
+        # Kodowanie nagrania w trakcie (mono, przepróbkowanie) - plik gotowy w chwili zatrzymania
+        cls.AUDIO_ENCODE_WHILE_RECORDING = _env_flag('AUDIO_ENCODE_WHILE_RECORDING', True)
+        cls.AUDIO_ENCODER_FORMAT = os.getenv('AUDIO_ENCODER_FORMAT', 'wav').lower()  # 'wav' lub 'flac' (pakiet soundfile)
+        cls.AUDIO_ENCODER_RATE = int(os.getenv('AUDIO_ENCODER_RATE', '16000'))  # Hz
+
+        # Źródło audio: 'portaudio' (mikrofon), 'file' (WAV), 'synthetic' (generator) lub 'stdin' (s16le z potoku)
+        cls.AUDIO_SOURCE = os.getenv('AUDIO_SOURCE', 'portaudio').lower()
+        cls.AUDIO_SOURCE_PATH = os.getenv('AUDIO_SOURCE_PATH', '')  # plik WAV ('file') lub potok ('stdin', '-' = stdin)
+        cls.AUDIO_SOURCE_SPEED = float(os.getenv('AUDIO_SOURCE_SPEED', '1.0'))  # krotność czasu rzeczywistego, 0 = bez czekania
+        cls.AUDIO_SOURCE_TIMING = _env_flag('AUDIO_SOURCE_TIMING', True)  # odtwarzaj zapisane chwile odczytu bloków
+        cls.AUDIO_SOURCE_LOOP = _env_flag('AUDIO_SOURCE_LOOP', False)  # plik od początku po dojściu do końca
+        cls.AUDIO_SOURCE_SIGNAL = os.getenv('AUDIO_SOURCE_SIGNAL', 'tone').lower()  # 'tone', 'noise' lub 'silence'
+        # Zapis sesji z mikrofonu (WAV + chwile odczytu bloków) do odtworzenia: python audio_source.py replay
+        cls.AUDIO_SOURCE_RECORD_DIR = os.getenv('AUDIO_SOURCE_RECORD_DIR', '')  # puste = bez zapisu
+
+        # Adaptacyjny limit równoległych żądań do API przy transkrypcji wielu plików (AIMD)
+        cls.API_CONCURRENCY_INITIAL = int(os.getenv('API_CONCURRENCY_INITIAL', '4'))
+        cls.API_CONCURRENCY_MIN = int(os.getenv('API_CONCURRENCY_MIN', '1'))
+        cls.API_CONCURRENCY_MAX = int(os.getenv('API_CONCURRENCY_MAX', '32'))
+        cls.API_LATENCY_TOLERANCE = float(os.getenv('API_LATENCY_TOLERANCE', '2.0'))  # krotność najlepszego opóźnienia
+        cls.API_MAX_ATTEMPTS = int(os.getenv('API_MAX_ATTEMPTS', '5'))
+        cls.API_RETRY_BACKOFF = float(os.getenv('API_RETRY_BACKOFF', '1.0'))  # sekundy (bez Retry-After)
+
+        # Strażnik segmentów lokalnego modelu (pętle powtórzeń i halucynacje w ciszy)
+        cls.SEGMENT_GUARD_ENABLED = _env_flag('SEGMENT_GUARD_ENABLED', True)
+        cls.SEGMENT_GUARD_MAX_NGRAM = int(os.getenv('SEGMENT_GUARD_MAX_NGRAM', '8'))  # słowa
+        cls.SEGMENT_GUARD_MAX_REPEATS = int(os.getenv('SEGMENT_GUARD_MAX_REPEATS', '4'))
+        cls.SEGMENT_GUARD_NO_SPEECH_THRESHOLD = float(os.getenv('SEGMENT_GUARD_NO_SPEECH_THRESHOLD', '0.6'))
+        # Segment jest ciszą tylko przy wysokim no_speech_prob i niskim avg_logprob (jak w Whisperze)
+        cls.SEGMENT_GUARD_LOGPROB_THRESHOLD = float(os.getenv('SEGMENT_GUARD_LOGPROB_THRESHOLD', '-1.0'))
+        # Pętla wewnątrz jednego segmentu jest odrzucana tylko na końcu tekstu i od tej liczby słów
+        cls.SEGMENT_GUARD_MIN_LOOP_WORDS = int(os.getenv('SEGMENT_GUARD_MIN_LOOP_WORDS', '16'))
+
+        # Przetwarzanie tekstu po transkrypcji (słownik zamian i komendy mówione)
+        cls.TEXT_REPLACEMENTS_FILE = os.getenv('TEXT_REPLACEMENTS_FILE')  # linie 'fraza => zamiana'
+        cls.TEXT_SPOKEN_COMMANDS = _env_flag('TEXT_SPOKEN_COMMANDS', True)
+        cls.TEXT_REPLACEMENTS_RELOAD_INTERVAL = float(os.getenv('TEXT_REPLACEMENTS_RELOAD_INTERVAL', '1.0'))  # sekundy
+
+        # Słownictwo dziedzinowe (podpowiedź dla modelu i korekta literówek)
+        cls.VOCABULARY_FILE = os.getenv('VOCABULARY_FILE')  # jeden termin na linię
+        cls.VOCABULARY_MAX_EDIT_DISTANCE = int(os.getenv('VOCABULARY_MAX_EDIT_DISTANCE', '2'))
+        cls.VOCABULARY_PREFIX_LENGTH = int(os.getenv('VOCABULARY_PREFIX_LENGTH', '7'))
+        cls.VOCABULARY_MIN_WORD_LENGTH = int(os.getenv('VOCABULARY_MIN_WORD_LENGTH', '4'))
+        cls.VOCABULARY_PROMPT_MAX_CHARS = int(os.getenv('VOCABULARY_PROMPT_MAX_CHARS', '600'))
+        # Zwykłe słowa (lista lub .dic hunspella) - nie są poprawiane na terminy
+        cls.VOCABULARY_DICTIONARY_FILE = os.getenv('VOCABULARY_DICTIONARY_FILE')
+
+        # Język dyktowania: kod języka lub 'auto' - rozpoznanie na początku mowy (language_id.py)
+        cls.TRANSCRIPTION_LANGUAGE = os.getenv('TRANSCRIPTION_LANGUAGE', 'pl')
+        cls.LANGUAGE_ID_CANDIDATES = os.getenv('LANGUAGE_ID_CANDIDATES', 'pl,en')  # puste = wszystkie języki modelu
+        cls.LANGUAGE_ID_SECONDS = float(os.getenv('LANGUAGE_ID_SECONDS', '1.0'))  # mowa od pierwszego głośnego fragmentu
+        cls.LANGUAGE_PRIOR_FILE = os.getenv('LANGUAGE_PRIOR_FILE', os.path.join('~', '.szeptucha', 'language_prior.json'))  # puste = tylko w pamięci
+        cls.LANGUAGE_PRIOR_CONFIDENCE = float(os.getenv('LANGUAGE_PRIOR_CONFIDENCE', '0.9'))  # udział języka pomijający rozpoznanie
+        cls.LANGUAGE_PRIOR_MIN_NOTES = int(os.getenv('LANGUAGE_PRIOR_MIN_NOTES', '5'))  # rozpoznania przed pierwszym pominięciem
+        cls.LANGUAGE_PRIOR_DECAY = float(os.getenv('LANGUAGE_PRIOR_DECAY', '0.8'))  # waga poprzednich rozpoznań
+        cls.LANGUAGE_PRIOR_RECHECK = int(os.getenv('LANGUAGE_PRIOR_RECHECK', '10'))  # co które pominięcie sprawdzić mimo to (0 = nigdy)
+
+        # Wykrywanie aktywnego okna: 'auto', 'win32', 'linux' lub 'fake'
+        cls.WINDOW_PROVIDER = os.getenv('WINDOW_PROVIDER', 'auto')
+        cls.WINDOW_CACHE_TTL = float(os.getenv('WINDOW_CACHE_TTL', '1.0'))  # sekundy
+
+        # Wklejanie i pisanie tekstu
+        cls.OUTPUT_CLIPBOARD_TIMEOUT = float(os.getenv('OUTPUT_CLIPBOARD_TIMEOUT', '0.5'))  # sekundy
+        cls.OUTPUT_TYPING_BATCH_SIZE = int(os.getenv('OUTPUT_TYPING_BATCH_SIZE', '32'))  # znaki
+        cls.OUTPUT_TYPING_BATCH_DELAY = float(os.getenv('OUTPUT_TYPING_BATCH_DELAY', '0.01'))  # sekundy
+
+        # Archiwum notatek (SQLite + FTS5)
+        cls.NOTES_ENABLED = _env_flag('NOTES_ENABLED', True)
+        cls.NOTES_DB_PATH = os.getenv('NOTES_DB_PATH', os.path.join('~', '.szeptucha', 'notes.db'))
+        # Ponowna transkrypcja archiwum większym modelem w tle, gdy komputer jest bezczynny (background_refiner.py)
+        cls.REFINE_ENABLED = _env_flag('REFINE_ENABLED', False)
+        cls.REFINE_MODEL = os.getenv('REFINE_MODEL', 'large-v3')
+        cls.REFINE_DEVICE = os.getenv('REFINE_DEVICE', '')  # puste = LOCAL_DEVICE
+        cls.REFINE_COMPUTE_TYPE = os.getenv('REFINE_COMPUTE_TYPE', '')  # puste = LOCAL_COMPUTE_TYPE
+        cls.REFINE_BEAM_SIZE = int(os.getenv('REFINE_BEAM_SIZE', '5'))
+        cls.REFINE_AUDIO_DIR = os.getenv('REFINE_AUDIO_DIR', os.path.join('~', '.szeptucha', 'audio'))
+        cls.REFINE_MAX_RECORDINGS = int(os.getenv('REFINE_MAX_RECORDINGS', '200'))  # starsze nagrania są usuwane
+        cls.REFINE_IDLE_DELAY = float(os.getenv('REFINE_IDLE_DELAY', '60'))  # sekundy od ostatniego nagrania
+        cls.REFINE_MAX_CPU = float(os.getenv('REFINE_MAX_CPU', '0.3'))  # obciążenie innych procesów (0.0 - 1.0)
+        cls.REFINE_CHECK_INTERVAL = float(os.getenv('REFINE_CHECK_INTERVAL', '5'))  # sekundy
+        # Przerwa po błędzie ładowania modelu lub dekodowania (podwajana do 1 h przy kolejnych błędach)
+        cls.REFINE_RETRY_DELAY = float(os.getenv('REFINE_RETRY_DELAY', '60'))  # sekundy
+
+        # Ostatnie nagrania w pamięci (16 kHz int16) do ponownej transkrypcji bez ponownego dyktowania (recent_audio.py)
+        cls.RECENT_AUDIO_CLIPS = int(os.getenv('RECENT_AUDIO_CLIPS', '5'))  # 0 = wyłączone
+        cls.RECENT_AUDIO_MAX_MB = float(os.getenv('RECENT_AUDIO_MAX_MB', '16'))  # starsze nagrania są usuwane
+        cls.RETRANSCRIBE_HOTKEY = os.getenv('RETRANSCRIBE_HOTKEY', '')  # np. '<ctrl>+<shift>+r' (puste = brak skrótu)
+        cls.RETRANSCRIBE_MODEL = os.getenv('RETRANSCRIBE_MODEL', '')  # puste = REFINE_MODEL (lokalnie) lub whisper-1 (API)
+        cls.RETRANSCRIBE_LANGUAGE = os.getenv('RETRANSCRIBE_LANGUAGE', '')  # puste = język pierwszej transkrypcji
+        cls.RETRANSCRIBE_BEAM_SIZE = int(os.getenv('RETRANSCRIBE_BEAM_SIZE', '0'))  # 0 = domyślna szerokość wiązki
+        cls.RETRANSCRIBE_MODEL_IDLE_TIMEOUT = float(os.getenv('RETRANSCRIBE_MODEL_IDLE_TIMEOUT', '120'))  # sekundy (0 = trzymany do końca)
+
+        # Demon transkrypcji (python daemon.py serve) - klienci współdzielą jeden załadowany model
+        cls.USE_DAEMON = os.getenv('USE_DAEMON', 'auto').lower()  # 'auto' (jeśli działa) lub 'never'
+        cls.DAEMON_SOCKET = os.getenv('DAEMON_SOCKET', os.path.join('~', '.szeptucha', 'daemon.sock'))
+        cls.DAEMON_TIMEOUT = float(os.getenv('DAEMON_TIMEOUT', '120'))  # sekundy
+
+        # Farma transkrypcji: koordynator i węzły robocze po TCP (python transcription_farm.py ...)
+        cls.FARM_COORDINATOR = os.getenv('FARM_COORDINATOR', '')  # 'host:port' - aplikacja wysyła nagrania do farmy
+        cls.FARM_HOST = os.getenv('FARM_HOST', '127.0.0.1')  # adres nasłuchiwania koordynatora
+        cls.FARM_PORT = int(os.getenv('FARM_PORT', '8766'))
+        cls.FARM_WORKER_CAPACITY = int(os.getenv('FARM_WORKER_CAPACITY', '1'))  # równoległe zadania węzła
+        cls.FARM_MAX_ATTEMPTS = int(os.getenv('FARM_MAX_ATTEMPTS', '3'))  # próby zadania po utracie węzłów
+        cls.FARM_HEARTBEAT_INTERVAL = float(os.getenv('FARM_HEARTBEAT_INTERVAL', '2'))  # sekundy
+        cls.FARM_WORKER_TIMEOUT = float(os.getenv('FARM_WORKER_TIMEOUT', '10'))  # cisza, po której węzeł jest utracony
+        cls.FARM_MODEL_LOAD_COST = float(os.getenv('FARM_MODEL_LOAD_COST', '10'))  # sekundy (przed pierwszym pomiarem)
+        cls.FARM_RECONNECT_DELAY = float(os.getenv('FARM_RECONNECT_DELAY', '2'))  # sekundy
+        cls.FARM_TIMEOUT = float(os.getenv('FARM_TIMEOUT', '600'))  # sekundy oczekiwania klienta na wynik
+
+        # Lokalny serwer HTTP zgodny z OpenAI (python transcription_server.py serve)
+        cls.SERVER_HOST = os.getenv('SERVER_HOST', '127.0.0.1')
+        cls.SERVER_PORT = int(os.getenv('SERVER_PORT', '8765'))
+        cls.SERVER_MAX_BATCH_SIZE = int(os.getenv('SERVER_MAX_BATCH_SIZE', '8'))
+        cls.SERVER_MAX_BATCH_WAIT = float(os.getenv('SERVER_MAX_BATCH_WAIT', '0.02'))  # sekundy
+        cls.SERVER_REQUEST_TIMEOUT = float(os.getenv('SERVER_REQUEST_TIMEOUT', '300'))  # sekundy
+
+        # Śledzenie przebiegu wypowiedzi (pliki trace-event JSON do ui.perfetto.dev / chrome://tracing)
+        cls.TRACE_ENABLED = _env_flag('TRACE_ENABLED', False)
+        cls.TRACE_DIR = os.getenv('TRACE_DIR', os.path.join('~', '.szeptucha', 'traces'))
+
+        # Dyktowanie ciągłe: wypowiedź kończy się po ciszy i trafia do transkrypcji, a nagrywanie trwa dalej
+        cls.ENDPOINT_ENABLED = _env_flag('ENDPOINT_ENABLED', False)
+        cls.ENDPOINT_SILENCE = float(os.getenv('ENDPOINT_SILENCE', '0.8'))  # sekundy ciszy kończące wypowiedź
+        cls.ENDPOINT_THRESHOLD = float(os.getenv('ENDPOINT_THRESHOLD', '0.01'))  # RMS mowy (0.0 - 1.0)
+        cls.ENDPOINT_MIN_SPEECH = float(os.getenv('ENDPOINT_MIN_SPEECH', '0.25'))  # krótsze fragmenty to trzaski
+        cls.ENDPOINT_MAX_UTTERANCE = float(os.getenv('ENDPOINT_MAX_UTTERANCE', '30'))  # wymuszony podział (s)
+        cls.ENDPOINT_PREROLL = float(os.getenv('ENDPOINT_PREROLL', '0.3'))  # cisza przed mową (s)
+
+        # Profilowanie sesji (cProfile + tracemalloc) - włączone od startu lub przełączane skrótem
+        cls.PROFILE_ENABLED = _env_flag('PROFILE_ENABLED', False)
+        cls.PROFILE_HOTKEY = os.getenv('PROFILE_HOTKEY', '')  # np. '<ctrl>+<shift>+<f12>' (puste = brak skrótu)
+        cls.PROFILE_DIR = os.getenv('PROFILE_DIR', os.path.join('~', '.szeptucha', 'profiles'))
+        cls.PROFILE_MAX_SESSIONS = int(os.getenv('PROFILE_MAX_SESSIONS', '10'))  # starsze sesje są usuwane
+        cls.PROFILE_MAX_SECONDS = float(os.getenv('PROFILE_MAX_SECONDS', '300'))  # 0 = bez limitu
+        cls.PROFILE_TRACEMALLOC = _env_flag('PROFILE_TRACEMALLOC', True)
+        cls.PROFILE_TRACEMALLOC_FRAMES = int(os.getenv('PROFILE_TRACEMALLOC_FRAMES', '1'))
+        cls.PROFILE_TOP_FUNCTIONS = int(os.getenv('PROFILE_TOP_FUNCTIONS', '30'))
+        cls.PROFILE_TOP_ALLOCATIONS = int(os.getenv('PROFILE_TOP_ALLOCATIONS', '25'))
+
+        # Budżet czasu zimnego importu modułów (python import_budget.py)
+        cls.IMPORT_TIME_BUDGET_MS = float(os.getenv('IMPORT_TIME_BUDGET_MS', '150'))
+    
     @classmethod
     def validate(cls):
         """Waliduje konfigurację"""
@@ -45,4 +222,24 @@ class Config:
         if cls.TRANSCRIPTION_MODE == 'api' and not cls.OPENAI_API_KEY:
             raise ValueError("Brak klucza API OpenAI w trybie 'api'. Ustaw OPENAI_API_KEY lub zmień TRANSCRIPTION_MODE na 'local' lub 'auto'.")
         # W trybie 'local' lub 'auto' bez klucza — akceptujemy konfigurację
-        return True
\ No newline at end of file
+        return True
+
+
+# Odczyt z os.environ (bez plików) - plik .env wczytuje load_environment() w punktach wejścia
+Config.reload()
+
+
+def load_environment(dotenv_path=None):
+    """
+    Wczytuje zmienne z pliku .env i odświeża konfigurację
+    
+    Args:
+        dotenv_path: Ścieżka do pliku .env (domyślnie wyszukiwany automatycznie)
+    """
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        print("⚠️ Brak pakietu python-dotenv - pomijam wczytywanie pliku .env")
+    else:
+        load_dotenv(dotenv_path)
+    Config.reload()
@@ -0,0 +1,490 @@
+"""
+Moduł demona transkrypcji - jedna instancja z "ciepłym" modelem obsługująca klientów przez gniazdo Unix
+"""
+import argparse
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+from typing import Optional
+from config import Config, load_environment
+
+
+class TranscriptionDaemon:
+    """
+    Demon trzymający w pamięci serwis transkrypcji i recorder audio.
+
+    Klienci (okno ze skrótem klawiszowym, CLI, wtyczki edytorów) łączą się
+    przez gniazdo Unix i wysyłają polecenia w postaci linii JSON. Model jest
+    ładowany raz, przy starcie demona.
+    """
+
+    def __init__(self, socket_path: Optional[str] = None):
+        """
+        Inicjalizuje demona
+
+        Args:
+            socket_path: Ścieżka gniazda (domyślnie z config)
+        """
+        self.socket_path = os.path.expanduser(socket_path or Config.DAEMON_SOCKET)
+        self.transcription_service = None
+        self.audio_recorder = None
+        self.server: Optional[socketserver.BaseServer] = None
+        # Jedna transkrypcja naraz - model i tak nie obsługuje równoległych wywołań wydajniej
+        self._transcribe_lock = threading.Lock()
+        self._recorder_lock = threading.Lock()
+
+    def serve_forever(self):
+        """Ładuje model, otwiera gniazdo i obsługuje klientów do czasu zatrzymania"""
+        if not hasattr(socket, 'AF_UNIX'):
+            raise RuntimeError("Gniazda Unix nie są dostępne na tej platformie")
+
+        if DaemonClient(self.socket_path).ping() is not None:
+            raise RuntimeError(f"Demon już działa: {self.socket_path}")
+
+        started = time.perf_counter()
+        from transcription_service import TranscriptionService
+        from vocabulary import VocabularyCorrector
+        vocabulary = VocabularyCorrector() if Config.VOCABULARY_FILE else None
+        self.transcription_service = TranscriptionService(vocabulary=vocabulary)
+        print(f"✅ Model gotowy w {time.perf_counter() - started:.2f} s")
+
+        # Usuń pozostałość po poprzednim (zakończonym) demonie
+        directory = os.path.dirname(self.socket_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+        daemon = self
+
+        class _Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                # Połączenie może przenosić wiele żądań (po jednym na linię)
+                for line in self.rfile:
+                    if not line.strip():
+                        continue
+                    response = daemon.handle_request(line)
+                    self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b"\n")
+                    self.wfile.flush()
+
+        class _Server(socketserver.ThreadingUnixStreamServer):
+            daemon_threads = True
+
+        self.server = _Server(self.socket_path, _Handler)
+        os.chmod(self.socket_path, 0o600)
+        print(f"🛰️ Demon transkrypcji nasłuchuje na {self.socket_path}")
+
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
+            print("👋 Demon transkrypcji zatrzymany")
+
+    def handle_request(self, raw: bytes) -> dict:
+        """
+        Obsługuje pojedyncze żądanie klienta
+
+        Args:
+            raw: Linia JSON z polem "command"
+
+        Returns:
+            dict: Odpowiedź z polem "ok"
+        """
+        try:
+            request = json.loads(raw)
+            command = request.get('command')
+            handler = getattr(self, f"_cmd_{command}", None)
+            if handler is None:
+                return {'ok': False, 'error': f"Nieznane polecenie: {command}"}
+            return handler(request)
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}
+
+    def _cmd_ping(self, request: dict) -> dict:
+        return {
+            'ok': True,
+            'pid': os.getpid(),
+            'mode': self.transcription_service.mode,
+            'model': self.transcription_service.model_name,
+        }
+
+    def _cmd_status(self, request: dict) -> dict:
+        status = self._cmd_ping(request)
+        status['is_recording'] = bool(self.audio_recorder and self.audio_recorder.is_recording)
+        status['model_stats'] = self.transcription_service.model_stats()
+        limiter = self.transcription_service.api_limiter
+        status['api_limiter'] = limiter.stats() if limiter else None
+        return status
+
+    def _cmd_prepare(self, request: dict) -> dict:
+        self.transcription_service.prepare()
+        return {'ok': True}
+
+    def _cmd_reconfigure(self, request: dict) -> dict:
+        wait = bool(request.get('wait'))
+        self.transcription_service.reconfigure(
+            mode=request.get('mode'),
+            model_name=request.get('model_name'),
+            device=request.get('device'),
+            compute_type=request.get('compute_type'),
+            wait=wait,
+        )
+        error = self.transcription_service.last_reconfigure_error if wait else None
+        return {
+            'ok': error is None,
+            'error': error,
+            'mode': self.transcription_service.mode,
+            'model': self.transcription_service.model_name,
+        }
+
+    def _cmd_transcribe(self, request: dict) -> dict:
+        path = request.get('path')
+        if not path:
+            return {'ok': False, 'error': "Brak ścieżki do pliku audio"}
+
+        started = time.perf_counter()
+        with self._transcribe_lock:
+            result = self.transcription_service.transcribe(
+                path, request.get('language', 'pl'),
+                model_name=request.get('model_name'), beam_size=request.get('beam_size'),
+            )
+        return {
+            'ok': result.text is not None,
+            'text': result.text,
+            'language': result.language,
+            'language_time': result.language_time,
+            'model_wait': result.model_wait,
+            'model': result.model,
+            'elapsed': time.perf_counter() - started,
+        }
+
+    def _cmd_start(self, request: dict) -> dict:
+        with self._recorder_lock:
+            if self.audio_recorder is None:
+                from audio_recorder import AudioRecorder
+                self.audio_recorder = AudioRecorder()
+            started = self.audio_recorder.start_recording()
+        if started:
+            self.transcription_service.prepare()
+        return {'ok': started}
+
+    def _cmd_stop(self, request: dict) -> dict:
+        with self._recorder_lock:
+            if not self.audio_recorder or not self.audio_recorder.is_recording:
+                return {'ok': False, 'error': "Nagrywanie nie jest aktywne"}
+            audio_file_path = self.audio_recorder.stop_recording()
+
+        if not audio_file_path:
+            return {'ok': False, 'error': "Nie udało się zapisać pliku audio"}
+        try:
+            return self._cmd_transcribe({'path': audio_file_path, 'language': request.get('language', 'pl')})
+        finally:
+            self.audio_recorder.cleanup_temp_file(audio_file_path)
+
+    def _cmd_toggle(self, request: dict) -> dict:
+        if self.audio_recorder and self.audio_recorder.is_recording:
+            return self._cmd_stop(request)
+        return self._cmd_start(request)
+
+    def _cmd_shutdown(self, request: dict) -> dict:
+        # serve_forever() musi zostać zatrzymane z innego wątku niż obsługujący żądanie
+        threading.Thread(target=self.server.shutdown, daemon=True).start()
+        return {'ok': True}
+
+
+class DaemonClient:
+    """
+    Lekki klient demona transkrypcji.
+
+    Udostępnia ten sam interfejs co TranscriptionService
+    (`transcribe_audio_file`, `mode`, `model_name`), więc aplikacja może
+    używać go zamiennie, bez ładowania własnego modelu.
+    """
+
+    def __init__(self, socket_path: Optional[str] = None, timeout: Optional[float] = None):
+        """
+        Inicjalizuje klienta
+
+        Args:
+            socket_path: Ścieżka gniazda (domyślnie z config)
+            timeout: Limit czasu odpowiedzi w sekundach (domyślnie z config)
+        """
+        self.socket_path = os.path.expanduser(socket_path or Config.DAEMON_SOCKET)
+        self.timeout = timeout if timeout is not None else Config.DAEMON_TIMEOUT
+        self.mode = None
+        self.model_name = None
+        self._sock: Optional[socket.socket] = None
+        self._reader = None
+        self._lock = threading.Lock()
+
+    def request(self, command: str, **params) -> dict:
+        """
+        Wysyła polecenie do demona (połączenie jest utrzymywane między wywołaniami)
+
+        Args:
+            command: Nazwa polecenia
+            **params: Parametry polecenia
+
+        Returns:
+            dict: Odpowiedź demona
+        """
+        payload = json.dumps({'command': command, **params}, ensure_ascii=False).encode('utf-8') + b"\n"
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    self._sock.sendall(payload)
+                    line = self._reader.readline()
+                    if not line:
+                        raise ConnectionError("Demon zamknął połączenie")
+                    return json.loads(line)
+                except (OSError, ConnectionError):
+                    # Połączenie mogło wygasnąć (np. restart demona) - spróbuj raz ponownie
+                    self.close()
+                    if attempt:
+                        raise
+
+    def ping(self) -> Optional[dict]:
+        """
+        Sprawdza, czy demon działa
+
+        Returns:
+            Optional[dict]: Informacje o demonie lub None, jeśli jest niedostępny
+        """
+        if not hasattr(socket, 'AF_UNIX') or not os.path.exists(self.socket_path):
+            return None
+        try:
+            response = self.request('ping')
+        except (OSError, ConnectionError, ValueError):
+            return None
+        if response.get('ok'):
+            self.mode = response.get('mode')
+            self.model_name = response.get('model')
+            return response
+        return None
+
+    def prepare(self):
+        """Prosi demona o załadowanie zwolnionego modelu (na początku nagrywania)"""
+        try:
+            self.request('prepare')
+        except (OSError, ConnectionError, ValueError):
+            pass
+
+    def reconfigure(self, mode: Optional[str] = None, model_name: Optional[str] = None,
+                    device: Optional[str] = None, compute_type: Optional[str] = None,
+                    wait: bool = False) -> bool:
+        """
+        Zleca demonowi zmianę backendu lub modelu (parametry jak w TranscriptionService.reconfigure)
+
+        Returns:
+            bool: True jeśli demon przyjął (lub przy wait=True wykonał) przełączenie
+        """
+        try:
+            response = self.request('reconfigure', mode=mode, model_name=model_name,
+                                    device=device, compute_type=compute_type, wait=wait)
+        except (OSError, ConnectionError, ValueError) as e:
+            print(f"❌ Błąd komunikacji z demonem transkrypcji: {e}")
+            return False
+        self.mode = response.get('mode')
+        self.model_name = response.get('model')
+        if not response.get('ok'):
+            print(f"❌ Demon nie przełączył modelu: {response.get('error')}")
+        return bool(response.get('ok'))
+
+    def transcribe_audio_file(self, audio_file_path: str, language: str = "pl",
+                              model_name: Optional[str] = None, beam_size: Optional[int] = None) -> Optional[str]:
+        """
+        Zleca demonowi transkrypcję pliku audio
+
+        Args:
+            audio_file_path: Ścieżka do pliku audio (demon działa na tej samej maszynie)
+            language: Kod języka ('auto' - rozpoznaje demon, z rozkładem języków użytkownika)
+            model_name: Inny model tylko dla tego nagrania (domyślnie bieżący model demona)
+            beam_size: Szerokość wiązki lokalnego modelu
+
+        Returns:
+            Optional[str]: Transkrybowany tekst lub None w przypadku błędu
+        """
+        return self.transcribe(audio_file_path, language, model_name, beam_size).text
+
+    def transcribe_samples(self, samples, language: str = "pl", model_name: Optional[str] = None,
+                           beam_size: Optional[int] = None) -> Optional[str]:
+        """
+        Zleca demonowi transkrypcję próbek int16 16 kHz mono (przez tymczasowy plik WAV)
+
+        Parametry jak w TranscriptionService.transcribe_samples.
+        """
+        return self.transcribe(samples, language, model_name, beam_size).text
+
+    def transcribe(self, audio, language: str = "pl", model_name: Optional[str] = None,
+                   beam_size: Optional[int] = None):
+        """
+        Zleca demonowi transkrypcję pliku lub próbek (jak TranscriptionService.transcribe)
+
+        Returns:
+            TranscriptionResult: Tekst z językiem i czasami tego wywołania (text=None w przypadku błędu)
+        """
+        from transcription_service import TranscriptionResult
+        if isinstance(audio, str):
+            return self._transcribe_file(audio, language, model_name, beam_size)
+
+        import tempfile
+        import wave
+        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
+            path = tmp.name
+        try:
+            with wave.open(path, 'wb') as wf:
+                wf.setnchannels(1)
+                wf.setsampwidth(2)
+                wf.setframerate(16000)
+                wf.writeframes(audio.astype('<i2').tobytes())
+            return self._transcribe_file(path, language, model_name, beam_size)
+        except OSError as e:
+            print(f"❌ Nie udało się zapisać próbek dla demona: {e}")
+            return TranscriptionResult(language=language, model=model_name)
+        finally:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    def _transcribe_file(self, audio_file_path: str, language: str, model_name: Optional[str],
+                         beam_size: Optional[int]):
+        """Wysyła polecenie transkrypcji pliku i składa wynik z odpowiedzi demona"""
+        from transcription_service import TranscriptionResult
+        result = TranscriptionResult(language=language, model=model_name)
+        try:
+            response = self.request('transcribe', path=os.path.abspath(audio_file_path), language=language,
+                                    model_name=model_name, beam_size=beam_size)
+        except (OSError, ConnectionError, ValueError) as e:
+            print(f"❌ Błąd komunikacji z demonem transkrypcji: {e}")
+            return result
+        if not response.get('ok'):
+            print(f"❌ Błąd transkrypcji w demonie: {response.get('error', 'brak tekstu')}")
+            return result
+        result.text = response.get('text')
+        result.language = response.get('language')
+        result.language_time = response.get('language_time') or 0.0
+        result.model_wait = response.get('model_wait') or 0.0
+        result.model = response.get('model') or model_name
+        return result
+
+    def close(self):
+        """Zamyka połączenie z demonem"""
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = None
+        self._reader = None
+
+    def _connect(self):
+        """Otwiera połączenie z gniazdem demona"""
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self._sock = sock
+        self._reader = sock.makefile('rb')
+
+
+def connect_to_daemon() -> Optional[DaemonClient]:
+    """
+    Łączy się z działającym demonem, jeśli jest włączony w konfiguracji
+
+    Returns:
+        Optional[DaemonClient]: Klient lub None, gdy demon nie działa
+    """
+    if Config.USE_DAEMON == 'never':
+        return None
+    client = DaemonClient()
+    info = client.ping()
+    if info is None:
+        return None
+    print(f"🛰️ Używam demona transkrypcji (pid {info['pid']}, model: {info.get('model')})")
+    return client
+
+
+def main(argv=None):
+    """Wiersz poleceń demona i jego klienta"""
+    parser = argparse.ArgumentParser(description="Demon transkrypcji Voice Notes")
+    parser.add_argument('--socket', help="Ścieżka gniazda (domyślnie DAEMON_SOCKET)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('serve', help="Uruchom demona")
+
+    transcribe_parser = subparsers.add_parser('transcribe', help="Transkrybuj plik audio")
+    transcribe_parser.add_argument('path')
+    transcribe_parser.add_argument('-l', '--language', default='pl')
+
+    ping_parser = subparsers.add_parser('ping', help="Zmierz opóźnienie komunikacji z demonem")
+    ping_parser.add_argument('-n', '--count', type=int, default=20)
+
+    reconfigure_parser = subparsers.add_parser('reconfigure', help="Zmień backend lub model bez restartu demona")
+    reconfigure_parser.add_argument('--mode', choices=('api', 'local', 'auto'))
+    reconfigure_parser.add_argument('--model', dest='model_name', help="Nazwa lokalnego modelu Whisper")
+    reconfigure_parser.add_argument('--device')
+    reconfigure_parser.add_argument('--compute-type', dest='compute_type')
+
+    for name, help_text in (('toggle', "Rozpocznij/zatrzymaj nagrywanie w demonie"),
+                            ('status', "Stan demona"),
+                            ('shutdown', "Zatrzymaj demona")):
+        subparsers.add_parser(name, help=help_text)
+
+    args = parser.parse_args(argv)
+    load_environment()
+
+    if args.command == 'serve':
+        try:
+            TranscriptionDaemon(args.socket).serve_forever()
+        except KeyboardInterrupt:
+            pass
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        return
+
+    client = DaemonClient(args.socket)
+    if client.ping() is None:
+        print("❌ Demon transkrypcji nie działa (uruchom: python daemon.py serve)")
+        sys.exit(1)
+
+    try:
+        if args.command == 'transcribe':
+            started = time.perf_counter()
+            text = client.transcribe_audio_file(args.path, args.language)
+            print(text or "")
+            print(f"⏱️ {(time.perf_counter() - started) * 1000:.0f} ms", file=sys.stderr)
+            sys.exit(0 if text else 1)
+        elif args.command == 'reconfigure':
+            started = time.perf_counter()
+            ok = client.reconfigure(args.mode, args.model_name, args.device, args.compute_type, wait=True)
+            print(f"{'✅' if ok else '❌'} {client.mode} ({client.model_name}) "
+                  f"w {time.perf_counter() - started:.2f} s")
+            sys.exit(0 if ok else 1)
+        elif args.command == 'ping':
+            samples = []
+            for _ in range(max(1, args.count)):
+                started = time.perf_counter()
+                client.request('ping')
+                samples.append((time.perf_counter() - started) * 1000)
+            samples.sort()
+            print(f"⏱️ Opóźnienie (ms): min {samples[0]:.3f}, "
+                  f"mediana {samples[len(samples) // 2]:.3f}, max {samples[-1]:.3f}")
+        else:
+            print(json.dumps(client.request(args.command), ensure_ascii=False))
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,9 +2,13 @@
 Moduł do zarządzania skrótami klawiszowymi
 """
 import time
-from typing import Callable, Optional
-from pynput import keyboard as pynput_keyboard
+from typing import TYPE_CHECKING, Callable, Dict, Optional
 from config import Config
+import profiler
+import tracing
+
+if TYPE_CHECKING:
+    from pynput import keyboard as pynput_keyboard
 
 
 class HotkeyManager:
@@ -18,8 +22,10 @@ class HotkeyManager:
             callback: Funkcja wywoływana po naciśnięciu skrótu
         """
         self.callback = callback
-        self.hotkey_listener: Optional[pynput_keyboard.GlobalHotKeys] = None
+        self.hotkey_listener: Optional["pynput_keyboard.GlobalHotKeys"] = None
         self.last_toggle_ts = 0.0  # Debounce dla skrótu
+        # Dodatkowe skróty (np. przełączanie profilowania) rejestrowane w tym samym listenerze
+        self.extra_hotkeys: Dict[str, Callable[[], None]] = {}
         
     def setup_hotkey(self, hotkey_combination: str = None) -> bool:
         """
@@ -38,10 +44,14 @@ class HotkeyManager:
             # Zatrzymaj poprzedni listener jeśli istnieje
             self.stop_hotkey()
             
-            # Utwórz nowy listener
-            self.hotkey_listener = pynput_keyboard.GlobalHotKeys({
-                hotkey_combination: self._on_hotkey
-            })
+            # Utwórz nowy listener (pynput ładowany dopiero tutaj)
+            from pynput import keyboard as pynput_keyboard
+            hotkeys = {
+                combination: self._wrap_extra_hotkey(callback)
+                for combination, callback in self.extra_hotkeys.items()
+            }
+            hotkeys[hotkey_combination] = self._on_hotkey
+            self.hotkey_listener = pynput_keyboard.GlobalHotKeys(hotkeys)
             
             self.hotkey_listener.start()
             print(f"🔥 Skrót klawiszowy {hotkey_combination} został aktywowany!")
@@ -51,6 +61,26 @@ class HotkeyManager:
             print(f"❌ Błąd podczas konfiguracji skrótu klawiszowego: {e}")
             return False
     
+    def add_hotkey(self, combination: str, callback: Callable[[], None]):
+        """
+        Rejestruje dodatkowy skrót klawiszowy (aktywny od następnego setup_hotkey)
+        
+        Args:
+            combination: Kombinacja klawiszy (np. '<ctrl>+<shift>+<f12>')
+            callback: Funkcja wywoływana po naciśnięciu skrótu
+        """
+        self.extra_hotkeys[combination] = callback
+    
+    @staticmethod
+    def _wrap_extra_hotkey(callback: Callable[[], None]) -> Callable[[], None]:
+        """Chroni listener przed wyjątkami z obsługi dodatkowego skrótu"""
+        def handler():
+            try:
+                callback()
+            except Exception as e:
+                print(f"❌ Błąd podczas obsługi skrótu klawiszowego: {e}")
+        return handler
+    
     def _on_hotkey(self):
         """Obsługuje naciśnięcie skrótu klawiszowego z debounce"""
         # Debounce, żeby uniknąć podwójnych wywołań
@@ -60,10 +90,15 @@ class HotkeyManager:
             
         self.last_toggle_ts = now
         
-        try:
-            self.callback()
-        except Exception as e:
-            print(f"❌ Błąd podczas obsługi skrótu klawiszowego: {e}")
+        # Ślad wypowiedzi obejmuje oba naciśnięcia (start i stop nagrywania);
+        # ślad zapisuje się po wklejeniu tekstu, więc skrót jest zdarzeniem chwilowym, nie zakresem
+        # Zatrzymanie nagrania wykonuje transkrypcję i przetwarzanie tekstu w tym wątku
+        with tracing.use_trace(tracing.begin_utterance()), profiler.section():
+            tracing.instant('hotkey')
+            try:
+                self.callback()
+            except Exception as e:
+                print(f"❌ Błąd podczas obsługi skrótu klawiszowego: {e}")
     
     def stop_hotkey(self):
         """Zatrzymuje nasłuchiwanie skrótów klawiszowych"""
@@ -0,0 +1,98 @@
+"""
+Pomiar czasu zimnego importu modułów (python -X importtime) z limitem budżetu
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from typing import List, Tuple
+from config import Config, load_environment
+
+# Linia wyjścia -X importtime: "import time: self [us] | cumulative | imported package"
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+# Moduły, których import nie powinien ładować ciężkich zależności
+DEFAULT_MODULES = ['config', 'main', 'voice_notes_app']
+
+# Zależności ładowane dopiero przy pierwszym użyciu komponentu
+HEAVY_MODULES = ('tkinter', 'pyaudio', 'numpy', 'pynput', 'pyperclip', 'win32gui',
+                 'openai', 'faster_whisper', 'dotenv')
+
+
+def measure_import(module: str, cwd: str) -> Tuple[float, List[Tuple[str, float, int]]]:
+    """
+    Importuje moduł w nowym interpreterze i odczytuje czasy z -X importtime
+
+    Args:
+        module: Nazwa modułu do zaimportowania
+        cwd: Katalog roboczy interpretera
+
+    Returns:
+        Tuple: (czas importu w ms, importy zależne jako (moduł, czas skumulowany w ms, poziom zagnieżdżenia))
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+        cwd=cwd, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Import {module} nie powiódł się:\n{result.stderr.strip()[-2000:]}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            _, cumulative, indent, name = match.groups()
+            entries.append((name, int(cumulative) / 1000, len(indent) // 2))
+
+    # Wpis badanego modułu jest ostatnim na poziomie 0; jego poddrzewo to wpisy
+    # od poprzedniego wpisu poziomu 0 (importy startowe interpretera są pomijane)
+    top = max(i for i, (name, _, depth) in enumerate(entries) if depth == 0 and name == module)
+    start = top
+    while start > 0 and entries[start - 1][2] > 0:
+        start -= 1
+    return entries[top][1], entries[start:top]
+
+
+def main(argv=None):
+    """Wiersz poleceń pomiaru importu (kod wyjścia 1 po przekroczeniu budżetu)"""
+    load_environment()
+    parser = argparse.ArgumentParser(description="Budżet czasu importu Voice Notes")
+    parser.add_argument('modules', nargs='*', default=DEFAULT_MODULES)
+    parser.add_argument('--budget', type=float, default=Config.IMPORT_TIME_BUDGET_MS,
+                        help="Limit czasu importu w ms (domyślnie IMPORT_TIME_BUDGET_MS)")
+    parser.add_argument('--package', action='store_true',
+                        help="Zmierz także import całego pakietu (z katalogu nadrzędnego)")
+    parser.add_argument('-n', '--top', type=int, default=5, help="Liczba najwolniejszych importów do pokazania")
+    args = parser.parse_args(argv)
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    targets = [(module, here) for module in args.modules]
+    if args.package:
+        targets.append((os.path.basename(here), os.path.dirname(here)))
+
+    failed = False
+    for module, cwd in targets:
+        try:
+            total, entries = measure_import(module, cwd)
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            failed = True
+            continue
+
+        heavy = sorted({name.split('.')[0] for name, _, _ in entries} & set(HEAVY_MODULES))
+        over = total > args.budget
+        failed = failed or over or bool(heavy)
+        print(f"{'❌' if over else '✅'} import {module}: {total:.1f} ms (budżet {args.budget:.0f} ms)")
+        if heavy:
+            print(f"   ⚠️ Ciężkie zależności ładowane przy imporcie: {', '.join(heavy)}")
+        # Najwolniejsze bezpośrednie importy (poziom 1 pod badanym modułem)
+        children = sorted((e for e in entries if e[2] == 1), key=lambda e: e[1], reverse=True)
+        for name, ms, _ in children[:args.top]:
+            print(f"   {ms:8.1f} ms  {name}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,388 @@
+"""
+Moduł rozpoznawania języka mowy - na krótkim fragmencie z mową, z zapamiętanymi językami użytkownika
+
+Przy TRANSCRIPTION_LANGUAGE=auto język jest rozpoznawany na pierwszych
+LANGUAGE_ID_SECONDS sekundach od początku mowy (cisza na początku nagrania
+jest pomijana), a model dekoduje całe nagranie już w wybranym języku.
+Wyniki trafiają do rozkładu języków użytkownika (LANGUAGE_PRIOR_FILE);
+gdy jeden język wyraźnie dominuje, rozpoznanie jest pomijane, z kontrolą
+co LANGUAGE_PRIOR_RECHECK nagrań.
+
+    python language_id.py status
+    python language_id.py bench nagranie.wav --model small
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from config import Config, load_environment
+import scheduling
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Wartość TRANSCRIPTION_LANGUAGE (i parametru language) włączająca rozpoznawanie
+AUTO = 'auto'
+
+# Częstotliwość próbkowania oczekiwana przez Whisper
+SAMPLE_RATE = 16000
+
+# Ramka oceny głośności i margines przed pierwszą głośną ramką
+_FRAME = 480  # 30 ms
+_PAD = 1600  # 100 ms
+
+
+def speech_prefix(samples: "np.ndarray", seconds: Optional[float] = None,
+                  threshold: Optional[float] = None) -> Optional["np.ndarray"]:
+    """
+    Wycina fragment od początku mowy (pierwszej ramki o RMS ponad progiem)
+
+    Args:
+        samples: Próbki 16 kHz mono (int16 lub float32 w zakresie -1..1)
+        seconds: Długość fragmentu (domyślnie LANGUAGE_ID_SECONDS)
+        threshold: Próg RMS mowy 0.0 - 1.0 (domyślnie ENDPOINT_THRESHOLD)
+
+    Returns:
+        Optional[np.ndarray]: Próbki float32 lub None, gdy nagranie nie zawiera mowy
+    """
+    import numpy as np
+    seconds = seconds if seconds is not None else Config.LANGUAGE_ID_SECONDS
+    threshold = threshold if threshold is not None else Config.ENDPOINT_THRESHOLD
+    audio = samples.astype(np.float32) / 32768.0 if samples.dtype == np.int16 else samples
+    frames = len(audio) // _FRAME
+    if not frames:
+        return None
+    rms = np.sqrt(np.mean(audio[:frames * _FRAME].reshape(frames, _FRAME) ** 2, axis=1))
+    loud = np.flatnonzero(rms >= threshold)
+    if not len(loud):
+        return None
+    start = max(0, int(loud[0]) * _FRAME - _PAD)
+    return audio[start:start + int(seconds * SAMPLE_RATE)]
+
+
+class LanguagePrior:
+    """
+    Rozkład języków użytkownika z wygaszaniem starszych rozpoznań, zapisywany w pliku JSON
+
+    Uczą go tylko faktyczne rozpoznania - język przyjęty bez rozpoznania nie
+    wzmacnia sam siebie, a okresowa kontrola pozwala zauważyć zmianę języka.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: Plik rozkładu (domyślnie LANGUAGE_PRIOR_FILE; pusty - tylko w pamięci)
+        """
+        path = path if path is not None else Config.LANGUAGE_PRIOR_FILE
+        self.path = os.path.expanduser(path) if path else None
+        self.confidence = Config.LANGUAGE_PRIOR_CONFIDENCE
+        self.min_notes = Config.LANGUAGE_PRIOR_MIN_NOTES
+        self.decay = Config.LANGUAGE_PRIOR_DECAY
+        self.recheck = Config.LANGUAGE_PRIOR_RECHECK
+        self.weights: Dict[str, float] = {}
+        self.observations = 0
+        self._skipped_since_check = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    def best(self) -> Tuple[Optional[str], float]:
+        """
+        Zwraca najczęstszy język i jego udział w rozkładzie
+
+        Returns:
+            Tuple[Optional[str], float]: Kod języka (None - brak rozpoznań) i udział 0.0 - 1.0
+        """
+        with self._lock:
+            return self._best_locked()
+
+    def choose(self) -> Optional[str]:
+        """
+        Zwraca język, który można przyjąć bez rozpoznawania
+
+        Returns:
+            Optional[str]: Pewny język lub None - trzeba rozpoznać (brak pewności lub czas na kontrolę)
+        """
+        with self._lock:
+            language, share = self._best_locked()
+            if language is None or self.observations < self.min_notes or share < self.confidence:
+                return None
+            if self.recheck and self._skipped_since_check >= self.recheck:
+                self._skipped_since_check = 0
+                return None
+            self._skipped_since_check += 1
+            return language
+
+    def observe(self, language: str):
+        """Dodaje rozpoznany język do rozkładu i zapisuje go"""
+        with self._lock:
+            for key in self.weights:
+                self.weights[key] *= self.decay
+            self.weights[language] = self.weights.get(language, 0.0) + 1.0
+            self.observations += 1
+            state = {'weights': dict(self.weights), 'observations': self.observations}
+        self._save(state)
+
+    def reset(self):
+        """Zapomina rozkład języków"""
+        with self._lock:
+            self.weights = {}
+            self.observations = 0
+            self._skipped_since_check = 0
+        if self.path and os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def describe(self) -> str:
+        """Opis rozkładu do komunikatów"""
+        with self._lock:
+            total = sum(self.weights.values())
+            shares = sorted(self.weights.items(), key=lambda item: -item[1])
+            observations = self.observations
+        if not total:
+            return "brak rozpoznań"
+        return ", ".join(f"{language} {weight / total:.0%}" for language, weight in shares) + f" ({observations} rozpoznań)"
+
+    def _best_locked(self) -> Tuple[Optional[str], float]:
+        total = sum(self.weights.values())
+        if not total:
+            return None, 0.0
+        language = max(self.weights, key=self.weights.get)
+        return language, self.weights[language] / total
+
+    def _load(self):
+        """Wczytuje rozkład z pliku (uszkodzony plik jest pomijany)"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                state = json.load(f)
+            self.weights = {str(key): float(value) for key, value in state.get('weights', {}).items()}
+            self.observations = int(state.get('observations', 0))
+        except (OSError, ValueError, AttributeError) as e:
+            print(f"⚠️ Nie udało się wczytać języków użytkownika z {self.path}: {e}")
+
+    def _save(self, state: dict):
+        """Zapisuje rozkład atomowo (zamiana pliku tymczasowego)"""
+        if not self.path:
+            return
+        try:
+            directory = os.path.dirname(self.path) or '.'
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"⚠️ Nie udało się zapisać języków użytkownika: {e}")
+
+
+class LanguageIdentifier:
+    """
+    Wybiera język nagrania: z rozkładu użytkownika albo rozpoznaniem na początku mowy
+
+    Rozpoznanie używa podanego modelu lokalnego (transcribe bez języka; strumień
+    segmentów jest zamykany przed dekodowaniem, więc działa tylko koder
+    i jeden krok wykrywania języka).
+    """
+
+    def __init__(self, prior: Optional[LanguagePrior] = None, candidates: Optional[List[str]] = None,
+                 seconds: Optional[float] = None):
+        """
+        Args:
+            prior: Rozkład języków użytkownika (None - rozpoznanie przy każdym nagraniu,
+                np. na współdzielonym węźle farmy)
+            candidates: Dopuszczalne języki (domyślnie LANGUAGE_ID_CANDIDATES; puste - wszystkie)
+            seconds: Długość rozpoznawanego fragmentu (domyślnie LANGUAGE_ID_SECONDS)
+        """
+        self.prior = prior
+        if candidates is None:
+            candidates = [code.strip() for code in Config.LANGUAGE_ID_CANDIDATES.split(',') if code.strip()]
+        self.candidates = candidates
+        self.seconds = seconds if seconds is not None else Config.LANGUAGE_ID_SECONDS
+
+        # Statystyki: rozpoznania, pominięcia dzięki rozkładowi i czas ostatniego wyboru języka
+        self.detections = 0
+        self.skipped = 0
+        self.detect_time = 0.0
+        self.last_time = 0.0
+        self.last_probability: Optional[float] = None
+
+    def choose(self, audio, model=None) -> Optional[str]:
+        """
+        Wybiera język nagrania
+
+        Args:
+            audio: Ścieżka do pliku lub próbki 16 kHz mono
+            model: Model lokalny do rozpoznania (None - tryb API: bez pewnego rozkładu
+                język wykrywa serwer na całym nagraniu)
+
+        Returns:
+            Optional[str]: Kod języka lub None - język ma wykryć backend
+        """
+        started = time.perf_counter()
+        self.last_probability = None
+        try:
+            language = self.prior.choose() if self.prior else None
+            if language is not None:
+                self.skipped += 1
+                return language
+            if model is None:
+                return None
+            return self._identify(audio, model)
+        finally:
+            self.last_time = time.perf_counter() - started
+
+    def detect(self, samples: "np.ndarray", model) -> Tuple[Optional[str], float]:
+        """
+        Rozpoznaje język fragmentu (bez dekodowania tekstu)
+
+        Args:
+            samples: Próbki float32 16 kHz
+            model: Model faster-whisper (lub WorkerModel)
+
+        Returns:
+            Tuple[Optional[str], float]: Kod języka spośród kandydatów i jego prawdopodobieństwo
+        """
+        with scheduling.decoding():
+            segments, info = model.transcribe(
+                samples, language=None, beam_size=1, without_timestamps=True,
+                condition_on_previous_text=False, max_new_tokens=1,
+            )
+            close = getattr(segments, 'close', None)
+            if close:
+                close()
+        probabilities = dict(getattr(info, 'all_language_probs', None) or [])
+        if self.candidates and probabilities:
+            language = max(self.candidates, key=lambda code: probabilities.get(code, 0.0))
+            # Prawdopodobieństwo względem kandydatów (reszta języków nie wchodzi w grę)
+            total = sum(probabilities.get(code, 0.0) for code in self.candidates)
+            return language, probabilities.get(language, 0.0) / total if total else 0.0
+        language = getattr(info, 'language', None)
+        if self.candidates and language not in self.candidates:
+            return None, 0.0
+        return language, float(getattr(info, 'language_probability', None) or 0.0)
+
+    def stats(self) -> dict:
+        """
+        Zwraca statystyki wyboru języka
+
+        Returns:
+            dict: Rozpoznania, pominięcia, średni czas rozpoznania w ms i rozkład użytkownika
+        """
+        return {
+            'detections': self.detections,
+            'skipped': self.skipped,
+            'detect_ms': self.detect_time / self.detections * 1000 if self.detections else None,
+            'prior': self.prior.describe() if self.prior else None,
+        }
+
+    def _identify(self, audio, model) -> Optional[str]:
+        """Rozpoznaje język na początku mowy i uczy rozkład; bez mowy - najczęstszy język lub pierwszy kandydat"""
+        if isinstance(audio, str):
+            from recent_audio import load_samples
+            audio = load_samples(audio)
+        prefix = speech_prefix(audio, self.seconds)
+        language = None
+        if prefix is not None:
+            started = time.perf_counter()
+            try:
+                language, self.last_probability = self.detect(prefix, model)
+            except Exception as e:
+                print(f"⚠️ Nie udało się rozpoznać języka: {e}")
+            self.detect_time += time.perf_counter() - started
+            self.detections += 1
+        if language is None:
+            fallback = self.prior.best()[0] if self.prior else None
+            return fallback or (self.candidates[0] if self.candidates else None)
+        if self.prior:
+            self.prior.observe(language)
+        return language
+
+
+# --- Pomiar dodatkowego opóźnienia ---
+
+def run_benchmark(paths: List[str], model_name: Optional[str] = None, repeats: int = 5,
+                  seconds: Optional[float] = None):
+    """
+    Mierzy koszt rozpoznania języka: fragment z mową, całe nagranie i pominięcie dzięki rozkładowi
+
+    Args:
+        paths: Nagrania WAV/FLAC
+        model_name: Model faster-whisper (domyślnie LOCAL_WHISPER_MODEL)
+        repeats: Powtórzenia pomiaru każdego nagrania
+        seconds: Długość fragmentu (domyślnie LANGUAGE_ID_SECONDS)
+    """
+    import statistics
+    from faster_whisper import WhisperModel
+    from recent_audio import load_samples
+
+    model_name = model_name or Config.LOCAL_WHISPER_MODEL
+    kwargs = {'device': Config.LOCAL_DEVICE, 'compute_type': Config.LOCAL_COMPUTE_TYPE}
+    threads = scheduling.decode_threads()
+    if threads:
+        kwargs['cpu_threads'] = threads
+    model = WhisperModel(model_name, **kwargs)
+    identifier = LanguageIdentifier(seconds=seconds)
+    prior = LanguagePrior(path='')
+    prior.min_notes = 0
+    prior.recheck = 0
+    prior.observe('pl')
+
+    prefix_times, full_times, skip_times = [], [], []
+    for path in paths:
+        samples = load_samples(path)
+        full = samples.astype('float32') / 32768.0
+        for _ in range(repeats):
+            started = time.perf_counter()
+            language = identifier._identify(path, model)
+            prefix_times.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            full_language, _probability = LanguageIdentifier(candidates=identifier.candidates).detect(full, model)
+            full_times.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            LanguageIdentifier(prior=prior).choose(path, model)
+            skip_times.append(time.perf_counter() - started)
+        print(f"🗣️ {path}: {len(samples) / SAMPLE_RATE:.1f} s, fragment: {language} "
+              f"({identifier.last_probability or 0.0:.0%}), całe nagranie: {full_language}")
+
+    def describe(times: List[float]) -> str:
+        return f"mediana {statistics.median(times) * 1000:.1f} ms, maks. {max(times) * 1000:.1f} ms"
+
+    print(f"\n⏱️ Rozpoznanie na {identifier.seconds:.1f} s mowy (z wczytaniem pliku): {describe(prefix_times)}")
+    print(f"⏱️ Rozpoznanie na całym nagraniu: {describe(full_times)}")
+    print(f"⏱️ Pewny język z rozkładu (bez rozpoznania): {describe(skip_times)}")
+
+
+def main(argv=None):
+    """Wiersz poleceń rozpoznawania języka"""
+    parser = argparse.ArgumentParser(description="Rozpoznawanie języka mowy")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('status', help="Zapamiętane języki użytkownika")
+    subparsers.add_parser('reset', help="Zapomnij języki użytkownika")
+    bench_parser = subparsers.add_parser('bench', help="Dodatkowe opóźnienie rozpoznania języka")
+    bench_parser.add_argument('paths', nargs='+', help="Nagrania WAV/FLAC")
+    bench_parser.add_argument('--model', help="Model (domyślnie LOCAL_WHISPER_MODEL)")
+    bench_parser.add_argument('-n', '--repeats', type=int, default=5)
+    bench_parser.add_argument('--seconds', type=float, help="Długość fragmentu (domyślnie LANGUAGE_ID_SECONDS)")
+    args = parser.parse_args(argv)
+    load_environment()
+
+    if args.command == 'status':
+        prior = LanguagePrior()
+        language, share = prior.best()
+        print(f"🗣️ Języki użytkownika ({prior.path or 'tylko w pamięci'}): {prior.describe()}")
+        if language and prior.observations >= prior.min_notes and share >= prior.confidence:
+            print(f"✅ {language} jest pewny - rozpoznanie pomijane (kontrola co {prior.recheck} nagrań)")
+    elif args.command == 'reset':
+        LanguagePrior().reset()
+        print("🗑️ Zapomniano języki użytkownika")
+    else:
+        run_benchmark(args.paths, args.model, args.repeats, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,24 @@
 """
 Główny plik uruchamiający aplikację Voice Notes
 """
-import tkinter as tk
 import sys
-from voice_notes_app import VoiceNotesApp
+from config import load_environment
 
 
 def main():
     """Funkcja główna aplikacji"""
+    load_environment()
+
+    # Tryb demona: bez okna i skrótów, tylko model obsługujący klientów przez gniazdo
+    if "--daemon" in sys.argv[1:]:
+        import daemon
+        daemon.main(["serve"])
+        return
+
+    # Ciężkie zależności (tkinter, pyaudio, pynput...) ładujemy dopiero tutaj
+    import tkinter as tk
+    from voice_notes_app import VoiceNotesApp
+    
     # Główny root Tk musi być utworzony w głównym wątku
     root = tk.Tk()
     
@@ -0,0 +1,466 @@
+"""
+Moduł trwałego archiwum notatek (SQLite + indeks pełnotekstowy FTS5)
+
+    python note_store.py search kubernetes
+    python note_store.py bench --notes 100000
+"""
+import argparse
+import json
+import os
+import queue
+import random
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional
+from config import Config, load_environment
+
+
+# Kolejne migracje schematu (indeks + 1 = wartość PRAGMA user_version po migracji)
+_MIGRATIONS = [
+    """
+    CREATE TABLE IF NOT EXISTS notes (
+        id INTEGER PRIMARY KEY,
+        created_at REAL NOT NULL,
+        duration REAL,
+        backend TEXT,
+        model TEXT,
+        language TEXT,
+        text TEXT NOT NULL,
+        timings TEXT
+    );
+    CREATE INDEX IF NOT EXISTS notes_created_at ON notes(created_at);
+    CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+        text, content='notes', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    );
+    CREATE TRIGGER IF NOT EXISTS notes_ai AFTER INSERT ON notes BEGIN
+        INSERT INTO notes_fts(rowid, text) VALUES (new.id, new.text);
+    END;
+    CREATE TRIGGER IF NOT EXISTS notes_ad AFTER DELETE ON notes BEGIN
+        INSERT INTO notes_fts(notes_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    END;
+    CREATE TRIGGER IF NOT EXISTS notes_au AFTER UPDATE OF text ON notes BEGIN
+        INSERT INTO notes_fts(notes_fts, rowid, text) VALUES ('delete', old.id, old.text);
+        INSERT INTO notes_fts(rowid, text) VALUES (new.id, new.text);
+    END;
+    """,
+    # Nagrania zachowane do ponownej transkrypcji większym modelem w tle (background_refiner.py)
+    """
+    ALTER TABLE notes ADD COLUMN audio_path TEXT;
+    ALTER TABLE notes ADD COLUMN draft_text TEXT;
+    ALTER TABLE notes ADD COLUMN refined_model TEXT;
+    ALTER TABLE notes ADD COLUMN refined_at REAL;
+    CREATE INDEX IF NOT EXISTS notes_pending_refinement ON notes(created_at)
+        WHERE audio_path IS NOT NULL AND refined_at IS NULL;
+    """,
+]
+
+_COLUMNS = ('created_at', 'duration', 'backend', 'model', 'language', 'text', 'timings', 'audio_path')
+
+_INSERT_SQL = f"INSERT INTO notes ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' for _ in _COLUMNS)})"
+_REFINE_SQL = ("UPDATE notes SET draft_text = COALESCE(draft_text, text), text = ?, "
+               "refined_model = ?, refined_at = ?, audio_path = NULL WHERE id = ?")
+_CORRECT_SQL = "UPDATE notes SET draft_text = COALESCE(draft_text, text), text = ?, model = ? WHERE created_at = ?"
+_DETACH_SQL = "UPDATE notes SET audio_path = NULL WHERE id = ?"
+
+
+class NoteStore:
+    """
+    Archiwum transkrypcji w lokalnej bazie SQLite.
+
+    Zapisy trafiają do kolejki i są wykonywane przez osobny wątek w
+    transakcjach obejmujących wiele notatek, więc `add()` nigdy nie czeka
+    na dysk. Indeks FTS5 jest aktualizowany przyrostowo przez wyzwalacze.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        Inicjalizuje archiwum notatek
+
+        Args:
+            db_path: Ścieżka do pliku bazy (domyślnie z config)
+        """
+        self.db_path = os.path.expanduser(db_path or Config.NOTES_DB_PATH)
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Połączenie do odczytu (współdzielone, chronione blokadą)
+        self._read_conn = self._connect()
+        self._migrate(self._read_conn)
+        self._read_lock = threading.Lock()
+
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+
+    def add(self, text: str, created_at: Optional[float] = None, duration: Optional[float] = None,
+            backend: Optional[str] = None, model: Optional[str] = None,
+            language: Optional[str] = None, timings: Optional[dict] = None,
+            audio_path: Optional[str] = None):
+        """
+        Dodaje notatkę do kolejki zapisu (nie blokuje)
+
+        Args:
+            text: Treść notatki
+            created_at: Znacznik czasu rozpoczęcia nagrania (domyślnie teraz)
+            duration: Długość nagrania w sekundach
+            backend: Tryb transkrypcji ('api' lub 'local')
+            model: Nazwa modelu
+            language: Kod języka
+            timings: Czasy poszczególnych etapów w sekundach
+            audio_path: Zachowane nagranie do ponownej transkrypcji w tle
+        """
+        row = (
+            created_at if created_at is not None else time.time(),
+            duration, backend, model, language, text,
+            json.dumps(timings) if timings else None,
+            audio_path,
+        )
+        self._ensure_writer()
+        self._queue.put(('insert', row))
+
+    def refine(self, note_id: int, text: str, model: str):
+        """
+        Zastępuje treść notatki transkrypcją większego modelu (nie blokuje)
+
+        Pierwotna treść zostaje w kolumnie draft_text, a nagranie jest odłączane
+        od notatki (plik usuwa wywołujący).
+
+        Args:
+            note_id: Identyfikator notatki
+            text: Nowa treść
+            model: Model, który ją rozpoznał
+        """
+        self._ensure_writer()
+        self._queue.put(('refine', (text, model, time.time(), note_id)))
+
+    def correct(self, created_at: float, text: str, model: str):
+        """
+        Zastępuje treść notatki poprawioną transkrypcją (nie blokuje)
+
+        Notatka jest wskazana chwilą rozpoczęcia nagrania, bo identyfikator
+        nie jest jeszcze znany, gdy zapis czeka w kolejce. Pierwotna treść
+        zostaje w kolumnie draft_text.
+
+        Args:
+            created_at: Znacznik czasu rozpoczęcia nagrania podany w add()
+            text: Nowa treść
+            model: Model, który ją rozpoznał
+        """
+        self._ensure_writer()
+        self._queue.put(('correct', (text, model, created_at)))
+
+    def detach_audio(self, note_id: int):
+        """Odłącza nagranie od notatki, np. gdy plik został usunięty (nie blokuje)"""
+        self._ensure_writer()
+        self._queue.put(('detach', (note_id,)))
+
+    def pending_refinement(self, limit: int = 10) -> List[dict]:
+        """
+        Zwraca notatki z zachowanym nagraniem, jeszcze nieprzetworzone większym modelem
+
+        Args:
+            limit: Maksymalna liczba wyników
+
+        Returns:
+            List[dict]: Notatki od najnowszej (świeże notatki są czytane najczęściej)
+        """
+        return self._query(
+            "SELECT * FROM notes WHERE audio_path IS NOT NULL AND refined_at IS NULL "
+            "ORDER BY created_at DESC LIMIT ?",
+            (limit,),
+        )
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Czeka na zapisanie wszystkich notatek z kolejki
+
+        Returns:
+            bool: True jeśli kolejka została opróżniona przed upływem limitu czasu
+        """
+        done = threading.Event()
+        self._ensure_writer()
+        self._queue.put(('flush', done))
+        return done.wait(timeout)
+
+    def close(self):
+        """Zapisuje oczekujące notatki i zamyka połączenia"""
+        if self._writer and self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join(timeout=5)
+        self._writer = None
+        with self._read_lock:
+            self._read_conn.close()
+
+    def search(self, query: str, limit: int = 20, raw: bool = False) -> List[dict]:
+        """
+        Wyszukuje notatki w indeksie pełnotekstowym
+
+        Args:
+            query: Zapytanie (słowa; ostatnie dopasowywane jako prefiks)
+            limit: Maksymalna liczba wyników
+            raw: Czy przekazać zapytanie bez zmian (składnia FTS5)
+
+        Returns:
+            List[dict]: Notatki posortowane według trafności
+        """
+        match = query if raw else self._build_match(query)
+        if not match:
+            return []
+        return self._query(
+            "SELECT n.*, f.snippet FROM ("
+            "  SELECT rowid, rank, snippet(notes_fts, 0, '[', ']', '…', 12) AS snippet"
+            "  FROM notes_fts WHERE notes_fts MATCH ? ORDER BY rank LIMIT ?"
+            ") f JOIN notes n ON n.id = f.rowid ORDER BY f.rank",
+            (match, limit),
+        )
+
+    def recent(self, limit: int = 20) -> List[dict]:
+        """
+        Zwraca najnowsze notatki
+
+        Args:
+            limit: Maksymalna liczba wyników
+
+        Returns:
+            List[dict]: Notatki od najnowszej
+        """
+        return self._query("SELECT * FROM notes ORDER BY created_at DESC LIMIT ?", (limit,))
+
+    def get(self, note_id: int) -> Optional[dict]:
+        """Zwraca notatkę o podanym identyfikatorze"""
+        rows = self._query("SELECT * FROM notes WHERE id = ?", (note_id,))
+        return rows[0] if rows else None
+
+    def count(self) -> int:
+        """Zwraca liczbę notatek w archiwum"""
+        with self._read_lock:
+            return self._read_conn.execute("SELECT COUNT(*) FROM notes").fetchone()[0]
+
+    def _query(self, sql: str, params: tuple) -> List[dict]:
+        """Wykonuje zapytanie odczytu i zwraca wiersze jako słowniki"""
+        with self._read_lock:
+            rows = self._read_conn.execute(sql, params).fetchall()
+        notes = []
+        for row in rows:
+            note = dict(row)
+            if note.get('timings'):
+                note['timings'] = json.loads(note['timings'])
+            notes.append(note)
+        return notes
+
+    def _connect(self) -> sqlite3.Connection:
+        """Otwiera połączenie z bazą"""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=10)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @staticmethod
+    def _migrate(conn: sqlite3.Connection):
+        """Doprowadza schemat bazy do aktualnej wersji"""
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for target, script in enumerate(_MIGRATIONS[version:], version + 1):
+            conn.executescript(script)
+            conn.execute(f"PRAGMA user_version = {target}")
+        conn.commit()
+
+    @staticmethod
+    def _build_match(query: str) -> str:
+        """Zamienia zapytanie użytkownika na bezpieczne wyrażenie FTS5"""
+        terms = [term.replace('"', '""') for term in query.split()]
+        if not terms:
+            return ''
+        quoted = [f'"{term}"' for term in terms]
+        quoted[-1] += '*'
+        return " ".join(quoted)
+
+    def _ensure_writer(self):
+        """Uruchamia wątek zapisu przy pierwszym użyciu"""
+        with self._writer_lock:
+            if not self._writer or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._write_loop, name="NoteStoreWriter", daemon=True)
+                self._writer.start()
+
+    def _write_loop(self):
+        """Pętla wątku zapisu - grupuje notatki w transakcje"""
+        conn = self._connect()
+        running = True
+        try:
+            while running:
+                batch = [self._queue.get()]
+                # Dobierz resztę oczekujących notatek (najwyżej przez krótki czas)
+                deadline = time.monotonic() + Config.NOTES_BATCH_INTERVAL
+                while len(batch) < Config.NOTES_BATCH_SIZE:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(self._queue.get(timeout=remaining))
+                    except queue.Empty:
+                        break
+
+                rows = []
+                refinements = []
+                corrections = []
+                detached = []
+                waiters = []
+                for item in batch:
+                    if item is None:
+                        running = False
+                    elif item[0] == 'insert':
+                        rows.append(item[1])
+                    elif item[0] == 'refine':
+                        refinements.append(item[1])
+                    elif item[0] == 'correct':
+                        corrections.append(item[1])
+                    elif item[0] == 'detach':
+                        detached.append(item[1])
+                    else:
+                        waiters.append(item[1])
+
+                statements = [
+                    (_INSERT_SQL, rows),
+                    (_REFINE_SQL, refinements),
+                    (_CORRECT_SQL, corrections),
+                    (_DETACH_SQL, detached),
+                ]
+                if rows or refinements or corrections or detached:
+                    try:
+                        with conn:
+                            for sql, params in statements:
+                                conn.executemany(sql, params)
+                    except Exception as e:
+                        # Jeden błędny wiersz nie może przepaść razem z całą partią
+                        print(f"⚠️ Błąd zapisu partii notatek ({e}) - zapisuję pojedynczo")
+                        self._write_one_by_one(conn, statements)
+
+                for waiter in waiters:
+                    waiter.set()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _write_one_by_one(conn: sqlite3.Connection, statements: List[tuple]):
+        """Wykonuje zapisy partii w osobnych transakcjach, zgłaszając tylko te, które się nie udały"""
+        for sql, params in statements:
+            for row in params:
+                try:
+                    with conn:
+                        conn.execute(sql, row)
+                except Exception as e:
+                    # Treść notatki (lub identyfikator), żeby dało się ją odtworzyć z logu
+                    detail = row[_COLUMNS.index('text')] if sql is _INSERT_SQL else row[0]
+                    print(f"❌ Nie zapisano zmiany w archiwum ({e}): {str(detail)[:200]!r}")
+
+
+def _format_note(note: dict) -> str:
+    """Formatuje notatkę do wyświetlenia w terminalu"""
+    when = datetime.fromtimestamp(note['created_at']).strftime('%Y-%m-%d %H:%M')
+    body = note.get('snippet') or note['text']
+    duration = f"{note['duration']:.1f}s" if note.get('duration') else '-'
+    model = note.get('refined_model') or note.get('model') or note.get('backend') or '?'
+    return f"#{note['id']} {when} ({duration}, {model})\n   {body}"
+
+
+def run_benchmark(notes: int = 100000, queries: int = 200):
+    """
+    Mierzy zapis i zapytania na archiwum z wieloma notatkami
+
+    Args:
+        notes: Liczba notatek w tymczasowym archiwum
+        queries: Liczba zapytań każdego rodzaju
+    """
+    rng = random.Random(0)
+    vocabulary = [
+        "spotkanie", "projekt", "kubernetes", "wdrożenie", "klient", "faktura", "termin", "zadanie",
+        "grafana", "raport", "poprawka", "serwer", "notatka", "pomysł", "zakupy", "rachunek",
+        "przegląd", "błąd", "kolejka", "telefon", "mleko", "jutro", "piątek", "budżet",
+    ] + [f"słowo{index}" for index in range(5000)]
+    directory = tempfile.mkdtemp(prefix='szeptucha-notes-')
+    store = NoteStore(os.path.join(directory, 'notes.db'))
+    try:
+        started = time.perf_counter()
+        now = time.time()
+        for index in range(notes):
+            text = " ".join(rng.choice(vocabulary) for _ in range(rng.randint(5, 40)))
+            store.add(text, created_at=now - index, duration=rng.uniform(1, 60), backend='local', model='base')
+        store.flush()
+        write_time = time.perf_counter() - started
+        print(f"💾 Zapisano {notes} notatek w {write_time:.1f} s ({notes / write_time:.0f} notatek/s)")
+
+        def measure(label: str, fn):
+            times = []
+            for index in range(queries):
+                started = time.perf_counter()
+                fn(index)
+                times.append(time.perf_counter() - started)
+            times.sort()
+            print(f"📊 {label:>24}: mediana {statistics.median(times) * 1000:6.2f} ms, "
+                  f"p95 {times[int(len(times) * 0.95) - 1] * 1000:6.2f} ms")
+
+        frequent = vocabulary[:24]
+        measure("najnowsze 20", lambda i: store.recent(20))
+        measure("częste słowo", lambda i: store.search(frequent[i % len(frequent)]))
+        measure("rzadkie słowo", lambda i: store.search(vocabulary[24 + i * 7 % 5000]))
+        measure("dwa słowa", lambda i: store.search(f"{frequent[i % 24]} {frequent[(i + 5) % 24]}"))
+        measure("prefiks", lambda i: store.search(frequent[i % 24][:4]))
+        measure("kolejka dopracowania", lambda i: store.pending_refinement(limit=1))
+    finally:
+        store.close()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main(argv=None):
+    """Wiersz poleceń archiwum notatek"""
+    parser = argparse.ArgumentParser(description="Archiwum notatek Voice Notes")
+    parser.add_argument('--db', help="Ścieżka do bazy (domyślnie NOTES_DB_PATH)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    search_parser = subparsers.add_parser('search', help="Wyszukiwanie pełnotekstowe")
+    search_parser.add_argument('query', nargs='+')
+    search_parser.add_argument('-n', '--limit', type=int, default=20)
+    search_parser.add_argument('--raw', action='store_true', help="Zapytanie w składni FTS5")
+
+    recent_parser = subparsers.add_parser('recent', help="Najnowsze notatki")
+    recent_parser.add_argument('-n', '--limit', type=int, default=20)
+
+    subparsers.add_parser('stats', help="Liczba notatek w archiwum")
+
+    bench_parser = subparsers.add_parser('bench', help="Pomiar zapisu i zapytań na tymczasowym archiwum")
+    bench_parser.add_argument('--notes', type=int, default=100000, help="Liczba notatek")
+    bench_parser.add_argument('--queries', type=int, default=200, help="Liczba zapytań każdego rodzaju")
+
+    args = parser.parse_args(argv)
+    load_environment()
+    if args.command == 'bench':
+        run_benchmark(args.notes, args.queries)
+        return
+    store = NoteStore(args.db)
+    try:
+        if args.command == 'stats':
+            print(f"📚 Notatek w archiwum: {store.count()} ({store.db_path})")
+            return
+
+        started = time.perf_counter()
+        if args.command == 'search':
+            notes = store.search(" ".join(args.query), args.limit, raw=args.raw)
+        else:
+            notes = store.recent(args.limit)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        for note in notes:
+            print(_format_note(note))
+        print(f"🔎 {len(notes)} wyników w {elapsed_ms:.1f} ms")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
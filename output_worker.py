@@ -0,0 +1,298 @@
+"""
+Moduł wyjścia tekstu - jeden długożyjący wątek wklejania/pisania z kolejką zachowującą kolejność
+"""
+import queue
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+from config import Config
+import profiler
+import tracing
+
+
+class ClipboardBackend:
+    """Interfejs schowka"""
+
+    def copy(self, text: str):
+        raise NotImplementedError
+
+    def paste(self) -> Optional[str]:
+        raise NotImplementedError
+
+
+class KeyboardBackend:
+    """Interfejs klawiatury"""
+
+    def send_paste(self):
+        """Wysyła skrót wklejania (Ctrl+V)"""
+        raise NotImplementedError
+
+    def type_text(self, text: str):
+        """Wpisuje tekst jako zdarzenia klawiszy"""
+        raise NotImplementedError
+
+    def send_backspace(self, count: int):
+        """Usuwa znaki przed kursorem (Backspace count razy)"""
+        raise NotImplementedError
+
+
+class PyperclipClipboard(ClipboardBackend):
+    """Schowek systemowy przez pyperclip"""
+
+    def __init__(self):
+        import pyperclip
+        self._pyperclip = pyperclip
+
+    def copy(self, text: str):
+        self._pyperclip.copy(text)
+
+    def paste(self) -> Optional[str]:
+        return self._pyperclip.paste()
+
+
+class PynputKeyboard(KeyboardBackend):
+    """Klawiatura przez pynput - jeden kontroler używany przez cały czas życia aplikacji"""
+
+    def __init__(self):
+        from pynput import keyboard as pynput_keyboard
+        self._key = pynput_keyboard.Key
+        self._controller = pynput_keyboard.Controller()
+
+    def send_paste(self):
+        try:
+            self._controller.press(self._key.ctrl)
+            self._controller.press('v')
+            self._controller.release('v')
+            self._controller.release(self._key.ctrl)
+        except Exception as e:
+            print(f"⚠️ Błąd podczas wklejania (pynput): {e}")
+            # Fallback do biblioteki keyboard, jeśli dostępna
+            import keyboard as kb
+            kb.send('ctrl+v')
+
+    def type_text(self, text: str):
+        self._controller.type(text)
+
+    def send_backspace(self, count: int):
+        for _ in range(count):
+            self._controller.press(self._key.backspace)
+            self._controller.release(self._key.backspace)
+
+
+class FakeClipboard(ClipboardBackend):
+    """Atrapa schowka do testów (opcjonalnie z opóźnieniem dostępności treści)"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self._text: Optional[str] = None
+        self._ready_at = 0.0
+
+    def copy(self, text: str):
+        self._text = text
+        self._ready_at = time.monotonic() + self.delay
+
+    def paste(self) -> Optional[str]:
+        if time.monotonic() < self._ready_at:
+            return None
+        return self._text
+
+
+class FakeKeyboard(KeyboardBackend):
+    """Atrapa klawiatury do testów - zapisuje zdarzenia wraz z czasem"""
+
+    def __init__(self, clipboard: Optional[ClipboardBackend] = None):
+        self.clipboard = clipboard
+        self.events: List[Tuple[str, Optional[str], float]] = []
+
+    def send_paste(self):
+        # Zapamiętujemy to, co faktycznie trafiłoby do aplikacji
+        content = self.clipboard.paste() if self.clipboard else None
+        self.events.append(('paste', content, time.monotonic()))
+
+    def type_text(self, text: str):
+        self.events.append(('type', text, time.monotonic()))
+
+    def send_backspace(self, count: int):
+        self.events.append(('backspace', str(count), time.monotonic()))
+
+
+class OutputWorker:
+    """
+    Wątek wyjścia tekstu obsługujący zlecenia w kolejności ich dodania.
+
+    Zastępuje osobny wątek i nowy kontroler klawiatury dla każdego wklejenia.
+    Zamiast stałej pauzy po skopiowaniu do schowka sprawdza w pętli, czy
+    schowek zawiera już nowy tekst.
+    """
+
+    def __init__(self, keyboard: Optional[KeyboardBackend] = None, clipboard: Optional[ClipboardBackend] = None):
+        """
+        Inicjalizuje wątek wyjścia
+
+        Args:
+            keyboard: Backend klawiatury (domyślnie pynput, tworzony w wątku roboczym)
+            clipboard: Backend schowka (domyślnie pyperclip)
+        """
+        self.keyboard = keyboard
+        self.clipboard = clipboard
+
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+        # Statystyki opóźnień (od zlecenia do wysłania zdarzeń klawiatury)
+        self.completed = 0
+        self.last_latency: Optional[float] = None
+        self.max_latency = 0.0
+
+    def paste(self, text: str):
+        """
+        Zleca wklejenie tekstu przez schowek
+
+        Args:
+            text: Tekst do wklejenia
+        """
+        self._submit('paste', text)
+
+    def type_text(self, text: str):
+        """
+        Zleca wpisanie tekstu zdarzeniami klawiszy (partiami z konfigurowalnym tempem)
+
+        Args:
+            text: Tekst do wpisania
+        """
+        self._submit('type', text)
+
+    def replace(self, count: int, text: str):
+        """
+        Zleca zastąpienie ostatnio wklejonego tekstu (Backspace, potem wklejenie)
+
+        Działa, gdy kursor stoi zaraz za wklejonym wcześniej tekstem.
+
+        Args:
+            count: Liczba znaków do usunięcia przed kursorem
+            text: Nowy tekst do wklejenia
+        """
+        self._submit('replace', (count, text))
+
+    def call(self, fn: Callable[[], None]):
+        """
+        Zleca wywołanie funkcji po wykonaniu wcześniejszych zleceń
+
+        Args:
+            fn: Funkcja wywoływana w wątku wyjścia
+        """
+        self._submit('call', fn)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Czeka na wykonanie wszystkich zleceń
+
+        Args:
+            timeout: Maksymalny czas oczekiwania w sekundach
+
+        Returns:
+            bool: True jeśli kolejka została opróżniona
+        """
+        done = threading.Event()
+        self._submit('flush', done)
+        return done.wait(timeout)
+
+    def stop(self, timeout: float = 2.0):
+        """Kończy wątek po wykonaniu oczekujących zleceń"""
+        if self._thread and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def _submit(self, kind: str, payload):
+        """Dodaje zlecenie do kolejki, uruchamiając wątek przy pierwszym użyciu"""
+        with self._start_lock:
+            if not self._thread or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="OutputWorker", daemon=True)
+                self._thread.start()
+        self._queue.put((kind, payload, time.monotonic(), tracing.current_trace()))
+
+    def _run(self):
+        """Pętla wątku wyjścia"""
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+
+            kind, payload, submitted_at, trace_id = job
+            if kind == 'flush':
+                payload.set()
+                continue
+
+            with tracing.use_trace(trace_id), profiler.section(), tracing.span(f"output.{kind}") as span:
+                span.set(queue_wait_ms=(time.monotonic() - submitted_at) * 1000)
+                try:
+                    if kind == 'call':
+                        payload()
+                        continue
+                    self._ensure_backends()
+                    if kind == 'paste':
+                        self._do_paste(payload)
+                    elif kind == 'replace':
+                        self._do_replace(*payload)
+                    else:
+                        self._do_type(payload)
+                    self._record_latency(time.monotonic() - submitted_at)
+                except Exception as e:
+                    print(f"❌ Błąd podczas wyprowadzania tekstu: {e}")
+
+    def _ensure_backends(self):
+        """Tworzy domyślne backendy (w wątku roboczym, raz na cały czas życia)"""
+        if self.clipboard is None:
+            self.clipboard = PyperclipClipboard()
+        if self.keyboard is None:
+            self.keyboard = PynputKeyboard()
+
+    def _do_paste(self, text: str):
+        """Kopiuje tekst do schowka, czeka aż będzie dostępny i wysyła Ctrl+V"""
+        with tracing.span('clipboard.copy'):
+            self.clipboard.copy(text)
+        with tracing.span('clipboard.wait'):
+            if not self._wait_for_clipboard(text):
+                print("⚠️ Schowek nie potwierdził nowej treści - wklejam mimo to")
+        with tracing.span('keyboard.send_paste'):
+            self.keyboard.send_paste()
+
+    def _do_replace(self, count: int, text: str):
+        """Usuwa poprzedni tekst i wkleja nowy"""
+        with tracing.span('keyboard.send_backspace', count=count):
+            self.keyboard.send_backspace(count)
+        self._do_paste(text)
+
+    def _wait_for_clipboard(self, text: str) -> bool:
+        """
+        Sprawdza w pętli, czy schowek zawiera już podany tekst
+
+        Returns:
+            bool: True jeśli treść została potwierdzona przed upływem limitu czasu
+        """
+        deadline = time.monotonic() + Config.OUTPUT_CLIPBOARD_TIMEOUT
+        while True:
+            try:
+                if self.clipboard.paste() == text:
+                    return True
+            except Exception:
+                pass
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(Config.OUTPUT_CLIPBOARD_POLL_INTERVAL)
+
+    def _do_type(self, text: str):
+        """Wpisuje tekst partiami znaków z przerwą między partiami"""
+        batch_size = max(1, Config.OUTPUT_TYPING_BATCH_SIZE)
+        for start in range(0, len(text), batch_size):
+            if start:
+                time.sleep(Config.OUTPUT_TYPING_BATCH_DELAY)
+            self.keyboard.type_text(text[start:start + batch_size])
+
+    def _record_latency(self, latency: float):
+        """Aktualizuje statystyki opóźnień"""
+        self.completed += 1
+        self.last_latency = latency
+        self.max_latency = max(self.max_latency, latency)
@@ -0,0 +1,281 @@
+"""
+Moduł profilowania sesji - cProfile i tracemalloc włączane na żądanie (PROFILE_ENABLED lub skrót)
+"""
+import cProfile
+import io
+import os
+import shutil
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Dict, Optional
+from config import Config
+
+_local = threading.local()
+_lock = threading.Lock()
+_session: Optional["_ProfileSession"] = None
+
+# Od Pythona 3.12 cProfile korzysta z sys.monitoring: w interpreterze może działać tylko jeden
+# profiler, ale mierzy on wszystkie wątki - sesja używa wtedy jednego, wspólnego profilera
+_SHARED_PROFILER = sys.version_info >= (3, 12)
+_SHARED_KEY = 0
+
+
+class _NullSection:
+    """Pusty blok zwracany, gdy profilowanie jest wyłączone"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SECTION = _NullSection()
+
+
+class _ProfileSession:
+    """Dane jednej sesji profilowania: profilery wątków i stan zakończenia"""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.stopped_at = 0.0
+        self.directory = os.path.join(
+            os.path.expanduser(Config.PROFILE_DIR), f"session-{datetime.now():%Y%m%d-%H%M%S}"
+        )
+        # Osobny profiler dla każdego wątku (cProfile mierzy tylko wątek, w którym go włączono);
+        # od Pythona 3.12 - jeden profiler pod kluczem _SHARED_KEY, włączony, gdy otwarty jest jakiś blok
+        self.profiles: Dict[int, cProfile.Profile] = {}
+        self.thread_names: Dict[int, str] = {}
+        self.open_sections = 0
+        # Czy zgłoszono już, że profilera nie udało się włączyć (np. działa inne narzędzie profilujące)
+        self.enable_failed = False
+        self.stopping = False
+        self.snapshot: Optional[tracemalloc.Snapshot] = None
+        self.traced_memory = (0, 0)
+        self.owns_tracemalloc = False
+        self.timer: Optional[threading.Timer] = None
+        # Ustawiane, gdy po zatrzymaniu sesji żaden wątek nie jest już w profilowanym bloku
+        self.idle = threading.Event()
+        self.finished = threading.Event()
+
+
+class _Section:
+    """Włącza profiler bieżącego wątku na czas bloku `with` (zagnieżdżenia nie wyłączają go wcześniej)"""
+
+    __slots__ = ('_session', '_profile')
+
+    def __init__(self, session: _ProfileSession):
+        self._session = session
+        self._profile: Optional[cProfile.Profile] = None
+
+    def __enter__(self):
+        depth = getattr(_local, 'depth', 0)
+        _local.depth = depth + 1
+        if depth:
+            return self
+        thread = threading.current_thread()
+        session = self._session
+        with _lock:
+            if session.stopping:
+                return self
+            key = _SHARED_KEY if _SHARED_PROFILER else thread.ident
+            profile = session.profiles.get(key)
+            if profile is None:
+                profile = session.profiles[key] = cProfile.Profile()
+                session.thread_names[key] = "wszystkie wątki" if _SHARED_PROFILER else thread.name
+            if not _SHARED_PROFILER or session.open_sections == 0:
+                try:
+                    profile.enable()
+                except ValueError as e:
+                    # Profilowanie nie może przerwać nagrywania ani wklejania - blok działa bez pomiaru
+                    if not session.enable_failed:
+                        session.enable_failed = True
+                        print(f"⚠️ Nie udało się włączyć profilera w wątku {thread.name}: {e}")
+                    return self
+            session.open_sections += 1
+        self._profile = profile
+        return self
+
+    def __exit__(self, *exc):
+        _local.depth -= 1
+        if self._profile is None:
+            return False
+        with _lock:
+            self._session.open_sections -= 1
+            if not _SHARED_PROFILER or self._session.open_sections == 0:
+                self._profile.disable()
+            if self._session.stopping and self._session.open_sections == 0:
+                self._session.idle.set()
+        return False
+
+
+def active() -> bool:
+    """Czy trwa sesja profilowania"""
+    session = _session
+    return session is not None and not session.stopping
+
+
+def section():
+    """
+    Profiluje blok `with` w bieżącym wątku (nagrywanie, transkrypcja, wklejanie, animacja okna)
+
+    Poza sesją profilowania zwraca pusty blok, więc koszt wywołania jest pomijalny.
+    """
+    session = _session
+    if session is None or session.stopping:
+        return _NULL_SECTION
+    return _Section(session)
+
+
+def start_session() -> bool:
+    """
+    Rozpoczyna sesję profilowania
+
+    Returns:
+        bool: True jeśli sesja została rozpoczęta, False gdy już trwa
+    """
+    global _session
+    with _lock:
+        if _session is not None:
+            if _session.stopping:
+                print("⚠️ Poprzednia sesja profilowania jeszcze się zapisuje")
+            return False
+        session = _session = _ProfileSession()
+
+    if Config.PROFILE_TRACEMALLOC and not tracemalloc.is_tracing():
+        # Mniej ramek stosu na alokację = mniejszy narzut i mniejszy ślad pamięci
+        tracemalloc.start(Config.PROFILE_TRACEMALLOC_FRAMES)
+        session.owns_tracemalloc = True
+
+    if Config.PROFILE_MAX_SECONDS > 0:
+        # Zapomniana sesja nie może spowalniać aplikacji w nieskończoność
+        session.timer = threading.Timer(Config.PROFILE_MAX_SECONDS, stop_session)
+        session.timer.daemon = True
+        session.timer.start()
+
+    print(f"🔬 Profilowanie włączone (cProfile + {'tracemalloc' if session.owns_tracemalloc else 'bez tracemalloc'})")
+    return True
+
+
+def stop_session(wait: bool = False, timeout: float = 10.0) -> Optional[str]:
+    """
+    Kończy sesję profilowania i zapisuje raporty do PROFILE_DIR
+
+    Raporty zapisują się w tle, gdy wszystkie wątki opuszczą profilowane bloki.
+
+    Args:
+        wait: Czy czekać na zapisanie raportów
+        timeout: Maksymalny czas oczekiwania w sekundach
+
+    Returns:
+        Optional[str]: Katalog sesji lub None, gdy sesja nie trwała
+    """
+    global _session
+    with _lock:
+        session = _session
+        if session is None or session.stopping:
+            return None
+        session.stopping = True
+        session.stopped_at = time.time()
+        if session.open_sections == 0:
+            session.idle.set()
+
+    if session.timer:
+        session.timer.cancel()
+    print("🔬 Profilowanie wyłączone - zapisywanie raportu...")
+    # Zrzut tracemalloc i zapis raportów trwają tym dłużej, im więcej żywych alokacji,
+    # więc nie mogą blokować wątku skrótu ani UI
+    threading.Thread(target=_write_session, args=(session,), name="ProfileWriter", daemon=True).start()
+    if wait:
+        session.finished.wait(timeout)
+    return session.directory
+
+
+def toggle_session() -> bool:
+    """
+    Przełącza profilowanie (obsługa skrótu PROFILE_HOTKEY)
+
+    Returns:
+        bool: True jeśli profilowanie jest teraz włączone
+    """
+    if active():
+        stop_session()
+        return False
+    return start_session()
+
+
+def _write_session(session: _ProfileSession):
+    """Zapisuje .prof, podsumowanie wątków i raport alokacji, a następnie rotuje katalog"""
+    global _session
+    if session.owns_tracemalloc:
+        session.traced_memory = tracemalloc.get_traced_memory()
+        session.snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        ))
+        tracemalloc.stop()
+    # Profilery wątków można odczytać dopiero po opuszczeniu profilowanych bloków
+    # (np. po zakończeniu trwającego nagrania)
+    session.idle.wait()
+    # Ładowany dopiero przy zapisie raportu - nie spowalnia importu aplikacji
+    import pstats
+    try:
+        os.makedirs(session.directory, exist_ok=True)
+        profiles = [p for p in session.profiles.values() if p.getstats()]
+        if profiles:
+            # Jeden plik .prof dla całej sesji (snakeviz, python -m pstats)
+            pstats.Stats(*profiles).dump_stats(os.path.join(session.directory, 'session.prof'))
+        with open(os.path.join(session.directory, 'summary.txt'), 'w', encoding='utf-8') as f:
+            _write_summary(f, session)
+        if session.snapshot is not None:
+            with open(os.path.join(session.directory, 'allocations.txt'), 'w', encoding='utf-8') as f:
+                _write_allocations(f, session)
+        _rotate(os.path.dirname(session.directory))
+        print(f"🔬 Raport profilowania zapisany: {session.directory}")
+    except OSError as e:
+        print(f"⚠️ Nie udało się zapisać raportu profilowania: {e}")
+    finally:
+        with _lock:
+            if _session is session:
+                _session = None
+        session.finished.set()
+
+
+def _write_summary(f, session: _ProfileSession):
+    """Najdroższe funkcje (czas skumulowany) osobno dla każdego wątku"""
+    import pstats
+    f.write(f"Sesja: {datetime.fromtimestamp(session.started_at):%Y-%m-%d %H:%M:%S}, "
+            f"czas trwania {session.stopped_at - session.started_at:.1f} s\n")
+    for ident, profile in session.profiles.items():
+        if not profile.getstats():
+            continue
+        buffer = io.StringIO()
+        stats = pstats.Stats(profile, stream=buffer)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(Config.PROFILE_TOP_FUNCTIONS)
+        f.write(f"\n=== Wątek {session.thread_names.get(ident, ident)} ===\n")
+        f.write(buffer.getvalue())
+
+
+def _write_allocations(f, session: _ProfileSession):
+    """Miejsca w kodzie z największą ilością zaalokowanej (wciąż żywej) pamięci"""
+    current, peak = session.traced_memory
+    f.write(f"Pamięć śledzona: bieżąca {current / 1024 / 1024:.1f} MB, szczyt {peak / 1024 / 1024:.1f} MB\n\n")
+    for stat in session.snapshot.statistics('lineno')[:Config.PROFILE_TOP_ALLOCATIONS]:
+        frame = stat.traceback[0]
+        f.write(f"{stat.size / 1024:10.1f} KiB  {stat.count:8d} bloków  {frame.filename}:{frame.lineno}\n")
+
+
+def _rotate(directory: str):
+    """Usuwa najstarsze sesje ponad limit PROFILE_MAX_SESSIONS"""
+    sessions = sorted(
+        name for name in os.listdir(directory)
+        if name.startswith('session-') and os.path.isdir(os.path.join(directory, name))
+    )
+    for name in sessions[:max(0, len(sessions) - Config.PROFILE_MAX_SESSIONS)]:
+        shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
@@ -0,0 +1,267 @@
+"""
+Moduł pamięci podręcznej ostatnich nagrań - ponowna transkrypcja bez ponownego dyktowania
+
+Kilka ostatnich nagrań zostaje w pamięci jako próbki int16 16 kHz mono
+(32 KiB na sekundę audio), gotowe do podania modelowi bez odczytu i
+dekodowania pliku. Najstarsze nagrania są usuwane po przekroczeniu
+RECENT_AUDIO_CLIPS nagrań lub RECENT_AUDIO_MAX_MB pamięci.
+
+    python recent_audio.py bench --clips 5 --seconds 20
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+import wave
+from collections import deque
+from typing import TYPE_CHECKING, Deque, Optional
+from config import Config, load_environment
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Częstotliwość próbkowania oczekiwana przez Whisper
+SAMPLE_RATE = 16000
+
+
+def load_samples(path: str, rate: int = SAMPLE_RATE) -> "np.ndarray":
+    """
+    Wczytuje nagranie (WAV 16-bit lub - z pakietem soundfile - FLAC) jako próbki int16 mono
+
+    Args:
+        path: Ścieżka do pliku
+        rate: Docelowa częstotliwość próbkowania
+
+    Returns:
+        np.ndarray: Próbki int16 o częstotliwości rate
+    """
+    import numpy as np
+    try:
+        with wave.open(path, 'rb') as wf:
+            if wf.getsampwidth() != 2:
+                raise ValueError(f"Obsługiwane są tylko pliki WAV 16-bit: {path}")
+            channels = wf.getnchannels()
+            source_rate = wf.getframerate()
+            data = wf.readframes(wf.getnframes())
+        samples = np.frombuffer(data, dtype='<i2')
+    except wave.Error:
+        # Nagranie zakodowane w trakcie nagrywania jako FLAC (AUDIO_ENCODER_FORMAT)
+        import soundfile
+        samples, source_rate = soundfile.read(path, dtype='int16', always_2d=True)
+        channels = samples.shape[1]
+        samples = samples.reshape(-1)
+
+    if channels == 1 and source_rate == rate:
+        return samples
+    mono = samples.astype(np.float32)
+    if channels > 1:
+        mono = mono[:len(mono) - len(mono) % channels].reshape(-1, channels).mean(axis=1)
+    if source_rate != rate:
+        from audio_encoder import _Resampler
+        resampler = _Resampler(source_rate, rate)
+        mono = np.concatenate((resampler.process(mono), resampler.flush()))
+    return np.clip(np.rint(mono), -32768, 32767).astype(np.int16)
+
+
+class RecentClip:
+    """Nagranie w pamięci wraz z wynikiem ostatniej transkrypcji"""
+
+    def __init__(self, samples: "np.ndarray", created_at: float, language: Optional[str] = "pl"):
+        """
+        Args:
+            samples: Próbki int16 16 kHz mono
+            created_at: Początek nagrania (klucz notatki w archiwum)
+            language: Język pierwszej transkrypcji (None - wykryty przez serwer API)
+        """
+        self.samples = samples
+        self.created_at = created_at
+        self.language = language
+        # Tekst po przetworzeniu końcowym (None - nic nie rozpoznano)
+        self.text: Optional[str] = None
+        # Dokładnie to, co trafiło do aktywnego okna (None - tekst nie został wklejony)
+        self.output: Optional[str] = None
+        # Model ostatniej transkrypcji (None - bieżący model serwisu)
+        self.model: Optional[str] = None
+        # Czy notatka z tym nagraniem jest w archiwum
+        self.archived = False
+
+    @property
+    def duration(self) -> float:
+        """Długość nagrania w sekundach"""
+        return len(self.samples) / SAMPLE_RATE
+
+    @property
+    def nbytes(self) -> int:
+        """Pamięć zajmowana przez próbki"""
+        return self.samples.nbytes
+
+
+class RecentAudioCache:
+    """
+    Ograniczona liczbą nagrań i pamięcią kolejka ostatnich nagrań
+
+    Dodawanie i odczyt są bezpieczne wątkowo (nagrania dodaje wątek skrótu
+    lub kolejka wypowiedzi, a ponowną transkrypcję zleca skrót).
+    """
+
+    def __init__(self, max_clips: Optional[int] = None, max_mb: Optional[float] = None):
+        """
+        Args:
+            max_clips: Maksymalna liczba nagrań (domyślnie RECENT_AUDIO_CLIPS)
+            max_mb: Maksymalna pamięć próbek w MB (domyślnie RECENT_AUDIO_MAX_MB)
+        """
+        self.max_clips = max_clips if max_clips is not None else Config.RECENT_AUDIO_CLIPS
+        self.max_bytes = int((max_mb if max_mb is not None else Config.RECENT_AUDIO_MAX_MB) * 1024 * 1024)
+        self._clips: Deque[RecentClip] = deque()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        # Statystyki: usunięte nagrania i koszt wczytania ostatniego
+        self.evicted = 0
+        self.last_load_time: Optional[float] = None
+
+    def add(self, path: str, created_at: Optional[float] = None,
+            language: Optional[str] = "pl") -> Optional[RecentClip]:
+        """
+        Wczytuje nagranie do pamięci, usuwając najstarsze ponad limity
+
+        Args:
+            path: Plik nagrania (przed usunięciem lub przeniesieniem)
+            created_at: Początek nagrania (domyślnie teraz)
+            language: Język pierwszej transkrypcji
+
+        Returns:
+            Optional[RecentClip]: Nagranie lub None, gdy nie udało się go wczytać albo przekracza limit pamięci
+        """
+        started = time.perf_counter()
+        try:
+            samples = load_samples(path)
+        except Exception as e:
+            print(f"⚠️ Nie udało się zachować nagrania w pamięci: {e}")
+            return None
+        self.last_load_time = time.perf_counter() - started
+
+        clip = RecentClip(samples, created_at if created_at is not None else time.time(), language)
+        if clip.nbytes > self.max_bytes:
+            print(f"⚠️ Nagranie ({clip.duration:.0f} s) przekracza limit pamięci ostatnich nagrań")
+            return None
+        with self._lock:
+            self._clips.append(clip)
+            self._bytes += clip.nbytes
+            while len(self._clips) > self.max_clips or self._bytes > self.max_bytes:
+                self._bytes -= self._clips.popleft().nbytes
+                self.evicted += 1
+        return clip
+
+    def last(self) -> Optional[RecentClip]:
+        """Zwraca najnowsze nagranie"""
+        with self._lock:
+            return self._clips[-1] if self._clips else None
+
+    def clear(self):
+        """Usuwa wszystkie nagrania z pamięci"""
+        with self._lock:
+            self._clips.clear()
+            self._bytes = 0
+
+    @property
+    def nbytes(self) -> int:
+        """Pamięć zajmowana przez próbki wszystkich nagrań"""
+        return self._bytes
+
+    def stats(self) -> dict:
+        """
+        Zwraca stan pamięci podręcznej
+
+        Returns:
+            dict: Liczba nagrań, sekundy audio, zajęta i maksymalna pamięć w MB,
+                liczba usuniętych nagrań i czas wczytania ostatniego w ms
+        """
+        with self._lock:
+            seconds = sum(clip.duration for clip in self._clips)
+            clips = len(self._clips)
+        return {
+            'clips': clips,
+            'seconds': seconds,
+            'mb': self._bytes / (1024 * 1024),
+            'max_mb': self.max_bytes / (1024 * 1024),
+            'evicted': self.evicted,
+            'last_load_ms': self.last_load_time * 1000 if self.last_load_time is not None else None,
+        }
+
+    def describe(self) -> str:
+        """Opis zajętości do komunikatów"""
+        stats = self.stats()
+        return (f"{stats['clips']} nagrań, {stats['seconds']:.0f} s audio, "
+                f"{stats['mb']:.1f}/{stats['max_mb']:.0f} MB")
+
+
+# --- Pomiar kosztu wczytania i zajętości pamięci ---
+
+def run_benchmark(clips: int = 5, seconds: float = 20.0, rate: int = 16000, repeats: int = 20,
+                  max_mb: Optional[float] = None):
+    """
+    Mierzy koszt zachowania nagrania w pamięci i zajętość pamięci podręcznej
+
+    Args:
+        clips: Limit liczby nagrań
+        seconds: Długość każdego nagrania
+        rate: Częstotliwość próbkowania pliku (16 kHz - koder w trakcie nagrywania, 44,1 kHz - zapis bez kodera)
+        repeats: Liczba dodanych nagrań (ponad limit - sprawdza usuwanie najstarszych)
+        max_mb: Limit pamięci w MB (domyślnie RECENT_AUDIO_MAX_MB)
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    pcm = (rng.standard_normal(int(rate * seconds)) * 3000).astype('<i2')
+    fd, path = tempfile.mkstemp(suffix='.wav')
+    os.close(fd)
+    try:
+        with wave.open(path, 'wb') as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(rate)
+            wf.writeframes(pcm.tobytes())
+
+        cache = RecentAudioCache(max_clips=clips, max_mb=max_mb)
+        load_times = []
+        for _ in range(repeats):
+            cache.add(path)
+            load_times.append(cache.last_load_time)
+
+        clip = cache.last()
+        started = time.perf_counter()
+        audio = clip.samples.astype(np.float32) / 32768.0
+        convert_time = time.perf_counter() - started
+    finally:
+        os.unlink(path)
+
+    load_times.sort()
+    stats = cache.stats()
+    print(f"\n🎞️ Pamięć ostatnich nagrań: {cache.describe()}, usunięte: {stats['evicted']}")
+    print(f"⏱️ Zachowanie nagrania {seconds:.0f} s ({rate} Hz): mediana "
+          f"{load_times[len(load_times) // 2] * 1000:.1f} ms, maks. {load_times[-1] * 1000:.1f} ms")
+    print(f"⏱️ Przygotowanie próbek dla modelu: {convert_time * 1000:.2f} ms ({audio.nbytes / 1024:.0f} KiB float32)")
+    print(f"📦 {clip.nbytes / seconds / 1024:.0f} KiB na sekundę audio (float32 16 kHz: "
+          f"{SAMPLE_RATE * 4 / 1024:.0f} KiB/s, surowe bloki {Config.AUDIO_RATE} Hz: {Config.AUDIO_RATE * 2 / 1024:.0f} KiB/s)")
+
+
+def main(argv=None):
+    """Wiersz poleceń pamięci podręcznej ostatnich nagrań"""
+    parser = argparse.ArgumentParser(description="Pamięć podręczna ostatnich nagrań")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    bench_parser = subparsers.add_parser('bench', help="Koszt zachowania nagrania i zajętość pamięci")
+    bench_parser.add_argument('--clips', type=int, default=5, help="Limit liczby nagrań")
+    bench_parser.add_argument('--seconds', type=float, default=20.0, help="Długość nagrania")
+    bench_parser.add_argument('--rate', type=int, default=16000, help="Częstotliwość próbkowania pliku (44100 - zapis bez kodera)")
+    bench_parser.add_argument('-n', '--repeats', type=int, default=20, help="Liczba dodanych nagrań")
+    bench_parser.add_argument('--max-mb', type=float, help="Limit pamięci (domyślnie RECENT_AUDIO_MAX_MB)")
+    args = parser.parse_args(argv)
+    load_environment()
+
+    run_benchmark(args.clips, args.seconds, args.rate, args.repeats, args.max_mb)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,26 @@
 """
 Moduł okna nagrywania z wizualizacją audio
 """
-import tkinter as tk
+import argparse
 import threading
 import queue
 import math
-import numpy as np
+import statistics
+import time
 from collections import deque
+from typing import TYPE_CHECKING, Callable, List, Optional
 from config import Config
+import profiler
+import scheduling
+
+if TYPE_CHECKING:
+    import tkinter as tk
 
 
 class RecordingWindow:
     """Klasa okna nagrywania z wizualizacją fali dźwiękowej"""
     
-    def __init__(self, root: tk.Tk):
+    def __init__(self, root: "tk.Tk"):
         """
         Inicjalizuje okno nagrywania
         
@@ -35,27 +42,39 @@ class RecordingWindow:
         # Blokada dla bezpiecznego dostępu do danych audio
         self.data_lock = threading.Lock()
 
+        # Okno i canvas tworzone raz i pokazywane/ukrywane (deiconify/withdraw)
+        self._geometry: Optional[str] = None
+        # Elementy canvas aktualizowane w każdej klatce (bez tworzenia nowych obiektów Tcl)
+        self._level_item = None
+        self._wave_item = None
+
     def start(self):
         """Uruchamia pętlę przetwarzania poleceń i animacji (wątku głównego Tk)."""
+        scheduling.apply(scheduling.UI)
+        # Okno powstaje przy starcie (ukryte), a nie w chwili rozpoczęcia nagrywania
+        self._create_window()
+
         def tick():
-            # Przetwórz oczekujące polecenia (show/hide) z innych wątków
-            try:
-                while True:
-                    cmd = self.command_queue.get_nowait()
-                    if cmd == 'show':
-                        self._open_window()
-                    elif cmd == 'hide':
-                        self._close_window()
-            except queue.Empty:
-                pass
-
-            # Aktualizuj animację jeśli okno jest widoczne
-            if self.visible and self.window and self.canvas:
+            # Wątek UI jest profilowany tylko w trakcie sesji profilowania
+            with profiler.section():
+                # Przetwórz oczekujące polecenia (show/hide) z innych wątków
                 try:
-                    self._draw_wave_visualization(self.width, self.height)
-                    self.animation_frame += Config.ANIMATION_SPEED
-                except Exception as e:
-                    print(f"⚠️ Błąd animacji: {e}")
+                    while True:
+                        cmd = self.command_queue.get_nowait()
+                        if cmd == 'show':
+                            self._open_window()
+                        elif cmd == 'hide':
+                            self._close_window()
+                except queue.Empty:
+                    pass
+
+                # Aktualizuj animację jeśli okno jest widoczne
+                if self.visible and self.window and self.canvas:
+                    try:
+                        self._draw_wave_visualization(self.width, self.height)
+                        self.animation_frame += Config.ANIMATION_SPEED
+                    except Exception as e:
+                        print(f"⚠️ Błąd animacji: {e}")
 
             # Zaplanuj następną aktualizację
             self.root.after(50, tick)  # 20 FPS
@@ -77,31 +96,52 @@ class RecordingWindow:
         except Exception as e:
             print(f"⚠️ Błąd podczas ukrywania okna: {e}")
 
-    def _open_window(self):
-        """Otwiera okno nagrywania (tylko w głównym wątku Tk)"""
-        if self.visible:
-            return
-
+    def _create_window(self):
+        """Tworzy ukryte okno nagrywania z canvas i statycznymi elementami (tylko w głównym wątku Tk)"""
         try:
+            import tkinter as tk
             self.window = tk.Toplevel(self.root)
+            self.window.withdraw()
             self.window.title("🎤 Nagrywanie...")
-            self.window.geometry(f"{self.width}x{self.height}")
             
             # Ustaw okno zawsze na wierzchu i bez ramki
             self.window.attributes('-topmost', True)
             self.window.overrideredirect(True)
             
-            # Wyśrodkuj okno na ekranie
-            screen_width = self.window.winfo_screenwidth()
-            screen_height = self.window.winfo_screenheight()
-            x = (screen_width - self.width) // 2
-            y = (screen_height - self.height) // 2
-            self.window.geometry(f"{self.width}x{self.height}+{x}+{y}")
+            # Wyśrodkuj okno na ekranie (pozycja liczona raz i zapamiętana)
+            if self._geometry is None:
+                screen_width = self.window.winfo_screenwidth()
+                screen_height = self.window.winfo_screenheight()
+                x = (screen_width - self.width) // 2
+                y = (screen_height - self.height) // 2
+                self._geometry = f"{self.width}x{self.height}+{x}+{y}"
+            self.window.geometry(self._geometry)
             
             # Utwórz canvas do rysowania wizualizacji
-            self.canvas = tk.Canvas(self.window, width=self.width, height=self.height, bg='black')
+            self.canvas = tk.Canvas(self.window, width=self.width, height=self.height, bg='black',
+                                    highlightthickness=0)
             self.canvas.pack()
+            self._create_canvas_items(self.width, self.height)
             
+        except Exception as e:
+            print(f"❌ Błąd podczas tworzenia okna nagrywania: {e}")
+            self.window = None
+            self.canvas = None
+
+    def _open_window(self):
+        """Pokazuje okno nagrywania (tylko w głównym wątku Tk)"""
+        if self.visible:
+            return
+
+        try:
+            if not self._window_exists():
+                self._create_window()
+            if self.window is None:
+                return
+            # Pierwsza klatka rysowana przed pokazaniem - bez migania poprzedniej sesji
+            self._draw_wave_visualization(self.width, self.height)
+            self.window.deiconify()
+            self.window.lift()
             self.visible = True
             
         except Exception as e:
@@ -109,22 +149,75 @@ class RecordingWindow:
             self.visible = False
 
     def _close_window(self):
-        """Zamyka okno nagrywania (tylko w głównym wątku Tk)"""
+        """Ukrywa okno nagrywania (tylko w głównym wątku Tk); okno zostaje do ponownego użycia"""
         if not self.visible:
             return
             
         try:
-            if self.window:
-                self.window.destroy()
-                self.window = None
-                self.canvas = None
+            if self._window_exists():
+                self.window.withdraw()
             self.visible = False
         except Exception as e:
             print(f"⚠️ Błąd podczas zamykania okna: {e}")
 
+    def _window_exists(self) -> bool:
+        """Sprawdza, czy okno nie zostało zniszczone (np. przez menedżer okien)"""
+        try:
+            return self.window is not None and bool(self.window.winfo_exists())
+        except Exception:
+            return False
+
+    def destroy(self):
+        """Niszczy okno nagrywania (tylko w głównym wątku Tk, przy zamykaniu aplikacji)"""
+        if self._window_exists():
+            self.window.destroy()
+        self.window = None
+        self.canvas = None
+        self.visible = False
+
+    def _create_canvas_items(self, width, height):
+        """
+        Tworzy elementy canvas raz: statyczne tło, ramkę wskaźnika i napis
+        oraz elementy dynamiczne (wypełnienie wskaźnika, linia fali)
+        
+        Args:
+            width: Szerokość canvas
+            height: Wysokość canvas
+        """
+        # Rysuj tło z gradientem
+        self._draw_gradient_background(width, height)
+        
+        # Tło wskaźnika poziomu
+        bar_x, bar_y, bar_width, bar_height = self._level_bar(width, height)
+        self.canvas.create_rectangle(
+            bar_x, bar_y, bar_x + bar_width, bar_y + bar_height,
+            fill="#333333", outline="#666666"
+        )
+        self._level_item = self.canvas.create_rectangle(
+            bar_x, bar_y, bar_x, bar_y + bar_height, fill="#00ff88", outline="", state='hidden'
+        )
+        self._wave_item = self.canvas.create_line(
+            0, 0, 0, 0, fill=Config.WAVE_COLORS[0], width=2, smooth=True, state='hidden'
+        )
+        
+        # Rysuj tekst
+        self.canvas.create_text(
+            width // 2, height - 20,
+            text="🎤 Nagrywanie w toku...",
+            fill="white",
+            font=("Arial", 10, "bold")
+        )
+
+    @staticmethod
+    def _level_bar(width, height):
+        """Zwraca położenie i rozmiar wskaźnika poziomu (x, y, szerokość, wysokość)"""
+        bar_width = int(width * 0.8)
+        bar_height = 20
+        return (width - bar_width) // 2, height // 2 - bar_height // 2, bar_width, bar_height
+
     def _draw_wave_visualization(self, width, height):
         """
-        Rysuje wizualizację fali dźwiękowej
+        Aktualizuje wizualizację fali dźwiękowej (przesuwa istniejące elementy canvas)
         
         Args:
             width: Szerokość canvas
@@ -134,31 +227,16 @@ class RecordingWindow:
             return
             
         try:
-            # Wyczyść canvas
-            self.canvas.delete("all")
-            
             # Pobierz dane audio w bezpieczny sposób
             with self.data_lock:
                 audio_data = list(self.audio_history)
                 current_level = self.audio_level
             
-            # Rysuj tło z gradientem
-            self._draw_gradient_background(width, height)
-            
-            # Rysuj główny wskaźnik poziomu
+            # Aktualizuj główny wskaźnik poziomu
             self._draw_level_indicator(width, height, current_level)
             
-            # Rysuj falę dźwiękową
-            if audio_data:
-                self._draw_waveform(width, height, audio_data)
-            
-            # Rysuj tekst
-            self.canvas.create_text(
-                width // 2, height - 20,
-                text="🎤 Nagrywanie w toku...",
-                fill="white",
-                font=("Arial", 10, "bold")
-            )
+            # Aktualizuj falę dźwiękową
+            self._draw_waveform(width, height, audio_data)
             
         except Exception as e:
             print(f"⚠️ Błąd podczas rysowania wizualizacji: {e}")
@@ -177,7 +255,7 @@ class RecordingWindow:
 
     def _draw_level_indicator(self, width, height, level):
         """
-        Rysuje wskaźnik poziomu dźwięku
+        Aktualizuje wypełnienie wskaźnika poziomu dźwięku
         
         Args:
             width: Szerokość canvas
@@ -185,40 +263,31 @@ class RecordingWindow:
             level: Poziom dźwięku (0.0 - 1.0)
         """
         try:
-            # Główny wskaźnik poziomu
-            bar_width = int(width * 0.8)
-            bar_height = 20
-            bar_x = (width - bar_width) // 2
-            bar_y = height // 2 - bar_height // 2
-            
-            # Tło wskaźnika
-            self.canvas.create_rectangle(
-                bar_x, bar_y, bar_x + bar_width, bar_y + bar_height,
-                fill="#333333", outline="#666666"
-            )
+            bar_x, bar_y, bar_width, bar_height = self._level_bar(width, height)
             
             # Wypełnienie wskaźnika
             fill_width = int(bar_width * level)
-            if fill_width > 0:
-                # Kolor zależny od poziomu
-                if level < 0.3:
-                    color = "#00ff88"
-                elif level < 0.7:
-                    color = "#ffff00"
-                else:
-                    color = "#ff4444"
-                    
-                self.canvas.create_rectangle(
-                    bar_x, bar_y, bar_x + fill_width, bar_y + bar_height,
-                    fill=color, outline=""
-                )
+            if fill_width <= 0:
+                self.canvas.itemconfigure(self._level_item, state='hidden')
+                return
+            
+            # Kolor zależny od poziomu
+            if level < 0.3:
+                color = "#00ff88"
+            elif level < 0.7:
+                color = "#ffff00"
+            else:
+                color = "#ff4444"
+            
+            self.canvas.coords(self._level_item, bar_x, bar_y, bar_x + fill_width, bar_y + bar_height)
+            self.canvas.itemconfigure(self._level_item, fill=color, state='normal')
                 
         except Exception as e:
             print(f"⚠️ Błąd podczas rysowania wskaźnika: {e}")
 
     def _draw_waveform(self, width, height, audio_data):
         """
-        Rysuje falę dźwiękową
+        Aktualizuje linię fali dźwiękowej
         
         Args:
             width: Szerokość canvas
@@ -227,13 +296,14 @@ class RecordingWindow:
         """
         try:
             if len(audio_data) < 2:
+                self.canvas.itemconfigure(self._wave_item, state='hidden')
                 return
                 
             # Parametry fali
             wave_height = height // 4
             wave_y = height // 2
             
-            # Rysuj linię fali
+            # Wyznacz punkty fali
             points = []
             for i, level in enumerate(audio_data):
                 x = int((i / len(audio_data)) * width)
@@ -242,10 +312,8 @@ class RecordingWindow:
                 y = wave_y + int((level - 0.5) * wave_height) + wave_offset
                 points.extend([x, y])
             
-            if len(points) >= 4:  # Minimum 2 punkty (4 współrzędne)
-                self.canvas.create_line(
-                    points, fill=Config.WAVE_COLORS[0], width=2, smooth=True
-                )
+            self.canvas.coords(self._wave_item, *points)
+            self.canvas.itemconfigure(self._wave_item, state='normal')
                 
         except Exception as e:
             print(f"⚠️ Błąd podczas rysowania fali: {e}")
@@ -260,6 +328,7 @@ class RecordingWindow:
         try:
             # Konwertuj dane audio na poziom (0.0 - 1.0)
             if audio_data:
+                import numpy as np
                 # Konwertuj bytes na numpy array
                 audio_array = np.frombuffer(audio_data, dtype=np.int16)
                 # Oblicz RMS (Root Mean Square)
@@ -284,4 +353,119 @@ class RecordingWindow:
     def _safe_close(self):
         """Bezpieczne zamknięcie okna"""
         if self.visible:
-            self.hide()
\ No newline at end of file
+            self.hide()
+
+
+class HeadlessRoot:
+    """Zastępuje root Tk bez ekranu (testy, odtwarzanie sesji) - wywołania after() wykonuje pump()"""
+
+    def __init__(self):
+        self._pending: List[Callable[[], None]] = []
+
+    def after(self, ms: int, fn: Callable[[], None]):
+        self._pending.append(fn)
+
+    def pump(self):
+        """Wykonuje zaplanowane wywołania (jeden obieg pętli zdarzeń)"""
+        pending, self._pending = self._pending, []
+        for fn in pending:
+            fn()
+
+
+class HeadlessRecordingWindow(RecordingWindow):
+    """Okno nagrywania bez ekranu - polecenia show/hide i dane wizualizacji obsługiwane bez Tk"""
+
+    def _create_window(self):
+        pass
+
+    def _open_window(self):
+        self.visible = True
+
+    def _close_window(self):
+        self.visible = False
+
+    def _draw_wave_visualization(self, width, height):
+        with self.data_lock:
+            list(self.audio_history)
+
+
+# --- Pomiar czasu pokazania okna ---
+
+def _show_legacy(root: "tk.Tk", width: int, height: int):
+    """Dawny sposób: nowe okno, canvas i pełne przerysowanie przy każdym pokazaniu"""
+    import tkinter as tk
+    window = tk.Toplevel(root)
+    window.attributes('-topmost', True)
+    window.overrideredirect(True)
+    x = (window.winfo_screenwidth() - width) // 2
+    y = (window.winfo_screenheight() - height) // 2
+    window.geometry(f"{width}x{height}+{x}+{y}")
+    canvas = tk.Canvas(window, width=width, height=height, bg='black', highlightthickness=0)
+    canvas.pack()
+    for i in range(height):
+        intensity = int(20 + (i / height) * 40)
+        canvas.create_line(0, i, width, i, fill=f"#{intensity:02x}{intensity//2:02x}{intensity//4:02x}")
+    window.lift()
+    return window
+
+
+def run_benchmark(iterations: int = 50):
+    """
+    Porównuje czas pokazania okna (od show() do narysowania) i klatki animacji:
+    tworzenie okna przy każdym nagraniu vs. okno utworzone raz (deiconify/withdraw)
+
+    Args:
+        iterations: Liczba pokazań okna w każdym wariancie
+    """
+    import tkinter as tk
+
+    root = tk.Tk()
+    root.withdraw()
+    width, height = Config.WINDOW_WIDTH, Config.WINDOW_HEIGHT
+
+    legacy = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        window = _show_legacy(root, width, height)
+        window.update()
+        legacy.append((time.perf_counter() - started) * 1000)
+        window.destroy()
+        root.update()
+
+    recording_window = RecordingWindow(root)
+    recording_window._create_window()
+    persistent = []
+    frames = []
+    for index in range(iterations):
+        started = time.perf_counter()
+        recording_window._open_window()
+        root.update()
+        persistent.append((time.perf_counter() - started) * 1000)
+        for _ in range(5):
+            recording_window.audio_history.append(abs(math.sin(index + len(frames))))
+            started = time.perf_counter()
+            recording_window._draw_wave_visualization(width, height)
+            root.update_idletasks()
+            frames.append((time.perf_counter() - started) * 1000)
+        recording_window._close_window()
+        root.update()
+    recording_window.destroy()
+    root.destroy()
+
+    print(f"{'wariant':<22} {'p50':>8} {'p95':>8} {'maks.':>8}")
+    for name, values in (("nowe okno", legacy), ("okno trwałe", persistent), ("klatka animacji", frames)):
+        values.sort()
+        print(f"{name:<22} {statistics.median(values):>6.2f}ms "
+              f"{values[int(len(values) * 0.95)]:>6.2f}ms {values[-1]:>6.2f}ms")
+
+
+def main(argv=None):
+    """Wiersz poleceń pomiaru okna nagrywania (wymaga środowiska graficznego)"""
+    parser = argparse.ArgumentParser(description="Okno nagrywania - pomiar czasu pokazania")
+    parser.add_argument('-n', '--iterations', type=int, default=50, help="Liczba pokazań okna w każdym wariancie")
+    args = parser.parse_args(argv)
+    run_benchmark(args.iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+"""
+Moduł polityki szeregowania - priorytety i przypisanie rdzeni dla nagrywania, UI i dekodowania
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional, Set
+from config import Config, load_environment
+
+# Role wątków i procesów
+CAPTURE = 'capture'
+UI = 'ui'
+DECODE = 'decode'
+# Praca odkładana na bezczynność (np. ponowna transkrypcja archiwum) - zawsze najniższy priorytet
+BACKGROUND = 'background'
+
+# Priorytety wątków Windows (SetThreadPriority; -15 = THREAD_PRIORITY_IDLE)
+_WINDOWS_PRIORITIES = {CAPTURE: 2, UI: 1, DECODE: -1, BACKGROUND: -15}
+
+_local = threading.local()
+_warned: Set[str] = set()
+
+
+def enabled() -> bool:
+    """Czy polityka szeregowania jest włączona (SCHED_POLICY_ENABLED)"""
+    return Config.SCHED_POLICY_ENABLED
+
+
+def available_cpus() -> Set[int]:
+    """Rdzenie dostępne dla procesu"""
+    if hasattr(os, 'sched_getaffinity'):
+        return set(os.sched_getaffinity(0))
+    return set(range(os.cpu_count() or 1))
+
+
+def reserved_cpus() -> Set[int]:
+    """
+    Rdzenie zarezerwowane dla nagrywania i UI (SCHED_RESERVED_CORES ostatnich rdzeni)
+
+    Returns:
+        Set[int]: Pusty zbiór, gdy rdzeni jest za mało, by cokolwiek zarezerwować
+    """
+    cpus = sorted(available_cpus())
+    reserved = max(0, Config.SCHED_RESERVED_CORES)
+    if reserved == 0 or reserved >= len(cpus):
+        return set()
+    return set(cpus[-reserved:])
+
+
+def decode_cpus() -> Set[int]:
+    """Rdzenie, na których może działać dekodowanie"""
+    return available_cpus() - reserved_cpus()
+
+
+def decode_threads() -> int:
+    """
+    Liczba wątków obliczeniowych modelu (cpu_threads faster-whisper)
+
+    Returns:
+        int: LOCAL_CPU_THREADS, przy włączonej polityce liczba rdzeni dekodowania,
+            w przeciwnym razie 0 (domyślna wartość biblioteki)
+    """
+    if Config.LOCAL_CPU_THREADS > 0:
+        return Config.LOCAL_CPU_THREADS
+    if Config.SCHED_POLICY_ENABLED:
+        return len(decode_cpus())
+    return 0
+
+
+def apply(role: str) -> bool:
+    """
+    Stosuje politykę do bieżącego wątku (wątki utworzone później ją dziedziczą)
+
+    Obniżenie priorytetu pracy w tle (BACKGROUND) nie wymaga uprawnień, więc
+    jest stosowane także przy wyłączonej polityce (SCHED_POLICY_ENABLED).
+
+    Args:
+        role: CAPTURE, UI, DECODE lub BACKGROUND
+
+    Returns:
+        bool: True jeśli polityka została zastosowana
+    """
+    if getattr(_local, 'role', None) == role:
+        return False
+    if not Config.SCHED_POLICY_ENABLED and role != BACKGROUND:
+        return False
+    _local.role = role
+
+    if role == DECODE or (role == BACKGROUND and Config.SCHED_POLICY_ENABLED):
+        _set_affinity(decode_cpus())
+    elif Config.SCHED_PIN_INTERACTIVE and reserved_cpus():
+        _set_affinity(reserved_cpus())
+
+    if sys.platform == 'win32':
+        _set_windows_priority(_WINDOWS_PRIORITIES[role])
+        return True
+    if role == BACKGROUND:
+        _set_idle_policy()
+    elif role == DECODE and Config.SCHED_DECODE_BATCH:
+        _set_batch_policy()
+    nice = {
+        CAPTURE: Config.SCHED_CAPTURE_NICE,
+        UI: Config.SCHED_UI_NICE,
+        DECODE: Config.SCHED_DECODE_NICE,
+        BACKGROUND: Config.SCHED_BACKGROUND_NICE,
+    }[role]
+    _set_thread_nice(nice, role)
+    return True
+
+
+@contextmanager
+def decoding():
+    """
+    Przenosi bieżący wątek na rdzenie dekodowania na czas bloku `with`
+
+    Dotyczy wątków, które obok dekodowania wykonują inną pracę (np. wątek
+    skrótu); priorytetu nie da się bez uprawnień przywrócić, więc zmieniane
+    jest tylko przypisanie rdzeni.
+    """
+    if not Config.SCHED_POLICY_ENABLED or not hasattr(os, 'sched_getaffinity') or not reserved_cpus():
+        yield
+        return
+    previous = os.sched_getaffinity(0)
+    _set_affinity(decode_cpus())
+    try:
+        yield
+    finally:
+        _set_affinity(previous)
+
+
+def call_in_decode_thread(fn: Callable, *args, **kwargs):
+    """
+    Wywołuje funkcję w osobnym wątku z polityką dekodowania i czeka na wynik
+
+    Wątki obliczeniowe tworzone przez bibliotekę (np. pula CTranslate2 przy
+    ładowaniu modelu) dziedziczą priorytet i rdzenie wątku, który je utworzył.
+    """
+    if not Config.SCHED_POLICY_ENABLED:
+        return fn(*args, **kwargs)
+    result = {}
+
+    def run():
+        apply(DECODE)
+        try:
+            result['value'] = fn(*args, **kwargs)
+        except BaseException as e:
+            result['error'] = e
+
+    thread = threading.Thread(target=run, name="DecodeLoader", daemon=True)
+    thread.start()
+    thread.join()
+    if 'error' in result:
+        raise result['error']
+    return result['value']
+
+
+def _set_affinity(cpus: Set[int]):
+    """Ustawia rdzenie bieżącego wątku (Linux)"""
+    if not cpus or not hasattr(os, 'sched_setaffinity'):
+        return
+    try:
+        os.sched_setaffinity(0, cpus)
+    except OSError as e:
+        _warn_once('affinity', f"⚠️ Nie udało się ustawić rdzeni wątku: {e}")
+
+
+def _set_batch_policy():
+    """Przełącza bieżący wątek na SCHED_BATCH - obliczenia bez wywłaszczania wątków interaktywnych przy wybudzeniu"""
+    if not hasattr(os, 'sched_setscheduler') or not hasattr(os, 'SCHED_BATCH'):
+        return
+    try:
+        os.sched_setscheduler(0, os.SCHED_BATCH, os.sched_param(0))
+    except OSError as e:
+        _warn_once('batch', f"⚠️ Nie udało się ustawić SCHED_BATCH: {e}")
+
+
+def _set_idle_policy():
+    """Przełącza bieżący wątek na SCHED_IDLE - działa tylko na rdzeniach, których nic innego nie potrzebuje"""
+    if not hasattr(os, 'sched_setscheduler') or not hasattr(os, 'SCHED_IDLE'):
+        return
+    try:
+        os.sched_setscheduler(0, os.SCHED_IDLE, os.sched_param(0))
+    except OSError as e:
+        _warn_once('idle', f"⚠️ Nie udało się ustawić SCHED_IDLE: {e}")
+
+
+def _set_thread_nice(nice: int, role: str):
+    """Ustawia priorytet (nice) bieżącego wątku - na Linuksie dotyczy tylko tego wątku"""
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), nice)
+    except PermissionError:
+        # Podniesienie priorytetu wymaga CAP_SYS_NICE lub limitu RLIMIT_NICE
+        _warn_once(role, f"⚠️ Brak uprawnień do ustawienia priorytetu {nice} ({role}) - "
+                         f"zostaje domyślny (zwiększ RLIMIT_NICE lub nadaj CAP_SYS_NICE)")
+    except (OSError, AttributeError) as e:
+        _warn_once(role, f"⚠️ Nie udało się ustawić priorytetu wątku ({role}): {e}")
+
+
+def _set_windows_priority(priority: int):
+    """Ustawia priorytet bieżącego wątku w Windows"""
+    try:
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        kernel32.SetThreadPriority(kernel32.GetCurrentThread(), priority)
+    except Exception as e:
+        _warn_once('windows', f"⚠️ Nie udało się ustawić priorytetu wątku: {e}")
+
+
+def _warn_once(key: str, message: str):
+    if key not in _warned:
+        _warned.add(key)
+        print(message)
+
+
+# --- Pomiar pod obciążeniem syntetycznym ---
+
+def _cpu_hog(stop, use_policy: bool):
+    """Proces zajmujący rdzeń w pętli (odpowiednik dekodowania)"""
+    if use_policy:
+        # Proces uruchomiony metodą spawn czyta konfigurację ze środowiska
+        Config.SCHED_POLICY_ENABLED = True
+        apply(DECODE)
+    while not stop.is_set():
+        sum(i * i for i in range(10000))
+
+
+def _measure(seconds: float, buffer_chunks: int, use_policy: bool, hogs: int) -> dict:
+    """Mierzy przepełnienia bufora nagrywania i opóźnienia klatek UI przy obciążonych rdzeniach"""
+    import numpy as np
+
+    period = Config.AUDIO_CHUNK / Config.AUDIO_RATE
+    block = (np.random.randn(Config.AUDIO_CHUNK) * 3000).astype(np.int16)
+    stop = threading.Event()
+    overflows = [0]
+    lateness = []
+
+    def capture():
+        if use_policy:
+            apply(CAPTURE)
+        start = time.perf_counter()
+        index = 0
+        while not stop.is_set():
+            delay = start + (index + 1) * period - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            float(np.sqrt(np.mean(block.astype(np.float32) ** 2)))
+            index += 1
+            lag = time.perf_counter() - (start + index * period)
+            if lag > buffer_chunks * period:
+                # Bufor PortAudio przepełniony - próbki z tego okresu przepadają
+                overflows[0] += 1
+                index += int(lag / period)
+
+    def ui():
+        if use_policy:
+            apply(UI)
+        due = time.perf_counter() + 0.05
+        while not stop.is_set():
+            time.sleep(max(0.0, due - time.perf_counter()))
+            lateness.append((time.perf_counter() - due) * 1000)
+            sum(abs(np.sin(i * 0.3)) for i in range(50))
+            due += 0.05
+
+    context = multiprocessing.get_context('spawn')
+    hog_stop = context.Event()
+    processes = [context.Process(target=_cpu_hog, args=(hog_stop, use_policy), daemon=True) for _ in range(hogs)]
+    for process in processes:
+        process.start()
+    time.sleep(0.5)
+
+    threads = [threading.Thread(target=capture), threading.Thread(target=ui)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    hog_stop.set()
+    for process in processes:
+        process.join(timeout=5)
+
+    lateness.sort()
+    return {
+        'overflows': overflows[0],
+        'ui_p50': statistics.median(lateness),
+        'ui_p95': lateness[int(len(lateness) * 0.95)],
+        'ui_max': lateness[-1],
+    }
+
+
+def run_benchmark(seconds: float = 5.0, buffer_chunks: int = 2, hogs: Optional[int] = None):
+    """
+    Porównuje nagrywanie i UI pod obciążeniem wszystkich rdzeni z polityką i bez niej
+
+    Args:
+        seconds: Czas pomiaru każdego wariantu
+        buffer_chunks: Pojemność symulowanego bufora wejścia audio w blokach
+        hogs: Liczba procesów obciążających (domyślnie 2 na rdzeń)
+    """
+    hogs = hogs or 2 * len(available_cpus())
+    print(f"🔥 Obciążenie: {hogs} procesów, rdzenie {sorted(available_cpus())}, "
+          f"zarezerwowane {sorted(reserved_cpus()) or 'brak'}")
+    print(f"{'polityka':<10} {'przepełnienia':>14} {'opóźnienie UI p50':>18} {'p95':>8} {'maks.':>8}")
+    for use_policy in (False, True):
+        Config.SCHED_POLICY_ENABLED = use_policy
+        result = _measure(seconds, buffer_chunks, use_policy, hogs)
+        print(f"{'wł.' if use_policy else 'wył.':<10} {result['overflows']:>14} "
+              f"{result['ui_p50']:>16.1f}ms {result['ui_p95']:>6.1f}ms {result['ui_max']:>6.1f}ms")
+
+
+def main(argv=None):
+    """Wiersz poleceń pomiaru polityki szeregowania"""
+    parser = argparse.ArgumentParser(description="Polityka szeregowania - pomiar pod obciążeniem CPU")
+    parser.add_argument('-s', '--seconds', type=float, default=5.0, help="Czas pomiaru każdego wariantu")
+    parser.add_argument('--buffer-chunks', type=int, default=2, help="Pojemność bufora wejścia audio (bloki)")
+    parser.add_argument('--hogs', type=int, help="Liczba procesów obciążających (domyślnie 2 na rdzeń)")
+    args = parser.parse_args(argv)
+    load_environment()
+    run_benchmark(args.seconds, args.buffer_chunks, args.hogs)
+
+
+if __name__ == "__main__":
+    main()
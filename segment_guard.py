@@ -0,0 +1,184 @@
+"""
+Moduł strażnika strumienia segmentów faster-whisper (pętle powtórzeń i halucynacje w ciszy)
+"""
+import re
+from typing import Iterable, List, Optional, Tuple
+from config import Config
+
+
+# Słowo po normalizacji: małe litery, bez interpunkcji na brzegach
+_PUNCTUATION_RE = re.compile(r"^\W+|\W+$")
+
+
+class SegmentGuard:
+    """
+    Pobiera segmenty z generatora faster-whisper, pomija halucynacje w ciszy
+    i przerywa dekodowanie, gdy model wpada w pętlę powtórzeń.
+
+    Generator segmentów faster-whisper jest leniwy - każdy kolejny segment
+    to kolejne okno dekodowania. Przerwanie iteracji oznacza, że reszta
+    nagrania nie jest w ogóle dekodowana, dlatego przerywa je tylko pętla
+    ciągnąca się przez kolejne segmenty. Cisza (pauza w dyktowaniu) nie
+    przerywa dekodowania - mowa po niej musi trafić do tekstu.
+    """
+
+    def __init__(self,
+                 max_ngram: Optional[int] = None,
+                 max_repeats: Optional[int] = None,
+                 no_speech_threshold: Optional[float] = None,
+                 logprob_threshold: Optional[float] = None,
+                 min_loop_words: Optional[int] = None):
+        """
+        Inicjalizuje strażnika segmentów
+
+        Args:
+            max_ngram: Najdłuższy n-gram (w słowach) sprawdzany pod kątem powtórzeń
+            max_repeats: Liczba kolejnych powtórzeń n-gramu uznawana za pętlę
+            no_speech_threshold: Próg no_speech_prob, powyżej którego segment może być ciszą
+            logprob_threshold: Próg avg_logprob, poniżej którego segment z wysokim
+                no_speech_prob uznajemy za ciszę (jak w Whisperze)
+            min_loop_words: Najmniejsza liczba słów pętli mieszczącej się w jednym segmencie,
+                odrzucanej na końcu tekstu (krótsze to zwykłe powtórzenia, np. "tak, tak, tak, tak")
+        """
+        self.max_ngram = max_ngram or Config.SEGMENT_GUARD_MAX_NGRAM
+        self.max_repeats = max_repeats or Config.SEGMENT_GUARD_MAX_REPEATS
+        self.no_speech_threshold = (
+            no_speech_threshold if no_speech_threshold is not None
+            else Config.SEGMENT_GUARD_NO_SPEECH_THRESHOLD
+        )
+        self.logprob_threshold = (
+            logprob_threshold if logprob_threshold is not None
+            else Config.SEGMENT_GUARD_LOGPROB_THRESHOLD
+        )
+        self.min_loop_words = min_loop_words or Config.SEGMENT_GUARD_MIN_LOOP_WORDS
+
+        # Informacje o ostatnim przebiegu (do logów i pomiarów)
+        self.aborted = False
+        self.abort_reason: Optional[str] = None
+        self.segments_read = 0
+        self.segments_dropped = 0
+        self.segments_silent = 0
+
+    def collect(self, segments: Iterable) -> str:
+        """
+        Składa tekst z segmentów, pomijając ciszę i odrzucając pętle powtórzeń
+
+        Args:
+            segments: Iterowalny strumień segmentów (obiekty z polami text, no_speech_prob
+                i avg_logprob; brak avg_logprob - segment nie jest uznawany za ciszę)
+
+        Returns:
+            str: Tekst bez halucynacji w ciszy i bez powtarzanego ogona
+        """
+        self.aborted = False
+        self.abort_reason = None
+        self.segments_read = 0
+        self.segments_dropped = 0
+        self.segments_silent = 0
+
+        words: List[str] = []
+        keys: List[str] = []
+        # Powtórzenia całych segmentów (długie zdania nie mieszczą się w n-gramach)
+        last_segment_key: Optional[tuple] = None
+        segment_repeats = 0
+        words_before_repeats = 0
+
+        try:
+            for segment in segments:
+                self.segments_read += 1
+                if self._is_silence(segment):
+                    # Halucynacja w ciszy - pomiń segment i dekoduj dalej
+                    self.segments_silent += 1
+                    continue
+
+                segment_words = segment.text.split()
+                segment_key = tuple(self._normalize(word) for word in segment_words)
+                if segment_key and segment_key == last_segment_key:
+                    segment_repeats += 1
+                elif segment_key:
+                    last_segment_key = segment_key
+                    segment_repeats = 1
+                    words_before_repeats = len(words) + len(segment_words)
+
+                segment_start = len(keys)
+                words.extend(segment_words)
+                keys.extend(segment_key)
+
+                if segment_repeats >= self.max_repeats:
+                    del words[words_before_repeats:]
+                    del keys[words_before_repeats:]
+                    self.segments_dropped = segment_repeats - 1
+                    self._abort("powtarzany segment")
+                    break
+
+                loop = self._find_repetition(keys)
+                if loop is not None and loop[0] < segment_start and len(segment_key):
+                    # Pętla zaczęła się w poprzednim segmencie i wypełnia cały bieżący - model się zapętlił;
+                    # zostaw pierwsze wystąpienie powtarzanej frazy, resztę odrzuć
+                    cut = loop[1]
+                    del words[cut:]
+                    del keys[cut:]
+                    self.segments_dropped = 1
+                    self._abort("pętla powtórzeń")
+                    break
+        finally:
+            # Zamknięcie generatora zatrzymuje dekodowanie pozostałych okien
+            close = getattr(segments, 'close', None)
+            if self.aborted and close:
+                try:
+                    close()
+                except Exception:
+                    pass
+
+        if not self.aborted:
+            # Długa pętla w ostatnim segmencie (dekodowanie już się skończyło)
+            loop = self._find_repetition(keys)
+            if loop is not None and len(keys) - loop[0] >= self.min_loop_words:
+                del words[loop[1]:]
+                self.abort_reason = "pętla powtórzeń na końcu"
+                print(f"⚠️ Odrzucono pętlę powtórzeń na końcu tekstu ({len(keys) - loop[1]} słów)")
+
+        return " ".join(words).strip()
+
+    def _is_silence(self, segment) -> bool:
+        """Segment to cisza, gdy model jest pewny braku mowy i niepewny rozpoznanego tekstu"""
+        no_speech_prob = getattr(segment, 'no_speech_prob', 0.0) or 0.0
+        avg_logprob = getattr(segment, 'avg_logprob', None)
+        return (no_speech_prob >= self.no_speech_threshold
+                and avg_logprob is not None and avg_logprob < self.logprob_threshold)
+
+    def _find_repetition(self, keys: List[str]) -> Optional[Tuple[int, int]]:
+        """
+        Sprawdza, czy końcówka tekstu to wielokrotnie powtórzony n-gram
+
+        Args:
+            keys: Znormalizowane słowa zaakceptowanego tekstu
+
+        Returns:
+            Optional[Tuple[int, int]]: Początek powtórzeń i indeks, od którego należy obciąć tekst
+                (za pierwszym wystąpieniem frazy), lub None
+        """
+        total = len(keys)
+        for size in range(1, self.max_ngram + 1):
+            if total < size * self.max_repeats:
+                break
+            pattern = keys[total - size:]
+            repeats = 1
+            start = total - size
+            while start - size >= 0 and keys[start - size:start] == pattern:
+                repeats += 1
+                start -= size
+            if repeats >= self.max_repeats:
+                return start, start + size
+        return None
+
+    def _abort(self, reason: str):
+        """Zapisuje powód przerwania dekodowania"""
+        self.aborted = True
+        self.abort_reason = reason
+        print(f"⚠️ Przerwano dekodowanie po {self.segments_read} segmentach: {reason}")
+
+    @staticmethod
+    def _normalize(word: str) -> str:
+        """Normalizuje słowo do porównań (małe litery, bez interpunkcji)"""
+        return _PUNCTUATION_RE.sub("", word.lower())
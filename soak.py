@@ -0,0 +1,371 @@
+"""
+Test długotrwały (soak) - tysiące cykli nagrywanie/zatrzymanie/transkrypcja bez mikrofonu, modelu i ekranu
+
+Aplikacja działa tygodniami, więc nawet niewielki wyciek na sesję (wątek,
+strumień audio, plik tymczasowy, obiekt Tk) rośnie bez końca. Skrypt steruje
+VoiceNotesApp atrapami (syntetyczne źródło audio, model, schowek i klawiatura), co
+kilka cykli mierzy zasoby procesu i kończy się błędem, gdy któryś z nich
+rośnie stale ponad tolerancję.
+
+Użycie:
+    python soak.py -n 2000
+    python soak.py -n 500 --endpointing --csv soak.csv
+"""
+import argparse
+import csv
+import gc
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+from config import Config, load_environment
+from audio_source import SyntheticSource
+from output_worker import ClipboardBackend, FakeClipboard, KeyboardBackend, OutputWorker
+from recording_window import HeadlessRecordingWindow, HeadlessRoot, RecordingWindow
+from transcription_service import TranscriptionService, resident_memory_mb
+from window_provider import FakeWindowProvider, WindowClassifier
+
+# Dopuszczalny wzrost metryki między początkiem a końcem pomiaru (po rozgrzewce)
+DEFAULT_TOLERANCES = {
+    'rss_mb': 25.0,
+    'threads': 2,
+    'fds': 4,
+    'temp_files': 0,
+    'tk_objects': 5,
+    'py_objects': 5000,
+}
+
+class _StubModel:
+    """Atrapa modelu faster-whisper - tekst zależny od długości nagrania, opcjonalne opóźnienie dekodowania"""
+
+    def __init__(self, decode_ms: float = 0.0):
+        self.decode_ms = decode_ms
+        self.calls = 0
+
+    def transcribe(self, audio, **kwargs):
+        self.calls += 1
+        if self.decode_ms:
+            time.sleep(self.decode_ms / 1000)
+        size = os.path.getsize(audio) if isinstance(audio, str) else len(audio)
+        words = " ".join(["notatka"] * max(1, size // 16000))
+        segment = SimpleNamespace(text=f"{words} {self.calls}.", no_speech_prob=0.0, start=0.0, end=1.0)
+        return iter([segment]), SimpleNamespace(language='pl', language_probability=1.0, duration=1.0)
+
+
+def _stub_model_factory(model_size: str, device: str = 'cpu', compute_type: str = 'int8', **kwargs):
+    """Fabryka atrapy (także dla procesu roboczego; model_size = czas dekodowania w ms)"""
+    try:
+        return _StubModel(float(model_size))
+    except ValueError:
+        return _StubModel()
+
+
+class _CountingKeyboard(KeyboardBackend):
+    """Atrapa klawiatury zliczająca wklejenia (bez przechowywania historii - sama nie może wyciekać)"""
+
+    def __init__(self, clipboard: ClipboardBackend):
+        self.clipboard = clipboard
+        self.pastes = 0
+        self.backspaces = 0
+        self.last_text: Optional[str] = None
+
+    def send_paste(self):
+        self.pastes += 1
+        self.last_text = self.clipboard.paste()
+
+    def type_text(self, text: str):
+        self.pastes += 1
+        self.last_text = text
+
+    def send_backspace(self, count: int):
+        self.backspaces += count
+
+
+def open_file_descriptors() -> Optional[int]:
+    """Liczba otwartych deskryptorów plików (Linux) lub uchwytów (Windows, psutil)"""
+    for directory in ('/proc/self/fd', '/dev/fd'):
+        try:
+            return len(os.listdir(directory))
+        except OSError:
+            continue
+    try:
+        import psutil
+        process = psutil.Process()
+        return process.num_handles() if sys.platform == 'win32' else process.num_fds()
+    except Exception:
+        return None
+
+
+def tk_object_count(root, window: RecordingWindow) -> Optional[int]:
+    """Liczba widżetów, obrazów, zaplanowanych wywołań after() i elementów canvas okna nagrywania"""
+    if isinstance(root, HeadlessRoot):
+        return None
+    widgets = 0
+    stack = [root]
+    while stack:
+        widget = stack.pop()
+        widgets += 1
+        stack.extend(widget.winfo_children())
+    count = widgets + len(root.tk.call('image', 'names')) + len(root.tk.call('after', 'info'))
+    if window.canvas is not None:
+        count += len(window.canvas.find_all())
+    return count
+
+
+class SoakHarness:
+    """Steruje aplikacją w cyklach nagrywanie/zatrzymanie i zbiera próbki zasobów"""
+
+    def __init__(self, record_seconds: float = 0.3, speed: float = 10.0, decode_ms: float = 0.0,
+                 endpointing: bool = False, worker: bool = False):
+        """
+        Args:
+            record_seconds: Czas nagrywania w jednym cyklu (czas zegarowy)
+            speed: Krotność czasu rzeczywistego atrapy audio
+            decode_ms: Czas dekodowania atrapy modelu w ms
+            endpointing: Dyktowanie ciągłe (wypowiedzi zamykane po ciszy)
+            worker: Dekodowanie w procesie roboczym (LOCAL_WORKER_PROCESS)
+        """
+        self.record_seconds = record_seconds
+        self.samples: List[Dict[str, float]] = []
+
+        # Pliki tymczasowe i archiwum notatek w prywatnym katalogu - pozostałości łatwo policzyć
+        self.temp_dir = tempfile.mkdtemp(prefix='szeptucha-soak-')
+        self._previous_tempdir = tempfile.tempdir
+        tempfile.tempdir = os.path.join(self.temp_dir, 'tmp')
+        os.makedirs(tempfile.tempdir)
+
+        Config.TRANSCRIPTION_MODE = 'local'
+        Config.LOCAL_WHISPER_MODEL = str(decode_ms)
+        Config.LOCAL_WORKER_PROCESS = worker
+        Config.NOTES_DB_PATH = os.path.join(self.temp_dir, 'notes.db')
+        Config.ENDPOINT_ENABLED = endpointing
+        Config.TRACE_ENABLED = False
+
+        self.root = self._create_root()
+        window_class = HeadlessRecordingWindow if isinstance(self.root, HeadlessRoot) else RecordingWindow
+        self.audio = SyntheticSource('tone', speed, silence_seconds=Config.ENDPOINT_SILENCE * 2 if endpointing else 0.0)
+        clipboard = FakeClipboard()
+        self.keyboard = _CountingKeyboard(clipboard)
+        factory = self._worker_factory if worker else _stub_model_factory
+
+        from voice_notes_app import VoiceNotesApp
+        self.app = VoiceNotesApp(
+            self.root,
+            audio_interface=self.audio,
+            transcription_service=TranscriptionService(model_factory=factory),
+            text_processor=self._create_text_processor(clipboard),
+            recording_window=window_class(self.root),
+        )
+        self.app.recording_window.start()
+
+    @staticmethod
+    def _create_root():
+        """Root Tk, gdy dostępny jest ekran; w przeciwnym razie atrapa"""
+        try:
+            import tkinter as tk
+            root = tk.Tk()
+            root.withdraw()
+            return root
+        except Exception as e:
+            print(f"ℹ️ Tk niedostępny ({e}) - okno nagrywania bez ekranu, bez pomiaru obiektów Tk")
+            return HeadlessRoot()
+
+    @staticmethod
+    def _worker_factory(model_size: str, **kwargs):
+        from transcription_worker import WorkerModel
+        return WorkerModel(model_size, kwargs['device'], kwargs['compute_type'], factory=_stub_model_factory)
+
+    def _create_text_processor(self, clipboard: ClipboardBackend):
+        from text_processor import TextProcessor
+        provider = FakeWindowProvider('Edit', 'Notatnik')
+        return TextProcessor(
+            window_classifier=WindowClassifier(provider=provider),
+            output_worker=OutputWorker(keyboard=self.keyboard, clipboard=clipboard),
+        )
+
+    def pump(self, seconds: float = 0.0):
+        """Obsługuje pętlę zdarzeń okna przez podany czas (co najmniej raz)"""
+        deadline = time.perf_counter() + seconds
+        while True:
+            if isinstance(self.root, HeadlessRoot):
+                self.root.pump()
+            else:
+                self.root.update()
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return
+            time.sleep(min(0.05, remaining))
+
+    def cycle(self):
+        """Jedno nagranie: start, mówienie, zatrzymanie, transkrypcja i wklejenie"""
+        if not self.app.start_recording():
+            raise RuntimeError("Nie udało się rozpocząć nagrywania")
+        self.pump(self.record_seconds)
+        self.app.stop_recording()
+        self.drain()
+        self.pump()
+
+    def drain(self, timeout: float = 30.0):
+        """Czeka na przetworzenie wypowiedzi i wykonanie wklejeń"""
+        executor = self.app._utterance_executor
+        if executor is not None:
+            executor.submit(lambda: None).result(timeout)
+        if not self.app.text_processor.output_worker.flush(timeout):
+            raise RuntimeError("Wątek wyjścia nie opróżnił kolejki")
+
+    def sample(self, cycle: int) -> Dict[str, float]:
+        """Zbiera metryki zasobów procesu (po odśmieceniu pamięci)"""
+        gc.collect()
+        sample = {
+            'cycle': cycle,
+            'rss_mb': resident_memory_mb(),
+            'threads': threading.active_count(),
+            'fds': open_file_descriptors(),
+            'temp_files': len(os.listdir(tempfile.gettempdir())),
+            'tk_objects': tk_object_count(self.root, self.app.recording_window),
+            'py_objects': len(gc.get_objects()),
+            'streams': self.audio.open_streams,
+        }
+        self.samples.append(sample)
+        return sample
+
+    def close(self):
+        """Zamyka aplikację i usuwa katalog tymczasowy"""
+        self.app.shutdown()
+        if not isinstance(self.root, HeadlessRoot):
+            self.root.destroy()
+        tempfile.tempdir = self._previous_tempdir
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+
+def detect_growth(samples: List[Dict[str, float]], tolerances: Dict[str, float]) -> List[str]:
+    """
+    Wykrywa metryki rosnące stale ponad tolerancję
+
+    Próbki dzielone są na trzy części; wzrost to różnica median ostatniej
+    i pierwszej części. Wzrost liczy się tylko wtedy, gdy mediana środkowej
+    części nie spada poniżej pierwszej (pojedynczy skok na końcu lub
+    chwilowy szczyt to nie wyciek).
+
+    Args:
+        samples: Próbki zebrane po rozgrzewce
+        tolerances: Dopuszczalny wzrost dla każdej metryki
+
+    Returns:
+        List[str]: Opisy przekroczeń (pusta lista - brak wycieków)
+    """
+    failures = []
+    if len(samples) < 3:
+        return failures
+    third = len(samples) // 3
+    for metric, tolerance in tolerances.items():
+        values = [s[metric] for s in samples if s.get(metric) is not None]
+        if len(values) < 3:
+            continue
+        first = statistics.median(values[:third])
+        middle = statistics.median(values[third:-third])
+        last = statistics.median(values[-third:])
+        growth = last - first
+        if growth > tolerance and first <= middle <= last:
+            failures.append(f"{metric}: {first:g} → {last:g} (+{growth:g}, tolerancja {tolerance:g})")
+    return failures
+
+
+def _format_value(value) -> str:
+    if value is None:
+        return '-'
+    return f"{value:.1f}" if isinstance(value, float) else str(value)
+
+
+def run_soak(cycles: int = 1000, sample_every: Optional[int] = None, warmup: Optional[int] = None,
+             csv_path: Optional[str] = None, tolerances: Optional[Dict[str, float]] = None, **options) -> bool:
+    """
+    Uruchamia test długotrwały
+
+    Args:
+        cycles: Liczba cykli nagrywania
+        sample_every: Co ile cykli zbierać próbkę (domyślnie ~50 próbek)
+        warmup: Liczba cykli rozgrzewki pomijanych w ocenie (domyślnie 10%)
+        csv_path: Opcjonalny plik CSV z próbkami
+        tolerances: Dopuszczalny wzrost metryk (domyślnie DEFAULT_TOLERANCES)
+        **options: Argumenty SoakHarness
+
+    Returns:
+        bool: True jeśli nie wykryto wycieków
+    """
+    sample_every = sample_every or max(1, cycles // 50)
+    warmup = warmup if warmup is not None else cycles // 10
+    tolerances = tolerances or DEFAULT_TOLERANCES
+
+    harness = SoakHarness(**options)
+    columns = ['cycle', 'rss_mb', 'threads', 'fds', 'temp_files', 'tk_objects', 'py_objects', 'streams']
+    started = time.perf_counter()
+    try:
+        print(" ".join(f"{c:>10}" for c in columns))
+        print(" ".join(f"{_format_value(v):>10}" for v in harness.sample(0).values()))
+        for cycle in range(1, cycles + 1):
+            harness.cycle()
+            if cycle % sample_every == 0 or cycle == cycles:
+                print(" ".join(f"{_format_value(v):>10}" for v in harness.sample(cycle).values()))
+        pastes = harness.keyboard.pastes
+    finally:
+        harness.close()
+
+    elapsed = time.perf_counter() - started
+    measured = [s for s in harness.samples if s['cycle'] >= warmup]
+    failures = detect_growth(measured, tolerances)
+    last = harness.samples[-1]
+    if last['temp_files']:
+        failures.append(f"temp_files: {last['temp_files']} pozostawionych plików tymczasowych")
+    if last['streams']:
+        failures.append(f"streams: {last['streams']} niezamkniętych strumieni audio")
+
+    if csv_path:
+        with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=columns)
+            writer.writeheader()
+            writer.writerows(harness.samples)
+
+    print(f"\n🔁 {cycles} cykli w {elapsed:.0f} s ({elapsed / cycles * 1000:.0f} ms/cykl), {pastes} wklejeń")
+    if failures:
+        print("❌ Wykryto stały wzrost zasobów:")
+        for failure in failures:
+            print(f"   • {failure}")
+        return False
+    print("✅ Brak wycieków ponad tolerancję")
+    return True
+
+
+def main(argv=None):
+    """Wiersz poleceń testu długotrwałego"""
+    parser = argparse.ArgumentParser(description="Test długotrwały - wycieki pamięci, wątków, deskryptorów i obiektów Tk")
+    parser.add_argument('-n', '--cycles', type=int, default=1000, help="Liczba cykli nagrywania")
+    parser.add_argument('--record-seconds', type=float, default=0.3, help="Czas nagrywania w cyklu")
+    parser.add_argument('--speed', type=float, default=10.0, help="Krotność czasu rzeczywistego atrapy audio")
+    parser.add_argument('--decode-ms', type=float, default=0.0, help="Czas dekodowania atrapy modelu (ms)")
+    parser.add_argument('--endpointing', action='store_true', help="Dyktowanie ciągłe (ENDPOINT_ENABLED)")
+    parser.add_argument('--worker', action='store_true', help="Dekodowanie w procesie roboczym")
+    parser.add_argument('--sample-every', type=int, help="Co ile cykli zbierać próbkę")
+    parser.add_argument('--warmup', type=int, help="Liczba cykli rozgrzewki (domyślnie 10%%)")
+    parser.add_argument('--rss-tolerance', type=float, default=DEFAULT_TOLERANCES['rss_mb'],
+                        help="Dopuszczalny wzrost RSS w MB")
+    parser.add_argument('--csv', help="Zapisz próbki do pliku CSV")
+    args = parser.parse_args(argv)
+    load_environment()
+
+    tolerances = dict(DEFAULT_TOLERANCES, rss_mb=args.rss_tolerance)
+    ok = run_soak(
+        args.cycles, sample_every=args.sample_every, warmup=args.warmup, csv_path=args.csv,
+        tolerances=tolerances, record_seconds=args.record_seconds, speed=args.speed,
+        decode_ms=args.decode_ms, endpointing=args.endpointing, worker=args.worker,
+    )
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
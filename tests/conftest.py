@@ -0,0 +1,5 @@
+"""Wspólna konfiguracja testów - moduły aplikacji leżą w katalogu głównym repozytorium"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
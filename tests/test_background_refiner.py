@@ -0,0 +1,83 @@
+"""Testy ponownej transkrypcji w tle: błędy modelu nie odpinają nagrań, uszkodzone pliki tak"""
+import wave
+from types import SimpleNamespace
+
+import pytest
+
+from background_refiner import BackgroundRefiner
+from config import Config
+from note_store import NoteStore
+
+
+class _Model:
+    def __init__(self, texts=(" Ala ma kota.", " I psa."), error=None):
+        self.texts = texts
+        self.error = error
+
+    def transcribe(self, audio, **kwargs):
+        if self.error:
+            raise self.error
+        return iter(SimpleNamespace(text=text) for text in self.texts), None
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'NOTES_BATCH_INTERVAL', 0.01)
+    store = NoteStore(str(tmp_path / "notes.db"))
+    yield store
+    store.close()
+
+
+def _note(store, path, valid=True):
+    if valid:
+        with wave.open(str(path), 'wb') as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(16000)
+            wf.writeframes(b'\x00\x00' * 1600)
+    else:
+        path.write_bytes(b'to nie jest nagranie')
+    store.add("stara treść", duration=0.1, audio_path=str(path))
+    store.flush()
+    return store.pending_refinement(limit=1)[0]
+
+
+def test_refined_text_is_joined_without_double_spaces(store, tmp_path):
+    note = _note(store, tmp_path / "a.wav")
+    refiner = BackgroundRefiner(store, model_factory=lambda *a, **k: _Model())
+    refiner._refine(note)
+    store.flush()
+    assert store.get(note['id'])['text'] == "Ala ma kota. I psa."
+
+
+def test_model_load_failure_keeps_note_queued(store, tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'REFINE_RETRY_DELAY', 60.0)
+    note = _note(store, tmp_path / "a.wav")
+
+    def factory(*args, **kwargs):
+        raise OSError("brak sieci")
+
+    refiner = BackgroundRefiner(store, model_factory=factory)
+    refiner._refine(note)
+    refiner._refine(note)
+    store.flush()
+    assert [n['id'] for n in store.pending_refinement()] == [note['id']]
+    assert refiner._failures == 2
+    assert refiner._retry_at > 0
+
+
+def test_transient_decode_error_keeps_note_queued(store, tmp_path):
+    note = _note(store, tmp_path / "a.wav")
+    refiner = BackgroundRefiner(store, model_factory=lambda *a, **k: _Model(error=MemoryError("brak pamięci")))
+    refiner._refine(note)
+    store.flush()
+    assert [n['id'] for n in store.pending_refinement()] == [note['id']]
+
+
+def test_unreadable_recording_is_detached(store, tmp_path):
+    note = _note(store, tmp_path / "a.wav", valid=False)
+    refiner = BackgroundRefiner(store, model_factory=lambda *a, **k: _Model(error=ValueError("invalid data")))
+    refiner._refine(note)
+    store.flush()
+    assert store.pending_refinement() == []
+    assert store.get(note['id'])['text'] == "stara treść"
@@ -0,0 +1,30 @@
+"""Testy adaptacyjnego limitu: opóźnienie porównywane na sekundę audio"""
+import time
+
+from concurrency_limiter import AdaptiveLimiter
+
+
+def _complete(limiter, latency, duration=None):
+    limiter.acquire()
+    limiter.release(time.monotonic() - latency, 'ok', duration=duration)
+
+
+def test_long_recordings_do_not_shrink_limit():
+    limiter = AdaptiveLimiter(initial=8, min_limit=1, max_limit=32, latency_tolerance=2.0)
+    for latency, duration in [(0.3, 2.0), (0.35, 3.0), (6.0, 50.0), (7.0, 60.0), (0.3, 2.5)]:
+        _complete(limiter, latency, duration)
+    assert limiter.limit == 8
+
+
+def test_slower_per_audio_second_shrinks_limit():
+    limiter = AdaptiveLimiter(initial=8, min_limit=1, max_limit=32, latency_tolerance=2.0)
+    _complete(limiter, 3.0, 50.0)
+    _complete(limiter, 9.0, 50.0)
+    assert limiter.limit < 8
+
+
+def test_without_duration_raw_latency_is_compared():
+    limiter = AdaptiveLimiter(initial=8, min_limit=1, max_limit=32, latency_tolerance=2.0)
+    _complete(limiter, 0.3)
+    _complete(limiter, 6.0)
+    assert limiter.limit < 8
@@ -0,0 +1,28 @@
+"""Testy budżetu zimnego importu: czas w limicie i brak ciężkich zależności przy imporcie"""
+import os
+
+import pytest
+
+from config import Config
+from import_budget import DEFAULT_MODULES, HEAVY_MODULES, measure_import
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Najcięższe zależności - zawsze ładowane dopiero przy pierwszym użyciu komponentu
+LAZY_MODULES = {'faster_whisper', 'openai', 'numpy', 'tkinter'} | set(HEAVY_MODULES)
+
+
+@pytest.mark.parametrize("module", DEFAULT_MODULES)
+def test_cold_import_fits_budget(module):
+    # Najlepszy z kilku pomiarów - pojedynczy może zawyżyć chwilowe obciążenie maszyny
+    total = min(measure_import(module, ROOT)[0] for _ in range(3))
+    assert total <= Config.IMPORT_TIME_BUDGET_MS, \
+        f"import {module}: {total:.1f} ms > {Config.IMPORT_TIME_BUDGET_MS:.0f} ms"
+
+
+@pytest.mark.parametrize("module", DEFAULT_MODULES)
+def test_heavy_modules_are_not_imported_eagerly(module):
+    _total, entries = measure_import(module, ROOT)
+    imported = {name.split('.')[0] for name, _ms, _depth in entries}
+    eager = sorted(imported & LAZY_MODULES)
+    assert not eager, f"import {module} ładuje ciężkie zależności: {', '.join(eager)}"
@@ -0,0 +1,32 @@
+"""Testy archiwum notatek: zapis partii z błędnym wierszem i wyszukiwanie"""
+import pytest
+
+from config import Config
+from note_store import NoteStore
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'NOTES_BATCH_INTERVAL', 0.05)
+    store = NoteStore(str(tmp_path / "notes.db"))
+    yield store
+    store.close()
+
+
+def test_failing_row_does_not_lose_rest_of_batch(store, capsys):
+    store.add("pierwsza notatka o kubernetesie", created_at=1.0)
+    # NOT NULL na treści - ta notatka nie może się zapisać
+    store.add(None, created_at=2.0)
+    store.add("trzecia notatka o grafanie", created_at=3.0)
+    store.correct(1.0, "pierwsza notatka poprawiona", "large-v3")
+    assert store.flush(timeout=5.0)
+
+    assert [note['text'] for note in store.recent()] == ["trzecia notatka o grafanie", "pierwsza notatka poprawiona"]
+    assert "zapisuję pojedynczo" in capsys.readouterr().out
+
+
+def test_search_finds_inflected_prefix(store):
+    store.add("wdrożenie na kubernetesa w piątek", created_at=1.0)
+    store.add("zakupy: mleko", created_at=2.0)
+    assert store.flush(timeout=5.0)
+    assert [note['created_at'] for note in store.search("wdrozenie kubernet")] == [1.0]
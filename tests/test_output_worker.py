@@ -0,0 +1,65 @@
+"""Testy wątku wyjścia na atrapach schowka i klawiatury: kolejność, oczekiwanie na schowek, pisanie partiami"""
+import time
+
+import pytest
+
+from config import Config
+from output_worker import FakeClipboard, FakeKeyboard, OutputWorker
+
+
+@pytest.fixture
+def backends():
+    clipboard = FakeClipboard()
+    keyboard = FakeKeyboard(clipboard)
+    worker = OutputWorker(keyboard=keyboard, clipboard=clipboard)
+    yield worker, clipboard, keyboard
+    worker.stop()
+
+
+def _events(keyboard):
+    return [(kind, text) for kind, text, _at in keyboard.events]
+
+
+def test_slow_item_does_not_let_fast_one_overtake(backends, monkeypatch):
+    worker, clipboard, keyboard = backends
+    monkeypatch.setattr(Config, 'OUTPUT_CLIPBOARD_TIMEOUT', 1.0)
+    # Schowek udostępnia treść dopiero po 100 ms - wklejenie czeka, a pisanie za nim też
+    clipboard.delay = 0.1
+    worker.paste("pierwsza wypowiedź")
+    worker.type_text("druga")
+    assert worker.flush(timeout=2.0)
+    assert _events(keyboard) == [('paste', "pierwsza wypowiedź"), ('type', "druga")]
+
+
+def test_order_is_kept_after_slow_call(backends):
+    worker, _clipboard, keyboard = backends
+    worker.call(lambda: time.sleep(0.05))
+    worker.paste("a")
+    worker.replace(1, "b")
+    assert worker.flush(timeout=2.0)
+    assert _events(keyboard) == [('paste', "a"), ('backspace', "1"), ('paste', "b")]
+    assert worker.completed == 2
+
+
+def test_clipboard_wait_times_out_and_pastes_anyway(backends, monkeypatch, capsys):
+    worker, clipboard, keyboard = backends
+    monkeypatch.setattr(Config, 'OUTPUT_CLIPBOARD_TIMEOUT', 0.05)
+    clipboard.delay = 5.0
+    started = time.monotonic()
+    worker.paste("tekst")
+    assert worker.flush(timeout=2.0)
+    assert time.monotonic() - started < 1.0
+    # Schowek nie zdążył - zdarzenie wklejenia poszło mimo to (z pustą treścią)
+    assert _events(keyboard) == [('paste', None)]
+    assert "Schowek nie potwierdził" in capsys.readouterr().out
+
+
+def test_typing_is_split_into_batches(backends, monkeypatch):
+    worker, _clipboard, keyboard = backends
+    monkeypatch.setattr(Config, 'OUTPUT_TYPING_BATCH_SIZE', 4)
+    monkeypatch.setattr(Config, 'OUTPUT_TYPING_BATCH_DELAY', 0.02)
+    worker.type_text("abcdefghij")
+    assert worker.flush(timeout=2.0)
+    assert _events(keyboard) == [('type', "abcd"), ('type', "efgh"), ('type', "ij")]
+    times = [at for _kind, _text, at in keyboard.events]
+    assert all(later - earlier >= 0.015 for earlier, later in zip(times, times[1:]))
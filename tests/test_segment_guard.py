@@ -0,0 +1,121 @@
+"""Testy strażnika segmentów na syntetycznych strumieniach (mowa, cisza, szum, pętle)"""
+from types import SimpleNamespace
+
+from segment_guard import SegmentGuard
+
+
+def _segment(text, no_speech_prob=0.0, avg_logprob=-0.3):
+    return SimpleNamespace(text=" " + text, no_speech_prob=no_speech_prob, avg_logprob=avg_logprob)
+
+
+class _Stream:
+    """Leniwy strumień segmentów, który pamięta, ile okien zdekodowano i czy go zamknięto"""
+
+    def __init__(self, segments):
+        self._segments = list(segments)
+        self.read = 0
+        self.closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.closed or self.read >= len(self._segments):
+            raise StopIteration
+        self.read += 1
+        return self._segments[self.read - 1]
+
+    def close(self):
+        self.closed = True
+
+
+def _guard():
+    return SegmentGuard(max_ngram=8, max_repeats=4, no_speech_threshold=0.6,
+                        logprob_threshold=-1.0, min_loop_words=16)
+
+
+def test_speech_after_pause_is_kept():
+    # Segmenty po pauzie mają wysokie no_speech_prob, ale pewny tekst - to mowa
+    stream = _Stream([
+        _segment("Ala ma kota.", 0.1),
+        _segment("Po pauzie…", 0.7),
+        _segment("I jeszcze coś.", 0.7),
+        _segment("Ważna końcówka.", 0.1),
+    ])
+    guard = _guard()
+    assert guard.collect(stream) == "Ala ma kota. Po pauzie… I jeszcze coś. Ważna końcówka."
+    assert stream.read == 4
+    assert not guard.aborted
+
+
+def test_segments_without_logprob_are_not_silence():
+    stream = [SimpleNamespace(text=text, no_speech_prob=prob) for text, prob in (
+        ("Ala ma kota.", 0.1), ("Po pauzie…", 0.7), ("I jeszcze coś.", 0.7), ("Ważna końcówka.", 0.1),
+    )]
+    assert _guard().collect(stream) == "Ala ma kota. Po pauzie… I jeszcze coś. Ważna końcówka."
+
+
+def test_silence_hallucinations_are_dropped_and_decoding_continues():
+    stream = _Stream([
+        _segment("Początek notatki.", 0.05),
+        _segment("Dziękuję za uwagę.", 0.92, -1.6),
+        _segment("Napisy stworzone przez społeczność.", 0.88, -1.3),
+        _segment("Koniec notatki.", 0.1),
+    ])
+    guard = _guard()
+    assert guard.collect(stream) == "Początek notatki. Koniec notatki."
+    assert guard.segments_silent == 2
+    assert stream.read == 4
+    assert not stream.closed
+
+
+def test_noise_with_low_confidence_but_speech_probability_is_kept():
+    # Szum tła: niska pewność tekstu, ale model nie uznaje okna za ciszę
+    stream = [_segment("Spotkanie w czwartek.", 0.2, -1.4), _segment("szszsz", 0.3, -2.0)]
+    assert _guard().collect(stream) == "Spotkanie w czwartek. szszsz"
+
+
+def test_only_silence_gives_empty_text():
+    stream = [_segment("Dziękuję.", 0.95, -1.8) for _ in range(5)]
+    assert _guard().collect(stream) == ""
+
+
+def test_emphatic_repetition_is_kept():
+    assert _guard().collect([_segment("Tak, tak, tak, tak.")]) == "Tak, tak, tak, tak."
+    assert _guard().collect([_segment("nie nie nie nie")]) == "nie nie nie nie"
+    assert (_guard().collect([_segment("Powiedział: nie, nie, nie, nie."), _segment("Potem wyszedł.")])
+            == "Powiedział: nie, nie, nie, nie. Potem wyszedł.")
+
+
+def test_loop_across_segments_stops_decoding():
+    stream = _Stream([
+        _segment("Zapisz to w notatce."),
+        _segment("i to i to"),
+        _segment("i to i to i to"),
+        _segment("Tego okna nie trzeba dekodować."),
+    ])
+    guard = _guard()
+    assert guard.collect(stream) == "Zapisz to w notatce. i to"
+    assert guard.aborted
+    assert stream.closed
+    assert stream.read == 3
+
+
+def test_repeated_segment_stops_decoding():
+    stream = _Stream([_segment("Dziękuję bardzo za uwagę i do zobaczenia.")] * 6)
+    guard = _guard()
+    assert guard.collect(stream) == "Dziękuję bardzo za uwagę i do zobaczenia."
+    assert stream.read == 4
+    assert stream.closed
+
+
+def test_long_loop_at_end_of_last_segment_is_cut():
+    text = "Lista zakupów: " + "mleko chleb " * 10
+    guard = _guard()
+    assert guard.collect([_segment(text.strip())]) == "Lista zakupów: mleko chleb"
+    assert guard.abort_reason == "pętla powtórzeń na końcu"
+
+
+def test_long_repetition_in_the_middle_is_kept():
+    text = "raz dwa " * 10 + "i koniec wyliczanki."
+    assert _guard().collect([_segment(text.strip())]) == text.strip()
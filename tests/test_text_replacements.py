@@ -0,0 +1,44 @@
+"""Testy słownika zamian i komend mówionych"""
+import pytest
+
+from text_replacements import ReplacementDictionary
+
+
+@pytest.fixture
+def commands():
+    return ReplacementDictionary(file_path='', include_spoken_commands=True)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Ala ma kota kropka nowa linia Potem", "Ala ma kota.\nPotem"),
+    ("Ala ma kota, kropka. Nowa linia. Potem", "Ala ma kota.\nPotem"),
+    ("Ala ma kota kropka nowy akapit Potem", "Ala ma kota.\n\nPotem"),
+    ("lista otwórz nawias a zamknij nawias kropka", "lista (a)."),
+    ("raz przecinek dwa kropka", "raz, dwa."),
+    ("tak kropka Nie", "tak. Nie"),
+])
+def test_spoken_commands(commands, text, expected):
+    assert commands.apply(text) == expected
+
+
+def test_file_entries_keep_spacing_before_commands(tmp_path):
+    path = tmp_path / "zamiany.txt"
+    path.write_text("np => na przykład\n", encoding="utf-8")
+    dictionary = ReplacementDictionary(file_path=str(path), include_spoken_commands=True)
+    assert dictionary.apply("np kropka nowa linia dalej") == "na przykład.\ndalej"
+    assert dictionary.apply("np jabłko") == "na przykład jabłko"
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("ala eee ma", "ala ma"),
+    ("eee ala ma", "ala ma"),
+    ("ala ma eee", "ala ma"),
+    ("ala, eee, ma", "ala, ma"),
+    ("ala eee eee kota", "ala kota"),
+    ("ala eee kropka", "ala."),
+])
+def test_empty_replacement_removes_filler_with_one_space(tmp_path, text, expected):
+    path = tmp_path / "zamiany.txt"
+    path.write_text("eee =>\n", encoding="utf-8")
+    dictionary = ReplacementDictionary(file_path=str(path), include_spoken_commands=True)
+    assert dictionary.apply(text) == expected
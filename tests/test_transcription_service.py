@@ -0,0 +1,105 @@
+"""Testy serwisu transkrypcji na atrapach modeli: podmiana modelu w trakcie pracy i inny model na żądanie"""
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from config import Config
+from transcription_service import TranscriptionService
+
+
+class _Model:
+    """Atrapa modelu faster-whisper - rozpoznaje własną nazwę, opcjonalnie czeka na sygnał"""
+
+    def __init__(self, name):
+        self.name = name
+        self.gate = None
+        self.started = threading.Event()
+
+    def transcribe(self, audio, **kwargs):
+        self.started.set()
+        if self.gate is not None:
+            assert self.gate.wait(5.0)
+        segment = SimpleNamespace(text=f" {self.name}", no_speech_prob=0.0, avg_logprob=-0.1,
+                                  compression_ratio=1.0, start=0.0, end=1.0)
+        return iter([segment]), SimpleNamespace(language='pl', language_probability=1.0, duration=1.0)
+
+
+@pytest.fixture
+def audio(tmp_path):
+    path = tmp_path / "nagranie.wav"
+    path.write_bytes(b'\x00' * 64)
+    return str(path)
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(Config, 'TRANSCRIPTION_MODE', 'local')
+    monkeypatch.setattr(Config, 'LOCAL_WHISPER_MODEL', 'stary')
+    monkeypatch.setattr(Config, 'LOCAL_WORKER_PROCESS', False)
+    monkeypatch.setattr(Config, 'LOCAL_MODEL_IDLE_TIMEOUT', 0)
+    monkeypatch.setattr(Config, 'RETRANSCRIBE_MODEL_IDLE_TIMEOUT', 0)
+    gates = {}
+    models = []
+
+    def factory(name, **kwargs):
+        if name in gates:
+            assert gates[name].wait(5.0)
+        model = _Model(name)
+        models.append(model)
+        return model
+
+    service = TranscriptionService(model_factory=factory)
+    service.gates = gates
+    service.models = models
+    return service
+
+
+def test_swap_lets_in_flight_call_finish_on_old_model(service, audio):
+    gate = threading.Event()
+    # Dekodowanie na starym modelu trwa, dopóki test go nie wypuści
+    service.local_model.gate = gate
+    results = {}
+    in_flight = threading.Thread(target=lambda: results.setdefault('old', service.transcribe(audio)))
+    in_flight.start()
+    assert service.local_model.started.wait(5.0)
+
+    service.reconfigure(model_name='nowy', wait=True)
+    assert service.last_reconfigure_error is None
+    fresh = service.transcribe(audio)
+
+    gate.set()
+    in_flight.join(5.0)
+    old = results['old']
+    assert (old.text, old.model) == ("stary", "stary")
+    assert (fresh.text, fresh.model) == ("nowy", "nowy")
+    assert not hasattr(service, 'last_model_wait')
+    assert old.model_wait >= 0.0 and fresh.model_wait >= 0.0
+
+
+def test_alternate_model_is_used_for_one_call(service, audio):
+    result = service.transcribe(audio, model_name='duży')
+    assert (result.text, result.model) == ("duży", "duży")
+    assert service.model_stats()['alternate_model'] == "duży"
+    # Kolejne wywołanie bez nazwy wraca do bieżącego modelu, a inny model nie jest ładowany ponownie
+    assert service.transcribe(audio).text == "stary"
+    service.transcribe(audio, model_name='duży')
+    assert [m.name for m in service.models] == ["stary", "duży"]
+
+
+def test_slow_alternate_load_does_not_block_other_lookups(service):
+    service.gates['wolny'] = threading.Event()
+    loaded = {}
+    slow = threading.Thread(target=lambda: loaded.setdefault('wolny', service._alternate_model('wolny')))
+    slow.start()
+
+    # Ładowanie 'wolnego' trwa - prośba o inny model nie czeka na jego koniec
+    finished = threading.Event()
+    threading.Thread(target=lambda: (service._alternate_model('szybki'), finished.set()), daemon=True).start()
+    assert finished.wait(2.0)
+
+    service.gates['wolny'].set()
+    slow.join(5.0)
+    assert loaded['wolny'].name == "wolny"
+    # Nowszy model zostaje zapamiętany - spóźnione ładowanie obsłużyło tylko swoje wywołanie
+    assert service.model_stats()['alternate_model'] == "szybki"
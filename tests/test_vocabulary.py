@@ -0,0 +1,37 @@
+"""Testy korekty słownictwa dziedzinowego: literówki, odmiana terminów i zwykłe słowa"""
+from vocabulary import VocabularyCorrector
+
+
+TERMS = ["Kubernetes", "Grafana", "Kafka", "faster-whisper"]
+
+
+def _corrector(dictionary=()):
+    return VocabularyCorrector(terms=TERMS, max_distance=2, prefix_length=7, dictionary=dictionary)
+
+
+def test_typos_are_corrected():
+    corrector = _corrector()
+    assert corrector.correct("wdrożenie na kubernetis") == "wdrożenie na Kubernetes"
+    assert corrector.correct("dashboard w grafana") == "dashboard w Grafana"
+
+
+def test_inflected_terms_keep_suffix():
+    corrector = _corrector()
+    assert corrector.correct("na kubernetesa i kubernetesie") == "na Kubernetesa i Kubernetesie"
+    assert corrector.correct("w grafanie i grafanę") == "w Grafanie i Grafanę"
+    assert corrector.correct("kolejka w kafce") == "kolejka w kafce"
+
+
+def test_dictionary_words_are_not_corrected():
+    corrector = _corrector(dictionary=["kawka", "pije"])
+    assert corrector.correct("Pije kawka") == "Pije kawka"
+    assert corrector.correct("kafak na produkcji") == "Kafka na produkcji"
+
+
+def test_dictionary_file_in_hunspell_format(tmp_path):
+    dic = tmp_path / "pl_PL.dic"
+    dic.write_text("2\nkawka/MN\npije\n", encoding="utf-8")
+    corrector = VocabularyCorrector(terms=TERMS, dictionary_file=str(dic))
+    assert corrector.is_dictionary_word("Kawka")
+    assert not corrector.is_dictionary_word("2")
+    assert corrector.correct("Pije kawka") == "Pije kawka"
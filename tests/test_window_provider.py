@@ -0,0 +1,55 @@
+"""Testy klasyfikatora aktywnego okna na atrapie dostawcy: klasy, cache dla uchwytu, zmiana fokusu"""
+import pytest
+
+from window_provider import FakeWindowProvider, WindowClassifier
+
+
+@pytest.fixture
+def classifier():
+    return WindowClassifier(provider=FakeWindowProvider(), cache_ttl=3600.0)
+
+
+@pytest.mark.parametrize("class_name, expected", [
+    # Terminale
+    ("xterm XTerm", True),
+    ("gnome-terminal-server Gnome-terminal", True),
+    ("konsole konsole", True),
+    ("ConsoleWindowClass", True),
+    # Edytory
+    ("code Code", True),
+    ("gedit Gedit", True),
+    ("Notepad", True),
+    ("emacs Emacs", True),
+    # Krótkie nazwy Linuksa nie pasują jako fragment innej klasy
+    ("barcode-scanner Barcode-scanner", False),
+    ("xtermcontrol Xtermcontrol", False),
+    ("Shell_TrayWnd", False),
+])
+def test_classifies_terminal_and_editor_classes(classifier, class_name, expected):
+    assert classifier.classify(class_name, "") is expected
+
+
+def test_same_window_is_described_once(classifier):
+    provider = classifier.provider
+    provider.set_foreground("code Code", "main.py - projekt")
+    for _ in range(5):
+        info, is_text = classifier.get_active_window()
+    assert (info.class_name, is_text) == ("code Code", True)
+    assert provider.describe_calls == 1
+
+
+def test_focus_change_invalidates_cached_decision(classifier):
+    provider = classifier.provider
+    provider.set_foreground("xterm XTerm", "user@host: ~")
+    assert classifier.get_active_window()[1] is True
+    provider.set_foreground("Shell_TrayWnd", "")
+    assert classifier.get_active_window()[1] is False
+    assert provider.describe_calls == 2
+
+    # Powrót do tego samego uchwytu po invalidate() też pyta dostawcę od nowa
+    classifier.invalidate()
+    classifier.get_active_window()
+    assert provider.describe_calls == 3
+
+    provider.clear_foreground()
+    assert classifier.get_active_window() is None
@@ -1,76 +1,120 @@
 """
 Moduł do przetwarzania i wklejania rozpoznanego tekstu
 """
-import time
-import threading
-import pyperclip
-import win32gui
 from typing import Optional
-from pynput import keyboard as pynput_keyboard
+from output_worker import OutputWorker
+from text_replacements import ReplacementDictionary
+from vocabulary import VocabularyCorrector
+from window_provider import WindowClassifier
+import tracing
 
 
 class TextProcessor:
     """Klasa odpowiedzialna za przetwarzanie i wklejanie rozpoznanego tekstu"""
     
-    def __init__(self):
-        """Inicjalizuje procesor tekstu"""
-        pass
+    def __init__(self, replacements: Optional[ReplacementDictionary] = None,
+                 vocabulary: Optional[VocabularyCorrector] = None,
+                 window_classifier: Optional[WindowClassifier] = None,
+                 output_worker: Optional[OutputWorker] = None):
+        """
+        Inicjalizuje procesor tekstu
+        
+        Args:
+            replacements: Słownik zamian (domyślnie wczytywany z config)
+            vocabulary: Opcjonalny korektor słownictwa dziedzinowego
+            window_classifier: Klasyfikator aktywnego okna (domyślnie dla bieżącej platformy)
+            output_worker: Wątek wklejania/pisania (domyślnie pynput + pyperclip)
+        """
+        self.replacements = replacements or ReplacementDictionary()
+        self.vocabulary = vocabulary
+        self.window_classifier = window_classifier or WindowClassifier()
+        self.output_worker = output_worker or OutputWorker()
+        # Tekst zlecony do wklejenia przez ostatnie process_recognized_text (None - nie wklejano)
+        self.last_output: Optional[str] = None
+    
+    def post_process(self, text: str) -> str:
+        """
+        Stosuje etap przetwarzania końcowego (korekta słownictwa, słownik zamian i komendy mówione)
+        
+        Args:
+            text: Surowy tekst z transkrypcji
+            
+        Returns:
+            str: Tekst po przetworzeniu
+        """
+        try:
+            if self.vocabulary:
+                text = self.vocabulary.correct(text)
+            return self.replacements.apply(text)
+        except Exception as e:
+            print(f"⚠️ Błąd podczas przetwarzania tekstu: {e}")
+            return text
     
-    def process_recognized_text(self, text: str):
+    def process_recognized_text(self, text: str, continuation: bool = False) -> Optional[str]:
         """
         Przetwarza rozpoznany tekst - wyświetla go i wkleja jeśli to możliwe
         
         Args:
             text: Rozpoznany tekst do przetworzenia
+            continuation: Czy tekst jest kolejną wypowiedzią dyktowania ciągłego (wklejany po spacji)
+            
+        Returns:
+            Optional[str]: Tekst po przetworzeniu końcowym lub None, jeśli był pusty
         """
+        self.last_output = None
         if not text or not text.strip():
             print("❌ Brak tekstu do przetworzenia")
-            return
+            return None
+        
+        with tracing.span('text.post_process'):
+            text = self.post_process(text)
             
         print(f"\n📝 ROZPOZNANY TEKST:")
         print(f"'{text}'")
         print("-" * 50)
         
         # Sprawdź czy jakieś okno jest aktywne i w trybie pisania
-        if self.is_text_input_active():
+        with tracing.span('window.classify'):
+            text_input_active = self.is_text_input_active()
+        if text_input_active:
             print("✍️ Wykryto aktywne pole tekstowe - wklejam tekst...")
-            self.paste_text(text)
+            self.last_output = f" {text}" if continuation else text
+            self.paste_text(self.last_output)
         else:
             print("💬 Tekst wyświetlony w terminalu")
+        
+        return text
     
     def paste_text(self, text: str):
         """
-        Wkleja tekst do aktywnego pola tekstowego
+        Wkleja tekst do aktywnego pola tekstowego (asynchronicznie, w kolejności zleceń)
         
         Args:
             text: Tekst do wklejenia
         """
         try:
-            # Kopiuj do schowka
-            pyperclip.copy(text)
-            time.sleep(0.1)  # Krótka pauza
-            
-            # Wklejanie w osobnym wątku, aby uniknąć blokowania
-            def _paste_async():
-                try:
-                    controller = pynput_keyboard.Controller()
-                    controller.press(pynput_keyboard.Key.ctrl)
-                    controller.press('v')
-                    controller.release('v')
-                    controller.release(pynput_keyboard.Key.ctrl)
-                except Exception as e:
-                    print(f"⚠️ Błąd podczas wklejania (pynput): {e}")
-                    # Fallback do biblioteki keyboard, jeśli dostępna
-                    try:
-                        import keyboard as kb
-                        kb.send('ctrl+v')
-                    except Exception as e2:
-                        print(f"⚠️ Błąd podczas wklejania (keyboard): {e2}")
-            
-            threading.Thread(target=_paste_async, daemon=True).start()
-            
+            self.output_worker.paste(text)
         except Exception as e:
-            print(f"❌ Błąd podczas kopiowania do schowka: {e}")
+            print(f"❌ Błąd podczas zlecania wklejenia: {e}")
+    
+    def replace_text(self, old_text: str, new_text: str):
+        """
+        Zastępuje wklejony wcześniej tekst nowym (asynchronicznie, w kolejności zleceń)
+
+        Usuwa len(old_text) znaków przed kursorem, więc kursor musi stać zaraz
+        za wklejonym tekstem.
+
+        Args:
+            old_text: Tekst wklejony poprzednio (dokładnie w tej postaci)
+            new_text: Nowy tekst
+        """
+        print(f"\n📝 POPRAWIONY TEKST:")
+        print(f"'{new_text.strip()}'")
+        print("-" * 50)
+        try:
+            self.output_worker.replace(len(old_text), new_text)
+        except Exception as e:
+            print(f"❌ Błąd podczas zlecania podmiany tekstu: {e}")
     
     def is_text_input_active(self) -> bool:
         """
@@ -80,42 +124,8 @@ class TextProcessor:
             bool: True jeśli aktywne pole tekstowe zostało wykryte, False w przeciwnym razie
         """
         try:
-            # Pobierz informacje o aktywnym oknie
-            hwnd = win32gui.GetForegroundWindow()
-            if not hwnd:
-                return False
-                
-            class_name = win32gui.GetClassName(hwnd)
-            window_text = win32gui.GetWindowText(hwnd)
-            
-            # Lista klas okien, które prawdopodobnie mają pola tekstowe
-            text_input_classes = [
-                'Edit', 'RichEdit', 'RichEdit20A', 'RichEdit20W',
-                'Notepad', 'WordPadClass', 'OpusApp',  # Word
-                'Chrome_WidgetWin_1', 'MozillaWindowClass',  # Przeglądarki
-                'Vim', 'ConsoleWindowClass',  # Edytory tekstu
-                'SciTEWindow', 'Notepad++',  # Inne edytory
-                'ThunderRT6TextBox', 'TMemo'  # Inne kontrolki tekstowe
-            ]
-            
-            # Sprawdź czy nazwa klasy sugeruje pole tekstowe
-            for text_class in text_input_classes:
-                if text_class.lower() in class_name.lower():
-                    return True
-            
-            # Sprawdź czy tytuł okna sugeruje edytor tekstu
-            text_indicators = [
-                'notepad', 'word', 'editor', 'code', 'text', 'write',
-                'document', 'edit', 'vim', 'emacs', 'sublime', 'vscode',
-                'atom', 'brackets', 'gedit', 'nano'
-            ]
-            
-            window_text_lower = window_text.lower()
-            for indicator in text_indicators:
-                if indicator in window_text_lower:
-                    return True
-            
-            return False
+            active = self.window_classifier.get_active_window()
+            return bool(active and active[1])
             
         except Exception as e:
             print(f"⚠️ Błąd podczas sprawdzania aktywnego okna: {e}")
@@ -129,15 +139,16 @@ class TextProcessor:
             Optional[dict]: Słownik z informacjami o oknie lub None w przypadku błędu
         """
         try:
-            hwnd = win32gui.GetForegroundWindow()
-            if not hwnd:
+            active = self.window_classifier.get_active_window()
+            if not active:
                 return None
-                
+            
+            info, is_text_input = active
             return {
-                'handle': hwnd,
-                'class_name': win32gui.GetClassName(hwnd),
-                'window_text': win32gui.GetWindowText(hwnd),
-                'is_text_input': self.is_text_input_active()
+                'handle': info.handle,
+                'class_name': info.class_name,
+                'window_text': info.title,
+                'is_text_input': is_text_input
             }
             
         except Exception as e:
@@ -152,19 +163,22 @@ class TextProcessor:
             text: Tekst do wpisania
         """
         try:
-            def _type_async():
-                try:
-                    controller = pynput_keyboard.Controller()
-                    # Małe opóźnienie przed rozpoczęciem pisania
-                    time.sleep(0.1)
-                    controller.type(text)
-                except Exception as e:
-                    print(f"⚠️ Błąd podczas pisania tekstu: {e}")
-            
-            threading.Thread(target=_type_async, daemon=True).start()
-            
+            self.output_worker.type_text(text)
         except Exception as e:
             print(f"❌ Błąd podczas inicjalizacji pisania tekstu: {e}")
+    
+    def after_output(self, fn):
+        """
+        Wywołuje funkcję po wykonaniu zleconych wcześniej wklejeń/pisania
+
+        Args:
+            fn: Funkcja bez argumentów (wywoływana w wątku wyjścia)
+        """
+        self.output_worker.call(fn)
+    
+    def shutdown(self):
+        """Kończy wątek wyjścia po wykonaniu oczekujących zleceń"""
+        self.output_worker.stop()
 
 
 class ClipboardManager:
@@ -182,6 +196,7 @@ class ClipboardManager:
             bool: True jeśli operacja się powiodła, False w przeciwnym razie
         """
         try:
+            import pyperclip
             pyperclip.copy(text)
             return True
         except Exception as e:
@@ -197,6 +212,7 @@ class ClipboardManager:
             Optional[str]: Tekst ze schowka lub None w przypadku błędu
         """
         try:
+            import pyperclip
             return pyperclip.paste()
         except Exception as e:
             print(f"❌ Błąd podczas pobierania ze schowka: {e}")
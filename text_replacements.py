@@ -0,0 +1,341 @@
+"""
+Moduł słownika zamian tekstu (skróty, nazwy własne, komendy interpunkcyjne)
+
+    python text_replacements.py bench --phrases 5000 --words 200
+"""
+import argparse
+import os
+import random
+import re
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from config import Config, load_environment
+
+
+# Wbudowane komendy mówione (interpunkcja i formatowanie)
+SPOKEN_COMMANDS = {
+    "nowa linia": "\n",
+    "nowy akapit": "\n\n",
+    "przecinek": ",",
+    "kropka": ".",
+    "znak zapytania": "?",
+    "wykrzyknik": "!",
+    "dwukropek": ":",
+    "średnik": ";",
+    "myślnik": "-",
+    "otwórz nawias": "(",
+    "zamknij nawias": ")",
+}
+
+# Znaki, które "doklejają się" do poprzedniego słowa (bez spacji przed)
+_ATTACH_LEFT_CHARS = ",.?!:;)\n"
+# Znaki, które "doklejają się" do następnego słowa (bez spacji po)
+_ATTACH_RIGHT_CHARS = "(\n"
+
+# Znaki, z których składają się komendy mówione (interpunkcja i białe znaki)
+_COMMAND_CHARS = ",.?!:;-()\n "
+# Interpunkcja, którą Whisper sam dopisuje wokół wypowiedzianych komend
+_WHISPER_PUNCTUATION = ",."
+
+# Znacznik końca frazy w węźle drzewa prefiksowego
+_END = ""
+
+
+class ReplacementDictionary:
+    """
+    Słownik zamian skompilowany do jednego wyrażenia regularnego o strukturze drzewa prefiksowego.
+
+    Frazy są układane w drzewo (trie), z którego generowany jest wzorzec
+    z wyciągniętymi wspólnymi prefiksami. Silnik `re` przechodzi tekst
+    jeden raz i w każdej pozycji sprawdza tylko gałąź pasującą do
+    bieżącego znaku, zamiast tysięcy osobnych wywołań `str.replace`.
+    """
+
+    def __init__(self, file_path: Optional[str] = None, include_spoken_commands: Optional[bool] = None):
+        """
+        Inicjalizuje słownik zamian
+
+        Args:
+            file_path: Ścieżka do pliku słownika (domyślnie z config)
+            include_spoken_commands: Czy dołączyć wbudowane komendy mówione (domyślnie z config)
+        """
+        self.file_path = file_path if file_path is not None else Config.TEXT_REPLACEMENTS_FILE
+        self.include_spoken_commands = (
+            include_spoken_commands if include_spoken_commands is not None
+            else Config.TEXT_SPOKEN_COMMANDS
+        )
+
+        # Skompilowany stan podmieniany atomowo przy przeładowaniu
+        self._compiled: Tuple[Optional[re.Pattern], Dict[str, str]] = (None, {})
+        self._mtime: Optional[float] = None
+        self._last_check = 0.0
+        self._reload_lock = threading.Lock()
+
+        self.reload()
+
+    def apply(self, text: str) -> str:
+        """
+        Stosuje zamiany do tekstu w jednym przebiegu
+
+        Args:
+            text: Tekst wejściowy
+
+        Returns:
+            str: Tekst po zamianach
+        """
+        if not text:
+            return text
+
+        self._reload_if_changed()
+
+        pattern, replacements = self._compiled
+        if pattern is None:
+            return text
+
+        def _value(match: re.Match) -> Optional[str]:
+            return replacements.get(" ".join(match.group('key').lower().split()))
+
+        def _next_attaches_left(match: re.Match) -> bool:
+            # Spacja należy do tej frazy, więc doklejająca się następna ("kropka nowa linia")
+            # nie może jej usunąć - sprawdzamy ją tutaj
+            following = pattern.match(match.string, match.end())
+            if following is None or not following.group('key'):
+                return False
+            next_value = _value(following)
+            return bool(next_value) and next_value[0] in _ATTACH_LEFT_CHARS
+
+        def _replace(match: re.Match) -> str:
+            value = _value(match)
+            if value is None:
+                return match.group(0)
+
+            prefix = match.group('pre')
+            suffix = match.group('post')
+            if not value:
+                # Usunięta fraza (np. wtrącenie "eee =>") - zostaje jeden znak interpunkcji
+                # i jeden odstęp, i to tylko między dwoma słowami
+                mark = suffix.strip() or prefix.strip()
+                space = suffix.lstrip(_WHISPER_PUNCTUATION)
+                if not prefix or _next_attaches_left(match):
+                    space = ""
+                return mark + space
+            if not value.strip(_COMMAND_CHARS):
+                # Komenda mówiona zastępuje interpunkcję dopisaną przez Whisper wokół niej
+                prefix = prefix.lstrip(_WHISPER_PUNCTUATION)
+                suffix = suffix.lstrip(_WHISPER_PUNCTUATION)
+            # Interpunkcja dokleja się do poprzedniego słowa
+            if value[0] in _ATTACH_LEFT_CHARS:
+                prefix = ""
+            # Po nowej linii i nawiasie otwierającym nie zostawiamy spacji
+            if value[-1] in _ATTACH_RIGHT_CHARS:
+                suffix = ""
+            elif suffix and _next_attaches_left(match):
+                suffix = ""
+            return prefix + value + suffix
+
+        return pattern.sub(_replace, text)
+
+    def reload(self) -> bool:
+        """
+        Wczytuje i kompiluje słownik od nowa
+
+        Returns:
+            bool: True jeśli słownik został wczytany, False w przypadku błędu
+        """
+        with self._reload_lock:
+            replacements: Dict[str, str] = {}
+            if self.include_spoken_commands:
+                replacements.update(SPOKEN_COMMANDS)
+
+            mtime = None
+            if self.file_path:
+                try:
+                    mtime = os.path.getmtime(self.file_path)
+                    replacements.update(self._load_file(self.file_path))
+                except FileNotFoundError:
+                    print(f"⚠️ Plik słownika zamian nie istnieje: {self.file_path}")
+                except Exception as e:
+                    print(f"❌ Błąd podczas wczytywania słownika zamian: {e}")
+                    return False
+
+            pattern = self._compile(replacements.keys()) if replacements else None
+            # Podmiana jednym przypisaniem - apply() w innym wątku widzi stary albo nowy stan
+            self._compiled = (pattern, replacements)
+            self._mtime = mtime
+            self._last_check = time.monotonic()
+
+            if self.file_path and mtime is not None:
+                print(f"📖 Wczytano słownik zamian: {len(replacements)} wpisów")
+            return True
+
+    def _reload_if_changed(self):
+        """Przeładowuje słownik, jeśli plik zmienił się od ostatniego wczytania"""
+        if not self.file_path:
+            return
+
+        now = time.monotonic()
+        if now - self._last_check < Config.TEXT_REPLACEMENTS_RELOAD_INTERVAL:
+            return
+        self._last_check = now
+
+        try:
+            mtime = os.path.getmtime(self.file_path)
+        except OSError:
+            mtime = None
+
+        if mtime != self._mtime:
+            self.reload()
+
+    @staticmethod
+    def _load_file(file_path: str) -> Dict[str, str]:
+        """
+        Wczytuje plik słownika w formacie `fraza => zamiana`
+
+        Puste linie i linie zaczynające się od `#` są pomijane.
+        W zamianie można użyć `\\n` dla nowej linii.
+
+        Args:
+            file_path: Ścieżka do pliku
+
+        Returns:
+            Dict[str, str]: Znormalizowane frazy i ich zamiany
+        """
+        replacements = {}
+        with open(file_path, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.rstrip("\n")
+                if not line.strip() or line.lstrip().startswith('#'):
+                    continue
+                if '=>' not in line:
+                    print(f"⚠️ Pominięto linię {line_no} słownika zamian (brak '=>')")
+                    continue
+                phrase, replacement = line.split('=>', 1)
+                key = " ".join(phrase.lower().split())
+                if key:
+                    replacements[key] = replacement.strip().replace("\\n", "\n")
+        return replacements
+
+    @staticmethod
+    def _compile(phrases) -> re.Pattern:
+        """
+        Kompiluje frazy do wyrażenia regularnego o strukturze drzewa prefiksowego
+
+        Args:
+            phrases: Znormalizowane frazy (małe litery, pojedyncze spacje)
+
+        Returns:
+            re.Pattern: Wzorzec z grupami pre, key i post
+        """
+        trie: dict = {}
+        for phrase in phrases:
+            node = trie
+            for char in phrase:
+                node = node.setdefault(char, {})
+            node[_END] = True
+
+        def _to_regex(node: dict) -> str:
+            branches = []
+            for char in sorted(k for k in node if k != _END):
+                atom = r"\s+" if char == " " else re.escape(char)
+                branches.append(atom + _to_regex(node[char]))
+
+            if not branches:
+                return ""
+            body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+            if _END in node:
+                # Zachłanny opcjonalny ogon - najpierw dłuższa fraza, potem krótsza
+                return "(?:" + body + ")?"
+            return body
+
+        return re.compile(
+            r"(?P<pre>[,.]?\s*)(?<!\w)(?P<key>" + _to_regex(trie) + r")(?!\w)(?P<post>[,.]?\s*)",
+            re.IGNORECASE,
+        )
+
+
+# --- Pomiar: słownik skompilowany do drzewa prefiksowego a pętla str.replace ---
+
+def _apply_with_replace_loop(text: str, replacements: Dict[str, str]) -> str:
+    """Podejście bez kompilacji: osobne str.replace dla każdej frazy słownika"""
+    text = text.lower()
+    for phrase, value in replacements.items():
+        if phrase in text:
+            text = text.replace(phrase, value)
+    return text
+
+
+def run_benchmark(phrases: int = 5000, words: int = 200, repeats: int = 200):
+    """
+    Porównuje czas zamian w jednej wypowiedzi: skompilowany wzorzec i pętla str.replace
+
+    Args:
+        phrases: Liczba wpisów słownika (poza komendami mówionymi)
+        words: Liczba słów wypowiedzi
+        repeats: Liczba powtórzeń pomiaru
+    """
+    import tempfile
+    rng = random.Random(0)
+    alphabet = "abcdefghijklmnoprstuwyzłśżąęó"
+
+    def word():
+        return "".join(rng.choice(alphabet) for _ in range(rng.randint(3, 9)))
+
+    entries = {}
+    while len(entries) < phrases:
+        entries[" ".join(word() for _ in range(rng.randint(1, 3)))] = word().capitalize()
+    keys = list(entries)
+    tokens = []
+    for _ in range(words):
+        roll = rng.random()
+        if roll < 0.05:
+            tokens.append(rng.choice(keys))
+        elif roll < 0.1:
+            tokens.append(rng.choice(list(SPOKEN_COMMANDS)))
+        else:
+            tokens.append(word())
+    text = " ".join(tokens)
+
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', encoding='utf-8', delete=False) as f:
+        f.write("\n".join(f"{phrase} => {value}" for phrase, value in entries.items()))
+        path = f.name
+    try:
+        started = time.perf_counter()
+        dictionary = ReplacementDictionary(path, include_spoken_commands=True)
+        compile_time = time.perf_counter() - started
+        replacements = dict(dictionary._compiled[1])
+
+        started = time.perf_counter()
+        for _ in range(repeats):
+            dictionary.apply(text)
+        compiled_time = (time.perf_counter() - started) / repeats
+
+        started = time.perf_counter()
+        for _ in range(repeats):
+            _apply_with_replace_loop(text, replacements)
+        loop_time = (time.perf_counter() - started) / repeats
+    finally:
+        os.unlink(path)
+
+    print(f"📖 Słownik: {len(replacements)} wpisów (kompilacja {compile_time * 1000:.0f} ms), "
+          f"wypowiedź: {words} słów")
+    print(f"📊 Skompilowany wzorzec: {compiled_time * 1000:.3f} ms/wypowiedź")
+    print(f"📊    Pętla str.replace: {loop_time * 1000:.3f} ms/wypowiedź "
+          f"({loop_time / compiled_time:.0f}× wolniej)")
+
+
+def main(argv=None):
+    """Wiersz poleceń pomiaru słownika zamian"""
+    parser = argparse.ArgumentParser(description="Słownik zamian tekstu")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    bench_parser = subparsers.add_parser('bench', help="Porównanie ze zwykłą pętlą str.replace")
+    bench_parser.add_argument('--phrases', type=int, default=5000, help="Liczba wpisów słownika")
+    bench_parser.add_argument('--words', type=int, default=200, help="Liczba słów wypowiedzi")
+    bench_parser.add_argument('--repeats', type=int, default=200, help="Liczba powtórzeń")
+    args = parser.parse_args(argv)
+    load_environment()
+    run_benchmark(args.phrases, args.words, args.repeats)
+
+
+if __name__ == "__main__":
+    main()
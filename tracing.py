@@ -0,0 +1,233 @@
+"""
+Moduł śledzenia przebiegu wypowiedzi - zapis zdarzeń w formacie Chrome/Perfetto trace-event JSON
+"""
+import itertools
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+from config import Config
+
+# Wspólny punkt odniesienia znaczników czasu (µs) dla wszystkich wątków
+_EPOCH_NS = time.perf_counter_ns()
+_PID = os.getpid()
+
+_local = threading.local()
+_lock = threading.Lock()
+_ids = itertools.count(1)
+_events: Dict[str, List[dict]] = {}
+_thread_names: Dict[int, str] = {}
+_active_trace: Optional[str] = None
+
+
+class _NullSpan:
+    """Pusty zakres zwracany przy wyłączonym śledzeniu (bez alokacji i pomiaru czasu)"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """Zakres czasu zapisywany jako zdarzenie 'X' (complete) po wyjściu z bloku"""
+
+    __slots__ = ('name', 'trace_id', 'args', '_start')
+
+    def __init__(self, name: str, trace_id: str, args: dict):
+        self.name = name
+        self.trace_id = trace_id
+        self.args = args
+
+    def __enter__(self):
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        _record({
+            'name': self.name,
+            'ph': 'X',
+            'ts': (self._start - _EPOCH_NS) / 1000,
+            'dur': (end - self._start) / 1000,
+        }, self.trace_id, self.args)
+        return False
+
+    def set(self, **args):
+        """Dodaje argumenty widoczne w szczegółach zakresu"""
+        self.args.update(args)
+
+
+class _TraceScope:
+    """Ustawia identyfikator śladu dla bieżącego wątku na czas bloku"""
+
+    __slots__ = ('trace_id', '_previous')
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+
+    def __enter__(self):
+        self._previous = getattr(_local, 'trace_id', None)
+        _local.trace_id = self.trace_id
+        return self
+
+    def __exit__(self, *exc):
+        _local.trace_id = self._previous
+        return False
+
+
+def enabled() -> bool:
+    """Czy śledzenie jest włączone (TRACE_ENABLED)"""
+    return Config.TRACE_ENABLED
+
+
+def begin_utterance() -> Optional[str]:
+    """
+    Zwraca identyfikator śladu bieżącej wypowiedzi, tworząc nowy przy jej rozpoczęciu
+
+    Wypowiedź obejmuje oba naciśnięcia skrótu (start i stop), dlatego ślad
+    pozostaje aktywny do wywołania end_utterance().
+
+    Returns:
+        Optional[str]: Identyfikator śladu lub None przy wyłączonym śledzeniu
+    """
+    global _active_trace
+    if not Config.TRACE_ENABLED:
+        return None
+    with _lock:
+        if _active_trace is None:
+            _active_trace = f"{os.getpid()}-{next(_ids)}"
+            _events[_active_trace] = []
+        return _active_trace
+
+
+def end_utterance(trace_id: Optional[str]) -> Optional[str]:
+    """
+    Kończy ślad wypowiedzi i zapisuje go do pliku JSON w TRACE_DIR
+
+    Args:
+        trace_id: Identyfikator śladu (None - nic nie robi)
+
+    Returns:
+        Optional[str]: Ścieżka zapisanego pliku
+    """
+    global _active_trace
+    if trace_id is None:
+        return None
+    with _lock:
+        if _active_trace == trace_id:
+            _active_trace = None
+        events = _events.pop(trace_id, None)
+    if not events:
+        return None
+
+    directory = os.path.expanduser(Config.TRACE_DIR)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"utterance-{datetime.now():%Y%m%d-%H%M%S}-{trace_id}.json")
+    try:
+        dump(path, events)
+    except OSError as e:
+        print(f"⚠️ Nie udało się zapisać śladu: {e}")
+        return None
+    print(f"🧭 Ślad wypowiedzi zapisany: {path} (otwórz w ui.perfetto.dev lub chrome://tracing)")
+    return path
+
+
+def current_trace() -> Optional[str]:
+    """Zwraca identyfikator śladu przypisany do bieżącego wątku"""
+    if not Config.TRACE_ENABLED:
+        return None
+    return getattr(_local, 'trace_id', None)
+
+
+def use_trace(trace_id: Optional[str]):
+    """
+    Przypisuje ślad do bieżącego wątku na czas bloku `with`
+
+    Używane w wątkach, które obsługują pracę zleconą w ramach wypowiedzi
+    (nagrywanie, wklejanie, ładowanie modelu).
+    """
+    if trace_id is None or not Config.TRACE_ENABLED:
+        return _NULL_SPAN
+    return _TraceScope(trace_id)
+
+
+def span(name: str, **args):
+    """
+    Mierzy blok `with` jako zakres śladu bieżącego wątku
+
+    Przy wyłączonym śledzeniu lub braku śladu zwraca pusty zakres.
+
+    Args:
+        name: Nazwa zakresu (np. 'transcribe.api')
+        **args: Dodatkowe informacje widoczne w szczegółach zakresu
+    """
+    if not Config.TRACE_ENABLED:
+        return _NULL_SPAN
+    trace_id = getattr(_local, 'trace_id', None)
+    if trace_id is None:
+        return _NULL_SPAN
+    return _Span(name, trace_id, args)
+
+
+def instant(name: str, **args):
+    """Zapisuje zdarzenie chwilowe w śladzie bieżącego wątku"""
+    if not Config.TRACE_ENABLED:
+        return
+    trace_id = getattr(_local, 'trace_id', None)
+    if trace_id is None:
+        return
+    _record({
+        'name': name,
+        'ph': 'i',
+        's': 't',
+        'ts': (time.perf_counter_ns() - _EPOCH_NS) / 1000,
+    }, trace_id, args)
+
+
+def dump(path: str, events: List[dict]):
+    """
+    Zapisuje zdarzenia w formacie trace-event JSON (z nazwami wątków)
+
+    Args:
+        path: Ścieżka pliku wynikowego
+        events: Zdarzenia jednego lub wielu śladów
+    """
+    with _lock:
+        names = dict(_thread_names)
+    tids = {event['tid'] for event in events}
+    metadata = [
+        {'name': 'thread_name', 'ph': 'M', 'pid': _PID, 'tid': tid, 'args': {'name': names.get(tid, str(tid))}}
+        for tid in sorted(tids)
+    ]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+
+
+def _record(event: dict, trace_id: str, args: dict):
+    """Dodaje zdarzenie do bufora śladu"""
+    thread = threading.current_thread()
+    event['pid'] = _PID
+    event['tid'] = thread.ident
+    event['cat'] = 'utterance'
+    event['args'] = dict(args, trace_id=trace_id)
+    with _lock:
+        bucket = _events.get(trace_id)
+        if bucket is None:
+            # Ślad został już zapisany (np. spóźnione zdarzenie z wątku w tle)
+            return
+        bucket.append(event)
+        _thread_names[thread.ident] = thread.name
@@ -0,0 +1,1180 @@
+"""
+Moduł farmy transkrypcji - koordynator rozdzielający nagrania między węzły robocze po TCP
+
+Węzły (python transcription_farm.py worker) łączą się z koordynatorem,
+zgłaszają liczbę równoległych zadań i załadowane modele, a następnie
+transkrybują przysłane nagrania własnym TranscriptionService, odsyłając
+segmenty w miarę dekodowania. Koordynator przydziela zadanie węzłowi o
+najwcześniejszym szacowanym końcu (długość audio × waga modelu × zmierzone
+tempo węzła, plus koszt ładowania modelu, którego węzeł nie ma w pamięci),
+a po utracie węzła ponawia jego zadania na pozostałych.
+
+    python transcription_farm.py coordinator
+    python transcription_farm.py worker --coordinator 10.0.0.5:8766 --capacity 2
+    python transcription_farm.py transcribe spotkanie.wav --model medium
+    python transcription_farm.py bench --workers 3 --jobs 60 --kill-after 3
+"""
+import argparse
+import io
+import json
+import os
+import signal
+import socket
+import socketserver
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import wave
+from concurrent.futures import Future, ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional, Tuple
+from config import Config, load_environment
+from language_id import AUTO, LanguageIdentifier, LanguagePrior
+import scheduling
+
+# Względny koszt dekodowania sekundy audio (pierwsze pasujące; nieznane modele - 1.0)
+_MODEL_WEIGHTS = (
+    ('distil', 1.5),
+    ('turbo', 1.5),
+    ('tiny', 0.3),
+    ('base', 0.5),
+    ('small', 1.0),
+    ('medium', 2.5),
+    ('large', 5.0),
+    ('whisper-1', 0.3),
+)
+
+# Wygładzanie zmierzonego tempa węzła i czasu ładowania modelu
+_EWMA_ALPHA = 0.3
+
+
+def model_weight(model: Optional[str]) -> float:
+    """
+    Zwraca względny koszt dekodowania modelu
+
+    Args:
+        model: Nazwa modelu (None - domyślny model węzła)
+
+    Returns:
+        float: Waga (small = 1.0)
+    """
+    name = (model or '').lower()
+    for key, weight in _MODEL_WEIGHTS:
+        if key in name:
+            return weight
+    return 1.0
+
+
+def parse_address(address: Optional[str] = None) -> Tuple[str, int]:
+    """
+    Rozbiera adres 'host:port' (domyślnie FARM_COORDINATOR lub FARM_HOST:FARM_PORT)
+
+    Returns:
+        Tuple[str, int]: Host i port
+    """
+    address = address or Config.FARM_COORDINATOR or f"{Config.FARM_HOST}:{Config.FARM_PORT}"
+    host, _, port = address.rpartition(':')
+    return host or Config.FARM_HOST, int(port)
+
+
+def audio_duration(data: bytes) -> float:
+    """Długość nagrania w sekundach (z nagłówka WAV lub szacowana z rozmiaru pliku FLAC 16 kHz)"""
+    try:
+        with wave.open(io.BytesIO(data), 'rb') as wf:
+            return wf.getnframes() / wf.getframerate()
+    except (wave.Error, EOFError):
+        return len(data) / 16000
+
+
+class _Connection:
+    """Połączenie TCP przenoszące komunikaty JSON (po jednym na linię) z opcjonalnym ładunkiem binarnym"""
+
+    def __init__(self, sock: socket.socket):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock = sock
+        self._reader = sock.makefile('rb')
+        self._send_lock = threading.Lock()
+
+    def send(self, message: dict, payload: bytes = b''):
+        """Wysyła komunikat; ładunek (np. nagranie) następuje bezpośrednio po linii JSON"""
+        if payload:
+            message = dict(message, size=len(payload))
+        data = json.dumps(message, ensure_ascii=False).encode('utf-8') + b"\n"
+        with self._send_lock:
+            self.sock.sendall(data + payload if payload else data)
+
+    def receive(self) -> Optional[Tuple[dict, bytes]]:
+        """
+        Odbiera kolejny komunikat
+
+        Returns:
+            Optional[Tuple[dict, bytes]]: Komunikat i ładunek lub None po zamknięciu połączenia
+        """
+        line = self._reader.readline()
+        if not line:
+            return None
+        message = json.loads(line)
+        size = message.get('size', 0)
+        payload = self._reader.read(size) if size else b''
+        if len(payload) < size:
+            return None
+        return message, payload
+
+    def close(self):
+        """Zamyka połączenie (odblokowuje wątek czekający w receive())"""
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+# --- Koordynator ---
+
+class _Job:
+    """Zadanie transkrypcji w kolejce koordynatora"""
+
+    def __init__(self, job_id: int, client: "_ClientHandle", client_id, message: dict, audio: bytes):
+        self.id = job_id
+        self.client = client
+        self.client_id = client_id
+        self.model: Optional[str] = message.get('model')
+        self.language: str = message.get('language') or 'pl'
+        self.beam_size: Optional[int] = message.get('beam_size')
+        self.suffix: str = message.get('suffix') or '.wav'
+        self.audio = audio
+        self.duration = audio_duration(audio)
+        self.submitted_at = time.monotonic()
+        self.attempts = 0
+        # Węzły, które utraciły to zadanie (nie dostaną go ponownie)
+        self.excluded = set()
+        # Przydział: węzeł, chwila wysłania i szacowany czas wykonania
+        self.worker: Optional["_WorkerHandle"] = None
+        self.started_at = 0.0
+        self.estimate = 0.0
+
+
+class _ClientHandle:
+    """Połączenie klienta zlecającego transkrypcje"""
+
+    def __init__(self, connection: _Connection):
+        self.connection = connection
+        self.closed = False
+
+    def send(self, message: dict):
+        if self.closed:
+            return
+        try:
+            self.connection.send(message)
+        except OSError:
+            self.closed = True
+
+
+class _WorkerHandle:
+    """Węzeł roboczy zarejestrowany u koordynatora"""
+
+    def __init__(self, worker_id: int, connection: _Connection, message: dict, rate: float):
+        self.id = worker_id
+        self.connection = connection
+        self.name: str = message.get('name') or f"węzeł-{worker_id}"
+        self.capacity = max(1, int(message.get('capacity') or 1))
+        self.models: List[str] = list(message.get('models') or [])
+        self.jobs: Dict[int, _Job] = {}
+        # Sekundy dekodowania na sekundę audio o wadze 1.0 i czas ładowania modelu (uczone z wyników)
+        self.rate = rate
+        self.load_cost = Config.FARM_MODEL_LOAD_COST
+        self.last_seen = time.monotonic()
+        self.completed = 0
+        self.model_loads = 0
+        self.busy_seconds = 0.0
+
+
+class FarmCoordinator:
+    """
+    Koordynator farmy: przyjmuje węzły i klientów na jednym porcie TCP
+
+    Zadania czekają w kolejce koordynatora i są wysyłane dopiero, gdy
+    wybrany węzeł ma wolne miejsce, więc przydział uwzględnia aktualny stan
+    farmy, a utracone zadania wracają na początek kolejki.
+    """
+
+    def __init__(self, host: Optional[str] = None, port: Optional[int] = None, locality: bool = True):
+        """
+        Args:
+            host: Adres nasłuchiwania (domyślnie FARM_HOST)
+            port: Port (domyślnie FARM_PORT; 0 - wolny port)
+            locality: Czy doliczać koszt ładowania modelu, którego węzeł nie ma w pamięci
+        """
+        self.host = host or Config.FARM_HOST
+        self.port = port if port is not None else Config.FARM_PORT
+        self.locality = locality
+        self.server: Optional[socketserver.BaseServer] = None
+
+        self._lock = threading.Lock()
+        self._workers: Dict[int, _WorkerHandle] = {}
+        self._pending: List[_Job] = []
+        self._next_id = 0
+        self._stop = threading.Event()
+        # Tempo nowego węzła - średnia zmierzona na pozostałych (początkowo ostrożne 1 s na sekundę audio)
+        self._fleet_rate = 1.0
+
+        # Statystyki
+        self.completed = 0
+        self.failed = 0
+        self.retries = 0
+        self.lost_workers = 0
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """Faktyczny adres nasłuchiwania (po starcie, także dla portu 0)"""
+        return self.server.server_address[:2] if self.server else (self.host, self.port)
+
+    def start(self):
+        """Otwiera port i obsługuje połączenia w wątkach w tle"""
+        coordinator = self
+
+        class _Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                coordinator._handle_connection(_Connection(self.request))
+
+        class _Server(socketserver.ThreadingTCPServer):
+            daemon_threads = True
+            allow_reuse_address = True
+
+        self.server = _Server((self.host, self.port), _Handler)
+        threading.Thread(target=self.server.serve_forever, name="FarmServer", daemon=True).start()
+        threading.Thread(target=self._monitor, name="FarmMonitor", daemon=True).start()
+        host, port = self.address
+        print(f"🛰️ Koordynator farmy nasłuchuje na {host}:{port}"
+              f"{'' if self.locality else ' (bez uwzględniania załadowanych modeli)'}")
+
+    def serve_forever(self):
+        """Uruchamia koordynatora i czeka na zatrzymanie (Ctrl+C)"""
+        self.start()
+        try:
+            self._stop.wait()
+        finally:
+            self.stop()
+
+    def stop(self):
+        """Zamyka port i połączenia z węzłami"""
+        self._stop.set()
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+        with self._lock:
+            workers = list(self._workers.values())
+        for worker in workers:
+            worker.connection.close()
+
+    def status(self) -> dict:
+        """
+        Zwraca stan farmy
+
+        Returns:
+            dict: Węzły (zadania, modele, tempo), długość kolejki i liczniki zadań
+        """
+        with self._lock:
+            workers = [{
+                'name': worker.name,
+                'capacity': worker.capacity,
+                'busy': len(worker.jobs),
+                'models': list(worker.models),
+                'rate': worker.rate,
+                'load_cost': worker.load_cost,
+                'completed': worker.completed,
+                'model_loads': worker.model_loads,
+                'busy_seconds': worker.busy_seconds,
+            } for worker in self._workers.values()]
+            pending = len(self._pending)
+            pending_audio = sum(job.duration for job in self._pending)
+        return {
+            'workers': workers,
+            'pending': pending,
+            'pending_audio': pending_audio,
+            'completed': self.completed,
+            'failed': self.failed,
+            'retries': self.retries,
+            'lost_workers': self.lost_workers,
+        }
+
+    # --- Połączenia ---
+
+    def _handle_connection(self, connection: _Connection):
+        """Pierwszy komunikat rozstrzyga, czy łączy się węzeł, czy klient"""
+        try:
+            received = connection.receive()
+        except (OSError, ValueError):
+            received = None
+        if received is None:
+            connection.close()
+            return
+        message, payload = received
+        if message.get('type') == 'register':
+            self._serve_worker(connection, message)
+        else:
+            self._serve_client(connection, message, payload)
+
+    def _serve_worker(self, connection: _Connection, message: dict):
+        """Obsługuje komunikaty węzła do zamknięcia połączenia"""
+        with self._lock:
+            self._next_id += 1
+            worker = _WorkerHandle(self._next_id, connection, message, self._fleet_rate)
+            self._workers[worker.id] = worker
+            assignments = self._dispatch_locked()
+        print(f"➕ Węzeł {worker.name}: {worker.capacity} zadań naraz, modele: {', '.join(worker.models) or '-'}")
+        self._send_jobs(assignments)
+        try:
+            while True:
+                received = connection.receive()
+                if received is None:
+                    break
+                self._on_worker_message(worker, received[0])
+        except (OSError, ValueError):
+            pass
+        finally:
+            self._drop_worker(worker)
+
+    def _on_worker_message(self, worker: _WorkerHandle, message: dict):
+        """Obsługuje komunikat węzła: puls, segment, wynik lub błąd zadania"""
+        kind = message.get('type')
+        worker.last_seen = time.monotonic()
+        if 'models' in message:
+            worker.models = list(message['models'])
+        if kind == 'heartbeat':
+            return
+
+        with self._lock:
+            job = worker.jobs.get(message.get('id'))
+            if job is None:
+                return
+            if kind == 'segment':
+                job.client.send({'type': 'segment', 'id': job.client_id, 'text': message.get('text')})
+                return
+            del worker.jobs[job.id]
+            if kind == 'done':
+                self._record_result(worker, job, message)
+            else:
+                self._retry_locked(job, worker, message.get('error') or "błąd węzła")
+            assignments = self._dispatch_locked()
+        self._send_jobs(assignments)
+
+    def _record_result(self, worker: _WorkerHandle, job: _Job, message: dict):
+        """Uczy się tempa węzła i odsyła wynik klientowi (wywoływane z blokadą)"""
+        elapsed = float(message.get('elapsed') or 0.0)
+        load = float(message.get('load') or 0.0)
+        work = job.duration * model_weight(job.model)
+        if work > 0:
+            # Pierwszy pomiar zastępuje założone tempo, kolejne je wygładzają
+            rate = max(0.0, elapsed - load) / work
+            worker.rate += (_EWMA_ALPHA if worker.completed else 1.0) * (rate - worker.rate)
+            self._fleet_rate += (_EWMA_ALPHA if self.completed else 1.0) * (rate - self._fleet_rate)
+        if load > 0:
+            worker.model_loads += 1
+            worker.load_cost += _EWMA_ALPHA * (load - worker.load_cost)
+        worker.completed += 1
+        worker.busy_seconds += elapsed
+        self.completed += 1
+        job.client.send({
+            'type': 'done',
+            'id': job.client_id,
+            'text': message.get('text'),
+            'model': message.get('model'),
+            'language': message.get('language'),
+            'worker': worker.name,
+            'attempts': job.attempts + 1,
+            'elapsed': elapsed,
+            'wait': job.started_at - job.submitted_at,
+        })
+
+    def _retry_locked(self, job: _Job, worker: _WorkerHandle, reason: str):
+        """Wraca zadanie na początek kolejki lub kończy je błędem po FARM_MAX_ATTEMPTS próbach"""
+        job.attempts += 1
+        job.excluded.add(worker.id)
+        job.worker = None
+        if job.attempts >= Config.FARM_MAX_ATTEMPTS:
+            self.failed += 1
+            job.client.send({'type': 'failed', 'id': job.client_id,
+                             'error': f"{reason} (próby: {job.attempts})"})
+            return
+        self.retries += 1
+        job.client.send({'type': 'retry', 'id': job.client_id, 'worker': worker.name, 'error': reason})
+        # Zachowaj kolejność zgłoszeń między ponawianymi zadaniami
+        position = 0
+        while position < len(self._pending) and self._pending[position].id < job.id:
+            position += 1
+        self._pending.insert(position, job)
+
+    def _drop_worker(self, worker: _WorkerHandle):
+        """Usuwa utracony węzeł i ponawia jego zadania na pozostałych"""
+        worker.connection.close()
+        with self._lock:
+            if self._workers.pop(worker.id, None) is None:
+                return
+            jobs = sorted(worker.jobs.values(), key=lambda job: job.id)
+            worker.jobs.clear()
+            for job in jobs:
+                self._retry_locked(job, worker, f"utracono węzeł {worker.name}")
+            if not self._stop.is_set():
+                self.lost_workers += 1
+            assignments = self._dispatch_locked()
+        if not self._stop.is_set():
+            print(f"➖ Węzeł {worker.name} odłączony (ponawiane zadania: {len(jobs)})")
+        self._send_jobs(assignments)
+
+    def _serve_client(self, connection: _Connection, message: dict, payload: bytes):
+        """Obsługuje zlecenia klienta; wyniki trafiają do niego asynchronicznie (po id)"""
+        client = _ClientHandle(connection)
+        received = (message, payload)
+        try:
+            while received is not None:
+                message, payload = received
+                kind = message.get('type')
+                if kind == 'transcribe':
+                    self._submit(client, message, payload)
+                elif kind == 'status':
+                    client.send(dict(self.status(), type='status', id=message.get('id')))
+                else:
+                    client.send({'type': 'failed', 'id': message.get('id'), 'error': f"Nieznane polecenie: {kind}"})
+                received = connection.receive()
+        except (OSError, ValueError):
+            pass
+        finally:
+            client.closed = True
+            with self._lock:
+                # Zadania rozłączonego klienta, które nie trafiły jeszcze do węzłów, są porzucane
+                self._pending = [job for job in self._pending if job.client is not client]
+            connection.close()
+
+    def _submit(self, client: _ClientHandle, message: dict, payload: bytes):
+        """Dodaje zadanie do kolejki i próbuje je od razu przydzielić"""
+        with self._lock:
+            self._next_id += 1
+            self._pending.append(_Job(self._next_id, client, message.get('id'), message, payload))
+            assignments = self._dispatch_locked()
+        self._send_jobs(assignments)
+
+    # --- Przydział zadań ---
+
+    def _estimate(self, worker: _WorkerHandle, job: _Job, now: float) -> float:
+        """Szacowany czas do ukończenia zadania na węźle: oczekiwanie na miejsce, ładowanie modelu i dekodowanie"""
+        wait = 0.0
+        if len(worker.jobs) >= worker.capacity:
+            # Zadanie spóźnione względem szacunku potrwa jeszcze co najmniej ćwierć szacunku
+            wait = min(max(running.estimate - (now - running.started_at), 0.25 * running.estimate)
+                       for running in worker.jobs.values())
+        cost = job.duration * model_weight(job.model) * worker.rate
+        if self.locality and job.model and job.model not in worker.models:
+            cost += worker.load_cost
+        return wait + cost
+
+    def _dispatch_locked(self) -> List[Tuple[_WorkerHandle, _Job]]:
+        """
+        Przydziela oczekujące zadania węzłom (wywoływane z blokadą)
+
+        Każde zadanie (w kolejności zgłoszeń) trafia do węzła o najwcześniejszym
+        szacowanym końcu. Jeśli ten węzeł jest zajęty, zadanie czeka na niego
+        - załadowany model wygrywa z wolnym węzłem, gdy ładowanie trwałoby dłużej.
+
+        Returns:
+            List[Tuple[_WorkerHandle, _Job]]: Przydziały do wysłania (poza blokadą)
+        """
+        assignments = []
+        if not self._workers:
+            return assignments
+        now = time.monotonic()
+        for job in list(self._pending):
+            candidates = [worker for worker in self._workers.values() if worker.id not in job.excluded]
+            if not candidates:
+                # Wszystkie węzły utraciły już to zadanie - spróbuj ponownie na każdym
+                job.excluded.clear()
+                candidates = list(self._workers.values())
+            best = min(candidates, key=lambda worker: self._estimate(worker, job, now))
+            if len(best.jobs) >= best.capacity:
+                continue
+            job.estimate = self._estimate(best, job, now)
+            job.started_at = now
+            job.worker = best
+            best.jobs[job.id] = job
+            if job.model and job.model not in best.models:
+                # Węzeł załaduje model - kolejne zadania tego modelu mogą na to liczyć
+                best.models.append(job.model)
+            self._pending.remove(job)
+            assignments.append((best, job))
+        return assignments
+
+    def _send_jobs(self, assignments: List[Tuple[_WorkerHandle, _Job]]):
+        """Wysyła przydzielone zadania (poza blokadą - nagrania mogą być duże)"""
+        for worker, job in assignments:
+            try:
+                worker.connection.send({
+                    'type': 'job',
+                    'id': job.id,
+                    'model': job.model,
+                    'language': job.language,
+                    'beam_size': job.beam_size,
+                    'suffix': job.suffix,
+                }, job.audio)
+            except OSError:
+                self._drop_worker(worker)
+
+    def _monitor(self):
+        """Odłącza węzły bez pulsu i okresowo ponawia przydział (szacunki zmieniają się z czasem)"""
+        while not self._stop.wait(Config.FARM_HEARTBEAT_INTERVAL):
+            now = time.monotonic()
+            with self._lock:
+                silent = [worker for worker in self._workers.values()
+                          if now - worker.last_seen > Config.FARM_WORKER_TIMEOUT]
+            for worker in silent:
+                print(f"⚠️ Węzeł {worker.name} nie odpowiada od {now - worker.last_seen:.0f} s")
+                # Zamknięcie połączenia kończy wątek węzła, który ponawia jego zadania
+                worker.connection.close()
+            with self._lock:
+                assignments = self._dispatch_locked()
+            self._send_jobs(assignments)
+
+
+# --- Węzeł roboczy ---
+
+class FarmWorker:
+    """
+    Węzeł farmy: transkrybuje zadania koordynatora własnym TranscriptionService
+
+    Po utracie połączenia łączy się ponownie co FARM_RECONNECT_DELAY sekund.
+    Model domyślny (LOCAL_WHISPER_MODEL) jest ładowany przy starcie, a inny
+    model zadania - obok niego, jak przy ponownej transkrypcji.
+    """
+
+    def __init__(self, coordinator: Optional[str] = None, capacity: Optional[int] = None,
+                 name: Optional[str] = None, transcription_service=None):
+        """
+        Args:
+            coordinator: Adres koordynatora 'host:port' (domyślnie FARM_COORDINATOR lub FARM_HOST:FARM_PORT)
+            capacity: Liczba równoległych zadań (domyślnie FARM_WORKER_CAPACITY)
+            name: Nazwa węzła w komunikatach koordynatora (domyślnie host-pid)
+            transcription_service: Serwis transkrypcji (domyślnie tworzony z config)
+        """
+        self.address = parse_address(coordinator)
+        self.capacity = capacity or Config.FARM_WORKER_CAPACITY
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}"
+        if transcription_service is None:
+            from transcription_service import TranscriptionService
+            from vocabulary import VocabularyCorrector
+            vocabulary = VocabularyCorrector() if Config.VOCABULARY_FILE else None
+            # Węzeł obsługuje wielu użytkowników - rozkład języków prowadzi klient
+            transcription_service = TranscriptionService(vocabulary=vocabulary,
+                                                         language_identifier=LanguageIdentifier())
+        self.service = transcription_service
+        # Wątki zadań mają priorytet dekodowania (SCHED_POLICY_ENABLED)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.capacity, thread_name_prefix="FarmJob",
+            initializer=scheduling.apply, initargs=(scheduling.DECODE,),
+        )
+        self._stop = threading.Event()
+        self._connection: Optional[_Connection] = None
+        self.completed = 0
+
+    def serve_forever(self):
+        """Łączy się z koordynatorem i obsługuje zadania do zatrzymania"""
+        host, port = self.address
+        while not self._stop.is_set():
+            try:
+                sock = socket.create_connection((host, port), timeout=10)
+                sock.settimeout(None)
+            except OSError as e:
+                print(f"⚠️ Koordynator {host}:{port} niedostępny ({e}) - ponawiam za {Config.FARM_RECONNECT_DELAY:.0f} s")
+                self._stop.wait(Config.FARM_RECONNECT_DELAY)
+                continue
+            self._session(_Connection(sock))
+            if not self._stop.is_set():
+                print(f"⚠️ Utracono połączenie z koordynatorem - ponawiam za {Config.FARM_RECONNECT_DELAY:.0f} s")
+                self._stop.wait(Config.FARM_RECONNECT_DELAY)
+        self._executor.shutdown(wait=True)
+
+    def stop(self):
+        """Zatrzymuje węzeł (zadania w toku są kończone)"""
+        self._stop.set()
+        if self._connection:
+            self._connection.close()
+
+    def loaded_models(self) -> List[str]:
+        """Modele w pamięci węzła (domyślny i dodatkowy)"""
+        stats = self.service.model_stats()
+        models = []
+        if stats['loaded'] or self.service.mode == 'api':
+            models.append(self.service.model_name)
+        if stats.get('alternate_model'):
+            models.append(stats['alternate_model'])
+        return models
+
+    def _session(self, connection: _Connection):
+        """Rejestruje węzeł i odbiera zadania do zamknięcia połączenia"""
+        self._connection = connection
+        session_closed = threading.Event()
+        try:
+            connection.send({
+                'type': 'register',
+                'name': self.name,
+                'capacity': self.capacity,
+                'models': self.loaded_models(),
+                'pid': os.getpid(),
+            })
+            print(f"🔗 Węzeł {self.name} zarejestrowany w {self.address[0]}:{self.address[1]} "
+                  f"({self.capacity} zadań naraz)")
+            threading.Thread(target=self._heartbeat, args=(connection, session_closed),
+                             name="FarmHeartbeat", daemon=True).start()
+            while True:
+                received = connection.receive()
+                if received is None:
+                    break
+                message, payload = received
+                if message.get('type') == 'job':
+                    self._executor.submit(self._run_job, connection, message, payload)
+        except (OSError, ValueError):
+            pass
+        finally:
+            session_closed.set()
+            connection.close()
+            self._connection = None
+
+    def _heartbeat(self, connection: _Connection, session_closed: threading.Event):
+        """Wysyła puls z listą załadowanych modeli (także w trakcie długiego dekodowania)"""
+        while not session_closed.wait(Config.FARM_HEARTBEAT_INTERVAL):
+            try:
+                connection.send({'type': 'heartbeat', 'models': self.loaded_models()})
+            except OSError:
+                return
+
+    def _run_job(self, connection: _Connection, job: dict, audio: bytes):
+        """Transkrybuje zadanie, odsyłając segmenty w miarę dekodowania i wynik na końcu"""
+        job_id = job['id']
+
+        def send(message: dict):
+            try:
+                connection.send(dict(message, id=job_id))
+            except OSError:
+                # Koordynator przydzieli zadanie ponownie po wykryciu utraty połączenia
+                pass
+
+        loads = self.service.model_loads
+        started = time.perf_counter()
+        language = job.get('language') or 'pl'
+        try:
+            with tempfile.NamedTemporaryFile(suffix=job.get('suffix') or '.wav', delete=False) as tmp:
+                tmp.write(audio)
+                path = tmp.name
+            try:
+                result = self.service.transcribe(
+                    path, language,
+                    model_name=job.get('model'), beam_size=job.get('beam_size'),
+                    on_segment=lambda segment: send({'type': 'segment', 'text': segment}),
+                )
+            finally:
+                os.unlink(path)
+        except Exception as e:
+            send({'type': 'error', 'error': str(e)})
+            return
+        elapsed = time.perf_counter() - started
+        load = (self.service.last_load_time or 0.0) if self.service.model_loads > loads else 0.0
+        self.completed += 1
+        send({
+            'type': 'done',
+            'text': result.text,
+            'model': result.model or self.service.model_name,
+            'language': result.language,
+            'elapsed': elapsed,
+            'load': load,
+            'models': self.loaded_models(),
+        })
+
+
+# --- Klient ---
+
+class FarmClient:
+    """
+    Klient farmy z interfejsem TranscriptionService (`transcribe_audio_file`, `mode`, `model_name`)
+
+    Jedno połączenie przenosi wiele równoległych zleceń; odpowiedzi są
+    przypisywane po identyfikatorze w osobnym wątku.
+    """
+
+    def __init__(self, coordinator: Optional[str] = None, timeout: Optional[float] = None):
+        """
+        Args:
+            coordinator: Adres koordynatora 'host:port' (domyślnie FARM_COORDINATOR lub FARM_HOST:FARM_PORT)
+            timeout: Limit oczekiwania na wynik w sekundach (domyślnie FARM_TIMEOUT)
+        """
+        self.address = parse_address(coordinator)
+        self.timeout = timeout if timeout is not None else Config.FARM_TIMEOUT
+        self.mode = 'farm'
+        # Model ostatniego wyniku (przed pierwszym - zakładany model domyślny węzłów)
+        self.model_name: str = Config.LOCAL_WHISPER_MODEL
+        # Model zlecany węzłom (None - model domyślny węzła)
+        self._requested_model: Optional[str] = None
+        # Rozkład języków użytkownika dla language='auto' (węzły rozpoznają bez niego)
+        self.language_prior = LanguagePrior()
+        self._connection: Optional[_Connection] = None
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._waiting: Dict[int, Tuple[Future, Optional[Callable[[str], None]]]] = {}
+
+    def submit_bytes(self, audio: bytes, suffix: str = '.wav', language: str = "pl",
+                     model_name: Optional[str] = None, beam_size: Optional[int] = None,
+                     on_segment: Optional[Callable[[str], None]] = None) -> Future:
+        """
+        Zleca transkrypcję nagrania
+
+        Args:
+            audio: Zawartość pliku audio
+            suffix: Rozszerzenie pliku (format dekodowany przez węzeł)
+            language: Kod języka ('auto' - pewny język z rozkładu użytkownika albo rozpoznanie na węźle)
+            model_name: Model (domyślnie ustawiony przez reconfigure() lub domyślny węzła)
+            beam_size: Szerokość wiązki lokalnego modelu
+            on_segment: Funkcja wywoływana z tekstem segmentów w miarę dekodowania
+
+        Returns:
+            Future: Komunikat końcowy - 'done' (text, language, worker, attempts, elapsed, wait) lub 'failed' (error)
+        """
+        future: Future = Future()
+        if language == AUTO:
+            language = self.language_prior.choose() or AUTO
+            if language == AUTO:
+                # Język rozpoznany przez węzeł uczy rozkład użytkownika
+                future.add_done_callback(self._observe_language)
+        with self._lock:
+            if self._connection is None:
+                self._connect()
+            self._next_id += 1
+            request_id = self._next_id
+            self._waiting[request_id] = (future, on_segment)
+            connection = self._connection
+        try:
+            connection.send({
+                'type': 'transcribe',
+                'id': request_id,
+                'model': model_name or self._requested_model,
+                'language': language,
+                'beam_size': beam_size,
+                'suffix': suffix,
+            }, audio)
+        except OSError as e:
+            self._fail_all(connection, e)
+        return future
+
+    def submit(self, audio_file_path: str, language: str = "pl", model_name: Optional[str] = None,
+               beam_size: Optional[int] = None, on_segment: Optional[Callable[[str], None]] = None) -> Future:
+        """Zleca transkrypcję pliku (parametry jak w submit_bytes)"""
+        with open(audio_file_path, 'rb') as audio_file:
+            audio = audio_file.read()
+        return self.submit_bytes(audio, os.path.splitext(audio_file_path)[1] or '.wav', language,
+                                 model_name, beam_size, on_segment)
+
+    def transcribe_audio_file(self, audio_file_path: str, language: str = "pl",
+                              model_name: Optional[str] = None, beam_size: Optional[int] = None,
+                              on_segment: Optional[Callable[[str], None]] = None) -> Optional[str]:
+        """
+        Transkrybuje plik na farmie i czeka na wynik
+
+        Returns:
+            Optional[str]: Transkrybowany tekst lub None w przypadku błędu
+        """
+        return self.transcribe(audio_file_path, language, model_name, beam_size, on_segment).text
+
+    def transcribe_samples(self, samples, language: str = "pl", model_name: Optional[str] = None,
+                           beam_size: Optional[int] = None) -> Optional[str]:
+        """Transkrybuje próbki int16 16 kHz mono (wysyłane jako WAV z pamięci)"""
+        return self.transcribe(samples, language, model_name, beam_size).text
+
+    def transcribe(self, audio, language: str = "pl", model_name: Optional[str] = None,
+                   beam_size: Optional[int] = None, on_segment: Optional[Callable[[str], None]] = None):
+        """
+        Transkrybuje plik lub próbki int16 na farmie (jak TranscriptionService.transcribe)
+
+        Returns:
+            TranscriptionResult: Tekst z językiem i modelem tego zlecenia (text=None w przypadku błędu)
+        """
+        from transcription_service import TranscriptionResult
+        try:
+            if isinstance(audio, str):
+                future = self.submit(audio, language, model_name, beam_size, on_segment)
+            else:
+                buffer = io.BytesIO()
+                with wave.open(buffer, 'wb') as wf:
+                    wf.setnchannels(1)
+                    wf.setsampwidth(2)
+                    wf.setframerate(16000)
+                    wf.writeframes(audio.astype('<i2').tobytes())
+                future = self.submit_bytes(buffer.getvalue(), '.wav', language, model_name, beam_size, on_segment)
+            message = future.result(self.timeout)
+        except Exception as e:
+            print(f"❌ Błąd transkrypcji na farmie: {e}")
+            return TranscriptionResult(language=language, model=model_name)
+        if message.get('type') != 'done':
+            print(f"❌ Farma nie przetworzyła nagrania: {message.get('error')}")
+            return TranscriptionResult(language=language, model=model_name)
+        self.model_name = message.get('model') or self.model_name
+        return TranscriptionResult(message.get('text'), language=message.get('language'),
+                                   model=message.get('model') or model_name)
+
+    def status(self) -> dict:
+        """Stan farmy (węzły, kolejka, liczniki)"""
+        future: Future = Future()
+        with self._lock:
+            if self._connection is None:
+                self._connect()
+            self._next_id += 1
+            self._waiting[self._next_id] = (future, None)
+            self._connection.send({'type': 'status', 'id': self._next_id})
+        return future.result(self.timeout)
+
+    def prepare(self):
+        """Modele węzłów są stale załadowane - nic do zrobienia"""
+
+    def reconfigure(self, mode: Optional[str] = None, model_name: Optional[str] = None, **kwargs) -> bool:
+        """Zmienia model zlecany węzłom (pozostałe ustawienia należą do węzłów)"""
+        if model_name:
+            self._requested_model = model_name
+            self.model_name = model_name
+        return True
+
+    def close(self):
+        """Zamyka połączenie z koordynatorem"""
+        with self._lock:
+            connection, self._connection = self._connection, None
+        if connection:
+            connection.close()
+
+    def _observe_language(self, future: Future):
+        """Dodaje język rozpoznany przez węzeł do rozkładu użytkownika"""
+        if future.exception() is None:
+            language = future.result().get('language')
+            if language:
+                self.language_prior.observe(language)
+
+    def _connect(self):
+        """Łączy się z koordynatorem i uruchamia wątek odbierający odpowiedzi (wywoływane z blokadą)"""
+        sock = socket.create_connection(self.address, timeout=10)
+        sock.settimeout(None)
+        self._connection = _Connection(sock)
+        threading.Thread(target=self._receive_loop, args=(self._connection,),
+                         name="FarmClient", daemon=True).start()
+
+    def _receive_loop(self, connection: _Connection):
+        """Przypisuje odpowiedzi koordynatora do oczekujących zleceń"""
+        error: Exception = ConnectionError("Koordynator zamknął połączenie")
+        try:
+            while True:
+                received = connection.receive()
+                if received is None:
+                    break
+                message = received[0]
+                with self._lock:
+                    entry = self._waiting.get(message.get('id'))
+                    if entry and message.get('type') in ('done', 'failed', 'status'):
+                        del self._waiting[message['id']]
+                if entry is None:
+                    continue
+                future, on_segment = entry
+                kind = message.get('type')
+                if kind == 'segment':
+                    if on_segment:
+                        on_segment(message.get('text') or '')
+                elif kind == 'retry':
+                    print(f"🔁 Zlecenie {message['id']}: {message.get('error')} - ponawiam na innym węźle")
+                else:
+                    future.set_result(message)
+        except (OSError, ValueError) as e:
+            error = e
+        self._fail_all(connection, error)
+
+    def _fail_all(self, connection: _Connection, error: Exception):
+        """Kończy błędem zlecenia czekające na zerwanym połączeniu"""
+        with self._lock:
+            if self._connection is not connection:
+                return
+            self._connection = None
+            waiting, self._waiting = self._waiting, {}
+        connection.close()
+        for future, _on_segment in waiting.values():
+            if not future.done():
+                future.set_exception(error)
+
+
+def connect_to_farm() -> Optional[FarmClient]:
+    """
+    Łączy się z farmą, jeśli FARM_COORDINATOR jest ustawiony
+
+    Returns:
+        Optional[FarmClient]: Klient lub None, gdy farma nie jest skonfigurowana albo niedostępna
+    """
+    if not Config.FARM_COORDINATOR:
+        return None
+    client = FarmClient()
+    try:
+        status = client.status()
+    except Exception as e:
+        print(f"⚠️ Farma transkrypcji {Config.FARM_COORDINATOR} niedostępna: {e}")
+        client.close()
+        return None
+    print(f"🛰️ Używam farmy transkrypcji {Config.FARM_COORDINATOR} (węzłów: {len(status['workers'])})")
+    return client
+
+
+# --- Pomiar na jednej maszynie (węzły w osobnych procesach na localhost) ---
+
+class _StubModel:
+    """Atrapa modelu: ładowanie trwa load_seconds, dekodowanie - długość × waga modelu × ms_per_second"""
+
+    def __init__(self, model_size: str, ms_per_second: float, load_seconds: float):
+        time.sleep(load_seconds)
+        self.model_size = model_size
+        self.ms_per_second = ms_per_second
+
+    def transcribe(self, audio, **kwargs):
+        with wave.open(audio, 'rb') as wf:
+            duration = wf.getnframes() / wf.getframerate()
+        info = SimpleNamespace(language=kwargs.get('language'), duration=duration)
+        return self._segments(duration), info
+
+    def _segments(self, duration: float):
+        # Segment co 5 s audio, jak w Whisperze; sen zamiast obliczeń - węzły dzielą jedną maszynę
+        per_second = self.ms_per_second / 1000 * model_weight(self.model_size)
+        start = 0.0
+        while start < duration:
+            length = min(5.0, duration - start)
+            time.sleep(length * per_second)
+            yield SimpleNamespace(text=f"{self.model_size} {start:.0f}.", no_speech_prob=0.0,
+                                  start=start, end=start + length)
+            start += length
+
+
+def _run_stub_worker(coordinator: str, name: str, capacity: int, model: str,
+                     ms_per_second: float, load_seconds: float):
+    """Proces węzła w pomiarze: TranscriptionService z atrapą modelu"""
+    import functools
+    sys.stdout = open(os.devnull, 'w')
+    from transcription_service import TranscriptionService
+    Config.TRANSCRIPTION_MODE = 'local'
+    Config.LOCAL_WHISPER_MODEL = model
+    Config.RETRANSCRIBE_MODEL_IDLE_TIMEOUT = 0
+    factory = functools.partial(_stub_factory, ms_per_second=ms_per_second, load_seconds=load_seconds)
+    service = TranscriptionService(model_factory=factory)
+    FarmWorker(coordinator, capacity, name, service).serve_forever()
+
+
+def _stub_factory(model_size: str, ms_per_second: float = 20.0, load_seconds: float = 1.0, **kwargs):
+    return _StubModel(model_size, ms_per_second, load_seconds)
+
+
+def run_benchmark(workers: int = 3, capacity: int = 1, jobs: int = 60, models: str = 'base,small,medium',
+                  ms_per_second: float = 20.0, load_seconds: float = 1.0, kill_after: Optional[float] = None,
+                  locality: bool = True, seed: int = 0) -> dict:
+    """
+    Uruchamia koordynatora i węzły (procesy) na localhost i mierzy przepustowość farmy
+
+    Args:
+        workers: Liczba węzłów
+        capacity: Równoległe zadania węzła
+        jobs: Liczba nagrań (2-30 s ciszy, modele losowane z listy)
+        models: Modele zadań rozdzielone przecinkami (węzeł i startuje z modelem i % n)
+        ms_per_second: Czas dekodowania sekundy audio modelu o wadze 1.0 (ms)
+        load_seconds: Czas ładowania modelu przez węzeł
+        kill_after: Po ilu sekundach zabić pierwszy węzeł (SIGKILL) - sprawdza ponawianie
+        locality: Czy koordynator uwzględnia załadowane modele
+        seed: Ziarno losowania zadań
+
+    Returns:
+        dict: Czas, przepustowość, opóźnienia, ponowienia i stan węzłów
+    """
+    import multiprocessing
+    import random
+
+    names = [name.strip() for name in models.split(',') if name.strip()]
+    rng = random.Random(seed)
+    lengths = [rng.uniform(2.0, 30.0) for _ in range(jobs)]
+    job_models = [rng.choice(names) for _ in range(jobs)]
+    recordings = {}
+    for length in set(round(length) for length in lengths):
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(16000)
+            wf.writeframes(b'\x00\x00' * int(16000 * length))
+        recordings[length] = buffer.getvalue()
+
+    Config.FARM_HEARTBEAT_INTERVAL = 0.5
+    Config.FARM_WORKER_TIMEOUT = 3.0
+    Config.FARM_MODEL_LOAD_COST = load_seconds
+    coordinator = FarmCoordinator('127.0.0.1', 0, locality=locality)
+    coordinator.start()
+    address = "%s:%d" % coordinator.address
+    context = multiprocessing.get_context('spawn')
+    processes = [
+        context.Process(target=_run_stub_worker, daemon=True,
+                        args=(address, f"węzeł-{index + 1}", capacity, names[index % len(names)],
+                              ms_per_second, load_seconds))
+        for index in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    # Rejestracja wszystkich węzłów (model domyślny ładuje się przy starcie)
+    deadline = time.monotonic() + 60
+    while len(coordinator.status()['workers']) < workers and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    client = FarmClient(address, timeout=300)
+    first_segment: Dict[int, float] = {}
+    try:
+        started = time.perf_counter()
+        futures = []
+        for index, (length, model) in enumerate(zip(lengths, job_models)):
+            def on_segment(text, index=index):
+                first_segment.setdefault(index, time.perf_counter() - started)
+            futures.append(client.submit_bytes(recordings[round(length)], '.wav', model_name=model,
+                                               on_segment=on_segment))
+        if kill_after is not None:
+            time.sleep(max(0.0, started + kill_after - time.perf_counter()))
+            os.kill(processes[0].pid, signal.SIGKILL)
+        results = []
+        for future in futures:
+            message = future.result(300)
+            results.append((message, time.perf_counter() - started))
+        elapsed = time.perf_counter() - started
+        status = coordinator.status()
+    finally:
+        client.close()
+        coordinator.stop()
+        for process in processes:
+            process.terminate()
+            process.join(5)
+
+    done = [(message, at) for message, at in results if message.get('type') == 'done']
+    latencies = sorted(at for _message, at in done)
+    audio_seconds = sum(round(length) for length in lengths)
+    return {
+        'jobs': jobs,
+        'done': len(done),
+        'failed': len(results) - len(done),
+        'elapsed': elapsed,
+        'audio_seconds': audio_seconds,
+        'speed': audio_seconds / elapsed,
+        'latency_median': statistics.median(latencies) if latencies else None,
+        'latency_max': latencies[-1] if latencies else None,
+        'first_segment_median': statistics.median(first_segment.values()) if first_segment else None,
+        'retried_jobs': sum(1 for message, _at in done if message.get('attempts', 1) > 1),
+        'retries': status['retries'],
+        'workers': status['workers'],
+    }
+
+
+def _print_benchmark(stats: dict, locality: bool):
+    """Wypisuje wynik pomiaru farmy"""
+    print(f"\n🛰️ Farma ({'z lokalnością modeli' if locality else 'bez lokalności modeli'}): "
+          f"{stats['done']}/{stats['jobs']} nagrań ({stats['audio_seconds'] / 60:.1f} min audio) "
+          f"w {stats['elapsed']:.1f} s - {stats['speed']:.1f}× czasu rzeczywistego")
+    print(f"⏱️ Wynik: mediana {stats['latency_median']:.1f} s, maks. {stats['latency_max']:.1f} s od zlecenia; "
+          f"pierwszy segment: mediana {stats['first_segment_median']:.1f} s")
+    print(f"🔁 Ponowienia: {stats['retries']} (zadania ukończone po ponowieniu: {stats['retried_jobs']}), "
+          f"nieudane: {stats['failed']}")
+    for worker in stats['workers']:
+        print(f"   {worker['name']}: {worker['completed']} zadań, ładowania modeli: {worker['model_loads']}, "
+              f"zajęty {worker['busy_seconds']:.1f} s, modele: {', '.join(worker['models'])}")
+
+
+def main(argv=None):
+    """Wiersz poleceń koordynatora, węzła i klienta farmy"""
+    parser = argparse.ArgumentParser(description="Farma transkrypcji Voice Notes")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    coordinator_parser = subparsers.add_parser('coordinator', help="Uruchom koordynatora")
+    coordinator_parser.add_argument('--host', default=None, help="Adres nasłuchiwania (domyślnie FARM_HOST)")
+    coordinator_parser.add_argument('--port', type=int, default=None, help="Port (domyślnie FARM_PORT)")
+    coordinator_parser.add_argument('--no-locality', action='store_true', help="Nie uwzględniaj załadowanych modeli")
+
+    worker_parser = subparsers.add_parser('worker', help="Uruchom węzeł roboczy")
+    worker_parser.add_argument('--coordinator', help="Adres koordynatora host:port")
+    worker_parser.add_argument('--capacity', type=int, help="Równoległe zadania (domyślnie FARM_WORKER_CAPACITY)")
+    worker_parser.add_argument('--name', help="Nazwa węzła")
+    worker_parser.add_argument('--model', help="Model domyślny (domyślnie LOCAL_WHISPER_MODEL)")
+
+    transcribe_parser = subparsers.add_parser('transcribe', help="Transkrybuj pliki na farmie")
+    transcribe_parser.add_argument('paths', nargs='+')
+    transcribe_parser.add_argument('--coordinator', help="Adres koordynatora host:port")
+    transcribe_parser.add_argument('--model', help="Model (domyślnie model domyślny węzła)")
+    transcribe_parser.add_argument('-l', '--language', default='pl')
+    transcribe_parser.add_argument('--beam-size', type=int)
+
+    status_parser = subparsers.add_parser('status', help="Stan farmy")
+    status_parser.add_argument('--coordinator', help="Adres koordynatora host:port")
+
+    bench_parser = subparsers.add_parser('bench', help="Pomiar z węzłami-procesami na localhost (atrapa modelu)")
+    bench_parser.add_argument('--workers', type=int, default=3)
+    bench_parser.add_argument('--capacity', type=int, default=1)
+    bench_parser.add_argument('--jobs', type=int, default=60)
+    bench_parser.add_argument('--models', default='base,small,medium')
+    bench_parser.add_argument('--ms-per-second', type=float, default=20.0,
+                              help="Dekodowanie sekundy audio modelu small (ms)")
+    bench_parser.add_argument('--load-seconds', type=float, default=1.0, help="Ładowanie modelu (s)")
+    bench_parser.add_argument('--kill-after', type=float, help="Zabij pierwszy węzeł po tylu sekundach")
+    bench_parser.add_argument('--no-locality', action='store_true')
+
+    args = parser.parse_args(argv)
+    load_environment()
+
+    if args.command == 'coordinator':
+        try:
+            FarmCoordinator(args.host, args.port, locality=not args.no_locality).serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return
+    if args.command == 'worker':
+        if args.model:
+            Config.LOCAL_WHISPER_MODEL = args.model
+        worker = FarmWorker(args.coordinator, args.capacity, args.name)
+        try:
+            worker.serve_forever()
+        except KeyboardInterrupt:
+            worker.stop()
+        return
+    if args.command == 'bench':
+        stats = run_benchmark(args.workers, args.capacity, args.jobs, args.models, args.ms_per_second,
+                              args.load_seconds, args.kill_after, locality=not args.no_locality)
+        _print_benchmark(stats, not args.no_locality)
+        return
+
+    client = FarmClient(args.coordinator)
+    try:
+        if args.command == 'status':
+            print(json.dumps(client.status(), ensure_ascii=False, indent=2))
+            return
+        started = time.perf_counter()
+        # Pojedynczy plik - segmenty na bieżąco; wiele plików - wyniki w kolejności zgłoszeń
+        stream = len(args.paths) == 1
+        futures = [client.submit(path, args.language, args.model, args.beam_size,
+                                 on_segment=(lambda text: print(text, flush=True)) if stream else None)
+                   for path in args.paths]
+        failed = 0
+        for path, future in zip(args.paths, futures):
+            message = future.result(client.timeout)
+            if message.get('type') != 'done':
+                failed += 1
+                print(f"❌ {path}: {message.get('error')}", file=sys.stderr)
+            elif not stream:
+                print(f"{path}\t{message.get('text') or ''}")
+            print(f"⏱️ {path}: węzeł {message.get('worker')}, kolejka {message.get('wait', 0.0):.1f} s, "
+                  f"dekodowanie {message.get('elapsed', 0.0):.1f} s, próby {message.get('attempts', 1)}",
+                  file=sys.stderr)
+        print(f"⏱️ Razem {time.perf_counter() - started:.1f} s", file=sys.stderr)
+        sys.exit(1 if failed else 0)
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
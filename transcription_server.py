@@ -0,0 +1,350 @@
+"""
+Moduł lokalnego serwera HTTP zgodnego z OpenAI /v1/audio/transcriptions, z dynamicznym grupowaniem żądań
+"""
+import argparse
+import email.parser
+import email.policy
+import json
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Optional, Tuple
+from config import Config, load_environment
+
+
+class DynamicBatcher:
+    """
+    Grupuje współbieżne zlecenia w partie przekazywane do jednego wywołania.
+
+    Pierwsze zlecenie otwiera okno o długości `max_wait`; wszystko, co
+    nadejdzie w tym czasie (do `max_batch_size`), trafia do tej samej partii.
+    Przy pojedynczym kliencie dodatkowe opóźnienie to najwyżej `max_wait`.
+    """
+
+    def __init__(self, process_batch: Callable[[List], List],
+                 max_batch_size: Optional[int] = None, max_wait: Optional[float] = None):
+        """
+        Inicjalizuje grupowanie
+
+        Args:
+            process_batch: Funkcja przetwarzająca listę zleceń i zwracająca listę wyników
+            max_batch_size: Maksymalny rozmiar partii (domyślnie z config)
+            max_wait: Maksymalny czas zbierania partii w sekundach (domyślnie z config)
+        """
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size or Config.SERVER_MAX_BATCH_SIZE
+        self.max_wait = max_wait if max_wait is not None else Config.SERVER_MAX_BATCH_WAIT
+
+        # Statystyki rozmiarów partii
+        self.batches = 0
+        self.items = 0
+
+        self._queue: "queue.Queue[Optional[Tuple[object, Future]]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="DynamicBatcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, item) -> Future:
+        """
+        Dodaje zlecenie do kolejki
+
+        Args:
+            item: Zlecenie przekazywane do process_batch
+
+        Returns:
+            Future: Wynik zlecenia
+        """
+        future: Future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def stop(self):
+        """Kończy wątek grupujący po obsłużeniu oczekujących zleceń"""
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+    def _run(self):
+        """Pętla zbierająca i przetwarzająca partie"""
+        running = True
+        while running:
+            first = self._queue.get()
+            if first is None:
+                break
+
+            batch = [first]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    entry = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if entry is None:
+                    running = False
+                    break
+                batch.append(entry)
+
+            items = [item for item, _future in batch]
+            try:
+                results = self.process_batch(items)
+                for (_item, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                for _item, future in batch:
+                    future.set_exception(e)
+
+            self.batches += 1
+            self.items += len(batch)
+
+
+class TranscriptionServer:
+    """Serwer HTTP udostępniający jeden załadowany model wielu klientom"""
+
+    def __init__(self, transcription_service=None, host: Optional[str] = None, port: Optional[int] = None):
+        """
+        Inicjalizuje serwer
+
+        Args:
+            transcription_service: Serwis transkrypcji (domyślnie tworzony z config)
+            host: Adres nasłuchiwania (domyślnie z config)
+            port: Port (domyślnie z config)
+        """
+        if transcription_service is None:
+            from transcription_service import TranscriptionService
+            from vocabulary import VocabularyCorrector
+            vocabulary = VocabularyCorrector() if Config.VOCABULARY_FILE else None
+            transcription_service = TranscriptionService(vocabulary=vocabulary)
+        self.transcription_service = transcription_service
+        self.host = host or Config.SERVER_HOST
+        self.port = port if port is not None else Config.SERVER_PORT
+        self.batcher = DynamicBatcher(self._process_batch)
+        self.httpd: Optional[ThreadingHTTPServer] = None
+
+    def _process_batch(self, items: List[Tuple[str, str]]) -> List[Optional[str]]:
+        """Transkrybuje partię (ścieżka, język), grupując zlecenia o tym samym języku"""
+        results: List[Optional[str]] = [None] * len(items)
+        by_language = {}
+        for index, (path, language) in enumerate(items):
+            by_language.setdefault(language, []).append(index)
+
+        for language, indices in by_language.items():
+            texts = self.transcription_service.transcribe_batch([items[i][0] for i in indices], language)
+            for index, text in zip(indices, texts):
+                results[index] = text
+        return results
+
+    def serve_forever(self):
+        """Uruchamia serwer HTTP (blokuje do zatrzymania)"""
+        server = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                if self.path.rstrip('/') == '/health':
+                    self._send_json(200, {
+                        'status': 'ok',
+                        'mode': server.transcription_service.mode,
+                        'model': server.transcription_service.model_name,
+                        'batches': server.batcher.batches,
+                        'requests': server.batcher.items,
+                    })
+                else:
+                    self._send_error(404, "Nie znaleziono")
+
+            def do_POST(self):
+                if self.path.split('?')[0].rstrip('/') != '/v1/audio/transcriptions':
+                    self._send_error(404, "Nie znaleziono")
+                    return
+                try:
+                    fields, audio, filename = self._parse_multipart()
+                except ValueError as e:
+                    self._send_error(400, str(e))
+                    return
+
+                suffix = os.path.splitext(filename or '')[1] or '.wav'
+                with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+                    tmp.write(audio)
+                    tmp_path = tmp.name
+                try:
+                    future = server.batcher.submit((tmp_path, fields.get('language') or 'pl'))
+                    text = future.result(timeout=Config.SERVER_REQUEST_TIMEOUT)
+                except Exception as e:
+                    self._send_error(500, f"Błąd transkrypcji: {e}")
+                    return
+                finally:
+                    try:
+                        os.unlink(tmp_path)
+                    except OSError:
+                        pass
+
+                text = text or ""
+                if fields.get('response_format') == 'text':
+                    self._send(200, text.encode('utf-8'), 'text/plain; charset=utf-8')
+                else:
+                    self._send_json(200, {'text': text})
+
+            def _parse_multipart(self):
+                content_type = self.headers.get('Content-Type', '')
+                if not content_type.startswith('multipart/form-data'):
+                    raise ValueError("Oczekiwano multipart/form-data")
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length)
+
+                message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+                    f"Content-Type: {content_type}\r\n\r\n".encode('latin-1') + body
+                )
+                fields = {}
+                audio = None
+                filename = None
+                for part in message.iter_parts():
+                    name = part.get_param('name', header='content-disposition')
+                    if name == 'file':
+                        audio = part.get_payload(decode=True)
+                        filename = part.get_filename()
+                    elif name:
+                        fields[name] = part.get_payload(decode=True).decode('utf-8', 'replace')
+                if not audio:
+                    raise ValueError("Brak pola 'file' z nagraniem")
+                return fields, audio, filename
+
+            def _send_json(self, status: int, payload: dict):
+                self._send(status, json.dumps(payload, ensure_ascii=False).encode('utf-8'), 'application/json')
+
+            def _send_error(self, status: int, message: str):
+                self._send_json(status, {'error': {'message': message, 'type': 'invalid_request_error'}})
+
+            def _send(self, status: int, body: bytes, content_type: str):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((self.host, self.port), _Handler)
+        self.httpd.daemon_threads = True
+        print(f"🌐 Serwer transkrypcji: http://{self.host}:{self.httpd.server_port}/v1/audio/transcriptions")
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self.httpd.server_close()
+            self.batcher.stop()
+
+    def shutdown(self):
+        """Zatrzymuje serwer (z innego wątku)"""
+        if self.httpd:
+            self.httpd.shutdown()
+
+
+def _post_audio(url: str, audio: bytes, filename: str, language: str) -> str:
+    """Wysyła nagranie do serwera w formacie multipart/form-data (jak klient OpenAI)"""
+    boundary = uuid.uuid4().hex
+    parts = [
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"model\"\r\n\r\nwhisper-1\r\n".encode(),
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"language\"\r\n\r\n{language}\r\n".encode(),
+        (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"{filename}\"\r\n"
+         f"Content-Type: application/octet-stream\r\n\r\n").encode() + audio + b"\r\n",
+        f"--{boundary}--\r\n".encode(),
+    ]
+    request = urllib.request.Request(
+        url, data=b"".join(parts), method='POST',
+        headers={'Content-Type': f"multipart/form-data; boundary={boundary}"},
+    )
+    with urllib.request.urlopen(request, timeout=Config.SERVER_REQUEST_TIMEOUT) as response:
+        return json.loads(response.read())['text']
+
+
+def run_load_test(url: str, audio_path: str, requests_count: int, concurrency: int, language: str = 'pl') -> dict:
+    """
+    Generator obciążenia - wysyła nagranie wielokrotnie i mierzy przepustowość oraz percentyle opóźnień
+
+    Args:
+        url: Adres endpointu /v1/audio/transcriptions
+        audio_path: Plik audio wysyłany w każdym żądaniu
+        requests_count: Liczba żądań
+        concurrency: Liczba równoległych klientów
+        language: Kod języka
+
+    Returns:
+        dict: Przepustowość (żądania/s) i percentyle opóźnień w ms
+    """
+    with open(audio_path, 'rb') as f:
+        audio = f.read()
+    filename = os.path.basename(audio_path)
+
+    def _one(_index) -> Optional[float]:
+        started = time.perf_counter()
+        try:
+            _post_audio(url, audio, filename, language)
+        except Exception as e:
+            print(f"⚠️ Żądanie nieudane: {e}")
+            return None
+        return (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = [latency for latency in executor.map(_one, range(requests_count)) if latency is not None]
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+
+    def _percentile(p: float) -> Optional[float]:
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(round(p / 100 * (len(latencies) - 1))))]
+
+    return {
+        'requests': requests_count,
+        'succeeded': len(latencies),
+        'throughput_rps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': _percentile(50),
+        'p90_ms': _percentile(90),
+        'p99_ms': _percentile(99),
+    }
+
+
+def main(argv=None):
+    """Wiersz poleceń serwera i generatora obciążenia"""
+    parser = argparse.ArgumentParser(description="Lokalny serwer transkrypcji Voice Notes")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = subparsers.add_parser('serve', help="Uruchom serwer")
+    serve_parser.add_argument('--host', default=None)
+    serve_parser.add_argument('--port', type=int, default=None)
+
+    bench_parser = subparsers.add_parser('bench', help="Generator obciążenia")
+    bench_parser.add_argument('audio')
+    bench_parser.add_argument('--url', default=None)
+    bench_parser.add_argument('-n', '--requests', type=int, default=50)
+    bench_parser.add_argument('-c', '--concurrency', type=int, default=8)
+    bench_parser.add_argument('-l', '--language', default='pl')
+
+    args = parser.parse_args(argv)
+    load_environment()
+
+    if args.command == 'serve':
+        try:
+            TranscriptionServer(host=args.host, port=args.port).serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return
+
+    url = args.url or f"http://{Config.SERVER_HOST}:{Config.SERVER_PORT}/v1/audio/transcriptions"
+    stats = run_load_test(url, args.audio, args.requests, args.concurrency, args.language)
+    print(json.dumps(stats, indent=2))
+    sys.exit(0 if stats['succeeded'] == stats['requests'] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,173 @@
 """
 Moduł do transkrypcji audio z wyborem trybu: OpenAI Whisper API lub lokalny faster-whisper
 """
+import gc
+import inspect
 import os
 import tempfile
-from typing import Optional
-from openai import OpenAI
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Callable, List, Optional, Tuple
 from config import Config
+from concurrency_limiter import AdaptiveLimiter
+from language_id import AUTO, LanguageIdentifier, LanguagePrior
+from segment_guard import SegmentGuard
+from vocabulary import VocabularyCorrector
+import scheduling
+import tracing
+
+
+def resident_memory_mb() -> Optional[float]:
+    """
+    Zwraca pamięć rezydentną (RSS) bieżącego procesu
+
+    Returns:
+        Optional[float]: RSS w MB lub None, jeśli nie da się go odczytać
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except Exception:
+        return None
+
+
+def _format_rss() -> str:
+    """Formatuje RSS procesu do komunikatów"""
+    rss = resident_memory_mb()
+    return f"{rss:.0f} MB" if rss is not None else "?"
+
+
+def _create_api_client():
+    """Tworzy klienta OpenAI (pakiet importowany dopiero przy wyborze trybu API)"""
+    from openai import OpenAI
+    return OpenAI(api_key=Config.OPENAI_API_KEY)
+
+
+def _accepts_argument(fn: Callable, name: str) -> bool:
+    """Sprawdza, czy funkcja (lub konstruktor klasy) przyjmuje argument o podanej nazwie"""
+    try:
+        parameters = inspect.signature(fn).parameters
+    except (TypeError, ValueError):
+        return False
+    return name in parameters or any(p.kind is inspect.Parameter.VAR_KEYWORD for p in parameters.values())
+
+
+def _wav_duration(path: str) -> Optional[float]:
+    """Długość nagrania WAV w sekundach z nagłówka (None - inny format lub błąd odczytu)"""
+    try:
+        with wave.open(path, 'rb') as wf:
+            return wf.getnframes() / wf.getframerate()
+    except (wave.Error, EOFError, OSError, ZeroDivisionError):
+        return None
+
+
+def _notify_segments(segments, on_segment: Callable[[str], None]):
+    """Przekazuje tekst każdego segmentu funkcji zwrotnej; zamknięcie przerywa też strumień modelu"""
+    try:
+        for segment in segments:
+            on_segment(segment.text)
+            yield segment
+    finally:
+        close = getattr(segments, 'close', None)
+        if close:
+            close()
+
+
+class TranscriptionResult:
+    """
+    Wynik jednej transkrypcji wraz z danymi tego wywołania
+
+    Serwis jest współdzielony (dyktowanie, ponowna transkrypcja, serwer,
+    wątek w tle), więc język i czasy wracają z wywołaniem zamiast
+    w atrybutach serwisu nadpisywanych przez równoległe transkrypcje.
+    """
+
+    __slots__ = ('text', 'language', 'language_time', 'model_wait', 'model')
+
+    def __init__(self, text: Optional[str] = None, language: Optional[str] = None,
+                 language_time: float = 0.0, model_wait: float = 0.0, model: Optional[str] = None):
+        """
+        Args:
+            text: Transkrybowany tekst (None - nic nie rozpoznano lub błąd)
+            language: Język transkrypcji (None - wykryty przez serwer API)
+            language_time: Czas wyboru języka przy language='auto'
+            model_wait: Oczekiwanie na ponowne załadowanie zwolnionego modelu
+            model: Model, który rozpoznał nagranie (None - bieżący model)
+        """
+        self.text = text
+        self.language = language
+        self.language_time = language_time
+        self.model_wait = model_wait
+        self.model = model
 
 
 class TranscriptionService:
     """Klasa odpowiedzialna za transkrypcję audio (API lub lokalnie)"""
 
-    def __init__(self):
-        """Inicjalizuje serwis transkrypcji z wyborem trybu"""
+    def __init__(self, vocabulary: Optional[VocabularyCorrector] = None,
+                 model_factory: Optional[Callable] = None,
+                 language_identifier: Optional[LanguageIdentifier] = None):
+        """
+        Inicjalizuje serwis transkrypcji z wyborem trybu
+
+        Args:
+            vocabulary: Słownictwo dziedzinowe podawane modelowi jako podpowiedź
+            model_factory: Funkcja tworząca model lokalny (model, device=, compute_type=);
+                domyślnie faster_whisper.WhisperModel (atrapy w testach)
+            language_identifier: Wybór języka dla language='auto'
+                (domyślnie z rozkładem języków użytkownika z LANGUAGE_PRIOR_FILE)
+        """
         # Waliduj konfigurację
         Config.validate()
 
         self.mode = None
         self.client = None
         self.local_model = None
+        self.model_name = None
+        # Podpowiedź ze słownictwa dziedzinowego (initial_prompt / hotwords / prompt API)
+        self.prompt = vocabulary.build_prompt() if vocabulary else None
+
+        # Ustawienia lokalnego modelu (zmieniane w locie przez reconfigure())
+        self.model_factory = model_factory
+        self._local_settings = {
+            'model': Config.LOCAL_WHISPER_MODEL,
+            'device': Config.LOCAL_DEVICE,
+            'compute_type': Config.LOCAL_COMPUTE_TYPE,
+        }
+        # Numer konfiguracji - chroni przed wstawieniem modelu ładowanego dla poprzedniej
+        self._generation = 0
+        self._reconfigure_lock = threading.Lock()
+        self.last_reconfigure_error: Optional[str] = None
+
+        # Zwalnianie lokalnego modelu po bezczynności i ponowne ładowanie w tle
+        self.idle_timeout = Config.LOCAL_MODEL_IDLE_TIMEOUT
+        self._model_lock = threading.Lock()
+        self._loader: Optional[threading.Thread] = None
+        self._idle_timer: Optional[threading.Timer] = None
+        self._active = 0
+        self._last_used = time.monotonic()
+        # Statystyki modelu (ładowania, zwolnienia, dodatkowe opóźnienie po zwolnieniu)
+        self.model_loads = 0
+        self.model_evictions = 0
+        self.last_load_time: Optional[float] = None
+        # Inny model lokalny na żądanie (ponowna transkrypcja): (nazwa, model), zwalniany po bezczynności
+        self._alternate: Optional[tuple] = None
+        self._alternate_lock = threading.Lock()
+        self._alternate_timer: Optional[threading.Timer] = None
+        # Ładowany właśnie inny model: (nazwa, zdarzenie końca ładowania)
+        self._alternate_loading: Optional[tuple] = None
+        # Wybór języka dla language='auto'
+        self.language_identifier = language_identifier or LanguageIdentifier(LanguagePrior())
+        # Adaptacyjny limit równoległych żądań przy transkrypcji wielu plików przez API
+        self.api_limiter: Optional[AdaptiveLimiter] = None
 
         forced_mode = Config.TRANSCRIPTION_MODE
 
@@ -27,20 +176,18 @@ class TranscriptionService:
 
         if use_api:
             # Inicjalizacja OpenAI klienta
-            self.client = OpenAI(api_key=Config.OPENAI_API_KEY)
+            self.client = _create_api_client()
             self.mode = 'api'
+            self.model_name = 'whisper-1'
             print("✅ Tryb transkrypcji: API (OpenAI Whisper)")
         else:
             # Spróbuj zainicjalizować lokalny model faster-whisper
             try:
-                from faster_whisper import WhisperModel
-                self.local_model = WhisperModel(
-                    Config.LOCAL_WHISPER_MODEL,
-                    device=Config.LOCAL_DEVICE,
-                    compute_type=Config.LOCAL_COMPUTE_TYPE,
-                )
+                self.local_model = self._load_local_model(self._local_settings)
                 self.mode = 'local'
+                self.model_name = self._local_settings['model']
                 print(f"✅ Tryb transkrypcji: lokalny (faster-whisper: {Config.LOCAL_WHISPER_MODEL})")
+                self._schedule_idle_eviction()
             except Exception as e:
                 # Jeśli wymuszony 'local' — zgłoś błąd; w 'auto' spróbuj fallback do API jeśli jest klucz
                 if forced_mode == 'local':
@@ -48,57 +195,151 @@ class TranscriptionService:
                         f"Błąd inicjalizacji lokalnego modelu Whisper: {e}. Zainstaluj pakiet 'faster-whisper' i upewnij się, że konfiguracja jest poprawna."
                     )
                 if Config.OPENAI_API_KEY:
-                    self.client = OpenAI(api_key=Config.OPENAI_API_KEY)
+                    self.client = _create_api_client()
                     self.mode = 'api'
+                    self.model_name = 'whisper-1'
                     print("⚠️ Lokalny model niedostępny; używam API (OpenAI Whisper).")
                 else:
                     raise RuntimeError(
                         f"Brak lokalnego modelu i klucza API. Zainstaluj 'faster-whisper' lub ustaw OPENAI_API_KEY. Szczegóły: {e}"
                     )
     
-    def transcribe_audio_file(self, audio_file_path: str, language: str = "pl") -> Optional[str]:
+    def transcribe_audio_file(self, audio_file_path: str, language: str = "pl",
+                              model_name: Optional[str] = None, beam_size: Optional[int] = None,
+                              on_segment: Optional[Callable[[str], None]] = None) -> Optional[str]:
         """
         Transkrybuje plik audio (API lub lokalny model)
 
         Args:
             audio_file_path: Ścieżka do pliku audio (WAV zalecany)
-            language: Kod języka (domyślnie "pl" dla polskiego)
+            language: Kod języka (domyślnie "pl" dla polskiego; 'auto' - rozpoznanie na początku mowy)
+            model_name: Inny model tylko dla tego nagrania (domyślnie bieżący)
+            beam_size: Szerokość wiązki lokalnego modelu (domyślnie ustawienie faster-whisper)
+            on_segment: Funkcja wywoływana z tekstem każdego segmentu w miarę dekodowania
+                (w trybie API - raz, z całym tekstem)
 
         Returns:
             Optional[str]: Transkrybowany tekst lub None w przypadku błędu
         """
-        if not os.path.exists(audio_file_path):
-            print(f"❌ Plik audio nie istnieje: {audio_file_path}")
-            return None
+        return self.transcribe(audio_file_path, language, model_name, beam_size, on_segment).text
+
+    def transcribe_samples(self, samples, language: str = "pl", model_name: Optional[str] = None,
+                           beam_size: Optional[int] = None) -> Optional[str]:
+        """
+        Transkrybuje próbki z pamięci bez zapisu i dekodowania pliku (ponowna transkrypcja)
+
+        Args:
+            samples: Próbki 16 kHz mono (int16 lub float32 w zakresie -1..1)
+            language: Kod języka ('auto' - rozpoznanie na początku mowy)
+            model_name: Inny model tylko dla tego nagrania (domyślnie bieżący)
+            beam_size: Szerokość wiązki lokalnego modelu (domyślnie ustawienie faster-whisper)
+
+        Returns:
+            Optional[str]: Transkrybowany tekst lub None w przypadku błędu
+        """
+        return self.transcribe(samples, language, model_name, beam_size).text
+
+    def transcribe(self, audio, language: str = "pl", model_name: Optional[str] = None,
+                   beam_size: Optional[int] = None,
+                   on_segment: Optional[Callable[[str], None]] = None) -> TranscriptionResult:
+        """
+        Transkrybuje plik lub próbki i zwraca tekst z językiem i czasami tego wywołania
+
+        Args:
+            audio: Ścieżka do pliku audio lub próbki 16 kHz mono (int16 lub float32)
+            language: Kod języka ('auto' - rozpoznanie na początku mowy)
+            model_name: Inny model tylko dla tego nagrania (domyślnie bieżący)
+            beam_size: Szerokość wiązki lokalnego modelu (domyślnie ustawienie faster-whisper)
+            on_segment: Funkcja wywoływana z tekstem każdego segmentu w miarę dekodowania
+
+        Returns:
+            TranscriptionResult: Wynik (text=None w przypadku błędu)
+        """
+        if isinstance(audio, str):
+            if not os.path.exists(audio):
+                print(f"❌ Plik audio nie istnieje: {audio}")
+                return TranscriptionResult(language=language, model=model_name)
+        else:
+            import numpy as np
+            if audio.dtype == np.int16:
+                audio = audio.astype(np.float32) / 32768.0
+        return self._transcribe(audio, language, model_name, beam_size, on_segment)
 
+    def _transcribe(self, audio, language: str, model_name: Optional[str], beam_size: Optional[int],
+                    on_segment: Optional[Callable[[str], None]] = None) -> TranscriptionResult:
+        """Transkrybuje plik lub próbki bieżącym backendem (albo innym modelem lokalnym)"""
+        result = TranscriptionResult(language=language, model=model_name)
         try:
-            if self.mode == 'api':
-                print("🔄 Przetwarzanie audio przez OpenAI Whisper (API)...")
-                with open(audio_file_path, 'rb') as audio_file:
-                    transcript = self.client.audio.transcriptions.create(
-                        model="whisper-1",
-                        file=audio_file,
-                        language=language,
-                    )
-                text = transcript.text.strip()
-            else:
-                print("🔄 Przetwarzanie audio lokalnie (faster-whisper)...")
-                segments, _info = self.local_model.transcribe(
-                    audio_file_path,
-                    language=language,
-                )
-                text = " ".join(seg.text for seg in segments).strip()
+            # Zadanie kończy się na backendzie, na którym się zaczęło (nawet po reconfigure())
+            started = time.perf_counter()
+            with tracing.span('model.acquire'):
+                mode, client, model, current_model = self._acquire_backend()
+            if mode == 'local':
+                # Dodatkowe opóźnienie wynikające z wcześniejszego zwolnienia modelu
+                result.model_wait = time.perf_counter() - started
+                if result.model_wait >= 0.01:
+                    print(f"⏳ Oczekiwanie na załadowanie modelu: {result.model_wait:.2f} s")
+            result.model = model_name or current_model
+            try:
+                if language == AUTO:
+                    language, result.language_time = self._choose_language(audio, mode, model)
+                    result.language = language
+                if mode == 'api':
+                    print("🔄 Przetwarzanie audio przez OpenAI Whisper (API)...")
+                    with tracing.span('transcribe.api', model=result.model):
+                        text = self._transcribe_api(client, audio, language, model_name)
+                    if text and on_segment:
+                        on_segment(text)
+                else:
+                    if model_name and model_name != current_model:
+                        with tracing.span('model.alternate', model=model_name):
+                            model = self._alternate_model(model_name)
+                    print("🔄 Przetwarzanie audio lokalnie (faster-whisper)...")
+                    with tracing.span('transcribe.local', model=result.model):
+                        text = self._transcribe_local(model, audio, language, beam_size=beam_size,
+                                                      on_segment=on_segment)
+            finally:
+                self._release_backend()
 
             if text:
-                return text
+                result.text = text
             else:
                 print("❌ Nie rozpoznano żadnego tekstu")
-                return None
 
         except Exception as e:
             print(f"❌ Błąd transkrypcji: {e}")
-            return None
+        return result
     
+    def identify_language(self, audio) -> Optional[str]:
+        """
+        Wybiera język nagrania bez transkrypcji (rozkład użytkownika lub rozpoznanie na początku mowy)
+
+        Args:
+            audio: Ścieżka do pliku lub próbki 16 kHz mono
+
+        Returns:
+            Optional[str]: Kod języka lub None - w trybie API język wykryje serwer
+        """
+        mode, _client, model, _name = self._acquire_backend()
+        try:
+            return self._choose_language(audio, mode, model)[0]
+        finally:
+            self._release_backend()
+
+    def _choose_language(self, audio, mode: str, model) -> Tuple[Optional[str], float]:
+        """
+        Wybiera język bieżącym modelem (mniejszym niż ewentualny inny model nagrania)
+
+        Returns:
+            tuple: (kod języka lub None - wykryje go API, czas wyboru w sekundach)
+        """
+        started = time.perf_counter()
+        with tracing.span('language.identify'):
+            language = self.language_identifier.choose(audio, model if mode == 'local' else None)
+        elapsed = time.perf_counter() - started
+        print(f"🗣️ Język: {language or 'wykrywany przez API'} ({elapsed * 1000:.0f} ms)")
+        return language, elapsed
+
     def transcribe_audio_data(self, audio_data: bytes, language: str = "pl") -> Optional[str]:
         """
         Transkrybuje surowe dane audio (WAV) — API lub lokalnie.
@@ -111,31 +352,35 @@ class TranscriptionService:
             Optional[str]: Transkrybowany tekst lub None w przypadku błędu
         """
         try:
-            if self.mode == 'api':
-                print("🔄 Przetwarzanie audio przez OpenAI Whisper (API)...")
-                from io import BytesIO
-                audio_buffer = BytesIO(audio_data)
-                audio_buffer.name = "audio.wav"  # OpenAI wymaga nazwy pliku
-                transcript = self.client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_buffer,
-                    language=language,
-                )
-                text = transcript.text.strip()
-            else:
-                print("🔄 Przetwarzanie audio lokalnie (faster-whisper)...")
-                # Zapisz dane do tymczasowego pliku WAV i przetwórz lokalnie
-                with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-                    tmp.write(audio_data)
-                    tmp_path = tmp.name
-                try:
-                    segments, _info = self.local_model.transcribe(tmp_path, language=language)
-                    text = " ".join(seg.text for seg in segments).strip()
-                finally:
+            mode, client, model, _name = self._acquire_backend()
+            try:
+                if mode == 'api':
+                    print("🔄 Przetwarzanie audio przez OpenAI Whisper (API)...")
+                    from io import BytesIO
+                    audio_buffer = BytesIO(audio_data)
+                    audio_buffer.name = "audio.wav"  # OpenAI wymaga nazwy pliku
+                    transcript = client.audio.transcriptions.create(
+                        model="whisper-1",
+                        file=audio_buffer,
+                        language=language,
+                        **self._api_prompt_kwargs(),
+                    )
+                    text = transcript.text.strip()
+                else:
+                    print("🔄 Przetwarzanie audio lokalnie (faster-whisper)...")
+                    # Zapisz dane do tymczasowego pliku WAV i przetwórz lokalnie
+                    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
+                        tmp.write(audio_data)
+                        tmp_path = tmp.name
                     try:
-                        os.unlink(tmp_path)
-                    except Exception:
-                        pass
+                        text = self._transcribe_local(model, tmp_path, language)
+                    finally:
+                        try:
+                            os.unlink(tmp_path)
+                        except Exception:
+                            pass
+            finally:
+                self._release_backend()
 
             if text:
                 return text
@@ -147,6 +392,548 @@ class TranscriptionService:
             print(f"❌ Błąd transkrypcji: {e}")
             return None
     
+    def transcribe_batch(self, audio_file_paths: List[str], language: str = "pl",
+                         beam_size: Optional[int] = None) -> List[Optional[str]]:
+        """
+        Transkrybuje kilka plików audio jednym wywołaniem
+
+        W trybie lokalnym krótkie nagrania (do 30 s) są dekodowane jednym
+        wsadowym wywołaniem modelu, a dłuższe - pojedynczo. W trybie API
+        pliki są wysyłane równolegle z limitem dobieranym adaptacyjnie
+        (AdaptiveLimiter), z ponowieniami po 429/5xx.
+
+        Args:
+            audio_file_paths: Ścieżki do plików audio
+            language: Kod języka ('auto' - rozpoznawany osobno dla każdego pliku)
+            beam_size: Szerokość wiązki lokalnego modelu (domyślnie ustawienie faster-whisper)
+
+        Returns:
+            List[Optional[str]]: Teksty w kolejności plików (None w przypadku błędu)
+        """
+        if not audio_file_paths:
+            return []
+
+        if len(audio_file_paths) == 1:
+            return [self.transcribe_audio_file(audio_file_paths[0], language, beam_size=beam_size)]
+        if language == AUTO:
+            # Każde nagranie może być w innym języku - wsad wymaga jednego
+            return [self.transcribe_audio_file(path, language, beam_size=beam_size) for path in audio_file_paths]
+        if self.mode == 'api':
+            return self._transcribe_api_bulk(audio_file_paths, language)
+
+        try:
+            mode, _client, model, _name = self._acquire_backend()
+            try:
+                if mode == 'local':
+                    return self._transcribe_local_batch(model, audio_file_paths, language, beam_size)
+            finally:
+                self._release_backend()
+            # Backend został przełączony na API w trakcie wywołania
+            return [self.transcribe_audio_file(path, language, beam_size=beam_size) for path in audio_file_paths]
+        except Exception as e:
+            print(f"⚠️ Dekodowanie wsadowe niedostępne ({e}) - transkrybuję pojedynczo")
+            return [self.transcribe_audio_file(path, language, beam_size=beam_size) for path in audio_file_paths]
+
+    def _transcribe_api_bulk(self, audio_file_paths: List[str], language: str) -> List[Optional[str]]:
+        """Wysyła wiele plików do API z adaptacyjnym limitem współbieżności"""
+        mode, client, _model, _name = self._acquire_backend()
+        try:
+            if mode != 'api':
+                # Backend został przełączony na lokalny w trakcie wywołania
+                return [self.transcribe_audio_file(path, language) for path in audio_file_paths]
+
+            if self.api_limiter is None:
+                self.api_limiter = AdaptiveLimiter()
+            limiter = self.api_limiter
+            # Ponowienia obsługuje ogranicznik - wbudowane ponowienia klienta ukryłyby odpowiedzi 429
+            bulk_client = client.with_options(max_retries=0) if hasattr(client, 'with_options') else client
+
+            def transcribe(path: str) -> Optional[str]:
+                if not os.path.exists(path):
+                    print(f"❌ Plik audio nie istnieje: {path}")
+                    return None
+                try:
+                    return limiter.call(self._transcribe_api, bulk_client, path, language,
+                                        duration=_wav_duration(path)) or None
+                except Exception as e:
+                    print(f"❌ Błąd transkrypcji {os.path.basename(path)}: {e}")
+                    return None
+
+            print(f"🔄 Transkrypcja {len(audio_file_paths)} plików przez API (limit startowy {limiter.limit:.0f})...")
+            with ThreadPoolExecutor(max_workers=limiter.max_limit) as executor:
+                results = list(executor.map(transcribe, audio_file_paths))
+        finally:
+            self._release_backend()
+
+        stats = limiter.stats()
+        print(f"📈 Limit API: {stats['limit']:.1f}, {stats['throughput']:.1f} żądań/s, "
+              f"odrzucone przez serwer: {stats['overloaded']}")
+        return results
+
+    def _transcribe_api(self, client, audio, language: str, model_name: Optional[str] = None) -> str:
+        """Wysyła jeden plik (lub próbki float32 16 kHz jako WAV w pamięci) do OpenAI API"""
+        if isinstance(audio, str):
+            with open(audio, 'rb') as audio_file:
+                return self._create_api_transcript(client, audio_file, language, model_name)
+        from io import BytesIO
+        import numpy as np
+        audio_buffer = BytesIO()
+        with wave.open(audio_buffer, 'wb') as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(16000)
+            wf.writeframes(np.clip(audio * 32768.0, -32768, 32767).astype('<i2').tobytes())
+        audio_buffer.seek(0)
+        audio_buffer.name = "audio.wav"  # OpenAI wymaga nazwy pliku
+        return self._create_api_transcript(client, audio_buffer, language, model_name)
+
+    def _create_api_transcript(self, client, audio_file, language: str, model_name: Optional[str]) -> str:
+        """Wywołuje endpoint transkrypcji OpenAI"""
+        # Bez kodu języka serwer wykrywa go sam
+        language_kwargs = {'language': language} if language else {}
+        transcript = client.audio.transcriptions.create(
+            model=model_name or "whisper-1",
+            file=audio_file,
+            **language_kwargs,
+            **self._api_prompt_kwargs(),
+        )
+        return transcript.text.strip()
+
+    def _transcribe_local_batch(self, model, audio_file_paths: List[str], language: str,
+                                beam_size: Optional[int] = None) -> List[Optional[str]]:
+        """
+        Dekoduje krótkie nagrania jednym wsadowym wywołaniem modelu CTranslate2
+
+        Opcje dekodowania (wiązka, podpowiedź, limit długości) i strażnik
+        segmentów są takie same jak w transkrypcji pojedynczego pliku.
+        Błąd jednego nagrania nie powtarza całego wsadu - pojedynczo
+        transkrybowane są tylko nagrania, których wsad nie objął.
+        """
+        import numpy as np
+        from faster_whisper.audio import decode_audio
+        from faster_whisper.tokenizer import Tokenizer
+
+        extractor = model.feature_extractor
+        results: List[Optional[str]] = [None] * len(audio_file_paths)
+        if not beam_size:
+            beam_size = self._local_default_option(model, 'beam_size', 5)
+
+        def transcribe_single(index: int):
+            try:
+                results[index] = self._transcribe_local(model, audio_file_paths[index], language,
+                                                        beam_size=beam_size) or None
+            except Exception as e:
+                print(f"❌ Błąd transkrypcji {os.path.basename(audio_file_paths[index])}: {e}")
+
+        batch_indices = []
+        features = []
+        for index, path in enumerate(audio_file_paths):
+            try:
+                audio = decode_audio(path, sampling_rate=extractor.sampling_rate)
+            except Exception as e:
+                print(f"❌ Nie udało się zdekodować {os.path.basename(path)}: {e}")
+                continue
+            if len(audio) > extractor.n_samples:
+                # Nagrania dłuższe niż jedno okno wymagają dekodowania sekwencyjnego (tym samym modelem)
+                transcribe_single(index)
+                continue
+            audio = np.pad(audio, (0, extractor.n_samples - len(audio)))
+            features.append(extractor(audio)[:, :extractor.nb_max_frames])
+            batch_indices.append(index)
+
+        if not batch_indices:
+            return results
+
+        try:
+            tokenizer = Tokenizer(model.hf_tokenizer, model.model.is_multilingual,
+                                  task="transcribe", language=language)
+            prompt_options = self._local_prompt_kwargs(model)
+            initial_prompt = prompt_options.get('initial_prompt')
+            previous_tokens = tokenizer.encode(" " + initial_prompt.strip()) if initial_prompt else []
+            prompt_kwargs = {'hotwords': prompt_options['hotwords']} if 'hotwords' in prompt_options else {}
+            prompt = model.get_prompt(tokenizer, previous_tokens, without_timestamps=True, **prompt_kwargs)
+
+            encoder_output = model.encode(np.stack(features))
+            outputs = model.model.generate(
+                encoder_output,
+                [prompt] * len(batch_indices),
+                beam_size=beam_size,
+                max_length=getattr(model, 'max_length', 448),
+                suppress_blank=True,
+                return_scores=True,
+                return_no_speech_prob=True,
+            )
+        except Exception as e:
+            print(f"⚠️ Dekodowanie wsadowe nie powiodło się ({e}) - transkrybuję pojedynczo")
+            for index in batch_indices:
+                transcribe_single(index)
+            return results
+
+        for index, output in zip(batch_indices, outputs):
+            tokens = [token for token in output.sequences_ids[0] if token < tokenizer.eot]
+            text = tokenizer.decode(tokens)
+            if Config.SEGMENT_GUARD_ENABLED:
+                # Jak faster-whisper: średni logprob z wyniku znormalizowanego długością sekwencji
+                avg_logprob = output.scores[0] * len(tokens) / (len(tokens) + 1)
+                segment = SimpleNamespace(text=text, no_speech_prob=output.no_speech_prob,
+                                          avg_logprob=avg_logprob)
+                text = SegmentGuard().collect(iter([segment]))
+            results[index] = text.strip() or None
+        return results
+
+    @staticmethod
+    def _local_default_option(model, name: str, fallback):
+        """Zwraca domyślną wartość opcji model.transcribe() (np. beam_size) używanej wersji faster-whisper"""
+        try:
+            parameter = inspect.signature(model.transcribe).parameters.get(name)
+        except (TypeError, ValueError):
+            parameter = None
+        if parameter is None or parameter.default is inspect.Parameter.empty:
+            return fallback
+        return parameter.default
+
+    def _transcribe_local(self, model, audio_source, language: str, beam_size: Optional[int] = None,
+                          on_segment: Optional[Callable[[str], None]] = None) -> str:
+        """
+        Transkrybuje audio lokalnym modelem, pilnując strumienia segmentów
+
+        Args:
+            model: Model faster-whisper pobrany przez _acquire_backend()
+            audio_source: Ścieżka do pliku audio lub dane akceptowane przez faster-whisper
+            language: Kod języka
+            beam_size: Szerokość wiązki (domyślnie ustawienie faster-whisper)
+            on_segment: Funkcja wywoływana z tekstem każdego zdekodowanego segmentu
+
+        Returns:
+            str: Transkrybowany tekst (może być pusty)
+        """
+        options = self._local_prompt_kwargs(model)
+        if beam_size:
+            options['beam_size'] = beam_size
+        # Ekstrakcja cech i składanie segmentów odbywają się w wątku wywołującym
+        with scheduling.decoding():
+            segments, _info = model.transcribe(
+                audio_source,
+                language=language,
+                **options,
+            )
+            if on_segment:
+                segments = _notify_segments(segments, on_segment)
+
+            if not Config.SEGMENT_GUARD_ENABLED:
+                return " ".join(seg.text for seg in segments).strip()
+
+            # Strażnik przerywa pobieranie segmentów przy pętli powtórzeń lub ciszy
+            return SegmentGuard().collect(segments)
+
+    def reconfigure(self, mode: Optional[str] = None, model_name: Optional[str] = None,
+                    device: Optional[str] = None, compute_type: Optional[str] = None,
+                    wait: bool = False) -> threading.Thread:
+        """
+        Zmienia backend lub model transkrypcji bez restartu aplikacji
+
+        Nowy model ładuje się w tle, a dotychczasowy obsługuje w tym czasie
+        transkrypcje. Przełączenie następuje atomowo między zadaniami; zadania
+        w toku kończą się na modelu, na którym się zaczęły, a stary model jest
+        zwalniany po ich zakończeniu.
+
+        Args:
+            mode: 'api', 'local' lub 'auto' (domyślnie bieżący tryb)
+            model_name: Nazwa lokalnego modelu (domyślnie bieżący)
+            device: Urządzenie lokalnego modelu (domyślnie bieżące)
+            compute_type: Typ obliczeń lokalnego modelu (domyślnie bieżący)
+            wait: Czy czekać na zakończenie przełączenia
+
+        Returns:
+            threading.Thread: Wątek przełączania (błąd trafia do last_reconfigure_error)
+        """
+        thread = threading.Thread(
+            target=self._apply_reconfiguration,
+            args=(mode, model_name, device, compute_type),
+            name="ModelSwap",
+            daemon=True,
+        )
+        thread.start()
+        if wait:
+            thread.join()
+        return thread
+
+    def prepare(self):
+        """
+        Zaczyna ładować zwolniony model w tle
+
+        Wywoływane na początku nagrywania, aby ładowanie modelu nakładało się
+        z mówieniem użytkownika zamiast opóźniać transkrypcję.
+        """
+        if self.mode != 'local':
+            return
+        with self._model_lock:
+            self._cancel_idle_eviction()
+            if self.local_model is not None or (self._loader and self._loader.is_alive()):
+                return
+            self._loader = threading.Thread(
+                target=self._reload_model, args=(tracing.current_trace(),), name="ModelLoader", daemon=True
+            )
+            self._loader.start()
+
+    def model_stats(self) -> dict:
+        """
+        Zwraca stan lokalnego modelu i zużycie pamięci
+
+        Returns:
+            dict: Czy model jest załadowany, liczniki ładowań/zwolnień,
+                ostatni czas ładowania i RSS w MB
+        """
+        alternate = self._alternate
+        return {
+            'loaded': self.local_model is not None,
+            'loads': self.model_loads,
+            'evictions': self.model_evictions,
+            'last_load_time': self.last_load_time,
+            'rss_mb': resident_memory_mb(),
+            'alternate_model': alternate[0] if alternate else None,
+            # Proces roboczy (LOCAL_WORKER_PROCESS): PID, zadania, restarty
+            'worker': self.local_model.stats() if hasattr(self.local_model, 'stats') else None,
+        }
+
+    def _apply_reconfiguration(self, mode: Optional[str], model_name: Optional[str],
+                               device: Optional[str], compute_type: Optional[str]) -> bool:
+        """Przygotowuje nowy backend i podmienia go atomowo (w wątku w tle)"""
+        with self._reconfigure_lock:
+            mode = (mode or self.mode).lower()
+            if mode == 'auto':
+                mode = 'api' if Config.OPENAI_API_KEY else 'local'
+            settings = {
+                'model': model_name or self._local_settings['model'],
+                'device': device or self._local_settings['device'],
+                'compute_type': compute_type or self._local_settings['compute_type'],
+            }
+            if mode == self.mode and (mode == 'api' or settings == self._local_settings):
+                return True
+
+            started = time.perf_counter()
+            try:
+                if mode == 'api':
+                    client = self.client or _create_api_client()
+                    model = None
+                elif mode == 'local':
+                    client = None
+                    model = self._load_local_model(settings)
+                else:
+                    raise ValueError(f"Nieznany tryb transkrypcji: {mode}")
+            except Exception as e:
+                self.last_reconfigure_error = str(e)
+                print(f"❌ Nie udało się przełączyć transkrypcji ({mode}): {e}")
+                return False
+
+            with self._model_lock:
+                old_model = self.local_model
+                self.mode = mode
+                self.client = client
+                self.local_model = model
+                self.model_name = 'whisper-1' if mode == 'api' else settings['model']
+                if mode == 'local':
+                    self._local_settings = settings
+                self._generation += 1
+                self._last_used = time.monotonic()
+                self._cancel_idle_eviction()
+                if mode == 'local' and not self._active:
+                    self._schedule_idle_eviction()
+
+            # Zadania w toku trzymają własną referencję - pamięć zwolni się po ich zakończeniu
+            del old_model
+            gc.collect()
+            self.last_reconfigure_error = None
+            print(f"🔁 Transkrypcja przełączona na {mode} ({self.model_name}) "
+                  f"w {time.perf_counter() - started:.2f} s (RSS: {_format_rss()})")
+            return True
+
+    def _load_local_model(self, settings: dict):
+        """Ładuje lokalny model faster-whisper o podanych ustawieniach"""
+        factory = self.model_factory
+        if factory is None and Config.LOCAL_WORKER_PROCESS:
+            # Dekodowanie w osobnym procesie (bez rywalizacji o GIL z UI i nagrywaniem)
+            from transcription_worker import WorkerModel
+            factory = WorkerModel
+        elif factory is None:
+            from faster_whisper import WhisperModel
+            factory = WhisperModel
+        kwargs = {'device': settings['device'], 'compute_type': settings['compute_type']}
+        # Limit wątków obliczeniowych zostawia rdzenie dla nagrywania i UI (atrapy w testach go nie znają)
+        cpu_threads = scheduling.decode_threads()
+        if cpu_threads and _accepts_argument(factory, 'cpu_threads'):
+            kwargs['cpu_threads'] = cpu_threads
+        started = time.perf_counter()
+        # Pula wątków modelu powstaje przy ładowaniu i dziedziczy priorytet oraz rdzenie dekodowania
+        model = scheduling.call_in_decode_thread(factory, settings['model'], **kwargs)
+        self.last_load_time = time.perf_counter() - started
+        self.model_loads += 1
+        return model
+
+    def _alternate_model(self, model_name: str):
+        """
+        Zwraca inny model lokalny (ładowany przy pierwszym użyciu, z ustawieniami bieżącego)
+
+        Trzymany jest najwyżej jeden taki model; zwalnia go RETRANSCRIBE_MODEL_IDLE_TIMEOUT
+        sekund bezczynności, zwolnienie bieżącego modelu lub prośba o kolejny model.
+        Ładowanie odbywa się bez blokady - czekają na nie tylko prośby o ten sam model.
+        """
+        while True:
+            with self._alternate_lock:
+                if self._alternate_timer is not None:
+                    self._alternate_timer.cancel()
+                    self._alternate_timer = None
+                if self._alternate is not None and self._alternate[0] == model_name:
+                    self._start_alternate_timer()
+                    return self._alternate[1]
+                loading = self._alternate_loading
+                if loading is None or loading[0] != model_name:
+                    # Poprzedni model zwalniany przed ładowaniem - w pamięci najwyżej jeden naraz
+                    self._alternate = None
+                    loading = (model_name, threading.Event())
+                    self._alternate_loading = loading
+                    break
+            # Ten sam model ładuje inny wątek - po zakończeniu sprawdź ponownie
+            loading[1].wait()
+
+        try:
+            gc.collect()
+            model = self._load_local_model(dict(self._local_settings, model=model_name))
+            print(f"✅ Model {model_name} załadowany w {self.last_load_time:.2f} s (RSS: {_format_rss()})")
+            with self._alternate_lock:
+                # W międzyczasie mógł zostać zażądany inny model - ten obsłuży tylko bieżące wywołanie
+                if self._alternate_loading is loading:
+                    self._alternate = (model_name, model)
+                    self._start_alternate_timer()
+            return model
+        finally:
+            with self._alternate_lock:
+                if self._alternate_loading is loading:
+                    self._alternate_loading = None
+            loading[1].set()
+
+    def _start_alternate_timer(self):
+        """Planuje zwolnienie innego modelu po bezczynności (wywoływane z _alternate_lock)"""
+        if Config.RETRANSCRIBE_MODEL_IDLE_TIMEOUT > 0:
+            # Odliczane od rozpoczęcia transkrypcji - dłuższa od limitu zatrzyma model do jej końca
+            self._alternate_timer = threading.Timer(Config.RETRANSCRIBE_MODEL_IDLE_TIMEOUT, self._drop_alternate)
+            self._alternate_timer.daemon = True
+            self._alternate_timer.start()
+
+    def _drop_alternate(self):
+        """Zwalnia inny model lokalny (transkrypcje w toku trzymają własną referencję)"""
+        with self._alternate_lock:
+            if self._alternate is None:
+                return
+            name, self._alternate = self._alternate[0], None
+        gc.collect()
+        print(f"💤 Model {name} zwolniony po {Config.RETRANSCRIBE_MODEL_IDLE_TIMEOUT:.0f} s (RSS: {_format_rss()})")
+
+    def _reload_model(self, trace_id: Optional[str] = None):
+        """Ponownie ładuje zwolniony model (w wątku w tle)"""
+        generation = self._generation
+        try:
+            with tracing.use_trace(trace_id), tracing.span('model.reload', model=self.model_name):
+                model = self._load_local_model(self._local_settings)
+        except Exception as e:
+            print(f"❌ Nie udało się ponownie załadować modelu: {e}")
+            return
+        with self._model_lock:
+            # W międzyczasie reconfigure() mógł podmienić backend - nie nadpisuj go
+            if generation != self._generation or self.local_model is not None:
+                return
+            self.local_model = model
+            self._last_used = time.monotonic()
+        print(f"♻️ Model {self.model_name} załadowany ponownie w {self.last_load_time:.2f} s (RSS: {_format_rss()})")
+
+    def _acquire_backend(self):
+        """
+        Zwraca bieżący backend do użycia, w razie potrzeby czekając na załadowanie modelu
+
+        Każde wywołanie musi zostać zakończone przez _release_backend().
+
+        Returns:
+            tuple: (tryb, klient API lub None, model lokalny lub None, nazwa modelu)
+        """
+        self.prepare()
+        loader = self._loader
+        if loader is not None:
+            loader.join()
+        with self._model_lock:
+            if self.mode == 'local' and self.local_model is None:
+                raise RuntimeError("Lokalny model nie jest załadowany")
+            self._active += 1
+            self._cancel_idle_eviction()
+            # Nazwa odczytana razem z modelem - reconfigure() może podmienić oba zaraz potem
+            return self.mode, self.client, self.local_model, self.model_name
+
+    def _release_backend(self):
+        """Kończy użycie backendu i planuje zwolnienie modelu po bezczynności"""
+        with self._model_lock:
+            self._active -= 1
+            self._last_used = time.monotonic()
+            if not self._active and self.mode == 'local':
+                self._schedule_idle_eviction()
+
+    def _schedule_idle_eviction(self):
+        """Planuje sprawdzenie bezczynności modelu (wywoływane z blokadą lub przy inicjalizacji)"""
+        if self.idle_timeout <= 0:
+            return
+        self._cancel_idle_eviction()
+        self._idle_timer = threading.Timer(self.idle_timeout, self._evict_if_idle)
+        self._idle_timer.daemon = True
+        self._idle_timer.start()
+
+    def _cancel_idle_eviction(self):
+        """Anuluje zaplanowane zwolnienie modelu"""
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+            self._idle_timer = None
+
+    def _evict_if_idle(self):
+        """Zwalnia model, jeśli nie był używany przez okres bezczynności"""
+        with self._model_lock:
+            if self._active or self.local_model is None:
+                return
+            if time.monotonic() - self._last_used < self.idle_timeout:
+                return
+            model = self.local_model
+            self.local_model = None
+            self._idle_timer = None
+
+        # Osobno od _model_lock - nigdy nie trzymamy obu blokad naraz
+        with self._alternate_lock:
+            if self._alternate_timer is not None:
+                self._alternate_timer.cancel()
+                self._alternate_timer = None
+            alternate, self._alternate = self._alternate, None
+
+        rss_before = _format_rss()
+        del model, alternate
+        gc.collect()
+        self.model_evictions += 1
+        print(f"💤 Model {self.model_name} zwolniony po {self.idle_timeout:.0f} s bezczynności "
+              f"(RSS: {rss_before} → {_format_rss()})")
+
+    def _api_prompt_kwargs(self) -> dict:
+        """Zwraca argumenty podpowiedzi dla OpenAI API"""
+        return {'prompt': self.prompt} if self.prompt else {}
+
+    def _local_prompt_kwargs(self, model) -> dict:
+        """Zwraca argumenty podpowiedzi dla faster-whisper (hotwords, jeśli wersja je obsługuje)"""
+        if not self.prompt:
+            return {}
+        # Model w procesie roboczym zgłasza parametry prawdziwego modelu
+        parameters = getattr(model, 'transcribe_parameters', None)
+        if parameters is None:
+            try:
+                parameters = inspect.signature(model.transcribe).parameters
+            except (TypeError, ValueError):
+                parameters = {}
+        if 'hotwords' in parameters:
+            return {'hotwords': self.prompt}
+        return {'initial_prompt': self.prompt}
+
     @staticmethod
     def is_api_key_configured() -> bool:
         """
@@ -0,0 +1,575 @@
+"""
+Moduł transkrypcji w osobnym procesie - audio przekazywane przez pamięć współdzieloną, wyniki przez potok
+"""
+import argparse
+import atexit
+import multiprocessing
+import os
+import signal
+import statistics
+import threading
+import time
+import wave
+import weakref
+from multiprocessing import shared_memory
+from types import SimpleNamespace
+from typing import Callable, Optional
+from config import Config, load_environment
+import scheduling
+
+# Częstotliwość próbkowania oczekiwana przez Whisper
+SAMPLE_RATE = 16000
+
+# Działające modele - zamykane przy wyjściu z programu, zanim multiprocessing zakończy procesy
+_workers: "weakref.WeakSet[WorkerModel]" = weakref.WeakSet()
+
+
+class WorkerCrashed(RuntimeError):
+    """Proces roboczy zakończył się w trakcie zadania"""
+
+
+def _load_whisper_model(model_size: str, device: str, compute_type: str, cpu_threads: int = 0):
+    """Domyślna fabryka modelu w procesie roboczym"""
+    from faster_whisper import WhisperModel
+    return WhisperModel(model_size, device=device, compute_type=compute_type, cpu_threads=cpu_threads)
+
+
+def _read_pcm(path: str):
+    """
+    Wczytuje nagranie WAV 16 kHz mono 16-bit jako tablicę float32
+
+    Returns:
+        Optional[np.ndarray]: Próbki lub None, gdy plik ma inny format (dekoduje go proces roboczy)
+    """
+    import numpy as np
+    try:
+        with wave.open(path, 'rb') as wf:
+            if wf.getframerate() != SAMPLE_RATE or wf.getnchannels() != 1 or wf.getsampwidth() != 2:
+                return None
+            data = wf.readframes(wf.getnframes())
+    except (wave.Error, EOFError):
+        return None
+    return np.frombuffer(data, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def _worker_main(conn, model_size: str, device: str, compute_type: str, factory: Optional[Callable],
+                 cpu_threads: int = 0):
+    """Pętla procesu roboczego: ładuje model i obsługuje zadania do zamknięcia potoku"""
+    # Ctrl+C w terminalu trafia do całej grupy procesów - zamykaniem zarządza proces główny
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Cały proces (i tworzone w nim wątki modelu) ma niższy priorytet i rdzenie dekodowania
+    scheduling.apply(scheduling.DECODE)
+    import inspect
+    import numpy as np
+
+    started = time.perf_counter()
+    try:
+        if factory is None:
+            model = _load_whisper_model(model_size, device, compute_type, cpu_threads)
+        else:
+            model = factory(model_size, device, compute_type)
+    except Exception as e:
+        conn.send(('error', f"{type(e).__name__}: {e}"))
+        return
+    try:
+        parameters = list(inspect.signature(model.transcribe).parameters)
+    except (TypeError, ValueError):
+        parameters = []
+    conn.send(('ready', time.perf_counter() - started, parameters))
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message[0] == 'stop':
+            return
+        if message[0] != 'transcribe':
+            continue
+
+        _, shm_name, samples, path, kwargs = message
+        shm = None
+        try:
+            if shm_name:
+                # Widok na pamięć współdzieloną - bez kopiowania próbek
+                shm = shared_memory.SharedMemory(name=shm_name)
+                audio = np.ndarray((samples,), dtype=np.float32, buffer=shm.buf)
+            else:
+                audio = path
+            segments, info = model.transcribe(audio, **kwargs)
+            conn.send(('info', {
+                'language': getattr(info, 'language', None),
+                'language_probability': getattr(info, 'language_probability', None),
+                'all_language_probs': getattr(info, 'all_language_probs', None),
+                'duration': getattr(info, 'duration', None),
+            }))
+            for segment in segments:
+                if conn.poll() and conn.recv()[0] == 'cancel':
+                    # Strażnik segmentów przerwał odczyt - nie dekoduj kolejnych okien
+                    close = getattr(segments, 'close', None)
+                    if close:
+                        close()
+                    break
+                conn.send(('segment', segment.text, getattr(segment, 'no_speech_prob', 0.0),
+                           getattr(segment, 'avg_logprob', None),
+                           getattr(segment, 'start', 0.0), getattr(segment, 'end', 0.0)))
+            conn.send(('done',))
+        except Exception as e:
+            conn.send(('failed', f"{type(e).__name__}: {e}"))
+        finally:
+            audio = None
+            if shm is not None:
+                shm.close()
+
+
+class WorkerModel:
+    """
+    Model faster-whisper uruchomiony w osobnym procesie
+
+    Udostępnia to samo API co WhisperModel (transcribe zwraca leniwy strumień
+    segmentów i informacje o nagraniu), więc TranscriptionService używa go jak
+    zwykłego modelu. Dekodowanie nie konkuruje o GIL z pętlą Tk, nasłuchem
+    skrótów i wątkiem nagrywania. Próbki trafiają do procesu przez pamięć
+    współdzieloną, a proces jest uruchamiany ponownie po awarii.
+    """
+
+    def __init__(self, model_size: str, device: str = 'cpu', compute_type: str = 'int8',
+                 cpu_threads: int = 0, factory: Optional[Callable] = None):
+        """
+        Uruchamia proces roboczy i czeka na załadowanie modelu
+
+        Args:
+            model_size: Nazwa modelu Whisper
+            device: Urządzenie ('cpu' lub 'cuda')
+            compute_type: Typ obliczeń
+            cpu_threads: Liczba wątków obliczeniowych modelu (0 - domyślna)
+            factory: Funkcja tworząca model w procesie roboczym (model_size, device, compute_type);
+                musi być dostępna na poziomie modułu (proces uruchamiany metodą spawn)
+        """
+        self.model_size = model_size
+        self.device = device
+        self.compute_type = compute_type
+        self.cpu_threads = cpu_threads
+        self.factory = factory
+        # Statystyki procesu roboczego
+        self.restarts = 0
+        self.jobs = 0
+        self.last_load_time: Optional[float] = None
+        self.transcribe_parameters = []
+
+        self._context = multiprocessing.get_context('spawn')
+        self._lock = threading.Lock()
+        self._closing = False
+        self._process = None
+        self._conn = None
+        # Bufor pamięci współdzielonej powiększany w razie potrzeby i używany ponownie
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        with self._lock:
+            self._start_worker()
+        _workers.add(self)
+
+    @property
+    def pid(self) -> Optional[int]:
+        """PID procesu roboczego"""
+        return self._process.pid if self._process else None
+
+    def transcribe(self, audio, **kwargs):
+        """
+        Transkrybuje nagranie w procesie roboczym
+
+        Args:
+            audio: Ścieżka do pliku lub tablica float32 16 kHz
+            **kwargs: Argumenty WhisperModel.transcribe (language, initial_prompt...)
+
+        Returns:
+            tuple: (strumień segmentów, informacje o nagraniu)
+        """
+        if isinstance(audio, str):
+            pcm = _read_pcm(audio)
+            path = None if pcm is not None else os.path.abspath(audio)
+        else:
+            pcm, path = audio, None
+
+        self._lock.acquire()
+        try:
+            if self._closing:
+                raise RuntimeError("Proces transkrypcji został zamknięty")
+            try:
+                info = self._submit(pcm, path, kwargs)
+            except WorkerCrashed as e:
+                # Zadanie nie zwróciło jeszcze segmentów - ponów je na nowym procesie
+                print(f"⚠️ {e} - ponawiam transkrypcję")
+                self._restart()
+                info = self._submit(pcm, path, kwargs)
+        except BaseException:
+            self._lock.release()
+            raise
+        self.jobs += 1
+        # Blokada jest zwalniana po odczytaniu lub zamknięciu strumienia segmentów
+        return _SegmentStream(self), SimpleNamespace(**info)
+
+    def stats(self) -> dict:
+        """
+        Zwraca stan procesu roboczego
+
+        Returns:
+            dict: PID, liczba zadań, liczba restartów i czas ładowania modelu
+        """
+        return {
+            'pid': self.pid,
+            'alive': bool(self._process and self._process.is_alive()),
+            'jobs': self.jobs,
+            'restarts': self.restarts,
+            'last_load_time': self.last_load_time,
+        }
+
+    def close(self):
+        """Zatrzymuje proces roboczy i zwalnia pamięć współdzieloną"""
+        # Trwające zadanie dostaje chwilę na zakończenie, potem proces jest zatrzymywany mimo niego
+        acquired = self._lock.acquire(timeout=10)
+        try:
+            if self._closing:
+                return
+            self._closing = True
+            self._stop_worker()
+            if self._shm is not None:
+                self._shm.close()
+                self._shm.unlink()
+                self._shm = None
+        finally:
+            if acquired:
+                self._lock.release()
+
+    def _submit(self, pcm, path: Optional[str], kwargs: dict) -> dict:
+        """Wysyła zadanie i czeka na informacje o nagraniu (wywoływane z blokadą)"""
+        shm_name = None
+        samples = 0
+        if pcm is not None:
+            samples = len(pcm)
+            shm_name = self._shared_buffer(samples * 4).name
+            import numpy as np
+            np.ndarray((samples,), dtype=np.float32, buffer=self._shm.buf)[:] = pcm
+        self._send(('transcribe', shm_name, samples, path, kwargs))
+        message = self._recv()
+        if message[0] == 'failed':
+            raise RuntimeError(f"Proces transkrypcji: {message[1]}")
+        return message[1]
+
+    def _cancel(self):
+        """Przerywa bieżące zadanie i odbiera pozostałe komunikaty"""
+        try:
+            self._send(('cancel',))
+            while self._recv()[0] not in ('done', 'failed'):
+                pass
+        except WorkerCrashed:
+            self._restart()
+
+    def _shared_buffer(self, size: int) -> shared_memory.SharedMemory:
+        """Zwraca bufor pamięci współdzielonej o rozmiarze co najmniej size bajtów"""
+        if self._shm is None or self._shm.size < size:
+            if self._shm is not None:
+                self._shm.close()
+                self._shm.unlink()
+            # Zapas na dłuższe nagrania bez ponownej alokacji
+            self._shm = shared_memory.SharedMemory(create=True, size=max(size, SAMPLE_RATE * 4 * 30))
+        return self._shm
+
+    def _send(self, message):
+        try:
+            self._conn.send(message)
+        except (OSError, EOFError, BrokenPipeError) as e:
+            raise WorkerCrashed(f"Proces transkrypcji niedostępny ({e})")
+
+    def _recv(self):
+        try:
+            return self._conn.recv()
+        except (OSError, EOFError) as e:
+            code = None
+            if self._process:
+                # Potok zamyka się chwilę przed zakończeniem procesu
+                self._process.join(timeout=1)
+                code = self._process.exitcode
+            raise WorkerCrashed(f"Proces transkrypcji zakończył się (kod {code})") from e
+
+    def _start_worker(self):
+        """Uruchamia proces roboczy i czeka na załadowanie modelu (wywoływane z blokadą)"""
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(child_conn, self.model_size, self.device, self.compute_type, self.factory, self.cpu_threads),
+            name="TranscriptionWorker",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        self._process, self._conn = process, parent_conn
+
+        if not parent_conn.poll(Config.LOCAL_WORKER_START_TIMEOUT):
+            self._stop_worker()
+            raise RuntimeError("Przekroczono czas uruchamiania procesu transkrypcji")
+        try:
+            message = parent_conn.recv()
+        except EOFError:
+            self._stop_worker()
+            raise RuntimeError(f"Proces transkrypcji zakończył się przy starcie (kod {process.exitcode})")
+        if message[0] == 'error':
+            self._stop_worker()
+            raise RuntimeError(message[1])
+        _, self.last_load_time, self.transcribe_parameters = message
+        print(f"🧵 Proces transkrypcji uruchomiony (PID {process.pid}, model załadowany w {self.last_load_time:.2f} s)")
+
+        # Strażnik trzyma słabą referencję - model zwolniony przez serwis zamyka swój proces (__del__)
+        threading.Thread(
+            target=_watch_worker, args=(weakref.ref(self), process), name="WorkerWatchdog", daemon=True
+        ).start()
+
+    def _stop_worker(self):
+        """Zatrzymuje bieżący proces roboczy (wywoływane z blokadą)"""
+        process, conn = self._process, self._conn
+        self._process = self._conn = None
+        if conn is not None:
+            try:
+                conn.send(('stop',))
+            except (OSError, EOFError):
+                pass
+            conn.close()
+        if process is not None:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+                process.join(timeout=5)
+
+    def _restart_locked(self):
+        """Uruchamia proces roboczy ponownie po awarii (poza blokadą zadania)"""
+        with self._lock:
+            self._restart()
+
+    def _restart(self):
+        """Uruchamia proces roboczy ponownie po awarii (wywoływane z blokadą)"""
+        if self._closing:
+            raise RuntimeError("Proces transkrypcji został zamknięty")
+        if self.restarts >= Config.LOCAL_WORKER_MAX_RESTARTS:
+            raise RuntimeError(f"Proces transkrypcji uległ awarii {self.restarts + 1} razy - rezygnuję z restartu")
+        self.restarts += 1
+        self._stop_worker()
+        self._start_worker()
+
+    def _on_worker_exit(self, process):
+        """Uruchamia proces ponownie, gdy ulegnie awarii poza zadaniem (np. w czasie bezczynności)"""
+        with self._lock:
+            if self._closing or self._process is not process:
+                return
+            print(f"⚠️ Proces transkrypcji zakończył się (kod {process.exitcode}) - uruchamiam ponownie")
+            try:
+                self._restart()
+            except Exception as e:
+                print(f"❌ Nie udało się ponownie uruchomić procesu transkrypcji: {e}")
+
+    def __del__(self):
+        """Destruktor - zatrzymuje proces roboczy"""
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+@atexit.register
+def _close_workers():
+    """Zatrzymuje procesy robocze przy wyjściu (bez restartu przez strażnika i wycieku pamięci współdzielonej)"""
+    for worker in list(_workers):
+        worker.close()
+
+
+def _watch_worker(worker_ref, process):
+    """Czeka na zakończenie procesu roboczego i zgłasza je modelowi, jeśli ten jeszcze istnieje"""
+    process.join()
+    worker = worker_ref()
+    if worker is not None:
+        worker._on_worker_exit(process)
+
+
+class _SegmentStream:
+    """Strumień segmentów zadania w procesie roboczym; zamknięcie przerywa dekodowanie"""
+
+    def __init__(self, worker: WorkerModel):
+        self._worker = worker
+        self._finished = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._finished:
+            raise StopIteration
+        try:
+            message = self._worker._recv()
+        except WorkerCrashed:
+            # Część segmentów mogła zostać już odebrana - zadania nie da się bezpiecznie powtórzyć
+            self._finish()
+            self._worker._restart_locked()
+            raise
+        if message[0] == 'segment':
+            _, text, no_speech_prob, avg_logprob, start, end = message
+            return SimpleNamespace(text=text, no_speech_prob=no_speech_prob, avg_logprob=avg_logprob,
+                                   start=start, end=end)
+        self._finish()
+        if message[0] == 'failed':
+            raise RuntimeError(f"Proces transkrypcji: {message[1]}")
+        raise StopIteration
+
+    def close(self):
+        """Przerywa zadanie (wywoływane przez SegmentGuard po wykryciu śmieci)"""
+        if self._finished:
+            return
+        try:
+            self._worker._cancel()
+        finally:
+            self._finish()
+
+    def _finish(self):
+        if not self._finished:
+            self._finished = True
+            self._worker._lock.release()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+# --- Pomiar wpływu dekodowania na nagrywanie i interfejs ---
+
+class _BusyModel:
+    """Atrapa modelu obciążająca interpreter (tokenizacja i przetwarzanie tekstu trzymają GIL)"""
+
+    def __init__(self, segment_ms: float):
+        self.segment_ms = segment_ms
+
+    def transcribe(self, audio, **kwargs):
+        duration = len(audio) / SAMPLE_RATE if not isinstance(audio, str) else 5.0
+        segments = max(1, int(duration / 2))
+        return self._segments(segments), SimpleNamespace(language='pl', language_probability=1.0, duration=duration)
+
+    def _segments(self, count: int):
+        for index in range(count):
+            deadline = time.perf_counter() + self.segment_ms / 1000
+            words = []
+            while time.perf_counter() < deadline:
+                words = [w.lower().strip('.,') for w in ("Ala ma kota, a kot ma Alę. " * 20).split()]
+            yield SimpleNamespace(text=f"segment {index} {len(words)}", no_speech_prob=0.0, start=0.0, end=0.0)
+
+
+def _busy_model_factory(model_size: str, device: str, compute_type: str):
+    """Fabryka atrapy dla procesu roboczego (model_size = czas dekodowania segmentu w ms)"""
+    return _BusyModel(float(model_size))
+
+
+def _measure(model, seconds: float, chunk: int, rate: int, buffer_chunks: int) -> dict:
+    """Transkrybuje w pętli i mierzy przepełnienia symulowanego bufora wejścia oraz czasy klatek UI"""
+    import numpy as np
+    from audio_encoder import IncrementalEncoder
+
+    stop = threading.Event()
+    period = chunk / rate
+    overflows = [0]
+    frame_times = []
+    block = (np.random.randn(chunk) * 3000).astype(np.int16).tobytes()
+
+    def capture():
+        # Bufor PortAudio mieści buffer_chunks bloków; dłuższe opóźnienie odczytu gubi próbki
+        encoder = IncrementalEncoder(rate)
+        start = time.perf_counter()
+        index = 0
+        while not stop.is_set():
+            due = start + (index + 1) * period
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            encoder.write(block)
+            samples = np.frombuffer(block, dtype=np.int16).astype(np.float32)
+            float(np.sqrt(np.mean(samples ** 2)))
+            index += 1
+            lag = time.perf_counter() - (start + index * period)
+            if lag > buffer_chunks * period:
+                overflows[0] += 1
+                index += int(lag / period)
+        encoder.abort()
+
+    def ui():
+        # Odpowiednik pętli RecordingWindow.tick (20 FPS)
+        previous = time.perf_counter()
+        while not stop.is_set():
+            time.sleep(0.05)
+            bars = [abs(np.sin(i * 0.3 + previous)) for i in range(50)]
+            sum(bars)
+            now = time.perf_counter()
+            frame_times.append((now - previous) * 1000)
+            previous = now
+
+    threads = [threading.Thread(target=capture), threading.Thread(target=ui)]
+    for thread in threads:
+        thread.start()
+    audio = np.zeros(SAMPLE_RATE * 6, dtype=np.float32)
+    jobs = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        segments, _info = model.transcribe(audio, language='pl')
+        " ".join(segment.text for segment in segments)
+        jobs += 1
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    frame_times.sort()
+    return {
+        'jobs': jobs,
+        'overflows': overflows[0],
+        'frame_p50': statistics.median(frame_times),
+        'frame_p95': frame_times[int(len(frame_times) * 0.95)],
+        'frame_max': frame_times[-1],
+    }
+
+
+def run_benchmark(seconds: float = 5.0, segment_ms: float = 200.0, buffer_chunks: int = 2,
+                  model_size: Optional[str] = None):
+    """
+    Porównuje dekodowanie w procesie aplikacji i w procesie roboczym
+
+    Args:
+        seconds: Czas pomiaru każdego wariantu
+        segment_ms: Czas dekodowania segmentu atrapy (trzymający GIL)
+        buffer_chunks: Pojemność symulowanego bufora wejścia audio w blokach
+        model_size: Prawdziwy model faster-whisper zamiast atrapy (np. 'tiny')
+    """
+    if model_size:
+        in_process = _load_whisper_model(model_size, Config.LOCAL_DEVICE, Config.LOCAL_COMPUTE_TYPE)
+        worker = WorkerModel(model_size, Config.LOCAL_DEVICE, Config.LOCAL_COMPUTE_TYPE)
+    else:
+        in_process = _BusyModel(segment_ms)
+        worker = WorkerModel(str(segment_ms), factory=_busy_model_factory)
+
+    print(f"{'wariant':<14} {'zadania':>8} {'przepełnienia':>14} {'klatka p50':>11} {'p95':>8} {'maks.':>8}")
+    try:
+        for name, model in (('w procesie', in_process), ('proces roboczy', worker)):
+            result = _measure(model, seconds, Config.AUDIO_CHUNK, Config.AUDIO_RATE, buffer_chunks)
+            print(f"{name:<14} {result['jobs']:>8} {result['overflows']:>14} "
+                  f"{result['frame_p50']:>9.1f}ms {result['frame_p95']:>6.1f}ms {result['frame_max']:>6.1f}ms")
+    finally:
+        worker.close()
+
+
+def main(argv=None):
+    """Wiersz poleceń: pomiar nagrywania i UI przy dekodowaniu w procesie i poza nim"""
+    parser = argparse.ArgumentParser(description="Transkrypcja w osobnym procesie - pomiar wpływu na aplikację")
+    parser.add_argument('-s', '--seconds', type=float, default=5.0, help="Czas pomiaru każdego wariantu")
+    parser.add_argument('--segment-ms', type=float, default=200.0, help="Czas dekodowania segmentu atrapy (ms)")
+    parser.add_argument('--buffer-chunks', type=int, default=2, help="Pojemność bufora wejścia audio (bloki)")
+    parser.add_argument('--model', help="Prawdziwy model faster-whisper zamiast atrapy (np. tiny)")
+    args = parser.parse_args(argv)
+    load_environment()
+    run_benchmark(args.seconds, args.segment_ms, args.buffer_chunks, args.model)
+
+
+if __name__ == "__main__":
+    main()
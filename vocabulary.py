@@ -0,0 +1,349 @@
+"""
+Moduł słownictwa dziedzinowego - podpowiedź dla modelu i korekta literówek w transkrypcji
+"""
+import re
+import zlib
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Set
+from config import Config
+
+
+# Token do korekty: słowo z ewentualnymi łącznikami (np. "faster-whisper")
+_TOKEN_RE = re.compile(r"\w[\w-]*")
+
+# Najdłuższa końcówka fleksyjna doklejana do terminu ("Kubernetes" -> "Kubernetesowi")
+_MAX_INFLECTION_SUFFIX = 4
+
+# Samogłoski tematyczne wymieniane przy odmianie ("Grafana" -> "Grafanie", "Grafanę")
+_STEM_VOWELS = set('aeiouyąęó')
+
+
+class VocabularyCorrector:
+    """
+    Indeks słownictwa dziedzinowego w stylu SymSpell (indeks usunięć znaków).
+
+    Dla każdego terminu zapamiętywane są wszystkie warianty powstałe przez
+    usunięcie do `max_distance` znaków z jego prefiksu. Kandydaci dla
+    tokenu z transkrypcji to terminy, które dzielą z nim któryś z takich
+    wariantów - odległość edycyjna liczona jest tylko dla nich, a nie dla
+    całego słownika.
+    """
+
+    def __init__(self, file_path: Optional[str] = None, terms: Optional[Iterable[str]] = None,
+                 max_distance: Optional[int] = None, prefix_length: Optional[int] = None,
+                 dictionary: Optional[Iterable[str]] = None, dictionary_file: Optional[str] = None):
+        """
+        Inicjalizuje korektor słownictwa
+
+        Args:
+            file_path: Ścieżka do pliku słownictwa, jeden termin na linię (domyślnie z config)
+            terms: Terminy podane bezpośrednio (zamiast pliku)
+            max_distance: Maksymalna odległość edycyjna korekty (domyślnie z config)
+            prefix_length: Długość prefiksu indeksowanego przez usunięcia
+            dictionary: Zwykłe słowa języka, których nie korygujemy (zamiast pliku)
+            dictionary_file: Słownik języka - lista słów lub plik .dic hunspella (domyślnie z config)
+        """
+        self.max_distance = max_distance if max_distance is not None else Config.VOCABULARY_MAX_EDIT_DISTANCE
+        self.prefix_length = prefix_length or Config.VOCABULARY_PREFIX_LENGTH
+        self.min_word_length = Config.VOCABULARY_MIN_WORD_LENGTH
+
+        # Terminy w kolejności z pliku (ważniejsze na początku) i ich forma kanoniczna
+        self.terms: List[str] = []
+        self._canonical: Dict[str, str] = {}
+        # Tematy terminów kończących się samogłoską ("grafan" -> "grafana")
+        self._stems: Dict[str, str] = {}
+        self._deletes: Dict[str, object] = {}
+        self._cache: Dict[str, Optional[str]] = {}
+
+        if terms is None:
+            file_path = file_path if file_path is not None else Config.VOCABULARY_FILE
+            terms = self._load_file(file_path) if file_path else []
+
+        for term in terms:
+            self.add_term(term)
+
+        # Słownik trzymamy jako posortowane sumy CRC32 - ~4 B na słowo zamiast
+        # kilkudziesięciu MB na zbiór napisów; rzadka kolizja oznacza tylko brak korekty
+        if dictionary is None:
+            dictionary_file = dictionary_file if dictionary_file is not None else Config.VOCABULARY_DICTIONARY_FILE
+            dictionary = self._load_dictionary(dictionary_file) if dictionary_file else []
+        self._dictionary = array('I', sorted({self._word_hash(word.lower()) for word in dictionary}))
+
+    def add_term(self, term: str):
+        """
+        Dodaje termin do indeksu
+
+        Args:
+            term: Termin w formie kanonicznej (np. "Kubernetes")
+        """
+        term = term.strip()
+        if not term:
+            return
+
+        key = term.lower()
+        if key in self._canonical:
+            return
+
+        self.terms.append(term)
+        self._canonical[key] = term
+        self._cache.clear()
+
+        # Korygujemy pojedyncze tokeny - frazy wielowyrazowe trafiają tylko do podpowiedzi
+        if ' ' in key:
+            return
+
+        if key[-1] in _STEM_VOWELS and len(key) > self.min_word_length:
+            self._stems.setdefault(key[:-1], key)
+
+        for variant in self._edits(key[:self.prefix_length], self.max_distance):
+            bucket = self._deletes.get(variant)
+            if bucket is None:
+                # Większość wariantów wskazuje na jeden termin - nie tworzymy listy
+                self._deletes[variant] = key
+            elif isinstance(bucket, list):
+                bucket.append(key)
+            else:
+                self._deletes[variant] = [bucket, key]
+
+    def correct(self, text: str) -> str:
+        """
+        Zamienia tokeny bliskie terminom ze słownictwa na ich formę kanoniczną
+
+        Odmienione formy terminów zachowują końcówkę ("kubernetesa" -> "Kubernetesa"),
+        a zwykłe słowa ze słownika języka nie są poprawiane.
+
+        Args:
+            text: Tekst z transkrypcji
+
+        Returns:
+            str: Tekst po korekcie
+        """
+        if not text or not self._canonical:
+            return text
+
+        def _replace(match: re.Match) -> str:
+            token = match.group(0)
+            replacement = self.lookup(token)
+            return replacement if replacement is not None else token
+
+        return _TOKEN_RE.sub(_replace, text)
+
+    def lookup(self, token: str) -> Optional[str]:
+        """
+        Znajduje termin najbliższy tokenowi w granicach budżetu odległości
+
+        Args:
+            token: Pojedyncze słowo
+
+        Returns:
+            Optional[str]: Forma kanoniczna terminu (z końcówką tokenu) lub None
+        """
+        key = token.lower()
+        if key in self._cache:
+            return self._cache[key]
+
+        result = self._lookup(key)
+        if len(self._cache) >= Config.VOCABULARY_CACHE_SIZE:
+            self._cache.clear()
+        self._cache[key] = result
+        return result
+
+    def _lookup(self, key: str) -> Optional[str]:
+        """Wyszukuje termin dla znormalizowanego tokenu (bez cache)"""
+        if key in self._canonical:
+            return self._canonical[key]
+
+        if len(key) < self.min_word_length or self.is_dictionary_word(key):
+            return None
+
+        inflected = self._inflect(key)
+        if inflected is not None:
+            return inflected
+
+        # Krótkie słowa korygujemy ostrożniej - inaczej zamienialibyśmy zwykłe wyrazy
+        budget = 1 if len(key) <= 6 else self.max_distance
+        budget = min(budget, self.max_distance)
+        if budget <= 0:
+            return None
+
+        candidates: Set[str] = set()
+        for variant in self._edits(key[:self.prefix_length], budget):
+            bucket = self._deletes.get(variant)
+            if bucket is None:
+                continue
+            if isinstance(bucket, list):
+                candidates.update(bucket)
+            else:
+                candidates.add(bucket)
+
+        best: Optional[str] = None
+        best_distance = budget + 1
+        for candidate in candidates:
+            if abs(len(candidate) - len(key)) >= best_distance:
+                continue
+            distance = self._distance(key, candidate, best_distance - 1)
+            if distance < best_distance:
+                best, best_distance = candidate, distance
+
+        return self._canonical[best] if best is not None else None
+
+    def is_dictionary_word(self, word: str) -> bool:
+        """
+        Sprawdza, czy słowo jest zwykłym wyrazem ze słownika języka
+
+        Args:
+            word: Słowo (wielkość liter bez znaczenia)
+
+        Returns:
+            bool: True jeśli słowo jest w słowniku
+        """
+        if not self._dictionary:
+            return False
+        value = self._word_hash(word.lower())
+        index = bisect_left(self._dictionary, value)
+        return index < len(self._dictionary) and self._dictionary[index] == value
+
+    def _inflect(self, key: str) -> Optional[str]:
+        """
+        Rozpoznaje odmienioną formę terminu i zwraca ją z kanoniczną pisownią tematu
+
+        Args:
+            key: Znormalizowany token (małe litery)
+
+        Returns:
+            Optional[str]: Termin z końcówką tokenu lub None
+        """
+        for cut in range(max(self.min_word_length, len(key) - _MAX_INFLECTION_SUFFIX), len(key)):
+            stem, suffix = key[:cut], key[cut:]
+            if stem in self._canonical and ' ' not in stem:
+                return self._canonical[stem] + suffix
+            term = self._stems.get(stem)
+            if term is not None:
+                return self._canonical[term][:-1] + suffix
+        return None
+
+    def build_prompt(self, max_chars: Optional[int] = None) -> Optional[str]:
+        """
+        Buduje podpowiedź dla modelu (initial_prompt / hotwords) z początku słownictwa
+
+        Args:
+            max_chars: Maksymalna długość podpowiedzi (domyślnie z config)
+
+        Returns:
+            Optional[str]: Terminy rozdzielone przecinkami lub None gdy słownictwo jest puste
+        """
+        max_chars = max_chars or Config.VOCABULARY_PROMPT_MAX_CHARS
+        parts = []
+        length = 0
+        for term in self.terms:
+            length += len(term) + 2
+            if length > max_chars:
+                break
+            parts.append(term)
+        return ", ".join(parts) if parts else None
+
+    @staticmethod
+    def _edits(word: str, distance: int) -> Set[str]:
+        """Zwraca słowo i wszystkie jego warianty z usuniętymi maksymalnie `distance` znakami"""
+        result = {word}
+        frontier = {word}
+        for _ in range(distance):
+            next_frontier = set()
+            for item in frontier:
+                if len(item) <= 1:
+                    continue
+                for i in range(len(item)):
+                    next_frontier.add(item[:i] + item[i + 1:])
+            next_frontier -= result
+            result |= next_frontier
+            frontier = next_frontier
+        return result
+
+    @staticmethod
+    def _distance(a: str, b: str, limit: int) -> int:
+        """
+        Odległość Damerau-Levenshteina (wariant OSA) z wczesnym przerwaniem
+
+        Args:
+            a: Pierwsze słowo
+            b: Drugie słowo
+            limit: Odległość, powyżej której wynik nie jest istotny
+
+        Returns:
+            int: Odległość lub limit + 1, jeśli została przekroczona
+        """
+        if a == b:
+            return 0
+        if abs(len(a) - len(b)) > limit:
+            return limit + 1
+
+        previous_previous: List[int] = []
+        previous = list(range(len(b) + 1))
+        for i in range(1, len(a) + 1):
+            current = [i] + [0] * len(b)
+            row_min = current[0]
+            for j in range(1, len(b) + 1):
+                cost = 0 if a[i - 1] == b[j - 1] else 1
+                value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+                if (i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                    value = min(value, previous_previous[j - 2] + 1)
+                current[j] = value
+                row_min = min(row_min, value)
+            if row_min > limit:
+                return limit + 1
+            previous_previous, previous = previous, current
+        return previous[-1] if previous[-1] <= limit else limit + 1
+
+    @staticmethod
+    def _word_hash(word: str) -> int:
+        """Suma kontrolna słowa przechowywana w słowniku"""
+        return zlib.crc32(word.encode('utf-8'))
+
+    @staticmethod
+    def _load_dictionary(file_path: str) -> List[str]:
+        """
+        Wczytuje słownik języka: listę słów lub plik .dic hunspella
+
+        W pliku .dic pomijana jest pierwsza linia z liczbą słów
+        oraz flagi afiksów po ukośniku ("kawka/MN" -> "kawka").
+
+        Args:
+            file_path: Ścieżka do pliku
+
+        Returns:
+            List[str]: Słowa ze słownika
+        """
+        try:
+            words = []
+            with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+                for line_number, line in enumerate(f):
+                    word = line.split('/', 1)[0].strip()
+                    if not word or (line_number == 0 and word.isdigit()):
+                        continue
+                    words.append(word)
+            print(f"📖 Wczytano słownik języka: {len(words)} słów")
+            return words
+        except Exception as e:
+            print(f"❌ Błąd podczas wczytywania słownika języka: {e}")
+            return []
+
+    @staticmethod
+    def _load_file(file_path: str) -> List[str]:
+        """
+        Wczytuje plik słownictwa (jeden termin na linię, `#` to komentarz)
+
+        Args:
+            file_path: Ścieżka do pliku
+
+        Returns:
+            List[str]: Terminy w kolejności z pliku
+        """
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                terms = [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+            print(f"📖 Wczytano słownictwo dziedzinowe: {len(terms)} terminów")
+            return terms
+        except Exception as e:
+            print(f"❌ Błąd podczas wczytywania słownictwa: {e}")
+            return []
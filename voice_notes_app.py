@@ -1,29 +1,84 @@
 """
 Główna klasa aplikacji Voice Notes - zrefaktoryzowana wersja
 """
-import tkinter as tk
 import sys
-from typing import Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, List, Optional, Tuple
 
 from config import Config
 from audio_recorder import AudioRecorder
+from background_refiner import BackgroundRefiner
+from recent_audio import RecentAudioCache
 from recording_window import RecordingWindow
 from transcription_service import TranscriptionService
 from hotkey_manager import HotkeyManager
 from text_processor import TextProcessor
+from note_store import NoteStore
+from daemon import connect_to_daemon
+from transcription_farm import connect_to_farm
+from vocabulary import VocabularyCorrector
+import profiler
+import scheduling
+import tracing
+
+if TYPE_CHECKING:
+    import tkinter as tk
+
+
+class DictationStats:
+    """Statystyki dyktowania ciągłego: przepustowość (słowa/min) i opóźnienie wypowiedzi"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        # Liczba wypowiedzi przekazanych do wklejenia (kolejne wklejane są po spacji)
+        self.submitted = 0
+        # (liczba słów, opóźnienie od końca wypowiedzi do wklejenia w sekundach)
+        self.utterances: List[Tuple[int, float]] = []
+
+    def add(self, words: int, latency: float):
+        """Dodaje wypowiedź (wywoływane w wątku wyjścia po wklejeniu)"""
+        self.utterances.append((words, latency))
+        print(f"⏱️ Wypowiedź {len(self.utterances)}: {words} słów, opóźnienie {latency:.2f} s")
+
+    def report(self):
+        """Wypisuje podsumowanie sesji dyktowania"""
+        if not self.utterances:
+            return
+        minutes = (time.perf_counter() - self.started_at) / 60
+        words = sum(w for w, _ in self.utterances)
+        latencies = sorted(latency for _, latency in self.utterances)
+        print(f"📈 Dyktowanie: {len(latencies)} wypowiedzi, {words} słów, "
+              f"{words / minutes if minutes > 0 else 0.0:.0f} słów/min, opóźnienie śr. "
+              f"{sum(latencies) / len(latencies):.2f} s, mediana {latencies[len(latencies) // 2]:.2f} s, "
+              f"maks. {latencies[-1]:.2f} s")
 
 
 class VoiceNotesApp:
     """Główna klasa aplikacji Voice Notes"""
     
-    def __init__(self, root: tk.Tk):
+    def __init__(self, root: "tk.Tk", audio_interface=None,
+                 transcription_service: Optional[TranscriptionService] = None,
+                 text_processor: Optional[TextProcessor] = None,
+                 recording_window: Optional[RecordingWindow] = None):
         """
         Inicjalizuje aplikację Voice Notes
         
         Args:
             root: Główne okno Tkinter
+            audio_interface: Źródło audio zgodne z pyaudio.PyAudio (domyślnie wybrane przez AUDIO_SOURCE)
+            transcription_service: Serwis transkrypcji (domyślnie demon lub nowy serwis)
+            text_processor: Procesor tekstu (domyślnie wklejanie do aktywnego okna)
+            recording_window: Okno nagrywania (domyślnie okno Tk z wizualizacją)
+        
+        Atrapy komponentów pozwalają uruchomić aplikację bez mikrofonu, modelu
+        i ekranu (soak.py).
         """
         self.root = root
+        self._audio_interface = audio_interface
+        self.transcription_service = transcription_service
+        self.text_processor = text_processor
+        self.recording_window = recording_window
         
         # Waliduj konfigurację
         try:
@@ -40,24 +95,73 @@ class VoiceNotesApp:
     def _init_components(self):
         """Inicjalizuje wszystkie komponenty aplikacji"""
         # Inicjalizuj okno nagrywania
-        self.recording_window = RecordingWindow(self.root)
+        if self.recording_window is None:
+            self.recording_window = RecordingWindow(self.root)
         
         # Inicjalizuj recorder audio z callback'iem do okna
         self.audio_recorder = AudioRecorder(
-            audio_callback=self.recording_window.update_audio_level
+            audio_callback=self.recording_window.update_audio_level,
+            utterance_callback=self._on_utterance,
+            audio_interface=self._audio_interface,
         )
         
-        # Inicjalizuj serwis transkrypcji
-        self.transcription_service = TranscriptionService()
+        # Wczytaj słownictwo dziedzinowe (wspólne dla podpowiedzi modelu i korekty)
+        self.vocabulary = VocabularyCorrector() if Config.VOCABULARY_FILE else None
+        
+        # Inicjalizuj serwis transkrypcji (farma z FARM_COORDINATOR, działający demon z załadowanym modelem lub lokalnie)
+        if self.transcription_service is None:
+            self.transcription_service = (connect_to_farm() or connect_to_daemon()
+                                          or TranscriptionService(vocabulary=self.vocabulary))
         
         # Inicjalizuj procesor tekstu
-        self.text_processor = TextProcessor()
+        if self.text_processor is None:
+            self.text_processor = TextProcessor(vocabulary=self.vocabulary)
+        
+        # Inicjalizuj archiwum notatek (zapis w tle, poza ścieżką wklejania)
+        self.note_store = self._init_note_store()
+        
+        # Ponowna transkrypcja archiwum większym modelem, gdy komputer jest bezczynny
+        self.refiner = None
+        if Config.REFINE_ENABLED and self.note_store:
+            self.refiner = BackgroundRefiner(
+                self.note_store,
+                is_busy=lambda: self.is_recording,
+                post_process=self.text_processor.post_process,
+            )
+        
+        # Ostatnie nagrania w pamięci do ponownej transkrypcji innym modelem
+        self.recent_audio = RecentAudioCache() if Config.RECENT_AUDIO_CLIPS > 0 else None
         
         # Inicjalizuj menedżer skrótów klawiszowych
         self.hotkey_manager = HotkeyManager(self.toggle_recording)
+        if Config.PROFILE_HOTKEY:
+            self.hotkey_manager.add_hotkey(Config.PROFILE_HOTKEY, self.toggle_profiling)
+        if Config.RETRANSCRIBE_HOTKEY and self.recent_audio:
+            self.hotkey_manager.add_hotkey(Config.RETRANSCRIBE_HOTKEY, self.retranscribe_last)
         
         # Stan aplikacji
         self.is_recording = False
+        self.recording_started_at: Optional[float] = None
+        # Identyfikator śladu bieżącej wypowiedzi (TRACE_ENABLED)
+        self.trace_id: Optional[str] = None
+        # Dyktowanie ciągłe: wypowiedzi przetwarzane po kolei w osobnym wątku, gdy nagrywanie trwa
+        self._utterance_executor: Optional[ThreadPoolExecutor] = None
+        self.dictation: Optional[DictationStats] = None
+    
+    def _init_note_store(self) -> Optional[NoteStore]:
+        """
+        Otwiera archiwum notatek, jeśli jest włączone
+        
+        Returns:
+            Optional[NoteStore]: Archiwum lub None, gdy wyłączone lub niedostępne
+        """
+        if not Config.NOTES_ENABLED:
+            return None
+        try:
+            return NoteStore()
+        except Exception as e:
+            print(f"⚠️ Archiwum notatek niedostępne: {e}")
+            return None
     
     def start_recording(self) -> bool:
         """
@@ -70,14 +174,26 @@ class VoiceNotesApp:
             print("⚠️ Nagrywanie już trwa!")
             return False
         
+        # Dekodowanie w tle ustępuje nowemu nagraniu
+        if self.refiner:
+            self.refiner.pause()
+        
         # Rozpocznij nagrywanie
-        if self.audio_recorder.start_recording():
+        self.trace_id = tracing.current_trace()
+        self.dictation = DictationStats() if self.audio_recorder.endpointing else None
+        with tracing.span('recorder.start'):
+            started = self.audio_recorder.start_recording()
+        if started:
             self.is_recording = True
+            self.recording_started_at = time.time()
+            # Zwolniony z pamięci model ładuje się w tle, gdy użytkownik mówi
+            self.transcription_service.prepare()
             # Pokaż okno nagrywania
             self.recording_window.show()
             print("Naciśnij ponownie Ctrl+Alt aby zatrzymać nagrywanie")
             return True
         
+        tracing.end_utterance(self.trace_id)
         return False
     
     def stop_recording(self):
@@ -87,27 +203,265 @@ class VoiceNotesApp:
             return
         
         self.is_recording = False
+        stop_ts = time.perf_counter()
         
         # Zatrzymaj nagrywanie i pobierz plik audio
-        audio_file_path = self.audio_recorder.stop_recording()
+        with tracing.span('recorder.stop'):
+            audio_file_path = self.audio_recorder.stop_recording()
+        saved_ts = time.perf_counter()
         
         # Ukryj okno nagrywania
         self.recording_window.hide()
         
+        trace_id, self.trace_id = self.trace_id, None
+        if self.dictation:
+            # Ostatnia wypowiedź trafia do kolejki za wcześniejszymi, zamkniętymi po ciszy
+            dictation, self.dictation = self.dictation, None
+            if audio_file_path:
+                self._on_utterance(audio_file_path, self.audio_recorder.last_duration, stop_ts, dictation)
+            self._utterance_queue().submit(self._finish_dictation, dictation, trace_id)
+            return
+        
+        try:
+            self._process_recording(audio_file_path, stop_ts, saved_ts)
+        finally:
+            # Ślad zapisze się po wykonaniu wklejenia (w kolejności zleceń wątku wyjścia)
+            if trace_id:
+                self.text_processor.after_output(lambda: tracing.end_utterance(trace_id))
+    
+    def _on_utterance(self, audio_file_path: str, duration: Optional[float], closed_ts: float,
+                      dictation: Optional[DictationStats] = None):
+        """
+        Kolejkuje wypowiedź zamkniętą po ciszy (wywoływane w wątku nagrywania)
+        
+        Transkrypcja wypowiedzi odbywa się, gdy użytkownik mówi następną; jeden wątek
+        przetwarzania zachowuje kolejność wklejania.
+        """
+        dictation = dictation or self.dictation
+        created_at = time.time() - (time.perf_counter() - closed_ts) - (duration or 0.0)
+        self._utterance_queue().submit(
+            self._process_utterance, audio_file_path, duration, closed_ts, created_at, dictation,
+            tracing.current_trace(),
+        )
+    
+    def _utterance_queue(self) -> ThreadPoolExecutor:
+        """Zwraca jednowątkową kolejkę przetwarzania wypowiedzi (tworzoną przy pierwszym użyciu)"""
+        if self._utterance_executor is None:
+            # Wątek transkrypcji wypowiedzi ma priorytet dekodowania (SCHED_POLICY_ENABLED)
+            self._utterance_executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="Utterance",
+                initializer=scheduling.apply, initargs=(scheduling.DECODE,),
+            )
+        return self._utterance_executor
+    
+    def _process_utterance(self, audio_file_path: str, duration: Optional[float], closed_ts: float,
+                           created_at: float, dictation: Optional[DictationStats], trace_id: Optional[str]):
+        """Przetwarza jedną wypowiedź dyktowania ciągłego i mierzy opóźnienie do wklejenia"""
+        with tracing.use_trace(trace_id), profiler.section():
+            try:
+                text = self._process_recording(
+                    audio_file_path, closed_ts, closed_ts, created_at=created_at, duration=duration,
+                    continuation=bool(dictation and dictation.submitted),
+                )
+            except Exception as e:
+                print(f"❌ Błąd podczas przetwarzania wypowiedzi: {e}")
+                return
+        if text and dictation:
+            dictation.submitted += 1
+            words = len(text.split())
+            self.text_processor.after_output(lambda: dictation.add(words, time.perf_counter() - closed_ts))
+    
+    def _finish_dictation(self, dictation: DictationStats, trace_id: Optional[str]):
+        """Wypisuje statystyki i zapisuje ślad po wklejeniu ostatniej wypowiedzi"""
+        def finish():
+            dictation.report()
+            tracing.end_utterance(trace_id)
+        self.text_processor.after_output(finish)
+    
+    def _process_recording(self, audio_file_path: Optional[str], stop_ts: float, saved_ts: float,
+                           created_at: Optional[float] = None, duration: Optional[float] = None,
+                           continuation: bool = False) -> Optional[str]:
+        """
+        Transkrybuje nagranie, przetwarza i wkleja tekst oraz archiwizuje notatkę
+        
+        Returns:
+            Optional[str]: Ostateczny tekst lub None, gdy nic nie rozpoznano
+        """
         if audio_file_path:
             # Transkrybuj audio
-            text = self.transcription_service.transcribe_audio_file(audio_file_path)
-            
-            # Usuń tymczasowy plik
-            self.audio_recorder.cleanup_temp_file(audio_file_path)
+            with tracing.span('transcribe'):
+                result = self.transcription_service.transcribe(audio_file_path, Config.TRANSCRIPTION_LANGUAGE)
+            transcribed_ts = time.perf_counter()
+            text = result.text
+            # Język rozpoznany przy TRANSCRIPTION_LANGUAGE=auto (None - wykrył go serwer API)
+            language = result.language
             
+            final_text = None
             if text:
                 # Przetwórz rozpoznany tekst
-                self.text_processor.process_recognized_text(text)
+                with tracing.span('text.process'):
+                    final_text = self.text_processor.process_recognized_text(text, continuation=continuation)
+                processed_ts = time.perf_counter()
             else:
                 print("❌ Nie udało się rozpoznać tekstu")
+            
+            # Zachowaj próbki w pamięci (po zleceniu wklejenia) do ponownej transkrypcji skrótem
+            if self.recent_audio:
+                with tracing.span('recent_audio.add'):
+                    self._remember_clip(audio_file_path, created_at or self.recording_started_at, text, final_text,
+                                        language)
+            
+            # Zachowaj nagranie do ponownej transkrypcji w tle albo usuń tymczasowy plik
+            retained_path = None
+            if text and self.refiner:
+                retained_path = self.refiner.retain(audio_file_path)
+            else:
+                self.audio_recorder.cleanup_temp_file(audio_file_path)
+            if self.refiner:
+                self.refiner.touch()
+            
+            if text:
+                self._archive_note(final_text or text, {
+                    'save': saved_ts - stop_ts,
+                    'transcribe': transcribed_ts - saved_ts,
+                    'process': processed_ts - transcribed_ts,
+                    'total': processed_ts - stop_ts,
+                    # Część czasu transkrypcji spędzona na czekaniu na ponowne załadowanie modelu
+                    'model_wait': result.model_wait,
+                    # Część czasu transkrypcji spędzona na wyborze języka (TRANSCRIPTION_LANGUAGE=auto)
+                    'language_id': result.language_time,
+                }, created_at=created_at, duration=duration, audio_path=retained_path, language=language,
+                   model=result.model)
+                return final_text
         else:
             print("❌ Nie udało się zapisać pliku audio")
+        return None
+    
+    def _remember_clip(self, audio_file_path: str, created_at: Optional[float], text: Optional[str],
+                       final_text: Optional[str], language: Optional[str]):
+        """Dodaje nagranie i wynik jego transkrypcji do pamięci ostatnich nagrań"""
+        clip = self.recent_audio.add(audio_file_path, created_at=created_at, language=language)
+        if clip is None:
+            return
+        clip.text = final_text or text
+        clip.output = self.text_processor.last_output if final_text else None
+        clip.archived = bool(text and self.note_store)
+    
+    def retranscribe_last(self, model_name: Optional[str] = None, language: Optional[str] = None,
+                          beam_size: Optional[int] = None) -> Optional[str]:
+        """
+        Ponownie transkrybuje ostatnie nagranie z pamięci i podmienia wklejony tekst
+        
+        Próbki są już w pamięci, więc koszt to tylko dekodowanie. Wklejony
+        wcześniej tekst jest usuwany (Backspace) i zastępowany nowym - kursor
+        musi stać zaraz za nim. Treść notatki w archiwum jest poprawiana.
+        
+        Args:
+            model_name: Model (domyślnie RETRANSCRIBE_MODEL, a gdy pusty - REFINE_MODEL
+                lokalnie lub whisper-1 w API)
+            language: Kod języka (domyślnie RETRANSCRIBE_LANGUAGE lub język pierwszej transkrypcji)
+            beam_size: Szerokość wiązki (domyślnie RETRANSCRIBE_BEAM_SIZE)
+        
+        Returns:
+            Optional[str]: Nowy tekst lub None, gdy brak nagrania albo nic nie rozpoznano
+        """
+        clip = self.recent_audio.last() if self.recent_audio else None
+        if clip is None:
+            print("⚠️ Brak nagrania do ponownej transkrypcji")
+            return None
+        if self.is_recording:
+            print("⚠️ Zatrzymaj nagrywanie przed ponowną transkrypcją")
+            return None
+        
+        mode = getattr(self.transcription_service, 'mode', None)
+        model_name = model_name or Config.RETRANSCRIBE_MODEL or (Config.REFINE_MODEL if mode == 'local' else None)
+        language = language or Config.RETRANSCRIBE_LANGUAGE or clip.language
+        beam_size = beam_size or Config.RETRANSCRIBE_BEAM_SIZE or None
+        
+        # Dekodowanie w tle ustępuje ponownej transkrypcji
+        if self.refiner:
+            self.refiner.pause()
+        started = time.perf_counter()
+        with tracing.span('retranscribe', model=model_name):
+            result = self.transcription_service.transcribe(
+                clip.samples, language, model_name=model_name, beam_size=beam_size,
+            )
+        elapsed = time.perf_counter() - started
+        if self.refiner:
+            self.refiner.touch()
+        text = result.text
+        model_name = result.model or model_name or self.transcription_service.model_name
+        print(f"🔂 Ponowna transkrypcja {clip.duration:.1f} s audio modelem {model_name} w {elapsed:.2f} s "
+              f"(w pamięci: {self.recent_audio.describe()})")
+        if not text:
+            print("❌ Nie udało się rozpoznać tekstu")
+            return None
+        
+        if clip.output is not None and self.recent_audio.last() is clip:
+            # Podmień wklejony tekst (z wiodącą spacją kolejnej wypowiedzi dyktowania)
+            final_text = self.text_processor.post_process(text)
+            replacement = f" {final_text}" if clip.output.startswith(" ") else final_text
+            self.text_processor.replace_text(clip.output, replacement)
+            clip.output = replacement
+        else:
+            final_text = self.text_processor.process_recognized_text(text)
+            clip.output = self.text_processor.last_output
+        clip.text, clip.language, clip.model = final_text, result.language, model_name
+        
+        if clip.archived:
+            self.note_store.correct(clip.created_at, final_text, model_name)
+        elif self.note_store:
+            self._archive_note(final_text, {'transcribe': elapsed}, created_at=clip.created_at,
+                               duration=clip.duration, language=result.language, model=model_name)
+            clip.archived = True
+        return final_text
+    
+    def _archive_note(self, text: str, timings: dict, language: Optional[str], model: Optional[str],
+                      created_at: Optional[float] = None, duration: Optional[float] = None,
+                      audio_path: Optional[str] = None):
+        """
+        Dodaje notatkę do archiwum (zapis odbywa się w tle)
+        
+        Args:
+            text: Ostateczna treść notatki
+            timings: Czasy etapów przetwarzania w sekundach
+            language: Język transkrypcji (None - nieznany, wykrył go serwer API)
+            model: Model, który faktycznie wykonał tę transkrypcję
+            created_at: Początek wypowiedzi (domyślnie początek nagrywania)
+            duration: Długość wypowiedzi (domyślnie ostatniego nagrania)
+            audio_path: Zachowane nagranie do ponownej transkrypcji w tle
+        """
+        if not self.note_store:
+            return
+        try:
+            self.note_store.add(
+                text,
+                created_at=created_at or self.recording_started_at,
+                duration=duration if duration is not None else self.audio_recorder.last_duration,
+                backend=self.transcription_service.mode,
+                model=model,
+                language=language,
+                timings=timings,
+                audio_path=audio_path,
+            )
+        except Exception as e:
+            print(f"⚠️ Nie udało się zarchiwizować notatki: {e}")
+    
+    def reconfigure_transcription(self, mode: Optional[str] = None, model_name: Optional[str] = None,
+                                  wait: bool = False):
+        """
+        Zmienia backend lub model transkrypcji bez restartu aplikacji
+
+        Nowy model ładuje się w tle; bieżące nagranie zostanie przetworzone
+        przez model, który będzie aktywny w chwili zatrzymania nagrywania.
+
+        Args:
+            mode: 'api', 'local' lub 'auto' (domyślnie bez zmian)
+            model_name: Nazwa lokalnego modelu Whisper (domyślnie bez zmian)
+            wait: Czy czekać na zakończenie przełączenia
+        """
+        print(f"🔁 Przełączanie transkrypcji: tryb={mode or 'bez zmian'}, model={model_name or 'bez zmian'}")
+        return self.transcription_service.reconfigure(mode=mode, model_name=model_name, wait=wait)
     
     def toggle_recording(self):
         """Przełącza stan nagrywania"""
@@ -116,6 +470,18 @@ class VoiceNotesApp:
         else:
             self.start_recording()
     
+    def toggle_profiling(self) -> bool:
+        """
+        Włącza lub wyłącza profilowanie sesji (cProfile + tracemalloc)
+        
+        Profilowane są wątki skrótu (transkrypcja i przetwarzanie), nagrywania,
+        wklejania oraz UI; raport trafia do PROFILE_DIR po wyłączeniu.
+        
+        Returns:
+            bool: True jeśli profilowanie jest teraz włączone
+        """
+        return profiler.toggle_session()
+    
     def setup_hotkey(self) -> bool:
         """
         Konfiguruje globalny skrót klawiszowy
@@ -136,6 +502,10 @@ class VoiceNotesApp:
         print("• Tekst zostanie wyświetlony w terminalu")
         print("• Jeśli aktywne jest pole tekstowe, tekst zostanie wklejony")
         print("• Naciśnij Ctrl+C aby zakończyć program")
+        if Config.PROFILE_HOTKEY:
+            print(f"• Naciśnij {Config.PROFILE_HOTKEY} aby włączyć/wyłączyć profilowanie")
+        if Config.RETRANSCRIBE_HOTKEY and self.recent_audio:
+            print(f"• Naciśnij {Config.RETRANSCRIBE_HOTKEY} aby ponownie rozpoznać ostatnie nagranie i podmienić tekst")
         print("• Używa OpenAI Whisper API lub lokalnego modelu (automatyczny wybór)")
         print("=" * 60)
         # Informacja o trybie jeśli dostępna
@@ -150,6 +520,12 @@ class VoiceNotesApp:
             print("❌ Nie udało się skonfigurować skrótu klawiszowego")
             return False
         
+        if Config.PROFILE_ENABLED:
+            profiler.start_session()
+        
+        if self.refiner:
+            self.refiner.start()
+        
         # Uruchom pętlę animacji/komend okienka
         self.recording_window.start()
         print("✅ Aplikacja działa! Oczekiwanie na skrót klawiszowy...")
@@ -159,6 +535,10 @@ class VoiceNotesApp:
         """Zamyka aplikację i zwalnia zasoby"""
         print("\n👋 Zamykanie aplikacji...")
         
+        # Przerwij ponowną transkrypcję w tle
+        if self.refiner:
+            self.refiner.stop()
+        
         # Zatrzymaj nagrywanie jeśli jest aktywne
         if self.is_recording:
             self.stop_recording()
@@ -171,6 +551,21 @@ class VoiceNotesApp:
         if self.recording_window:
             self.recording_window.hide()
         
+        # Dokończ przetwarzanie wypowiedzi dyktowania ciągłego
+        if self._utterance_executor:
+            self._utterance_executor.shutdown(wait=True)
+        
+        # Dokończ oczekujące wklejenia
+        if self.text_processor:
+            self.text_processor.shutdown()
+        
+        # Zapisz oczekujące notatki
+        if self.note_store:
+            self.note_store.close()
+        
+        # Zapisz raport trwającej sesji profilowania
+        profiler.stop_session(wait=True)
+        
         # Zwolnij zasoby audio
         if hasattr(self.audio_recorder, 'audio'):
             try:
@@ -189,5 +584,9 @@ class VoiceNotesApp:
             'is_recording': self.is_recording,
             'hotkey_active': self.hotkey_manager.is_active() if self.hotkey_manager else False,
             'window_visible': self.recording_window.visible if self.recording_window else False,
-            'api_configured': TranscriptionService.is_api_key_configured()
+            'api_configured': TranscriptionService.is_api_key_configured(),
+            'recent_audio': self.recent_audio.stats() if self.recent_audio else None,
+            'language': Config.TRANSCRIPTION_LANGUAGE,
+            'language_id': (self.transcription_service.language_identifier.stats()
+                            if hasattr(self.transcription_service, 'language_identifier') else None),
         }
\ No newline at end of file
@@ -0,0 +1,427 @@
+"""
+Moduł wykrywania aktywnego okna (win32, Linux/X11, atrapa do testów) i klasyfikacji pól tekstowych
+
+    python window_provider.py bench -n 100000
+"""
+import argparse
+import atexit
+import re
+import subprocess
+import sys
+import threading
+import time
+from typing import NamedTuple, Optional
+from config import Config, load_environment
+
+
+# Klasy okien, które prawdopodobnie mają pola tekstowe
+TEXT_INPUT_CLASSES = [
+    'Edit', 'RichEdit', 'RichEdit20A', 'RichEdit20W',
+    'Notepad', 'WordPadClass', 'OpusApp',  # Word
+    'Chrome_WidgetWin_1', 'MozillaWindowClass',  # Przeglądarki
+    'Vim', 'ConsoleWindowClass',  # Edytory tekstu
+    'SciTEWindow', 'Notepad++',  # Inne edytory
+    'ThunderRT6TextBox', 'TMemo',  # Inne kontrolki tekstowe
+]
+
+# Linux: nazwy z WM_CLASS (instancja lub klasa) - porównywane w całości,
+# bo krótkie nazwy ('code', 'xterm') jako fragmenty pasowałyby do obcych klas
+LINUX_TEXT_INPUT_CLASSES = [
+    'gedit', 'org.gnome.gedit', 'org.gnome.TextEditor', 'kate', 'code', 'emacs',
+    'firefox', 'chromium', 'google-chrome',
+    'gnome-terminal', 'gnome-terminal-server', 'konsole', 'xterm',
+    'libreoffice', 'libreoffice-writer', 'libreoffice-calc', 'soffice',
+]
+
+# Fragmenty tytułu okna sugerujące edytor tekstu
+TEXT_TITLE_INDICATORS = [
+    'notepad', 'word', 'editor', 'code', 'text', 'write',
+    'document', 'edit', 'vim', 'emacs', 'sublime', 'vscode',
+    'atom', 'brackets', 'gedit', 'nano'
+]
+
+
+class WindowInfo(NamedTuple):
+    """Informacje o oknie na pierwszym planie"""
+    handle: int
+    class_name: str
+    title: str
+
+
+class ForegroundWindowProvider:
+    """Interfejs dostawcy informacji o oknie na pierwszym planie"""
+
+    def get_foreground_handle(self) -> Optional[int]:
+        """
+        Zwraca uchwyt okna na pierwszym planie (tania operacja)
+
+        Returns:
+            Optional[int]: Uchwyt okna lub None, jeśli nie ma aktywnego okna
+        """
+        raise NotImplementedError
+
+    def describe(self, handle: int) -> Optional[WindowInfo]:
+        """
+        Pobiera klasę i tytuł okna
+
+        Args:
+            handle: Uchwyt okna
+
+        Returns:
+            Optional[WindowInfo]: Informacje o oknie lub None w przypadku błędu
+        """
+        raise NotImplementedError
+
+
+class Win32WindowProvider(ForegroundWindowProvider):
+    """Dostawca oparty na win32gui (Windows)"""
+
+    def __init__(self):
+        import win32gui
+        self._win32gui = win32gui
+
+    def get_foreground_handle(self) -> Optional[int]:
+        return self._win32gui.GetForegroundWindow() or None
+
+    def describe(self, handle: int) -> Optional[WindowInfo]:
+        return WindowInfo(
+            handle,
+            self._win32gui.GetClassName(handle),
+            self._win32gui.GetWindowText(handle),
+        )
+
+
+class LinuxWindowProvider(ForegroundWindowProvider):
+    """
+    Dostawca dla X11 oparty na narzędziu `xprop`
+
+    Aktywne okno śledzi jeden długo działający `xprop -spy` (zmiany
+    _NET_ACTIVE_WINDOW czyta wątek w tle), więc sprawdzenie uchwytu nie
+    uruchamia procesu. Gdy nasłuch nie działa, xprop jest wywoływany
+    przy każdym sprawdzeniu.
+    """
+
+    _ACTIVE_RE = re.compile(r"window id # (0x[0-9a-fA-F]+)")
+    _CLASS_RE = re.compile(r'WM_CLASS\(\w+\) = "([^"]*)"(?:, "([^"]*)")?')
+    _NAME_RE = re.compile(r'(?:_NET_WM_NAME|WM_NAME)\(\w+\) = "(.*)"')
+
+    def __init__(self):
+        self._active: Optional[int] = None
+        self._spy: Optional[subprocess.Popen] = None
+        self._spy_failed = False
+        self._spy_lock = threading.Lock()
+        atexit.register(self.close)
+
+    def get_foreground_handle(self) -> Optional[int]:
+        if self._watch():
+            return self._active
+        return self._parse_active(self._xprop('-root', '_NET_ACTIVE_WINDOW'))
+
+    def close(self):
+        """Kończy nasłuch zmian aktywnego okna"""
+        with self._spy_lock:
+            spy, self._spy = self._spy, None
+        if spy is not None and spy.poll() is None:
+            spy.terminate()
+            try:
+                spy.wait(timeout=1.0)
+            except subprocess.TimeoutExpired:
+                spy.kill()
+
+    def _watch(self) -> bool:
+        """Uruchamia nasłuch (także ponownie, np. po restarcie X); False - nasłuch niedostępny"""
+        with self._spy_lock:
+            if self._spy is not None and self._spy.poll() is None:
+                return True
+            if self._spy_failed:
+                return False
+            try:
+                spy = subprocess.Popen(
+                    ['xprop', '-root', '-spy', '_NET_ACTIVE_WINDOW'],
+                    stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+                )
+            except OSError:
+                self._spy_failed = True
+                return False
+            # xprop -spy od razu wypisuje bieżącą wartość; pusty wynik - brak serwera X
+            first = spy.stdout.readline()
+            if not first:
+                spy.wait()
+                self._spy_failed = True
+                return False
+            self._active = self._parse_active(first)
+            self._spy = spy
+        threading.Thread(target=self._read_spy, args=(spy,), name="ActiveWindowSpy", daemon=True).start()
+        return True
+
+    def _read_spy(self, spy: subprocess.Popen):
+        """Pętla wątku nasłuchu: zapamiętuje uchwyt z każdej zmiany aktywnego okna"""
+        for line in spy.stdout:
+            self._active = self._parse_active(line)
+        spy.stdout.close()
+
+    @classmethod
+    def _parse_active(cls, output: Optional[str]) -> Optional[int]:
+        """Wyciąga uchwyt aktywnego okna z wyjścia xprop"""
+        match = cls._ACTIVE_RE.search(output or '')
+        if not match:
+            return None
+        return int(match.group(1), 16) or None
+
+    def describe(self, handle: int) -> Optional[WindowInfo]:
+        output = self._xprop('-id', hex(handle), 'WM_CLASS', '_NET_WM_NAME', 'WM_NAME')
+        if output is None:
+            return None
+
+        class_match = self._CLASS_RE.search(output)
+        name_match = self._NAME_RE.search(output)
+        # WM_CLASS to para (instancja, klasa) - łączymy obie do dopasowania
+        class_name = " ".join(g for g in class_match.groups() if g) if class_match else ''
+        title = name_match.group(1) if name_match else ''
+        return WindowInfo(handle, class_name, title)
+
+    @staticmethod
+    def _xprop(*args) -> Optional[str]:
+        """Uruchamia xprop i zwraca jego wyjście lub None w przypadku błędu"""
+        try:
+            result = subprocess.run(
+                ['xprop', *args], capture_output=True, text=True, timeout=1.0,
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        return result.stdout if result.returncode == 0 else None
+
+
+class FakeWindowProvider(ForegroundWindowProvider):
+    """Atrapa dostawcy do testów i trybu bez interfejsu graficznego"""
+
+    def __init__(self, class_name: str = '', title: str = ''):
+        self.describe_calls = 0
+        self.window: Optional[WindowInfo] = None
+        self._next_handle = 1
+        self.set_foreground(class_name, title)
+
+    def set_foreground(self, class_name: str, title: str, handle: Optional[int] = None):
+        """
+        Ustawia okno "na pierwszym planie"
+
+        Args:
+            class_name: Klasa okna
+            title: Tytuł okna
+            handle: Uchwyt okna (domyślnie nowy, jak przy zmianie fokusu)
+        """
+        if handle is None:
+            handle = self._next_handle
+            self._next_handle += 1
+        self.window = WindowInfo(handle, class_name, title)
+
+    def clear_foreground(self):
+        """Symuluje brak aktywnego okna"""
+        self.window = None
+
+    def get_foreground_handle(self) -> Optional[int]:
+        return self.window.handle if self.window else None
+
+    def describe(self, handle: int) -> Optional[WindowInfo]:
+        self.describe_calls += 1
+        if self.window and self.window.handle == handle:
+            return self.window
+        return None
+
+
+def create_window_provider(name: Optional[str] = None) -> Optional[ForegroundWindowProvider]:
+    """
+    Tworzy dostawcę aktywnego okna dla bieżącej platformy
+
+    Args:
+        name: 'auto', 'win32', 'linux' lub 'fake' (domyślnie z config)
+
+    Returns:
+        Optional[ForegroundWindowProvider]: Dostawca lub None, jeśli platforma nie jest obsługiwana
+    """
+    name = (name or Config.WINDOW_PROVIDER).lower()
+    if name == 'auto':
+        if sys.platform == 'win32':
+            name = 'win32'
+        elif sys.platform.startswith('linux'):
+            name = 'linux'
+
+    try:
+        if name == 'win32':
+            return Win32WindowProvider()
+        if name == 'linux':
+            return LinuxWindowProvider()
+        if name == 'fake':
+            return FakeWindowProvider()
+    except Exception as e:
+        print(f"⚠️ Nie udało się zainicjalizować wykrywania okien ({name}): {e}")
+        return None
+
+    print(f"⚠️ Brak obsługi wykrywania aktywnego okna dla platformy: {name}")
+    return None
+
+
+class WindowClassifier:
+    """
+    Klasyfikuje okno na pierwszym planie jako pole tekstowe.
+
+    Reguły klas i tytułów są skompilowane do jednego wyrażenia regularnego
+    każda, a decyzja jest zapamiętywana dla uchwytu okna - dopóki fokus
+    nie zmieni się na inne okno (lub nie minie TTL), kolejne wywołania
+    nie pytają systemu o klasę i tytuł.
+    """
+
+    def __init__(self, provider: Optional[ForegroundWindowProvider] = None, cache_ttl: Optional[float] = None):
+        """
+        Inicjalizuje klasyfikator
+
+        Args:
+            provider: Dostawca aktywnego okna (domyślnie dla bieżącej platformy)
+            cache_ttl: Czas ważności decyzji dla tego samego okna w sekundach (domyślnie z config)
+        """
+        self.provider = provider if provider is not None else create_window_provider()
+        self.cache_ttl = cache_ttl if cache_ttl is not None else Config.WINDOW_CACHE_TTL
+
+        self._class_re = self._compile(TEXT_INPUT_CLASSES)
+        self._linux_classes = frozenset(c.lower() for c in LINUX_TEXT_INPUT_CLASSES)
+        self._title_re = self._compile(TEXT_TITLE_INDICATORS)
+
+        # Ostatnio sklasyfikowane okno: (info, decyzja, czas)
+        self._cached: Optional[tuple] = None
+        self._lock = threading.Lock()
+
+    def classify(self, class_name: str, title: str) -> bool:
+        """
+        Sprawdza, czy klasa lub tytuł okna sugerują pole tekstowe
+
+        Args:
+            class_name: Klasa okna
+            title: Tytuł okna
+
+        Returns:
+            bool: True jeśli okno prawdopodobnie przyjmuje tekst
+        """
+        return bool(not self._linux_classes.isdisjoint(class_name.lower().split())
+                    or self._class_re.search(class_name)
+                    or self._title_re.search(title))
+
+    def get_active_window(self) -> Optional[tuple]:
+        """
+        Zwraca aktywne okno wraz z decyzją klasyfikatora (z cache, jeśli fokus się nie zmienił)
+
+        Returns:
+            Optional[tuple]: Para (WindowInfo, is_text_input) lub None
+        """
+        if self.provider is None:
+            return None
+
+        handle = self.provider.get_foreground_handle()
+        if not handle:
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cached
+            if cached and cached[0].handle == handle and now - cached[2] < self.cache_ttl:
+                return cached[0], cached[1]
+
+        # Fokus zmienił się na inne okno (lub minął TTL) - klasyfikuj od nowa
+        info = self.provider.describe(handle)
+        if info is None:
+            return None
+
+        decision = self.classify(info.class_name, info.title)
+        with self._lock:
+            self._cached = (info, decision, now)
+        return info, decision
+
+    def invalidate(self):
+        """Unieważnia zapamiętaną decyzję"""
+        with self._lock:
+            self._cached = None
+
+    @staticmethod
+    def _compile(patterns) -> re.Pattern:
+        """Kompiluje listę fragmentów do jednego wyrażenia (bez rozróżniania wielkości liter)"""
+        # Dłuższe fragmenty najpierw, żeby alternatywa nie kończyła się na krótszym prefiksie
+        ordered = sorted(set(patterns), key=len, reverse=True)
+        return re.compile("|".join(re.escape(p) for p in ordered), re.IGNORECASE)
+
+
+# --- Pomiar kosztu klasyfikacji ---
+
+def _classify_with_lists(class_name: str, title: str) -> bool:
+    """Poprzednia klasyfikacja: małe litery i przeszukiwanie list fragmentów przy każdym wywołaniu"""
+    class_lower = class_name.lower()
+    title_lower = title.lower()
+    return (any(c.lower() in class_lower for c in TEXT_INPUT_CLASSES + LINUX_TEXT_INPUT_CLASSES)
+            or any(t in title_lower for t in TEXT_TITLE_INDICATORS))
+
+
+def run_benchmark(calls: int = 100000, provider_name: Optional[str] = None):
+    """
+    Mierzy koszt jednego sprawdzenia aktywnego okna
+
+    Porównuje klasyfikację listami (dawną), wyrażeniem regularnym, a także
+    get_active_window() z trafieniem w cache i przy zmianie fokusu przed
+    każdym wywołaniem. Z provider_name mierzy też prawdziwego dostawcę.
+
+    Args:
+        calls: Liczba wywołań w każdym wariancie
+        provider_name: Dostawca do pomiaru ('linux', 'win32'; None - tylko atrapa)
+    """
+    windows = [
+        ('Chrome_WidgetWin_1', 'Dokumentacja - Google Chrome'),
+        ('XLMAIN', 'Arkusz1 - Excel'),
+        ('gnome-terminal-server Gnome-terminal', 'user@host: ~'),
+        ('Shell_TrayWnd', ''),
+    ]
+
+    def measure(label: str, fn):
+        started = time.perf_counter()
+        for index in range(calls):
+            fn(index)
+        per_call = (time.perf_counter() - started) / calls
+        print(f"📊 {label:>28}: {per_call * 1e6:8.2f} µs/wywołanie")
+
+    fake = FakeWindowProvider(*windows[0])
+    classifier = WindowClassifier(provider=fake, cache_ttl=3600.0)
+    measure("listy (dawniej)", lambda i: _classify_with_lists(*windows[i % len(windows)]))
+    measure("wyrażenie regularne", lambda i: classifier.classify(*windows[i % len(windows)]))
+    measure("cache (to samo okno)", lambda i: classifier.get_active_window())
+
+    def switch_focus(index):
+        fake.set_foreground(*windows[index % len(windows)])
+        classifier.get_active_window()
+
+    measure("zmiana fokusu", switch_focus)
+
+    if provider_name:
+        provider = create_window_provider(provider_name)
+        if provider is None:
+            return
+        real = WindowClassifier(provider=provider)
+        real.get_active_window()
+        # Prawdziwy dostawca jest wolniejszy - mniej wywołań wystarczy
+        calls = max(1, calls // 100)
+        measure(f"{provider_name}, cache", lambda i: real.get_active_window())
+        measure(f"{provider_name}, bez cache", lambda i: (real.invalidate(), real.get_active_window()))
+        close = getattr(provider, 'close', None)
+        if close:
+            close()
+
+
+def main(argv=None):
+    """Wiersz poleceń pomiaru klasyfikacji aktywnego okna"""
+    parser = argparse.ArgumentParser(description="Wykrywanie i klasyfikacja aktywnego okna")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    bench_parser = subparsers.add_parser('bench', help="Koszt jednego sprawdzenia aktywnego okna")
+    bench_parser.add_argument('-n', '--calls', type=int, default=100000, help="Liczba wywołań na wariant")
+    bench_parser.add_argument('--provider', help="Zmierz też prawdziwego dostawcę (linux, win32)")
+    args = parser.parse_args(argv)
+    load_environment()
+    run_benchmark(args.calls, args.provider)
+
+
+if __name__ == "__main__":
+    main()